@@ -2,9 +2,17 @@
 Anomaly Prediction Model
 
 This module provides functions for predicting anomalies in Kubernetes pods.
-It can operate in two modes:
-1. TensorFlow-based prediction (when TensorFlow is available)
-2. Rule-based fallback prediction (when TensorFlow is not available)
+It can operate in three modes:
+1. NumPy runtime prediction (when an exported .npz model is available)
+2. TensorFlow-based prediction (when only the Keras .h5 model is available)
+3. Rule-based fallback prediction (when no model can be loaded)
+
+TensorFlow is only imported when no exported NumPy model exists, so agents
+that score pods with the exported model only need NumPy. The model is loaded
+lazily through the model registry on the first prediction, not on import.
+
+When INFERENCE_SERVER_URL is set, batch predictions are sent to the shared
+inference server (inference_server.py) so the model is loaded only once per host.
 """
 
 import os
@@ -13,38 +21,68 @@ import logging
 import pandas as pd
 import numpy as np
 
+try:
+    from .lstm_runtime import NumpyLSTMModel
+    from .model_registry import registry
+    from .rule_engine import rule_predictions
+except ImportError:
+    from lstm_runtime import NumpyLSTMModel
+    from model_registry import registry
+    from rule_engine import rule_predictions
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("anomaly-prediction")
 
-# Try to import TensorFlow, but provide a robust fallback if it fails
-try:
-    import tensorflow as tf
-    from tensorflow.keras.models import load_model
-    HAS_TENSORFLOW = True
-    logger.info("TensorFlow successfully imported")
-except ImportError as e:
-    HAS_TENSORFLOW = False
-    logger.warning(f"TensorFlow import failed: {e}")
-    logger.info("Using rule-based fallback prediction instead")
-
-# Path to the saved model
+# Path to the saved Keras model
 MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
                          "model_artifacts", "anomaly_model.h5")
 
-# Load the model if TensorFlow is available
-model = None
-if HAS_TENSORFLOW and os.path.exists(MODEL_PATH):
-    try:
-        model = load_model(MODEL_PATH)
-        logger.info(f"Loaded model from {MODEL_PATH}")
-    except Exception as e:
-        logger.error(f"Failed to load model: {e}")
-        model = None
+# Path to the same model exported for the NumPy runtime (see lstm_runtime.py)
+RUNTIME_MODEL_PATH = os.path.splitext(MODEL_PATH)[0] + ".npz"
+
+def _load_model():
+    """Load the exported NumPy model, falling back to Keras if only the .h5 exists"""
+    if os.path.exists(RUNTIME_MODEL_PATH):
+        try:
+            return NumpyLSTMModel.load(RUNTIME_MODEL_PATH)
+        except Exception as e:
+            logger.error(f"Failed to load NumPy runtime model: {e}")
+    
+    if os.path.exists(MODEL_PATH):
+        try:
+            from tensorflow.keras.models import load_model
+            keras_model = load_model(MODEL_PATH)
+            logger.info(f"Loaded model from {MODEL_PATH}")
+            logger.info("Export it with lstm_runtime.py to avoid importing TensorFlow")
+            return keras_model
+        except ImportError as e:
+            logger.warning(f"TensorFlow import failed: {e}")
+        except Exception as e:
+            logger.error(f"Failed to load model: {e}")
+    
+    logger.info("Using rule-based fallback prediction instead")
+    return None
+
+def _model_revision():
+    """Revision of the model file _load_model would load (its modification time)"""
+    for path in (RUNTIME_MODEL_PATH, MODEL_PATH):
+        if os.path.exists(path):
+            return f"{os.path.basename(path)}@{os.path.getmtime(path)}"
+    return None
+
+# Registry name of the per-sample anomaly model; a rewritten model file is
+# swapped in by registry.refresh() like a newly published sequence model
+MODEL_NAME = "anomaly"
+registry.register(MODEL_NAME, _load_model, revision_fn=_model_revision)
+
+def get_model():
+    """Return the anomaly model, loading it on first use (None if unavailable)"""
+    return registry.get(MODEL_NAME)
 
 def rule_based_prediction(pod_metrics):
     """
-    Fallback prediction function using simple rules when TensorFlow is unavailable
+    Fallback prediction function using simple rules when no model is available
     
     Args:
         pod_metrics: Dictionary containing pod metrics
@@ -52,99 +90,207 @@ def rule_based_prediction(pod_metrics):
     Returns:
         Dictionary with prediction results
     """
-    # Extract relevant metrics with safe defaults
-    cpu_usage = pod_metrics.get('CPU Usage (%)', 0)
-    memory_usage = pod_metrics.get('Memory Usage (%)', 0)
-    pod_restarts = pod_metrics.get('Pod Restarts', 0)
-    ready_containers = pod_metrics.get('Ready Containers', 0)
-    total_containers = pod_metrics.get('Total Containers', 1)
-    
-    # Default result
-    result = {
-        'predicted_anomaly': 0,
-        'anomaly_probability': 0.1,
-        'anomaly_type': 'unknown'
-    }
+    return rule_predictions([pod_metrics])[0]
+
+# Features fed to the sequence model, in input order
+MODEL_FEATURES = [
+    'CPU Usage (%)',
+    'Memory Usage (%)',
+    'Pod Restarts',
+    'Memory Usage (MB)',
+    'Network Receive Bytes',
+    'Network Transmit Bytes',
+    'Network Receive Packets Dropped (p/s)',
+    'Network Transmit Packets Dropped (p/s)',
+    'Ready Containers'
+]
+
+def _safe_float(value):
+    """Convert a metric value to float, mapping missing/invalid values to 0"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if np.isnan(value) else value
+
+def _latest_metrics(history):
+    """Return the most recent metrics record from a pod history"""
+    if isinstance(history, pd.DataFrame):
+        return history.iloc[-1].to_dict() if not history.empty else {}
+    if isinstance(history, dict):
+        return history
+    return history[-1] if history else {}
+
+def _window_values(history, seq_length):
+    """Return the last seq_length samples of a pod history as a 2D array"""
+    if isinstance(history, pd.DataFrame):
+        frame = history.tail(seq_length).reindex(columns=MODEL_FEATURES)
+        return frame.apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float32)
+    if isinstance(history, dict):
+        history = [history]
+    rows = history[-seq_length:]
+    return np.array(
+        [[_safe_float(row.get(feature, 0)) for feature in MODEL_FEATURES] for row in rows],
+        dtype=np.float32
+    ).reshape(len(rows), len(MODEL_FEATURES))
+
+def _model_sequence_length(model):
+    """Return the number of timesteps the loaded model expects per sample"""
+    try:
+        seq_length = model.input_shape[1]
+        if seq_length:
+            return int(seq_length)
+    except Exception:
+        pass
+    return 1
+
+def build_feature_windows(pod_histories, seq_length):
+    """
+    Stack the feature windows of many pods into a single model input array
     
-    # Simple rule-based detection
-    if pod_restarts > 5:
-        result['predicted_anomaly'] = 1
-        result['anomaly_probability'] = min(0.5 + (pod_restarts * 0.05), 0.95)
-        result['anomaly_type'] = 'crash_loop'
-    elif cpu_usage > 90:
-        result['predicted_anomaly'] = 1
-        result['anomaly_probability'] = min(cpu_usage / 100, 0.95)
-        result['anomaly_type'] = 'resource_exhaustion'
-    elif memory_usage > 90:
-        result['predicted_anomaly'] = 1
-        result['anomaly_probability'] = min(memory_usage / 100, 0.95)
-        result['anomaly_type'] = 'oom_risk'
-    elif ready_containers < total_containers:
-        result['predicted_anomaly'] = 1
-        result['anomaly_probability'] = 0.8
-        result['anomaly_type'] = 'pod_failure'
+    Pods with fewer than seq_length samples are left-padded by repeating
+    their oldest sample, so every pod contributes exactly one window.
     
-    return result
+    Args:
+        pod_histories: Dictionary mapping pod names to metric histories
+                       (list of metric dicts, a single dict, or a DataFrame)
+        seq_length: Number of timesteps per window
+        
+    Returns:
+        Tuple of (pod_names, array of shape (pods, seq_length, features))
+    """
+    pod_names = list(pod_histories.keys())
+    X = np.zeros((len(pod_names), seq_length, len(MODEL_FEATURES)), dtype=np.float32)
+    
+    for i, pod_name in enumerate(pod_names):
+        values = _window_values(pod_histories[pod_name], seq_length)
+        if len(values) == 0:
+            continue
+        pad = seq_length - len(values)
+        X[i, pad:] = values
+        X[i, :pad] = values[0]
+    
+    return pod_names, X
 
-def predict_anomalies(pod_metrics):
+def classify_anomaly(pod_metrics):
+    """Map a positive model prediction to an anomaly type using the pod metrics"""
+    if _safe_float(pod_metrics.get('Pod Restarts', 0)) > 5:
+        return 'crash_loop'
+    elif _safe_float(pod_metrics.get('CPU Usage (%)', 0)) > 80:
+        return 'resource_exhaustion'
+    elif _safe_float(pod_metrics.get('Memory Usage (%)', 0)) > 80:
+        return 'oom_risk'
+    return 'pod_failure'
+
+def _forward(model, X):
+    """Run a single forward pass over a stacked batch of windows"""
+    if hasattr(model, 'predict_on_batch'):
+        # Avoids the per-call dataset/callback setup of model.predict
+        return np.asarray(model.predict_on_batch(X))
+    return np.asarray(model.predict(X, verbose=0))
+
+def _rule_based_batch(latest):
+    """Apply the fallback rules to every pod in one vectorized pass"""
+    pod_names = list(latest.keys())
+    return dict(zip(pod_names, rule_predictions([latest[name] for name in pod_names])))
+
+def predict_anomalies_local(pod_histories):
     """
-    Predict anomalies in a Kubernetes pod based on its metrics
+    Predict anomalies for many pods with a single forward pass of the
+    model loaded in this process
     
     Args:
-        pod_metrics: Dictionary containing pod metrics
+        pod_histories: Dictionary mapping pod names to metric histories
+                       (list of metric dicts, a single dict, or a DataFrame)
         
     Returns:
-        Dictionary with prediction results
+        Dictionary mapping pod names to prediction result dictionaries
     """
-    if not HAS_TENSORFLOW or model is None:
+    if not pod_histories:
+        return {}
+    
+    latest = {pod_name: _latest_metrics(history) for pod_name, history in pod_histories.items()}
+    
+    model = get_model()
+    if model is None:
         # Use rule-based prediction as fallback
-        return rule_based_prediction(pod_metrics)
+        return _rule_based_batch(latest)
     
     try:
-        # Convert metrics to model input format
-        # This would need to match your model's expected input format
-        input_features = [
-            pod_metrics.get('CPU Usage (%)', 0),
-            pod_metrics.get('Memory Usage (%)', 0),
-            pod_metrics.get('Pod Restarts', 0),
-            pod_metrics.get('Memory Usage (MB)', 0),
-            pod_metrics.get('Network Receive Bytes', 0),
-            pod_metrics.get('Network Transmit Bytes', 0),
-            pod_metrics.get('Network Receive Packets Dropped (p/s)', 0),
-            pod_metrics.get('Network Transmit Packets Dropped (p/s)', 0),
-            pod_metrics.get('Ready Containers', 0)
-        ]
-        
-        # Reshape for model input (assuming time series model)
-        X = np.array([input_features]).reshape(1, 1, len(input_features))
-        
-        # Make prediction
-        prediction = model.predict(X)[0]
-        
-        # Process prediction output
-        is_anomaly = prediction[0] > 0.5
-        anomaly_type = 'unknown'
-        
-        # Map prediction to anomaly type (adjust based on your model output)
-        if is_anomaly:
-            if pod_metrics.get('Pod Restarts', 0) > 5:
-                anomaly_type = 'crash_loop'
-            elif pod_metrics.get('CPU Usage (%)', 0) > 80:
-                anomaly_type = 'resource_exhaustion'
-            elif pod_metrics.get('Memory Usage (%)', 0) > 80:
-                anomaly_type = 'oom_risk'
-            else:
-                anomaly_type = 'pod_failure'
-        
-        return {
-            'predicted_anomaly': 1 if is_anomaly else 0,
-            'anomaly_probability': float(prediction[0]),
-            'anomaly_type': anomaly_type
-        }
+        pod_names, X = build_feature_windows(pod_histories, _model_sequence_length(model))
+        scores = _forward(model, X).reshape(len(pod_names), -1)[:, 0]
     except Exception as e:
-        logger.error(f"Error in TensorFlow prediction: {e}")
+        logger.error(f"Error in batched model prediction: {e}")
         # Fallback to rule-based prediction on error
-        return rule_based_prediction(pod_metrics)
+        return _rule_based_batch(latest)
+    
+    results = {}
+    for pod_name, score in zip(pod_names, scores):
+        is_anomaly = score > 0.5
+        results[pod_name] = {
+            'predicted_anomaly': 1 if is_anomaly else 0,
+            'anomaly_probability': float(score),
+            'anomaly_type': classify_anomaly(latest[pod_name]) if is_anomaly else 'unknown'
+        }
+    return results
+
+# Base URL of the shared inference server (see inference_server.py). When set,
+# predictions are delegated to the server instead of loading the model here.
+INFERENCE_SERVER_URL_ENV = "INFERENCE_SERVER_URL"
+_inference_client = None
+
+def _get_inference_client():
+    """Return the client for the shared inference server, or None if not configured"""
+    global _inference_client
+    url = os.environ.get(INFERENCE_SERVER_URL_ENV)
+    if not url:
+        return None
+    if _inference_client is None or _inference_client.url != url.rstrip('/'):
+        try:
+            from .inference_server import InferenceClient
+        except ImportError:
+            from inference_server import InferenceClient
+        _inference_client = InferenceClient(url)
+    return _inference_client
+
+def predict_anomalies_batch(pod_histories):
+    """
+    Predict anomalies for many pods with a single model forward pass
+    
+    Uses the shared inference server when INFERENCE_SERVER_URL is set, and
+    the model loaded in this process otherwise (or if the server fails).
+    
+    Args:
+        pod_histories: Dictionary mapping pod names to metric histories
+                       (list of metric dicts, a single dict, or a DataFrame)
+        
+    Returns:
+        Dictionary mapping pod names to prediction result dictionaries
+    """
+    if not pod_histories:
+        return {}
+    
+    client = _get_inference_client()
+    if client is not None:
+        try:
+            return client.predict_batch(pod_histories)
+        except Exception as e:
+            logger.warning(f"Inference server at {client.url} failed ({e}), predicting locally")
+    
+    return predict_anomalies_local(pod_histories)
+
+def predict_anomalies(pod_metrics):
+    """
+    Predict anomalies in a Kubernetes pod based on its metrics
+    
+    Args:
+        pod_metrics: Dictionary containing pod metrics, or a metric history
+                     (list of dicts or DataFrame) for a single pod
+        
+    Returns:
+        Dictionary with prediction results
+    """
+    return predict_anomalies_batch({'pod': pod_metrics})['pod']
 
 # Test function to verify the module works
 def test_prediction():
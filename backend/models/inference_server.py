@@ -0,0 +1,630 @@
+"""
+Shared Inference Server
+
+This module runs a local inference service that owns the single copy of the
+anomaly model for every agent on the host. Clients (the dataset agent, the
+anomaly agent, the dashboard and the multi-agent orchestrator) send their
+pods to the server over loopback HTTP instead of loading the model themselves.
+
+Requests arriving concurrently are merged into micro-batches: the batcher
+waits until either `max_batch_size` pods are queued or `max_wait_ms` has
+passed since the first queued request, then scores the whole batch with one
+forward pass and hands each client its own results.
+
+Clients opt in by setting INFERENCE_SERVER_URL (see anomaly_prediction.py).
+
+The server also hosts the trained LSTM sequence model (streaming_inference.py).
+Clients keep their per-pod sliding windows, scale them with the served
+model's scaler and send only the stacked windows for the forward pass, which
+is micro-batched the same way. register_remote_sequence_model() puts such a
+remote bundle in the client's model registry, so a StreamingInferenceEngine
+built from it works unchanged and follows the server's model version.
+
+Endpoints:
+- POST /predict         {"pods": {pod_name: history}} -> {"predictions": {pod_name: result}}
+- GET  /sequence_model  -> version, sequence length, threshold and scaler of the sequence model
+- POST /forward         {"version": v, "windows": {key: window}} -> {"scores": {key: score}}
+- GET  /health          -> {"status": "ok", "model_loaded": bool, "sequence_model_version": v}
+- GET  /stats           -> batching and model registry statistics
+"""
+
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+
+try:
+    from .anomaly_prediction import predict_anomalies_local, MODEL_NAME
+    from .lstm_runtime import ScalerParams
+    from .model_registry import registry
+    from .streaming_inference import SEQUENCE_MODEL_NAME, SequenceModelArtifacts, TRAINING_FEATURES
+except ImportError:
+    from anomaly_prediction import predict_anomalies_local, MODEL_NAME
+    from lstm_runtime import ScalerParams
+    from model_registry import registry
+    from streaming_inference import SEQUENCE_MODEL_NAME, SequenceModelArtifacts, TRAINING_FEATURES
+
+logger = logging.getLogger("inference-server")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Registry name, in client processes, of the sequence model served remotely
+REMOTE_SEQUENCE_MODEL_NAME = "lstm-remote"
+
+
+class SequenceModelChanged(RuntimeError):
+    """The server swapped its sequence model since the client fetched its scaler"""
+
+    def __init__(self, message, version=None):
+        super().__init__(message)
+        self.version = version  # Version the server runs now (None if unavailable)
+
+
+def _json_default(value):
+    """Convert NumPy/pandas values that json cannot encode natively"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_history(history):
+    """Turn a pod history (dict, list of dicts or DataFrame) into JSON-friendly data"""
+    if isinstance(history, pd.DataFrame):
+        return history.to_dict('records')
+    return history
+
+
+def sequence_model_info(name=SEQUENCE_MODEL_NAME):
+    """
+    Describe the served sequence model so clients can fill and scale windows.
+
+    Returns:
+        Dictionary with version, seq_length, threshold, features and the
+        MinMax scale/min arrays, or None if the model is unavailable or its
+        scaler cannot be applied by clients
+    """
+    bundle = registry.get(name)
+    if bundle is None:
+        return None
+    scale = getattr(bundle.scaler, 'scale_', None)
+    minimum = getattr(bundle.scaler, 'min_', None)
+    if scale is None or minimum is None:
+        logger.warning(f"Sequence model {name} has no MinMax-style scaler, not serving it to clients")
+        return None
+    return {
+        'version': bundle.version,
+        'seq_length': int(bundle.seq_length),
+        'threshold': float(bundle.threshold),
+        'features': TRAINING_FEATURES,
+        'scale': np.asarray(scale, dtype=np.float32).tolist(),
+        'min': np.asarray(minimum, dtype=np.float32).tolist(),
+    }
+
+
+def forward_windows_local(windows, name=SEQUENCE_MODEL_NAME):
+    """
+    Score scaled windows with the sequence model in one forward pass.
+
+    Args:
+        windows: Dictionary mapping keys to windows of shape (seq_length, features)
+        name: Registry name of the sequence model
+
+    Returns:
+        Dictionary mapping keys to anomaly scores
+    """
+    bundle = registry.get(name)
+    if bundle is None:
+        raise RuntimeError(f"Sequence model {name} is not available")
+    return _forward_bundle(bundle, windows)
+
+
+def forward_versioned_windows(items, name=SEQUENCE_MODEL_NAME):
+    """
+    Score windows scaled for a given model version, in one forward pass.
+
+    The version is checked against the bundle that runs the pass, so a model
+    swapped while the windows were queued never scores them.
+
+    Args:
+        items: Dictionary mapping keys to {'version': ..., 'window': ...}
+        name: Registry name of the sequence model
+
+    Returns:
+        Dictionary mapping keys to anomaly scores, or to a
+        SequenceModelChanged error for windows of another version
+    """
+    bundle = registry.get(name)
+    version = getattr(bundle, 'version', None)
+    changed = SequenceModelChanged(f"Sequence model {name} is now version {version}", version)
+    current = {key: item['window'] for key, item in items.items()
+               if bundle is not None and item.get('version') == version}
+    scores = _forward_bundle(bundle, current) if current else {}
+    return {key: scores.get(key, changed) for key in items}
+
+
+def _forward_bundle(bundle, windows):
+    keys = list(windows.keys())
+    X = np.asarray([windows[key] for key in keys], dtype=np.float32)
+    if hasattr(bundle.model, 'predict_on_batch'):
+        scores = np.asarray(bundle.model.predict_on_batch(X))
+    else:
+        scores = np.asarray(bundle.model.predict(X, verbose=0))
+    return dict(zip(keys, scores.reshape(len(keys), -1)[:, 0].astype(float).tolist()))
+
+
+class _PendingRequest:
+    """One client request waiting for its share of a micro-batch"""
+
+    __slots__ = ('pod_histories', 'done', 'result', 'error')
+
+    def __init__(self, pod_histories):
+        self.pod_histories = pod_histories
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent prediction requests into bounded micro-batches"""
+
+    def __init__(self, predict_fn=predict_anomalies_local, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        """
+        Args:
+            predict_fn: Function mapping {key: history} to {key: prediction};
+                        an exception as a prediction fails the request of that key
+            max_batch_size: Maximum number of pods scored in one batch
+            max_wait_ms: Maximum time the first request of a batch waits for more
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'batches': 0, 'pods': 0, 'max_batch_pods': 0, 'errors': 0}
+
+    def start(self):
+        """Start the batching thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the batching thread after the current batch"""
+        self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def submit(self, pod_histories, timeout=None):
+        """
+        Queue pods for scoring and block until their batch has been scored.
+
+        Args:
+            pod_histories: Dictionary mapping pod names to metric histories
+            timeout: Maximum seconds to wait for the result
+
+        Returns:
+            Dictionary mapping pod names to prediction result dictionaries
+        """
+        if not pod_histories:
+            return {}
+        request = _PendingRequest(pod_histories)
+        self._queue.put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for inference batch")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self, first):
+        """Gather requests until the batch is full or the wait budget is spent"""
+        batch = [first]
+        pods = len(first.pod_histories)
+        deadline = time.monotonic() + self.max_wait
+        while pods < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._running = False
+                break
+            batch.append(request)
+            pods += len(request.pod_histories)
+        return batch, pods
+
+    def _run(self):
+        while self._running:
+            first = self._queue.get()
+            if first is None:
+                continue
+            batch, pods = self._collect(first)
+
+            # Keys are (request index, pod name) so pods with the same name
+            # from different clients do not collide
+            merged = {}
+            for index, request in enumerate(batch):
+                for pod_name, history in request.pod_histories.items():
+                    merged[(index, pod_name)] = history
+
+            try:
+                predictions = self.predict_fn(merged)
+                for index, request in enumerate(batch):
+                    request.result = {pod_name: predictions[(index, pod_name)] for pod_name in request.pod_histories}
+                    request.error = next((value for value in request.result.values()
+                                          if isinstance(value, Exception)), None)
+            except Exception as e:
+                logger.error(f"Error scoring batch of {pods} pods: {e}")
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
+
+            with self._stats_lock:
+                self._stats['requests'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['pods'] += pods
+                self._stats['max_batch_pods'] = max(self._stats['max_batch_pods'], pods)
+                if batch[0].error is not None:
+                    self._stats['errors'] += 1
+
+    def stats(self):
+        """Return batching statistics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['mean_batch_pods'] = stats['pods'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+
+class _InferenceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end for the micro-batcher"""
+
+    server_version = "K8sInferenceServer/1.0"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=_json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            sequence_model = self.server.sequence_model_name
+            bundle = registry.get(sequence_model) if registry.is_loaded(sequence_model) else None
+            self._send_json(200, {'status': 'ok', 'model_loaded': registry.is_loaded(MODEL_NAME),
+                                  'sequence_model_loaded': bundle is not None,
+                                  'sequence_model_version': getattr(bundle, 'version', None)})
+        elif self.path == '/sequence_model':
+            info = sequence_model_info(self.server.sequence_model_name)
+            if info is None:
+                self._send_json(404, {'error': "Sequence model is not available"})
+            else:
+                self._send_json(200, info)
+        elif self.path == '/stats':
+            self._send_json(200, {'batching': self.server.batcher.stats(),
+                                  'sequence_batching': self.server.sequence_batcher.stats(),
+                                  'models': registry.stats()})
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ('/predict', '/forward'):
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        field = 'pods' if self.path == '/predict' else 'windows'
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            items = payload.get(field, {})
+            if not isinstance(items, dict):
+                raise ValueError(f"'{field}' must be a dictionary")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {'error': f"Invalid request: {e}"})
+            return
+
+        if self.path == '/forward':
+            # Windows scaled for another model version must not be scored: the
+            # batcher checks the version against the model it runs
+            items = {key: {'version': payload.get('version'), 'window': window} for key, window in items.items()}
+            batcher = self.server.sequence_batcher
+        else:
+            batcher = self.server.batcher
+
+        try:
+            results = batcher.submit(items, timeout=self.server.request_timeout)
+        except SequenceModelChanged as e:
+            self._send_json(409, {'error': "Sequence model version changed", 'version': e.version})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, {'predictions' if self.path == '/predict' else 'scores': results})
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s" % (self.address_string(), format % args))
+
+
+class InferenceServer:
+    """Loopback HTTP server owning one instance of each model and their micro-batchers"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, predict_fn=predict_anomalies_local, request_timeout=30.0,
+                 model_refresh_interval=None, sequence_model_name=SEQUENCE_MODEL_NAME):
+        """
+        Args:
+            host: Interface to bind (loopback by default)
+            port: Port to bind (0 picks a free port)
+            max_batch_size: Maximum number of pods scored in one batch
+            max_wait_ms: Maximum time a request waits for others to join its batch
+            predict_fn: Batch prediction function (defaults to the local anomaly model)
+            request_timeout: Seconds a request may wait for its batch
+            model_refresh_interval: Seconds between checks for newly published
+                                    model versions (None disables hot swapping)
+            sequence_model_name: Registry name of the sequence model whose
+                                 forward passes are served on /forward
+        """
+        self.sequence_model_name = sequence_model_name
+        self.batcher = MicroBatcher(predict_fn, max_batch_size, max_wait_ms)
+        self.sequence_batcher = MicroBatcher(lambda items: forward_versioned_windows(items, sequence_model_name),
+                                             max_batch_size, max_wait_ms)
+        self.httpd = ThreadingHTTPServer((host, port), _InferenceRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.batcher = self.batcher
+        self.httpd.sequence_batcher = self.sequence_batcher
+        self.httpd.sequence_model_name = sequence_model_name
+        self.httpd.request_timeout = request_timeout
+        self.model_refresh_interval = model_refresh_interval
+        self._thread = None
+
+    def warmup(self):
+        """Load both served models and run a dummy forward pass through each"""
+        registry.warmup(MODEL_NAME)
+        registry.warmup(self.sequence_model_name)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, warmup=False):
+        """
+        Start serving in a background thread.
+
+        Args:
+            warmup: Load the models and run a dummy forward pass before serving
+        """
+        if warmup:
+            self.warmup()
+        if self.model_refresh_interval:
+            registry.start_watcher(self.model_refresh_interval)
+        self.batcher.start()
+        self.sequence_batcher.start()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="inference-http", daemon=True)
+        self._thread.start()
+        logger.info(f"Inference server listening on {self.url}")
+        return self
+
+    def serve_forever(self, warmup=False):
+        """Serve in the current thread until shutdown() is called"""
+        if warmup:
+            self.warmup()
+        if self.model_refresh_interval:
+            registry.start_watcher(self.model_refresh_interval)
+        self.batcher.start()
+        self.sequence_batcher.start()
+        logger.info(f"Inference server listening on {self.url}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.batcher.stop()
+            self.sequence_batcher.stop()
+
+    def shutdown(self):
+        """Stop serving and release the socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.stop()
+        self.sequence_batcher.stop()
+
+
+class InferenceClient:
+    """Client for the shared inference server"""
+
+    def __init__(self, url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout=30.0):
+        """
+        Args:
+            url: Base URL of the inference server
+            timeout: Request timeout in seconds
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload, default=_json_default).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(self.url + path, data=data, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def predict_batch(self, pod_histories):
+        """
+        Score pods on the server.
+
+        Args:
+            pod_histories: Dictionary mapping pod names to metric histories
+
+        Returns:
+            Dictionary mapping pod names to prediction result dictionaries
+        """
+        if not pod_histories:
+            return {}
+        pods = {str(pod_name): _encode_history(history) for pod_name, history in pod_histories.items()}
+        predictions = self._request('/predict', {'pods': pods})['predictions']
+        return {pod_name: predictions[str(pod_name)] for pod_name in pod_histories}
+
+    def sequence_model(self):
+        """
+        Describe the sequence model served by the server.
+
+        Returns:
+            The /sequence_model payload, or None if the server does not serve one
+        """
+        try:
+            return self._request('/sequence_model')
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def forward_windows(self, X, version):
+        """
+        Score stacked, scaled windows with the server's sequence model.
+
+        Args:
+            X: Array of shape (windows, seq_length, features)
+            version: Sequence model version the windows were scaled for
+
+        Returns:
+            Array of scores, one per window
+        """
+        windows = {str(index): window for index, window in enumerate(np.asarray(X, dtype=np.float32).tolist())}
+        try:
+            scores = self._request('/forward', {'version': version, 'windows': windows})['scores']
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                raise SequenceModelChanged(f"Server sequence model is no longer version {version}")
+            raise
+        return np.array([scores[str(index)] for index in range(len(windows))], dtype=np.float32)
+
+    def health(self):
+        """Return the server health payload"""
+        return self._request('/health')
+
+    def stats(self):
+        """Return the server batching and model statistics"""
+        return self._request('/stats')
+
+
+class RemoteSequenceModel:
+    """Sequence model whose forward passes run on the inference server"""
+
+    supports_step = False
+
+    def __init__(self, client, version, seq_length, n_features):
+        self.client = client
+        self.version = version
+        self.input_shape = (None, seq_length, n_features)
+
+    def predict_on_batch(self, X):
+        try:
+            return self.client.forward_windows(X, self.version).reshape(-1, 1)
+        except SequenceModelChanged:
+            # Fetch the new scaler and model so the engine switches on its next score
+            registry.refresh(REMOTE_SEQUENCE_MODEL_NAME)
+            raise
+
+
+def load_remote_sequence_artifacts(client):
+    """
+    Bundle of the server's sequence model for a StreamingInferenceEngine.
+
+    Returns:
+        SequenceModelArtifacts whose model forwards to the server, or None if
+        the server does not serve a sequence model
+    """
+    try:
+        info = client.sequence_model()
+    except Exception as e:
+        logger.warning(f"Could not fetch the sequence model from {client.url}: {e}")
+        return None
+    if info is None:
+        return None
+    model = RemoteSequenceModel(client, info['version'], info['seq_length'], len(info['features']))
+    return SequenceModelArtifacts(model, ScalerParams(info['scale'], info['min']), info['threshold'],
+                                  info['seq_length'], info['version'])
+
+
+def register_remote_sequence_model(url, timeout=30.0):
+    """
+    Register the sequence model served at `url` in this process's model registry.
+
+    The entry follows the server's model version, so engines built from it
+    (StreamingInferenceEngine.from_registry(REMOTE_SEQUENCE_MODEL_NAME))
+    switch scalers when the server swaps models.
+
+    Returns:
+        The registry name of the remote model
+    """
+    client = InferenceClient(url, timeout)
+
+    def revision():
+        info = client.sequence_model()
+        return info['version'] if info is not None else None
+
+    registry.register(REMOTE_SEQUENCE_MODEL_NAME, lambda: load_remote_sequence_artifacts(client),
+                      revision_fn=revision)
+    return REMOTE_SEQUENCE_MODEL_NAME
+
+
+def main():
+    """Run the inference server from the command line"""
+    parser = argparse.ArgumentParser(description='Shared anomaly model inference server')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST,
+                        help=f'Interface to bind (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to bind (default: {DEFAULT_PORT})')
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f'Maximum pods per batch (default: {DEFAULT_MAX_BATCH_SIZE})')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help=f'Maximum batching delay in milliseconds (default: {DEFAULT_MAX_WAIT_MS})')
+    parser.add_argument('--warmup', action='store_true',
+                        help='Load and warm up the model before serving')
+    parser.add_argument('--model-refresh-interval', type=float, default=60.0,
+                        help='Seconds between checks for newly published model versions (0 disables, default: 60)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = InferenceServer(args.host, args.port, args.max_batch_size, args.max_wait_ms,
+                             model_refresh_interval=args.model_refresh_interval or None)
+    try:
+        server.serve_forever(warmup=args.warmup)
+    except KeyboardInterrupt:
+        logger.info("Inference server interrupted")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+NumPy LSTM Runtime
+
+This module lets agents score pods with the trained Keras LSTM without
+importing TensorFlow. A trained model is exported once to a NumPy archive
+(.npz) holding the raw layer weights plus the scaler parameters and anomaly
+threshold; `NumpyLSTMModel` then runs the forward pass with NumPy only.
+
+TensorFlow is only needed by `export_keras_model`, i.e. at training time.
+
+Usage:
+    python lstm_runtime.py <model.h5> <output.npz> [--scaler scaler.pkl] [--threshold anomaly_threshold.pkl]
+"""
+
+import os
+import json
+import logging
+import argparse
+import numpy as np
+
+logger = logging.getLogger("lstm-runtime")
+
+# Layers that are no-ops at inference time
+_INFERENCE_NOOP_LAYERS = ('Dropout', 'InputLayer', 'GaussianNoise', 'SpatialDropout1D')
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'tanh': np.tanh,
+    'relu': _relu,
+    'linear': _linear,
+}
+
+
+class ScalerParams:
+    """Minimal MinMaxScaler stand-in built from exported scale_/min_ arrays"""
+
+    def __init__(self, scale, minimum):
+        self.scale_ = np.asarray(scale, dtype=np.float32)
+        self.min_ = np.asarray(minimum, dtype=np.float32)
+
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float32) * self.scale_ + self.min_
+
+
+class NumpyLSTMModel:
+    """Inference-only LSTM/Dense stack evaluated with NumPy"""
+
+    def __init__(self, layers, input_shape, scaler=None, threshold=None):
+        """
+        Initialize the runtime model.
+
+        Args:
+            layers: List of layer dicts with 'type', 'config' and weight arrays
+            input_shape: Keras-style input shape, e.g. (None, 10, 11)
+            scaler: Optional ScalerParams exported with the model
+            threshold: Optional anomaly threshold exported with the model
+        """
+        self.layers = layers
+        self.input_shape = tuple(input_shape)
+        self.scaler = scaler
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a model exported by `export_keras_model`.
+
+        Args:
+            path: Path to the .npz archive
+
+        Returns:
+            NumpyLSTMModel instance
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            config = json.loads(str(archive['config']))
+            layers = []
+            for i, layer_config in enumerate(config['layers']):
+                layer = {'type': layer_config['type'], 'config': layer_config}
+                for name in layer_config.get('weights', []):
+                    layer[name] = archive[f'layer{i}_{name}'].astype(np.float32)
+                layers.append(layer)
+
+            scaler = None
+            if 'scaler_scale' in archive.files:
+                scaler = ScalerParams(archive['scaler_scale'], archive['scaler_min'])
+            threshold = float(archive['threshold']) if 'threshold' in archive.files else None
+
+        input_shape = tuple(None if d is None else int(d) for d in config['input_shape'])
+        logger.info(f"Loaded NumPy LSTM runtime from {path} with {len(layers)} layers")
+        return cls(layers, input_shape, scaler=scaler, threshold=threshold)
+
+    @staticmethod
+    def _lstm(layer, X, initial_state=None, return_state=False):
+        """
+        Run an LSTM layer over a batch of sequences, shape (batch, seq, features)
+
+        Args:
+            layer: LSTM layer dict
+            X: Input sequences
+            initial_state: Optional (h, c) tuple to start from instead of zeros
+            return_state: Also return the final (h, c) tuple
+        """
+        config = layer['config']
+        units = config['units']
+        activation = ACTIVATIONS[config['activation']]
+        recurrent_activation = ACTIVATIONS[config['recurrent_activation']]
+        kernel, recurrent_kernel, bias = layer['kernel'], layer['recurrent_kernel'], layer['bias']
+
+        batch, seq_length, _ = X.shape
+        # Input projections for every timestep in one matmul
+        x_proj = X @ kernel + bias
+
+        if initial_state is None:
+            h = np.zeros((batch, units), dtype=np.float32)
+            c = np.zeros((batch, units), dtype=np.float32)
+        else:
+            h, c = initial_state
+        outputs = np.empty((batch, seq_length, units), dtype=np.float32) if config['return_sequences'] else None
+
+        for t in range(seq_length):
+            z = x_proj[:, t] + h @ recurrent_kernel
+            # Keras gate order: input, forget, cell, output
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+
+        result = outputs if outputs is not None else h
+        if return_state:
+            return result, (h, c)
+        return result
+
+    @staticmethod
+    def _dense(layer, X):
+        """Apply a Dense layer"""
+        return ACTIVATIONS[layer['config']['activation']](X @ layer['kernel'] + layer['bias'])
+
+    def predict_on_batch(self, X):
+        """
+        Run a forward pass over a batch of windows.
+
+        Args:
+            X: Array of shape (batch, seq_length, features)
+
+        Returns:
+            Array of model outputs, shape (batch, outputs)
+        """
+        out = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            if layer['type'] == 'LSTM':
+                out = self._lstm(layer, out)
+            elif layer['type'] == 'Dense':
+                out = self._dense(layer, out)
+        return out
+
+    def predict(self, X, verbose=0, batch_size=None):
+        """Keras-compatible alias for `predict_on_batch`"""
+        return self.predict_on_batch(X)
+
+    @property
+    def supports_step(self):
+        """
+        Whether the model can be advanced one timestep at a time.
+
+        This holds when the only sequence output is consumed by the last
+        LSTM layer, i.e. no Dense layer is applied per timestep.
+        """
+        lstm_indices = [i for i, layer in enumerate(self.layers) if layer['type'] == 'LSTM']
+        if not lstm_indices:
+            return False
+        return not self.layers[lstm_indices[-1]]['config']['return_sequences']
+
+    def predict_with_state(self, X):
+        """
+        Run a forward pass over full windows and keep the recurrent state.
+
+        Args:
+            X: Array of shape (batch, seq_length, features)
+
+        Returns:
+            Tuple of (outputs, state), where state is a list with one (h, c)
+            tuple per LSTM layer, each of shape (batch, units)
+        """
+        out = np.asarray(X, dtype=np.float32)
+        state = []
+        for layer in self.layers:
+            if layer['type'] == 'LSTM':
+                out, layer_state = self._lstm(layer, out, return_state=True)
+                state.append(layer_state)
+            elif layer['type'] == 'Dense':
+                out = self._dense(layer, out)
+        return out, state
+
+    def step(self, x, state):
+        """
+        Advance the recurrent state by one timestep.
+
+        Args:
+            x: Array of shape (batch, features) holding the new samples
+            state: State returned by `predict_with_state` or a previous `step`
+
+        Returns:
+            Tuple of (outputs, new_state)
+        """
+        out = np.asarray(x, dtype=np.float32)[:, None, :]
+        new_state = []
+        lstm_index = 0
+        for layer in self.layers:
+            if layer['type'] == 'LSTM':
+                out, layer_state = self._lstm(layer, out, initial_state=state[lstm_index], return_state=True)
+                new_state.append(layer_state)
+                lstm_index += 1
+            elif layer['type'] == 'Dense':
+                out = self._dense(layer, out)
+        return out, new_state
+
+
+def export_keras_model(model, output_path, scaler=None, threshold=None):
+    """
+    Export a Keras LSTM/Dense model to a NumPy archive.
+
+    Args:
+        model: Trained Keras model (Sequential LSTM/Dropout/Dense stack)
+        output_path: Path of the .npz archive to write
+        scaler: Optional fitted MinMaxScaler to embed
+        threshold: Optional anomaly threshold to embed
+
+    Returns:
+        Path of the written archive
+    """
+    arrays = {}
+    layer_configs = []
+
+    for layer in model.layers:
+        layer_type = layer.__class__.__name__
+        if layer_type in _INFERENCE_NOOP_LAYERS:
+            continue
+
+        keras_config = layer.get_config()
+        if layer_type == 'LSTM':
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            config = {
+                'type': 'LSTM',
+                'units': int(keras_config['units']),
+                'activation': keras_config.get('activation', 'tanh'),
+                'recurrent_activation': keras_config.get('recurrent_activation', 'sigmoid'),
+                'return_sequences': bool(keras_config.get('return_sequences', False)),
+                'weights': ['kernel', 'recurrent_kernel', 'bias'],
+            }
+            weights = {'kernel': kernel, 'recurrent_kernel': recurrent_kernel, 'bias': bias}
+        elif layer_type == 'Dense':
+            kernel, bias = layer.get_weights()
+            config = {
+                'type': 'Dense',
+                'activation': keras_config.get('activation', 'linear'),
+                'weights': ['kernel', 'bias'],
+            }
+            weights = {'kernel': kernel, 'bias': bias}
+        else:
+            raise ValueError(f"Unsupported layer type for NumPy runtime: {layer_type}")
+
+        for activation_key in ('activation', 'recurrent_activation'):
+            if activation_key in config and config[activation_key] not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation '{config[activation_key]}' in layer {layer.name}")
+
+        index = len(layer_configs)
+        for name, value in weights.items():
+            arrays[f'layer{index}_{name}'] = np.asarray(value, dtype=np.float32)
+        layer_configs.append(config)
+
+    config = {
+        'input_shape': [None if d is None else int(d) for d in model.input_shape],
+        'layers': layer_configs,
+    }
+    arrays['config'] = np.array(json.dumps(config))
+
+    if scaler is not None:
+        arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float32)
+        arrays['scaler_min'] = np.asarray(scaler.min_, dtype=np.float32)
+    if threshold is not None:
+        arrays['threshold'] = np.array(float(threshold))
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    np.savez(output_path, **arrays)
+    logger.info(f"Exported {len(layer_configs)} layers to {output_path}")
+    return output_path
+
+
+def main():
+    """Export a saved Keras model (and optionally its scaler/threshold) to the NumPy runtime format"""
+    parser = argparse.ArgumentParser(description='Export a Keras LSTM model for the NumPy runtime')
+    parser.add_argument('model_path', help='Path to the saved Keras model (.h5)')
+    parser.add_argument('output_path', help='Path of the .npz archive to write')
+    parser.add_argument('--scaler', help='Path to the fitted scaler (.pkl) to embed')
+    parser.add_argument('--threshold', help='Path to the anomaly threshold (.pkl) to embed')
+    args = parser.parse_args()
+
+    import joblib
+    from tensorflow.keras.models import load_model
+
+    model = load_model(args.model_path)
+    scaler = joblib.load(args.scaler) if args.scaler else None
+    threshold = joblib.load(args.threshold) if args.threshold else None
+    export_keras_model(model, args.output_path, scaler=scaler, threshold=threshold)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,312 @@
+"""
+Streaming Time-to-OOM Forecasting
+
+Threshold rules on 'Memory Usage (%)' fire at 80-90%, moments before the
+kernel OOM-kills the container. A leaking pod is visible much earlier as a
+steady upward trend. This module fits that trend per pod and projects when
+memory reaches the limit:
+
+- SlidingLinearTrend keeps the running sums of an ordinary least-squares fit
+  over the last `window` samples; adding a sample and evicting the oldest
+  one are O(1), so the fit never rescans the window,
+- MemoryLeakForecaster turns the fit into a time-to-OOM estimate and flags a
+  leak when the trend is steep, consistent (high R²) and reaches the limit
+  within the forecast horizon.
+"""
+
+import math
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+import numpy as np
+
+logger = logging.getLogger("memory-forecaster")
+
+# Memory metric forecast, as a percentage of the container limit
+MEMORY_FEATURE = 'Memory Usage (%)'
+
+# Seconds between samples assumed when they carry no usable timestamp
+DEFAULT_SAMPLE_INTERVAL = 60.0
+
+# Timestamps are re-based once they drift this far (in seconds) from the
+# origin, keeping the sums well conditioned on long-running pods
+_REBASE_AFTER = 1e5
+
+
+def _to_float(value):
+    """Convert a metric value to float, returning None for missing/invalid values"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Seconds since the epoch of a sample timestamp (None if it cannot be parsed)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if math.isnan(value) else float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    text = str(value)
+    for parse in (lambda t: datetime.strptime(t, "%Y-%m-%d %H:%M:%S"), datetime.fromisoformat):
+        try:
+            return parse(text).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class SlidingLinearTrend:
+    """Least-squares line over a sliding window, maintained with running sums"""
+
+    __slots__ = ('window', 'origin', '_xs', '_ys', '_pos', 'n', 'sx', 'sy', 'sxx', 'sxy', 'syy')
+
+    def __init__(self, window: int = 30):
+        self.window = window
+        self.origin = None  # x of the first sample; stored xs are relative to it
+        self._xs = np.zeros(window)
+        self._ys = np.zeros(window)
+        self._pos = 0
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+
+    def add(self, x: float, y: float) -> None:
+        """Add a sample, evicting the oldest one once the window is full"""
+        if self.origin is None:
+            self.origin = x
+        x -= self.origin
+        if x > _REBASE_AFTER:
+            self._rebase(x)
+            x = 0.0
+
+        if self.n == self.window:
+            old_x, old_y = self._xs[self._pos], self._ys[self._pos]
+            self.sx -= old_x
+            self.sy -= old_y
+            self.sxx -= old_x * old_x
+            self.sxy -= old_x * old_y
+            self.syy -= old_y * old_y
+        else:
+            self.n += 1
+        self._xs[self._pos], self._ys[self._pos] = x, y
+        self._pos = (self._pos + 1) % self.window
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.sxy += x * y
+        self.syy += y * y
+
+    def _rebase(self, shift):
+        """Move the origin forward by `shift`, adjusting the sums exactly"""
+        n = self.n
+        self.sxx += -2 * shift * self.sx + n * shift * shift
+        self.sxy -= shift * self.sy
+        self.sx -= n * shift
+        self._xs[:n] -= shift
+        self.origin += shift
+
+    def fit(self):
+        """
+        Current fit.
+
+        Returns:
+            Tuple of (slope, intercept at the origin, R²), or None with fewer
+            than two distinct x values
+        """
+        n = self.n
+        if n < 2:
+            return None
+        var_x = self.sxx - self.sx * self.sx / n
+        if var_x <= 1e-12:
+            return None
+        cov_xy = self.sxy - self.sx * self.sy / n
+        var_y = self.syy - self.sy * self.sy / n
+        slope = cov_xy / var_x
+        intercept = (self.sy - slope * self.sx) / n
+        r2 = (cov_xy * cov_xy) / (var_x * var_y) if var_y > 1e-12 else 0.0
+        return slope, intercept, min(max(r2, 0.0), 1.0)
+
+    def predict(self, x: float) -> float:
+        """Fitted value at absolute x (requires a fit)"""
+        slope, intercept, _ = self.fit()
+        return intercept + slope * (x - self.origin)
+
+
+class MemoryForecast(NamedTuple):
+    """Trend of one pod's memory usage"""
+    slope_per_hour: float  # Percentage points of the limit per hour
+    r2: float
+    current: float  # Fitted memory usage at the latest sample (%)
+    time_to_oom_seconds: Optional[float]  # None if memory is not growing
+    leaking: bool
+    samples: int
+
+
+class _PodTrend:
+    __slots__ = ('trend', 'last_x', 'last_timestamp', 'holder', 'restarts')
+
+    def __init__(self, window, holder=None, restarts=None):
+        self.trend = SlidingLinearTrend(window)
+        self.last_x = None
+        self.last_timestamp = None
+        self.holder = holder  # Pod currently reporting under the trend's key
+        self.restarts = restarts  # Last 'Pod Restarts' value of the holder
+
+
+class MemoryLeakForecaster:
+    """Per-pod memory trend estimation and time-to-OOM projection"""
+
+    def __init__(self, window: int = 30, min_samples: int = 10, horizon_seconds: float = 6 * 3600,
+                 min_slope_per_hour: float = 1.0, min_r2: float = 0.6, limit_percent: float = 100.0):
+        """
+        Args:
+            window: Number of recent samples the trend is fitted on
+            min_samples: Samples needed before a pod can be flagged
+            horizon_seconds: A leak is flagged only if the limit is projected
+                             to be reached within this many seconds
+            min_slope_per_hour: Minimum growth, in percentage points of the
+                                limit per hour, for a trend to count as a leak
+            min_r2: Minimum R² of the fit, so noisy usage is not extrapolated
+            limit_percent: Memory usage at which the container is OOM-killed
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.horizon_seconds = horizon_seconds
+        self.min_slope_per_hour = min_slope_per_hour
+        self.min_r2 = min_r2
+        self.limit_percent = limit_percent
+        self.pods: Dict[str, _PodTrend] = {}
+        self.stats = {'samples': 0, 'leaks_flagged': 0, 'resets': 0}
+
+    def observe(self, pod_name: str, metrics: Dict[str, Any], timestamp: Optional[float] = None,
+                holder: Optional[str] = None) -> None:
+        """
+        Fold one sample of a pod into its trend.
+
+        A container restart ('Pod Restarts' increases) or a new pod taking
+        over the key frees the memory the trend was fitted on, so the trend
+        starts over instead of mixing the two.
+
+        Args:
+            pod_name: Name of the pod (or of the identity it reports under)
+            metrics: Dictionary of pod metrics for one sample
+            timestamp: Sample time in seconds (defaults to the sample's 'Timestamp')
+            holder: Pod reporting the sample (defaults to the sample's 'Pod Name')
+        """
+        memory = _to_float(metrics.get(MEMORY_FEATURE))
+        if memory is None:
+            return
+        holder = holder if holder is not None else metrics.get('Pod Name')
+        restarts = _to_float(metrics.get('Pod Restarts'))
+        state = self.pods.get(pod_name)
+        if state is not None and self._restarted(state, holder, restarts):
+            logger.debug(f"Resetting the memory trend of {pod_name}: pod restarted or replaced")
+            self.stats['resets'] += 1
+            state = None
+        if state is None:
+            state = _PodTrend(self.window, holder, restarts)
+            self.pods[pod_name] = state
+        if holder is not None:
+            state.holder = holder
+        if restarts is not None:
+            state.restarts = restarts
+
+        x = timestamp if timestamp is not None else parse_timestamp(metrics.get('Timestamp'))
+        if x is None or (state.last_x is not None and x <= state.last_x):
+            x = (state.last_x + DEFAULT_SAMPLE_INTERVAL) if state.last_x is not None else 0.0
+        state.trend.add(x, memory)
+        state.last_x = x
+        self.stats['samples'] += 1
+
+    @staticmethod
+    def _restarted(state: _PodTrend, holder: Optional[str], restarts: Optional[float]) -> bool:
+        """Whether a sample comes from a restarted container or a different pod"""
+        if holder is not None and state.holder is not None and holder != state.holder:
+            return True
+        return restarts is not None and state.restarts is not None and restarts > state.restarts
+
+    def observe_history(self, pod_name: str, history: List[Dict[str, Any]],
+                        holder: Optional[str] = None) -> None:
+        """
+        Observe the samples of a pod history that have not been seen yet.
+
+        Samples are deduplicated by 'Timestamp' like the other streaming
+        detectors, so callers can pass overlapping histories. The history of
+        a new holder is never deduplicated against its predecessor's samples.
+        """
+        state = self.pods.get(pod_name)
+        last_timestamp = state.last_timestamp if state is not None else None
+        if state is not None and history:
+            newest = history[-1]
+            if self._restarted(state, holder if holder is not None else newest.get('Pod Name'), None):
+                last_timestamp = None
+        start = len(history)
+        if last_timestamp is None:
+            start = max(0, len(history) - self.window)
+        else:
+            while start > 0:
+                timestamp = history[start - 1].get('Timestamp')
+                if timestamp is None or str(timestamp) <= last_timestamp:
+                    break
+                start -= 1
+
+        for sample in history[start:]:
+            self.observe(pod_name, sample, holder=holder)
+            timestamp = sample.get('Timestamp')
+            if timestamp is not None and pod_name in self.pods:
+                self.pods[pod_name].last_timestamp = str(timestamp)
+
+    def forecast(self, pod_name: str) -> Optional[MemoryForecast]:
+        """
+        Project when a pod's memory reaches the limit.
+
+        Returns:
+            MemoryForecast, or None while the pod has no usable trend
+        """
+        state = self.pods.get(pod_name)
+        if state is None:
+            return None
+        fit = state.trend.fit()
+        if fit is None:
+            return None
+        slope, _, r2 = fit
+        current = state.trend.predict(state.last_x)
+        slope_per_hour = slope * 3600
+
+        time_to_oom = None
+        if slope > 0:
+            time_to_oom = max(0.0, (self.limit_percent - current) / slope)
+        leaking = (state.trend.n >= self.min_samples and r2 >= self.min_r2
+                   and slope_per_hour >= self.min_slope_per_hour
+                   and time_to_oom is not None and time_to_oom <= self.horizon_seconds)
+        return MemoryForecast(slope_per_hour, r2, current, time_to_oom, leaking, state.trend.n)
+
+    def leak_prediction(self, forecast: MemoryForecast) -> Dict[str, Any]:
+        """
+        Prediction dictionary for a flagged leak, in the format of the other detectors.
+
+        The probability grows as the projected OOM gets closer.
+        """
+        urgency = 1.0 - min(forecast.time_to_oom_seconds / self.horizon_seconds, 1.0)
+        self.stats['leaks_flagged'] += 1
+        return {
+            'predicted_anomaly': 1,
+            'anomaly_probability': round(0.6 + 0.35 * urgency * forecast.r2, 4),
+            'anomaly_type': 'memory_leak',
+            'time_to_oom_minutes': round(forecast.time_to_oom_seconds / 60, 1),
+            'memory_growth_per_hour': round(forecast.slope_per_hour, 2),
+            'trend_r2': round(forecast.r2, 3),
+        }
+
+    def forget(self, pod_name: str) -> None:
+        """Drop the trend of a pod that no longer exists"""
+        self.pods.pop(pod_name, None)
+
+    def retain(self, pod_names) -> None:
+        """Forget every pod not in pod_names (e.g. pods missing from a full cluster snapshot)"""
+        pod_names = set(pod_names)
+        for pod_name in [pod_name for pod_name in self.pods if pod_name not in pod_names]:
+            del self.pods[pod_name]
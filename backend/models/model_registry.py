@@ -0,0 +1,333 @@
+"""
+Model Registry
+
+This module provides a lazy, thread-safe registry for inference models.
+Modules register a loader function at import time, which is cheap; the model
+itself is only loaded the first time it is requested. Processes that never
+score pods therefore never pay for model loading.
+
+Several versions of the same model can be registered side by side. Load time,
+warmup time and the process memory growth caused by each load are recorded
+and exposed through `ModelRegistry.stats()`.
+
+A loader may come with a revision function (for example the published
+version of the artifact store). `refresh()`, or the background watcher
+started by `start_watcher()`, reloads a model whose revision changed and
+swaps it in atomically: the new model is loaded while callers keep using the
+old one, and `get()` returns either the old or the new model, never a mix.
+"""
+
+import os
+import time
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger("model-registry")
+
+DEFAULT_VERSION = "default"
+
+# Seconds before a loader that provided no model is called again
+DEFAULT_RETRY_SECONDS = 30.0
+
+
+def _current_rss_bytes():
+    """Return the resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+class _RegistryEntry:
+    """A registered model loader and, once loaded, the model it produced"""
+
+    def __init__(self, name, version, loader, revision_fn=None):
+        self.name = name
+        self.version = version
+        self.loader = loader
+        self.revision_fn = revision_fn
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.model = None
+        self.retry_at = 0.0  # When a loader that provided no model may run again
+        self.stats = {
+            'load_time_s': None,
+            'rss_delta_mb': None,
+            'loaded_at': None,
+            'warmup_time_s': None,
+            'revision': None,
+            'swaps': 0,
+        }
+
+    def current_revision(self):
+        """Revision the loader would load now (None if not tracked or unknown)"""
+        if self.revision_fn is None:
+            return None
+        try:
+            return self.revision_fn()
+        except Exception as e:
+            logger.warning(f"Could not read revision of {self.name}@{self.version}: {e}")
+            return None
+
+    def load(self):
+        """Call the loader, recording load time and memory growth"""
+        revision = self.current_revision()
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = self.loader()
+        except Exception as e:
+            logger.error(f"Failed to load model {self.name}@{self.version}: {e}")
+            model = None
+        self.stats['load_time_s'] = time.perf_counter() - start
+        self.stats['rss_delta_mb'] = (_current_rss_bytes() - rss_before) / (1024 * 1024)
+        self.stats['loaded_at'] = time.time()
+        self.stats['revision'] = revision
+        return model
+
+
+class ModelRegistry:
+    """Lazily loads and caches models, keyed by name and version"""
+
+    def __init__(self, retry_after=DEFAULT_RETRY_SECONDS):
+        """
+        Args:
+            retry_after: Seconds before a loader that provided no model (e.g. the
+                         model file does not exist yet) is called again
+        """
+        self.retry_after = retry_after
+        self._entries = {}
+        self._default_versions = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+
+    def register(self, name, loader, version=DEFAULT_VERSION, make_default=True, revision_fn=None):
+        """
+        Register a loader for a model. The loader is not called until the
+        model is first requested.
+
+        Args:
+            name: Model name
+            loader: Zero-argument callable returning the model (or None if unavailable)
+            version: Version label, allowing several versions side by side
+            make_default: Whether this version becomes the default for `name`
+            revision_fn: Optional zero-argument callable returning the revision
+                         the loader currently provides; refresh() reloads the
+                         model when it changes
+        """
+        with self._lock:
+            self._entries[(name, version)] = _RegistryEntry(name, version, loader, revision_fn)
+            if make_default or name not in self._default_versions:
+                self._default_versions[name] = version
+        logger.debug(f"Registered model loader {name}@{version}")
+
+    def set_default_version(self, name, version):
+        """Make an already registered version the default for `name`"""
+        with self._lock:
+            if (name, version) not in self._entries:
+                raise KeyError(f"Model {name}@{version} is not registered")
+            self._default_versions[name] = version
+
+    def versions(self, name):
+        """List the registered versions of a model"""
+        with self._lock:
+            return [version for (entry_name, version) in self._entries if entry_name == name]
+
+    def _entry(self, name, version=None):
+        with self._lock:
+            if version is None:
+                version = self._default_versions.get(name)
+            entry = self._entries.get((name, version))
+        if entry is None:
+            raise KeyError(f"Model {name}@{version} is not registered")
+        return entry
+
+    def get(self, name, version=None):
+        """
+        Return a model, loading it on first use.
+
+        Concurrent callers block on the same load rather than loading twice.
+        A loader that provides no model is retried on a later call, at most
+        once every `retry_after` seconds, so a model published after startup
+        is picked up.
+
+        Args:
+            name: Model name
+            version: Version label (defaults to the default version)
+
+        Returns:
+            The loaded model, or None if its loader could not provide one
+        """
+        entry = self._entry(name, version)
+        if entry.loaded or time.time() < entry.retry_at:
+            return entry.model
+
+        with entry.lock:
+            if not entry.loaded and time.time() >= entry.retry_at:
+                model = entry.load()
+                if model is None:
+                    entry.retry_at = time.time() + self.retry_after
+                    logger.warning(f"Model {entry.name}@{entry.version} is not available, "
+                                   f"retrying in {self.retry_after:.0f}s")
+                else:
+                    entry.model = model
+                    entry.loaded = True
+                    logger.info(f"Loaded model {entry.name}@{entry.version} in "
+                                f"{entry.stats['load_time_s']:.3f}s "
+                                f"(+{entry.stats['rss_delta_mb']:.1f} MB RSS)")
+        return entry.model
+
+    def is_loaded(self, name, version=None):
+        """Whether a model has already been loaded"""
+        return self._entry(name, version).loaded
+
+    def warmup(self, name=None, version=None):
+        """
+        Load models ahead of time and run one dummy forward pass so the
+        first real request does not pay for lazy initialization.
+
+        Args:
+            name: Model to warm up (defaults to every registered default version)
+            version: Version label (defaults to the default version)
+        """
+        if name is None:
+            with self._lock:
+                targets = list(self._default_versions.items())
+        else:
+            targets = [(name, version)]
+
+        for target_name, target_version in targets:
+            entry = self._entry(target_name, target_version)
+            model = self.get(target_name, target_version)
+            if model is None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                if hasattr(model, 'warmup'):
+                    model.warmup()
+                else:
+                    input_shape = getattr(model, 'input_shape', None)
+                    if input_shape is not None and hasattr(model, 'predict_on_batch'):
+                        dummy = np.zeros((1,) + tuple(d or 1 for d in input_shape[1:]), dtype=np.float32)
+                        model.predict_on_batch(dummy)
+            except Exception as e:
+                logger.warning(f"Warmup of {entry.name}@{entry.version} failed: {e}")
+                continue
+            entry.stats['warmup_time_s'] = time.perf_counter() - start
+            logger.info(f"Warmed up model {entry.name}@{entry.version} in {entry.stats['warmup_time_s']:.3f}s")
+
+    def unload(self, name, version=None):
+        """Drop a loaded model so it is reloaded on next use"""
+        entry = self._entry(name, version)
+        with entry.lock:
+            entry.model = None
+            entry.loaded = False
+            entry.retry_at = 0.0
+
+    def refresh(self, name=None, version=None):
+        """
+        Reload loaded models whose revision changed and swap them in.
+
+        The new model is loaded outside the entry lock, so concurrent get()
+        calls keep returning the old model until the swap. If the new model
+        fails to load, the old one stays in place.
+
+        Args:
+            name: Model to check (defaults to every registered model)
+            version: Version label (defaults to the default version)
+
+        Returns:
+            List of "name@version" keys that were swapped
+        """
+        if name is None:
+            with self._lock:
+                entries = list(self._entries.values())
+        else:
+            entries = [self._entry(name, version)]
+
+        swapped = []
+        for entry in entries:
+            if not entry.loaded or entry.revision_fn is None:
+                continue
+            revision = entry.current_revision()
+            if revision is None or revision == entry.stats['revision']:
+                continue
+
+            model = entry.load()
+            if model is None:
+                logger.error(f"Keeping {entry.name}@{entry.version} at revision "
+                             f"{entry.stats['revision']}; revision {revision} failed to load")
+                # Avoid retrying a broken revision on every poll
+                entry.stats['revision'] = revision
+                continue
+            if hasattr(model, 'warmup'):
+                try:
+                    model.warmup()
+                except Exception as e:
+                    logger.warning(f"Warmup of {entry.name}@{entry.version} revision {revision} failed: {e}")
+
+            with entry.lock:
+                entry.model = model
+                entry.stats['swaps'] += 1
+            swapped.append(f"{entry.name}@{entry.version}")
+            logger.info(f"Swapped model {entry.name}@{entry.version} to revision {revision}")
+        return swapped
+
+    def start_watcher(self, interval=60.0):
+        """
+        Start a daemon thread calling refresh() every `interval` seconds.
+
+        Calling it again while a watcher runs has no effect.
+        """
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return self._watcher
+            self._watcher_stop.clear()
+
+            def watch():
+                while not self._watcher_stop.wait(interval):
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        logger.error(f"Model refresh failed: {e}")
+
+            self._watcher = threading.Thread(target=watch, name="model-registry-watcher", daemon=True)
+            self._watcher.start()
+        logger.info(f"Watching registered models for new revisions every {interval}s")
+        return self._watcher
+
+    def stop_watcher(self):
+        """Stop the background watcher, if running"""
+        self._watcher_stop.set()
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.join(timeout=5)
+        self._watcher = None
+
+    def stats(self):
+        """
+        Return load statistics for every registered model.
+
+        Returns:
+            Dictionary keyed by "name@version" with loaded flag, load time,
+            memory growth and warmup time
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            f"{entry.name}@{entry.version}": {'loaded': entry.loaded, **entry.stats}
+            for entry in entries
+        }
+
+
+# Process-wide registry shared by the inference modules
+registry = ModelRegistry()
@@ -0,0 +1,142 @@
+"""
+Versioned Model Artifacts
+
+Each trained sequence model is stored as an immutable version directory:
+
+    model_artifacts/versions/
+        CURRENT                      <- name of the version agents should use
+        20240101T120000Z/
+            lstm_anomaly_model.npz   <- NumPy runtime model with scaler and threshold
+            lstm_anomaly_model.h5    <- Keras model, used to warm-start retraining
+            scaler.pkl
+            anomaly_threshold.pkl
+            metadata.json
+
+A version is written to a temporary directory and renamed into place, and
+the CURRENT pointer is replaced with `os.replace`. Readers therefore never
+observe a half-written version or pointer. Running agents poll
+`current_version()` through the model registry and hot-swap when it changes.
+"""
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+from datetime import datetime, timezone
+
+logger = logging.getLogger("model-versions")
+
+DEFAULT_ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts")
+VERSIONS_DIRNAME = "versions"
+CURRENT_FILE = "CURRENT"
+METADATA_FILE = "metadata.json"
+
+
+def _atomic_write_text(path, text):
+    """Write a small text file so readers see either the old or the new content"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelVersionStore:
+    """Directory of immutable model versions with an atomic CURRENT pointer"""
+
+    def __init__(self, artifacts_dir=DEFAULT_ARTIFACTS_DIR):
+        """
+        Args:
+            artifacts_dir: Model artifacts directory; versions live in its
+                           'versions' subdirectory
+        """
+        self.root = os.path.join(artifacts_dir, VERSIONS_DIRNAME)
+
+    def version_dir(self, version):
+        """Directory holding the files of a version"""
+        return os.path.join(self.root, version)
+
+    def list_versions(self):
+        """List stored versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith('.') and os.path.isdir(os.path.join(self.root, name)))
+
+    def current_version(self):
+        """Return the published version, or None if nothing has been published"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version or None
+
+    def metadata(self, version):
+        """Return the metadata stored with a version"""
+        with open(os.path.join(self.version_dir(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    @staticmethod
+    def new_version_id():
+        """Version id derived from the current UTC time (sorts chronologically)"""
+        return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+    def write_version(self, write_files, metadata=None, version=None):
+        """
+        Create a new version directory atomically.
+
+        Args:
+            write_files: Callable receiving a staging directory to write the
+                         model files into
+            metadata: Dictionary stored as metadata.json
+            version: Version id (defaults to a timestamp)
+
+        Returns:
+            The new version id
+        """
+        os.makedirs(self.root, exist_ok=True)
+        version = version or self.new_version_id()
+        final_dir = self.version_dir(version)
+        if os.path.exists(final_dir):
+            raise FileExistsError(f"Model version {version} already exists")
+
+        staging_dir = tempfile.mkdtemp(dir=self.root, prefix=f".staging-{version}-")
+        try:
+            write_files(staging_dir)
+            metadata = dict(metadata or {})
+            metadata.setdefault('version', version)
+            metadata.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+            with open(os.path.join(staging_dir, METADATA_FILE), 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            os.rename(staging_dir, final_dir)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"Wrote model version {version} to {final_dir}")
+        return version
+
+    def publish(self, version):
+        """Point CURRENT at a version; running agents pick it up on their next poll"""
+        if not os.path.isdir(self.version_dir(version)):
+            raise FileNotFoundError(f"Model version {version} does not exist")
+        _atomic_write_text(os.path.join(self.root, CURRENT_FILE), version + "\n")
+        logger.info(f"Published model version {version}")
+
+    def prune(self, keep=5):
+        """Delete the oldest versions, always keeping the published one"""
+        current = self.current_version()
+        versions = self.list_versions()
+        for version in versions[:max(0, len(versions) - keep)]:
+            if version != current:
+                shutil.rmtree(self.version_dir(version), ignore_errors=True)
+                logger.info(f"Pruned model version {version}")
@@ -0,0 +1,259 @@
+"""
+Node-Level Aggregate Anomaly Detection
+
+A failing node surfaces as many unrelated pod anomalies: pods lose
+readiness, restart, drop packets and report events, one pod at a time. This
+module aggregates pod metrics per node incrementally and flags node-wide
+problems in one computation:
+
+- every pod's latest sample is a contribution vector to its node's sums;
+  a new sample replaces the pod's previous contribution, so an update costs
+  O(1) regardless of how many pods run on the node,
+- restarts are turned into a per-node restart rate with an EWMA,
+- NODE_ANOMALY_RULES is a rule table (see rule_engine.py) evaluated over the
+  per-node aggregates of the whole cluster in a single vectorized pass.
+"""
+
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+import numpy as np
+
+try:
+    from .rule_engine import Col, Rule, RuleTable, FAILURE_EVENT_REASONS
+except ImportError:
+    from rule_engine import Col, Rule, RuleTable, FAILURE_EVENT_REASONS
+
+logger = logging.getLogger("node-detector")
+
+# Event reasons reported for a pod that point at its node rather than the pod
+NODE_EVENT_REASONS = ['NodeNotReady', 'NodeNetworkUnavailable', 'NodeHasDiskPressure',
+                      'NodeHasMemoryPressure', 'NodeHasPIDPressure', 'Evicted', 'TaintManagerEviction']
+
+# Event reasons of a pod in trouble
+POD_ERROR_REASONS = FAILURE_EVENT_REASONS + ['CrashLoopBackOff', 'OOMKilled', 'Unhealthy']
+
+# Per-pod contribution to the node sums, in array order
+AGGREGATE_FIELDS = [
+    'pods', 'ready_containers', 'total_containers', 'error_pods', 'dropping_pods',
+    'dropped_packets', 'cpu_usage', 'memory_usage', 'node_event_pods',
+]
+_FIELD = {name: index for index, name in enumerate(AGGREGATE_FIELDS)}
+
+# Node heuristics over the aggregates returned by NodeAggregator.node_records
+NODE_ANOMALY_RULES = RuleTable([
+    Rule('node_event', Col('Node Event Pods') > 0, 'node_failure',
+         (Col('Node Event Pods') * 0.1 + 0.8).clip_max(0.99),
+         description='Pods report events of an unhealthy node'),
+    Rule('readiness_collapse', (Col('Pods') >= 2) & (Col('Ready Ratio', default=1.0) < 0.5), 'node_failure',
+         Col('Not Ready Ratio') * 0.4 + 0.55,
+         description='Most containers on the node are not ready'),
+    Rule('widespread_errors', (Col('Error Pods') >= 2) & (Col('Error Pod Ratio') >= 0.5), 'node_failure',
+         (Col('Error Pod Ratio') * 0.3 + 0.6).clip_max(0.95),
+         description='Most pods on the node report failures'),
+    Rule('restart_storm', Col('Restart Rate') >= 3, 'node_failure',
+         (Col('Restart Rate') * 0.05 + 0.6).clip_max(0.9),
+         description='Pods on the node restart at a high rate'),
+    Rule('network_drops', (Col('Dropping Pods') >= 2) & (Col('Dropping Pod Ratio') >= 0.5), 'node_network_issue',
+         (Col('Dropping Pod Ratio') * 0.3 + 0.55).clip_max(0.9),
+         description='Most pods on the node drop packets'),
+    Rule('resource_pressure', Col('Mean Memory Usage (%)') > 90, 'node_pressure',
+         (Col('Mean Memory Usage (%)') / 100).clip_max(0.95),
+         description='Pods on the node are close to their memory limits'),
+], combine='max', default_type='none', default_probability=0.0)
+
+
+def _to_float(value):
+    """Convert a metric value to float, mapping missing/invalid values to 0"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if np.isnan(value) else value
+
+
+def node_of(metrics: Dict[str, Any]) -> Optional[str]:
+    """Node a pod runs on ('Node Name' from the collector, 'node' from the orchestrator)"""
+    node = metrics.get('Node Name') or metrics.get('node')
+    if node is None or (isinstance(node, float) and np.isnan(node)):
+        return None
+    node = str(node)
+    return node if node and node != 'Unknown' else None
+
+
+def pod_contribution(metrics: Dict[str, Any]) -> np.ndarray:
+    """Contribution of one pod sample to its node's aggregates"""
+    contribution = np.zeros(len(AGGREGATE_FIELDS))
+    ready = _to_float(metrics.get('Ready Containers', 0))
+    total = _to_float(metrics.get('Total Containers', 0))
+    reason = str(metrics.get('Event Reason') or metrics.get('Pod Event Reason') or '')
+    dropped = (_to_float(metrics.get('Network Receive Packets Dropped (p/s)', 0)) +
+               _to_float(metrics.get('Network Transmit Packets Dropped (p/s)', 0)))
+
+    contribution[_FIELD['pods']] = 1
+    contribution[_FIELD['ready_containers']] = ready
+    contribution[_FIELD['total_containers']] = total
+    contribution[_FIELD['error_pods']] = reason in POD_ERROR_REASONS or ready < total
+    contribution[_FIELD['dropping_pods']] = dropped > 0
+    contribution[_FIELD['dropped_packets']] = dropped
+    contribution[_FIELD['cpu_usage']] = _to_float(metrics.get('CPU Usage (%)', 0))
+    contribution[_FIELD['memory_usage']] = _to_float(metrics.get('Memory Usage (%)', 0))
+    contribution[_FIELD['node_event_pods']] = reason in NODE_EVENT_REASONS or \
+        'NodeNotReady' in str(metrics.get('Node Name', ''))
+    return contribution
+
+
+class NodeAssessment(NamedTuple):
+    """Outcome of evaluating one node"""
+    node: str
+    is_anomaly: bool
+    anomaly_type: str
+    probability: float
+    reasons: List[str]
+    aggregates: Dict[str, float]
+    pods: List[str]
+
+
+class NodeAggregator:
+    """Incrementally maintained per-node aggregates of pod metrics"""
+
+    def __init__(self, restart_alpha: float = 0.3):
+        """
+        Args:
+            restart_alpha: Smoothing factor of the per-node restart rate
+                           (restarts per evaluation)
+        """
+        self.restart_alpha = restart_alpha
+        self.sums: Dict[str, np.ndarray] = {}  # node -> summed pod contributions
+        self.members: Dict[str, set] = {}  # node -> pods currently on it
+        self.restart_rate: Dict[str, float] = {}  # node -> EWMA of restarts per evaluation
+        self._new_restarts: Dict[str, float] = {}  # node -> restarts since the last evaluation
+        self._pods: Dict[str, tuple] = {}  # pod -> (node, contribution, restart count)
+        self.stats = {'updates': 0, 'evaluations': 0, 'node_anomalies': 0}
+
+    def update(self, pod_name: str, metrics: Dict[str, Any]) -> None:
+        """
+        Replace a pod's contribution with its latest sample.
+
+        Args:
+            pod_name: Name of the pod
+            metrics: Latest metrics of the pod
+        """
+        node = node_of(metrics)
+        restarts = _to_float(metrics.get('Pod Restarts', 0))
+        previous = self._pods.get(pod_name)
+        if previous is not None:
+            previous_node, previous_contribution, previous_restarts = previous
+            if node == previous_node:
+                self.sums[node] -= previous_contribution
+                if restarts > previous_restarts:
+                    self._new_restarts[node] = self._new_restarts.get(node, 0.0) + restarts - previous_restarts
+            else:
+                self._remove(pod_name, previous_node, previous_contribution)
+        self.stats['updates'] += 1
+
+        if node is None:
+            self._pods.pop(pod_name, None)
+            return
+        contribution = pod_contribution(metrics)
+        if node not in self.sums:
+            self.sums[node] = np.zeros(len(AGGREGATE_FIELDS))
+            self.members[node] = set()
+        self.sums[node] += contribution
+        self.members[node].add(pod_name)
+        self._pods[pod_name] = (node, contribution, restarts)
+
+    def update_many(self, pod_metrics: Dict[str, Dict[str, Any]]) -> None:
+        """Apply the latest sample of several pods"""
+        for pod_name, metrics in pod_metrics.items():
+            self.update(pod_name, metrics)
+
+    def _remove(self, pod_name, node, contribution):
+        self.sums[node] -= contribution
+        self.members[node].discard(pod_name)
+        if not self.members[node]:
+            for state in (self.sums, self.members, self.restart_rate, self._new_restarts):
+                state.pop(node, None)
+
+    def forget(self, pod_name: str) -> None:
+        """Drop the contribution of a pod that no longer exists"""
+        previous = self._pods.pop(pod_name, None)
+        if previous is not None:
+            self._remove(pod_name, previous[0], previous[1])
+
+    def retain(self, pod_names) -> None:
+        """Forget every pod not in pod_names (e.g. pods missing from a full cluster snapshot)"""
+        pod_names = set(pod_names)
+        for pod_name in [pod_name for pod_name in self._pods if pod_name not in pod_names]:
+            self.forget(pod_name)
+
+    def node_records(self) -> Dict[str, Dict[str, float]]:
+        """
+        Derived per-node aggregates (counts, ratios, means and restart rate).
+
+        Returns:
+            Dictionary mapping node names to aggregate columns
+        """
+        nodes = list(self.sums)
+        if not nodes:
+            return {}
+        sums = np.stack([self.sums[node] for node in nodes])
+        pods = np.maximum(sums[:, _FIELD['pods']], 1)
+        total_containers = sums[:, _FIELD['total_containers']]
+        ready_ratio = np.where(total_containers > 0,
+                               sums[:, _FIELD['ready_containers']] / np.maximum(total_containers, 1), 1.0)
+
+        records = {}
+        for i, node in enumerate(nodes):
+            records[node] = {
+                'Pods': float(sums[i, _FIELD['pods']]),
+                'Ready Ratio': float(ready_ratio[i]),
+                'Not Ready Ratio': float(1 - ready_ratio[i]),
+                'Error Pods': float(sums[i, _FIELD['error_pods']]),
+                'Error Pod Ratio': float(sums[i, _FIELD['error_pods']] / pods[i]),
+                'Dropping Pods': float(sums[i, _FIELD['dropping_pods']]),
+                'Dropping Pod Ratio': float(sums[i, _FIELD['dropping_pods']] / pods[i]),
+                'Dropped Packets (p/s)': float(sums[i, _FIELD['dropped_packets']]),
+                'Mean CPU Usage (%)': float(sums[i, _FIELD['cpu_usage']] / pods[i]),
+                'Mean Memory Usage (%)': float(sums[i, _FIELD['memory_usage']] / pods[i]),
+                'Node Event Pods': float(sums[i, _FIELD['node_event_pods']]),
+                'Restart Rate': self.restart_rate.get(node, 0.0),
+            }
+        return records
+
+    def evaluate(self) -> Dict[str, NodeAssessment]:
+        """
+        Fold in the restarts since the last call and score every node at once.
+
+        Returns:
+            Dictionary mapping node names to a NodeAssessment
+        """
+        for node in self.sums:
+            rate = self.restart_rate.get(node, 0.0)
+            self.restart_rate[node] = rate + self.restart_alpha * (self._new_restarts.get(node, 0.0) - rate)
+        self._new_restarts.clear()
+
+        records = self.node_records()
+        nodes = list(records)
+        if not nodes:
+            return {}
+        result = NODE_ANOMALY_RULES.evaluate([records[node] for node in nodes])
+
+        assessments = {}
+        for i, node in enumerate(nodes):
+            reasons = [rule.name for rule in NODE_ANOMALY_RULES.rules if result.masks[rule.name][i]]
+            assessments[node] = NodeAssessment(
+                node=node,
+                is_anomaly=bool(result.matched[i]),
+                anomaly_type=result.anomaly_type[i],
+                probability=float(result.probability[i]),
+                reasons=reasons,
+                aggregates=records[node],
+                pods=sorted(self.members[node]),
+            )
+
+        anomalous = [node for node, assessment in assessments.items() if assessment.is_anomaly]
+        self.stats['evaluations'] += 1
+        self.stats['node_anomalies'] += len(anomalous)
+        if anomalous:
+            logger.warning(f"Node-level anomalies on {len(anomalous)}/{len(nodes)} nodes: {', '.join(anomalous)}")
+        return assessments
@@ -0,0 +1,450 @@
+"""
+Vectorized Rule Engine
+
+This module holds the heuristic detection rules shared by every detector as
+declarative tables. Each rule pairs a condition with the anomaly type,
+probability, priority weight or remediation action it implies. A rule table
+is evaluated over a whole batch of pods at once: conditions compile to NumPy
+boolean masks over metric columns, so a cluster is scored in one pass instead
+of one dictionary at a time.
+
+Rule tables:
+- DETECTION_RULES: fallback model rules (anomaly_prediction.rule_based_prediction)
+- POD_ANOMALY_RULES: orchestrator heuristics (k8s_multi_agent_system.predict_pod_anomaly)
+- PRIORITY_RULES: remediation priority (k8s_multi_agent_system.calculate_pod_priority)
+- REMEDIATION_RULES: suggested action (k8s_visualization_dashboard.suggest_remediation_action)
+"""
+
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+import numpy as np
+
+logger = logging.getLogger("rule-engine")
+
+
+class PodBatch:
+    """Column-oriented view over the metrics of many pods"""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        """
+        Args:
+            records: List of per-pod metric dictionaries
+        """
+        self.records = records
+        self._numeric = {}
+        self._text = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def numeric(self, column: str, default: float = 0.0) -> np.ndarray:
+        """Return a column as a float array, with missing/invalid values set to default"""
+        key = (column, default)
+        if key not in self._numeric:
+            values = np.empty(len(self.records), dtype=np.float64)
+            for i, record in enumerate(self.records):
+                try:
+                    value = float(record.get(column, default))
+                except (TypeError, ValueError):
+                    value = default
+                values[i] = default if np.isnan(value) else value
+            self._numeric[key] = values
+        return self._numeric[key]
+
+    def text(self, column: str) -> np.ndarray:
+        """Return a column as an array of strings, with missing values set to ''"""
+        if column not in self._text:
+            values = []
+            for record in self.records:
+                value = record.get(column, '')
+                values.append('' if value is None or (isinstance(value, float) and np.isnan(value)) else str(value))
+            self._text[column] = np.array(values, dtype=object)
+        return self._text[column]
+
+
+class Expr:
+    """Expression over pod metric columns that evaluates to a NumPy array"""
+
+    def evaluate(self, batch: PodBatch) -> np.ndarray:
+        raise NotImplementedError
+
+    def _binary(self, other, op):
+        return _BinaryExpr(self, _as_expr(other), op)
+
+    def __gt__(self, other):
+        return self._binary(other, np.greater)
+
+    def __ge__(self, other):
+        return self._binary(other, np.greater_equal)
+
+    def __lt__(self, other):
+        return self._binary(other, np.less)
+
+    def __le__(self, other):
+        return self._binary(other, np.less_equal)
+
+    def __eq__(self, other):
+        return self._binary(other, np.equal)
+
+    def __ne__(self, other):
+        return self._binary(other, np.not_equal)
+
+    def __and__(self, other):
+        return self._binary(other, np.logical_and)
+
+    def __or__(self, other):
+        return self._binary(other, np.logical_or)
+
+    def __invert__(self):
+        return _UnaryExpr(self, np.logical_not)
+
+    def __add__(self, other):
+        return self._binary(other, np.add)
+
+    def __mul__(self, other):
+        return self._binary(other, np.multiply)
+
+    def __truediv__(self, other):
+        return self._binary(other, np.divide)
+
+    def clip_max(self, upper: float) -> 'Expr':
+        """Cap the expression at an upper bound"""
+        return self._binary(upper, np.minimum)
+
+    __hash__ = object.__hash__
+
+
+class Const(Expr):
+    """Constant value broadcast over the batch"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, batch: PodBatch) -> np.ndarray:
+        return np.full(len(batch), self.value, dtype=object if isinstance(self.value, str) else None)
+
+
+class Col(Expr):
+    """Numeric metric column"""
+
+    def __init__(self, name: str, default: float = 0.0):
+        self.name = name
+        self.default = default
+
+    def evaluate(self, batch: PodBatch) -> np.ndarray:
+        return batch.numeric(self.name, self.default)
+
+
+class Text(Expr):
+    """String metric column"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def evaluate(self, batch: PodBatch) -> np.ndarray:
+        return batch.text(self.name)
+
+    def isin(self, values) -> Expr:
+        """Match rows whose value is one of the given strings"""
+        return _FuncExpr(lambda column: np.isin(column, list(values)), self)
+
+    def contains(self, substring: str) -> Expr:
+        """Match rows whose value contains the given substring"""
+        return _FuncExpr(lambda column: np.fromiter((substring in v for v in column), dtype=bool, count=len(column)), self)
+
+    def nonempty(self) -> Expr:
+        """Match rows with a non-empty value"""
+        return _FuncExpr(lambda column: column != '', self)
+
+
+class _BinaryExpr(Expr):
+    def __init__(self, left: Expr, right: Expr, op):
+        self.left, self.right, self.op = left, right, op
+
+    def evaluate(self, batch: PodBatch) -> np.ndarray:
+        return self.op(self.left.evaluate(batch), self.right.evaluate(batch))
+
+
+class _UnaryExpr(Expr):
+    def __init__(self, operand: Expr, op):
+        self.operand, self.op = operand, op
+
+    def evaluate(self, batch: PodBatch) -> np.ndarray:
+        return self.op(self.operand.evaluate(batch))
+
+
+class _FuncExpr(Expr):
+    def __init__(self, func, operand: Expr):
+        self.func, self.operand = func, operand
+
+    def evaluate(self, batch: PodBatch) -> np.ndarray:
+        return self.func(self.operand.evaluate(batch))
+
+
+def _as_expr(value) -> Expr:
+    return value if isinstance(value, Expr) else Const(value)
+
+
+def minimum(left, right) -> Expr:
+    """Element-wise minimum of two expressions"""
+    return _BinaryExpr(_as_expr(left), _as_expr(right), np.minimum)
+
+
+class Rule(NamedTuple):
+    """One row of a rule table"""
+    name: str
+    condition: Expr
+    anomaly_type: Optional[str] = None
+    probability: Union[float, Expr, None] = None
+    priority: float = 0.0
+    group: Optional[str] = None
+    action: Optional[str] = None
+    details: Optional[Dict[str, str]] = None
+    description: Optional[str] = None
+
+
+class RuleResult(NamedTuple):
+    """Per-pod outcome of evaluating a rule table over a batch"""
+    matched: np.ndarray
+    anomaly_type: np.ndarray
+    probability: np.ndarray
+    priority: np.ndarray
+    action: np.ndarray
+    masks: Dict[str, np.ndarray]
+
+
+class RuleTable:
+    """Ordered rule table evaluated with NumPy masks"""
+
+    def __init__(self, rules: List[Rule], combine: str = 'first',
+                 default_type: str = 'unknown', default_probability: float = 0.0,
+                 default_action: Optional[str] = None, max_priority: Optional[float] = None):
+        """
+        Args:
+            rules: Rules in precedence order
+            combine: How probabilities of several matching rules combine:
+                     'first' takes the first match, 'max' the highest one.
+                     Anomaly types and actions always come from the first match.
+            default_type: Anomaly type for pods no rule matches
+            default_probability: Probability for pods no rule matches
+            default_action: Action for pods no rule matches
+            max_priority: Optional cap on the summed priority
+        """
+        if combine not in ('first', 'max'):
+            raise ValueError(f"Unknown combine mode: {combine}")
+        self.rules = rules
+        self.combine = combine
+        self.default_type = default_type
+        self.default_probability = default_probability
+        self.default_action = default_action
+        self.max_priority = max_priority
+
+    def evaluate(self, batch: Union[PodBatch, List[Dict[str, Any]]]) -> RuleResult:
+        """
+        Evaluate every rule over the batch in one pass.
+
+        Priority weights are summed across groups; within a group only the
+        first matching rule counts (rules without a group each form their own).
+
+        Args:
+            batch: PodBatch or list of per-pod metric dictionaries
+
+        Returns:
+            RuleResult with one entry per pod
+        """
+        if not isinstance(batch, PodBatch):
+            batch = PodBatch(batch)
+        n = len(batch)
+
+        masks = {rule.name: np.asarray(rule.condition.evaluate(batch), dtype=bool).reshape(n) for rule in self.rules}
+
+        matched = np.zeros(n, dtype=bool)
+        anomaly_type = np.full(n, self.default_type, dtype=object)
+        action = np.full(n, self.default_action, dtype=object)
+        probability = np.zeros(n) if self.combine == 'max' else np.full(n, float(self.default_probability))
+        groups = {}
+
+        # Walk the table backwards so earlier rules overwrite later ones
+        for rule in reversed(self.rules):
+            mask = masks[rule.name]
+            matched |= mask
+            if rule.anomaly_type is not None:
+                anomaly_type[mask] = rule.anomaly_type
+            if rule.action is not None:
+                action[mask] = rule.action
+            if rule.probability is not None:
+                rule_probability = np.broadcast_to(
+                    np.asarray(_as_expr(rule.probability).evaluate(batch), dtype=np.float64), (n,))
+                if self.combine == 'max':
+                    probability = np.where(mask, np.maximum(probability, rule_probability), probability)
+                else:
+                    probability = np.where(mask, rule_probability, probability)
+            if rule.priority:
+                group = rule.group or rule.name
+                groups[group] = np.where(mask, rule.priority, groups.get(group, 0.0))
+
+        if self.combine == 'max':
+            probability = np.where(matched, probability, float(self.default_probability))
+
+        priority = np.zeros(n)
+        for group_priority in groups.values():
+            priority = priority + group_priority
+        if self.max_priority is not None:
+            priority = np.minimum(priority, self.max_priority)
+
+        return RuleResult(matched, anomaly_type, probability, priority, action, masks)
+
+
+# Fallback model rules: first match wins
+DETECTION_RULES = RuleTable([
+    Rule('crash_loop', Col('Pod Restarts') > 5, 'crash_loop',
+         (Col('Pod Restarts') * 0.05 + 0.5).clip_max(0.95)),
+    Rule('cpu_exhaustion', Col('CPU Usage (%)') > 90, 'resource_exhaustion',
+         (Col('CPU Usage (%)') / 100).clip_max(0.95)),
+    Rule('oom_risk', Col('Memory Usage (%)') > 90, 'oom_risk',
+         (Col('Memory Usage (%)') / 100).clip_max(0.95)),
+    Rule('pod_failure', Col('Ready Containers') < Col('Total Containers', default=1), 'pod_failure', 0.8),
+], combine='first', default_type='unknown', default_probability=0.1)
+
+# Event reasons that indicate a failing pod
+FAILURE_EVENT_REASONS = ["BackOff", "Failed", "FailedMount", "FailedScheduling", "OutOfmemory"]
+
+# Orchestrator heuristics: the first matching rule names the anomaly type and
+# the probability is the highest of all matching rules. A BackOff event takes
+# precedence over every type except an intentional crash.
+POD_ANOMALY_RULES = RuleTable([
+    Rule('intentional_crash', Text('Command').contains('exit 1'), 'intentional_crash', 0.99,
+         details={'command': 'Command'},
+         description='Pod is configured to exit with code 1 intentionally'),
+    Rule('backoff_event', Text('Event Reason') == 'BackOff', 'pod_failure', 0.85,
+         details={'event_reason': 'Event Reason', 'event_message': 'Event Message'}),
+    Rule('crash_loop', Col('Pod Restarts') > 5, 'crash_loop',
+         (Col('Pod Restarts') / 20 + 0.5).clip_max(0.95),
+         details={'restart_count': 'Pod Restarts'}),
+    Rule('resource_exhaustion', (Col('CPU Usage (%)') > 90) | (Col('Memory Usage (%)') > 90),
+         'resource_exhaustion', minimum(Col('CPU Usage (%)'), Col('Memory Usage (%)')) / 100,
+         details={'cpu_usage': 'CPU Usage (%)', 'memory_usage': 'Memory Usage (%)'}),
+    Rule('failure_event', Text('Event Reason').isin(FAILURE_EVENT_REASONS), 'pod_failure', 0.85,
+         details={'event_reason': 'Event Reason', 'event_message': 'Event Message'}),
+    Rule('network_issue', (Col('Network Receive Packets Dropped (p/s)') > 0) |
+         (Col('Network Transmit Packets Dropped (p/s)') > 0), 'network_issue', 0.70,
+         details={'dropped_rx': 'Network Receive Packets Dropped (p/s)',
+                  'dropped_tx': 'Network Transmit Packets Dropped (p/s)'}),
+    Rule('container_failure', (Text('Container State') == 'terminated') & (Col('Exit Code') != 0),
+         'container_failure', 0.90,
+         details={'exit_code': 'Exit Code', 'container_state': 'Container State'}),
+], combine='max', default_type='none', default_probability=0.0)
+
+# Remediation priority: weights are summed across groups, first match within a group
+PRIORITY_RULES = RuleTable([
+    Rule('critical_event', Text('Event Reason').isin(['OOMKilled', 'BackOff', 'CrashLoopBackOff', 'Failed']),
+         priority=40, group='event'),
+    Rule('important_event', Text('Event Reason').isin(['Unhealthy', 'NodeNotReady', 'FailedMount']),
+         priority=30, group='event'),
+    Rule('warning_event', Text('Event Reason').nonempty(), priority=20, group='event'),
+
+    Rule('event_age_5m', (Col('Event Age (minutes)') > 0) & (Col('Event Age (minutes)') <= 5),
+         priority=15, group='event_age'),
+    Rule('event_age_30m', (Col('Event Age (minutes)') > 5) & (Col('Event Age (minutes)') <= 30),
+         priority=10, group='event_age'),
+    Rule('event_age_2h', (Col('Event Age (minutes)') > 30) & (Col('Event Age (minutes)') <= 120),
+         priority=5, group='event_age'),
+
+    Rule('event_count_10', Col('Event Count') >= 10, priority=15, group='event_count'),
+    Rule('event_count_5', Col('Event Count') >= 5, priority=10, group='event_count'),
+    Rule('event_count_3', Col('Event Count') >= 3, priority=5, group='event_count'),
+
+    Rule('restarts_10', Col('Pod Restarts') >= 10, priority=20, group='restarts'),
+    Rule('restarts_5', Col('Pod Restarts') >= 5, priority=15, group='restarts'),
+    Rule('restarts_2', Col('Pod Restarts') >= 2, priority=10, group='restarts'),
+
+    Rule('resources_95', (Col('CPU Usage (%)') >= 95) | (Col('Memory Usage (%)') >= 95), priority=15, group='resources'),
+    Rule('resources_85', (Col('CPU Usage (%)') >= 85) | (Col('Memory Usage (%)') >= 85), priority=10, group='resources'),
+    Rule('resources_75', (Col('CPU Usage (%)') >= 75) | (Col('Memory Usage (%)') >= 75), priority=5, group='resources'),
+
+    Rule('drops_10', (Col('Network Receive Packets Dropped (p/s)') > 10) |
+         (Col('Network Transmit Packets Dropped (p/s)') > 10), priority=10, group='network'),
+    Rule('drops_any', (Col('Network Receive Packets Dropped (p/s)') > 0) |
+         (Col('Network Transmit Packets Dropped (p/s)') > 0), priority=5, group='network'),
+], max_priority=100)
+
+# Suggested remediation action, evaluated over metrics plus an 'anomaly_type' column
+REMEDIATION_RULES = RuleTable([
+    # A leak outgrows any limit; a restart buys the time until it is fixed
+    Rule('memory_leak', Text('anomaly_type') == 'memory_leak', action='restart_pod'),
+    Rule('memory', (Text('anomaly_type') == 'oom_risk') | (Col('Memory Usage (%)') > 85), action='increase_memory'),
+    Rule('cpu', (Text('anomaly_type') == 'resource_exhaustion') | (Col('CPU Usage (%)') > 85), action='increase_cpu'),
+    Rule('restart', (Text('anomaly_type') == 'crash_loop') | (Col('Pod Restarts') > 2), action='restart_pod'),
+    Rule('deployment', Text('anomaly_type') == 'deployment_issue', action='restart_deployment'),
+    Rule('scaling', Text('anomaly_type') == 'scaling_issue', action='scale_deployment'),
+], default_action='restart_pod')
+
+
+def rule_predictions(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Apply DETECTION_RULES to a batch of pods.
+
+    Returns:
+        List of prediction dictionaries in the format of rule_based_prediction
+    """
+    result = DETECTION_RULES.evaluate(records)
+    return [
+        {
+            'predicted_anomaly': int(result.matched[i]),
+            'anomaly_probability': float(result.probability[i]),
+            'anomaly_type': result.anomaly_type[i],
+        }
+        for i in range(len(records))
+    ]
+
+
+def evaluate_cluster(pod_metrics: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Score every pod of a cluster with POD_ANOMALY_RULES and PRIORITY_RULES in one pass.
+
+    Args:
+        pod_metrics: Dictionary mapping pod names to their latest metrics
+
+    Returns:
+        Dictionary mapping pod names to {'is_anomaly', 'prediction', 'priority'}
+    """
+    pod_names = list(pod_metrics.keys())
+    records = [pod_metrics[name] for name in pod_names]
+    batch = PodBatch(records)
+    anomalies = POD_ANOMALY_RULES.evaluate(batch)
+    priorities = PRIORITY_RULES.evaluate(batch)
+
+    results = {}
+    for i, pod_name in enumerate(pod_names):
+        is_anomaly = bool(anomalies.matched[i])
+        details = {}
+        if is_anomaly:
+            metrics = records[i]
+            for rule in POD_ANOMALY_RULES.rules:
+                if rule.details and anomalies.masks[rule.name][i]:
+                    for key, column in rule.details.items():
+                        details[key] = metrics.get(column, '' if column in ('Command', 'Event Message') else 0)
+                    if rule.description:
+                        details['description'] = rule.description
+        results[pod_name] = {
+            'is_anomaly': is_anomaly,
+            'prediction': {
+                'predicted_anomaly': 1 if is_anomaly else 0,
+                'anomaly_probability': float(anomalies.probability[i]),
+                'anomaly_type': anomalies.anomaly_type[i],
+                'details': details,
+            },
+            'priority': int(priorities.priority[i]),
+        }
+    return results
+
+
+def pod_priorities(records: List[Dict[str, Any]]) -> np.ndarray:
+    """Return PRIORITY_RULES scores (0-100) for a batch of pods"""
+    return PRIORITY_RULES.evaluate(records).priority.astype(int)
+
+
+def suggest_remediation_actions(anomaly_types: List[str], records: List[Dict[str, Any]]) -> List[str]:
+    """Return the REMEDIATION_RULES action for each (anomaly type, metrics) pair"""
+    batch = [{**metrics, 'anomaly_type': anomaly_type} for anomaly_type, metrics in zip(anomaly_types, records)]
+    return list(REMEDIATION_RULES.evaluate(batch).action)
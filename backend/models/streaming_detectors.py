@@ -0,0 +1,398 @@
+"""
+Streaming Statistical Detectors
+
+This module provides the cheap first stage of the detection cascade. Running
+baselines of the metrics are kept per baseline key, and every new sample is
+checked against them in O(1) time with respect to the history:
+
+- WelfordZScore: distance from the running mean in running standard deviations,
+  taken from the hour-of-day profile (SeasonalProfile) once the hour is warm
+- RollingMAD: distance from the median of a short window in robust (MAD) units
+- EWMAResidual: residual from an exponentially weighted forecast, scaled by
+  the exponentially weighted residual deviation
+
+A metric counts as deviating when at least two of the three detectors agree.
+
+The baseline key defaults to the pod name. Pod names change on every restart
+and rollout, so callers usually key baselines by owner workload instead: all
+replicas then update and are scored against one shared baseline, which
+survives pod churn and takes 1/replicas of the memory.
+`StatisticalPrefilter` combines the detectors with the heuristic rule table
+from rule_engine.py. Only pods that deviate from their own baseline, or that
+show suspicious events or states, are escalated to the sequence model.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+
+try:
+    from .rule_engine import POD_ANOMALY_RULES
+    from .memory_forecaster import parse_timestamp
+except ImportError:
+    from rule_engine import POD_ANOMALY_RULES
+    from memory_forecaster import parse_timestamp
+
+logger = logging.getLogger("streaming-detectors")
+
+# Metrics the first stage watches, in array order
+PREFILTER_FEATURES = [
+    'CPU Usage (%)', 'Memory Usage (%)', 'Memory Usage (MB)', 'Pod Restarts',
+    'Network Receive Packets Dropped (p/s)', 'Network Transmit Packets Dropped (p/s)',
+]
+
+# Robust consistency constant turning a MAD into a standard deviation estimate
+MAD_SCALE = 1.4826
+
+# Hour-of-day buckets of the seasonal profile
+SEASON_BUCKETS = 24
+
+
+def _to_float(value):
+    """Convert a metric value to float, mapping missing/invalid values to 0"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if np.isnan(value) else value
+
+
+def _deviation_floor(center, relative_floor, absolute_floor):
+    """Smallest spread used for scaling, so flat baselines do not divide by zero"""
+    return np.maximum(np.abs(center) * relative_floor, absolute_floor)
+
+
+def season_of(metrics: Dict[str, Any]) -> Optional[int]:
+    """Hour-of-day bucket of a sample (None without a usable 'Timestamp')"""
+    timestamp = parse_timestamp(metrics.get('Timestamp'))
+    if timestamp is None:
+        return None
+    return int(timestamp // 3600) % SEASON_BUCKETS
+
+
+class WelfordZScore:
+    """Running mean/variance (Welford) z-score per feature"""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def score(self, x, relative_floor, absolute_floor):
+        """Absolute z-score of a sample against the current baseline"""
+        std = np.sqrt(self.m2 / self.count) if self.count > 1 else np.zeros_like(self.mean)
+        std = np.maximum(std, _deviation_floor(self.mean, relative_floor, absolute_floor))
+        return np.abs(x - self.mean) / std
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+
+class SeasonalProfile:
+    """Running mean/variance (Welford) per feature for each hour of the day"""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, n_features, buckets=SEASON_BUCKETS):
+        self.count = np.zeros(buckets, dtype=np.int64)
+        self.mean = np.zeros((buckets, n_features))
+        self.m2 = np.zeros((buckets, n_features))
+
+    def score(self, x, bucket, relative_floor, absolute_floor):
+        """Absolute z-score of a sample against the profile of its hour"""
+        count, mean = self.count[bucket], self.mean[bucket]
+        std = np.sqrt(self.m2[bucket] / count) if count > 1 else np.zeros_like(mean)
+        std = np.maximum(std, _deviation_floor(mean, relative_floor, absolute_floor))
+        return np.abs(x - mean) / std
+
+    def update(self, x, bucket):
+        self.count[bucket] += 1
+        delta = x - self.mean[bucket]
+        self.mean[bucket] += delta / self.count[bucket]
+        self.m2[bucket] += delta * (x - self.mean[bucket])
+
+
+class RollingMAD:
+    """Median absolute deviation over a fixed window of recent samples"""
+
+    __slots__ = ('window', 'count', '_buffer', '_pos')
+
+    def __init__(self, n_features, window=30):
+        self.window = window
+        self.count = 0
+        self._buffer = np.zeros((window, n_features))
+        self._pos = 0
+
+    def score(self, x, relative_floor, absolute_floor):
+        """Absolute robust z-score of a sample against the window"""
+        if self.count == 0:
+            return np.zeros_like(x)
+        values = self._buffer[:min(self.count, self.window)]
+        median = np.median(values, axis=0)
+        mad = MAD_SCALE * np.median(np.abs(values - median), axis=0)
+        mad = np.maximum(mad, _deviation_floor(median, relative_floor, absolute_floor))
+        return np.abs(x - median) / mad
+
+    def update(self, x):
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        self.count += 1
+
+
+class EWMAResidual:
+    """Residual from an exponentially weighted forecast"""
+
+    __slots__ = ('alpha', 'count', 'level', 'variance')
+
+    def __init__(self, n_features, alpha=0.1):
+        self.alpha = alpha
+        self.count = 0
+        self.level = np.zeros(n_features)
+        self.variance = np.zeros(n_features)
+
+    def score(self, x, relative_floor, absolute_floor):
+        """Absolute forecast residual in units of the smoothed residual deviation"""
+        if self.count == 0:
+            return np.zeros_like(x)
+        std = np.maximum(np.sqrt(self.variance), _deviation_floor(self.level, relative_floor, absolute_floor))
+        return np.abs(x - self.level) / std
+
+    def update(self, x):
+        if self.count == 0:
+            self.level = np.array(x, dtype=np.float64)
+        else:
+            residual = x - self.level
+            self.level = self.level + self.alpha * residual
+            self.variance = (1 - self.alpha) * (self.variance + self.alpha * residual * residual)
+        self.count += 1
+
+
+class Baseline:
+    """Detector state of one baseline key, shared by the pods mapped to it"""
+
+    __slots__ = ('zscore', 'seasonal', 'mad', 'ewma', 'count', 'pods')
+
+    def __init__(self, n_features, window, alpha):
+        self.zscore = WelfordZScore(n_features)
+        self.seasonal = SeasonalProfile(n_features)
+        self.mad = RollingMAD(n_features, window)
+        self.ewma = EWMAResidual(n_features, alpha)
+        self.count = 0
+        self.pods = set()  # Pods currently scored against this baseline
+
+
+class PodCursor:
+    """The per-pod state of the statistical prefilter"""
+
+    __slots__ = ('key', 'last_timestamp', 'hold')
+
+    def __init__(self, key):
+        self.key = key  # Baseline key of the pod
+        self.last_timestamp = None
+        # Remaining screens for which a recently flagged pod stays escalated
+        self.hold = 0
+
+
+class ScreenResult(NamedTuple):
+    """Outcome of screening one pod"""
+    escalate: bool
+    reasons: List[str]
+
+
+class StatisticalPrefilter:
+    """First cascade stage deciding which pods need the sequence model"""
+
+    def __init__(self, features=None, z_threshold=4.0, mad_threshold=5.0, ewma_threshold=4.0,
+                 min_votes=2, warmup_samples=10, window=30, alpha=0.1, hold_screens=3,
+                 relative_floor=0.01, absolute_floor=1e-3,
+                 baseline_key: Optional[Callable[[str, Dict[str, Any]], str]] = None):
+        """
+        Args:
+            features: Metric names to watch (defaults to PREFILTER_FEATURES)
+            z_threshold: Welford z-score above which a sample is flagged
+            mad_threshold: Robust MAD z-score above which a sample is flagged
+            ewma_threshold: EWMA residual z-score above which a sample is flagged
+            min_votes: Number of detectors that must agree before a metric
+                       counts as deviating (filters single-detector noise)
+            warmup_samples: Samples a pod needs before its baseline is trusted;
+                            pods are escalated until then
+            window: Number of recent samples used by the MAD detector
+            alpha: Smoothing factor of the EWMA detector
+            hold_screens: Screens a flagged pod stays escalated for, so the
+                          model also sees its recovery
+            relative_floor: Minimum spread as a fraction of the baseline level
+            absolute_floor: Minimum spread in metric units
+            baseline_key: Function mapping (pod name, metrics) to the key of
+                          the baseline the pod shares, e.g. its owner workload
+                          (defaults to one baseline per pod)
+        """
+        self.features = list(features or PREFILTER_FEATURES)
+        self.z_threshold = z_threshold
+        self.mad_threshold = mad_threshold
+        self.ewma_threshold = ewma_threshold
+        self.min_votes = min_votes
+        self.warmup_samples = warmup_samples
+        self.window = window
+        self.alpha = alpha
+        self.hold_screens = hold_screens
+        self.relative_floor = relative_floor
+        self.absolute_floor = absolute_floor
+        self.baseline_key = baseline_key
+        self.baselines: Dict[str, Baseline] = {}
+        self.pods: Dict[str, PodCursor] = {}
+        self.stats = {'screened': 0, 'escalated': 0, 'samples': 0}
+
+    def _vector(self, metrics):
+        return np.array([_to_float(metrics.get(f, 0)) for f in self.features], dtype=np.float64)
+
+    def _cursor(self, pod_name, metrics):
+        """Cursor of a pod, attached to the baseline its latest metrics map to"""
+        key = self.baseline_key(pod_name, metrics) if self.baseline_key is not None else pod_name
+        cursor = self.pods.get(pod_name)
+        if cursor is None:
+            cursor = PodCursor(key)
+            self.pods[pod_name] = cursor
+        elif cursor.key != key:
+            self._detach(pod_name, cursor.key)
+            cursor.key = key
+        baseline = self.baselines.get(key)
+        if baseline is None:
+            baseline = Baseline(len(self.features), self.window, self.alpha)
+            self.baselines[key] = baseline
+        baseline.pods.add(pod_name)
+        return cursor
+
+    def _detach(self, pod_name, key):
+        baseline = self.baselines.get(key)
+        if baseline is not None:
+            baseline.pods.discard(pod_name)
+            if not baseline.pods:
+                del self.baselines[key]
+
+    def baseline_of(self, pod_name) -> Optional[Baseline]:
+        """Baseline a pod is scored against (None for unknown pods)"""
+        cursor = self.pods.get(pod_name)
+        return self.baselines.get(cursor.key) if cursor is not None else None
+
+    def observe(self, pod_name, metrics):
+        """
+        Score one sample against the pod's baseline, then fold it in.
+
+        The z-score uses the hour-of-day profile once that hour has seen
+        `warmup_samples` samples, and the all-day statistics before that.
+
+        Args:
+            pod_name: Name of the pod
+            metrics: Dictionary of pod metrics for one sample
+
+        Returns:
+            List of reasons the sample deviates (empty if it looks normal)
+        """
+        baseline = self.baselines[self._cursor(pod_name, metrics).key]
+        x = self._vector(metrics)
+        season = season_of(metrics)
+        reasons = []
+        if baseline.count >= self.warmup_samples:
+            floors = (self.relative_floor, self.absolute_floor)
+            if season is not None and baseline.seasonal.count[season] >= self.warmup_samples:
+                zscore = baseline.seasonal.score(x, season, *floors)
+            else:
+                zscore = baseline.zscore.score(x, *floors)
+            votes = ((zscore > self.z_threshold).astype(int) +
+                     (baseline.mad.score(x, *floors) > self.mad_threshold) +
+                     (baseline.ewma.score(x, *floors) > self.ewma_threshold))
+            reasons.extend(f"deviation:{self.features[i]}" for i in np.nonzero(votes >= self.min_votes)[0])
+
+        baseline.zscore.update(x)
+        if season is not None:
+            baseline.seasonal.update(x, season)
+        baseline.mad.update(x)
+        baseline.ewma.update(x)
+        baseline.count += 1
+        self.stats['samples'] += 1
+        return reasons
+
+    def observe_history(self, pod_name, history):
+        """
+        Observe the samples of a pod history that have not been seen yet.
+
+        Like the streaming engine, samples are deduplicated by their
+        'Timestamp' so callers can pass overlapping histories.
+
+        Returns:
+            Reasons collected over all new samples
+        """
+        if not history:
+            return []
+        cursor = self._cursor(pod_name, history[-1])
+        start = len(history)
+        if cursor.last_timestamp is None:
+            start = max(0, len(history) - max(self.window, self.warmup_samples))
+        else:
+            while start > 0:
+                timestamp = history[start - 1].get('Timestamp')
+                if timestamp is None or str(timestamp) <= cursor.last_timestamp:
+                    break
+                start -= 1
+
+        reasons = []
+        for sample in history[start:]:
+            reasons.extend(self.observe(pod_name, sample))
+            timestamp = sample.get('Timestamp')
+            if timestamp is not None:
+                cursor.last_timestamp = str(timestamp)
+        return reasons
+
+    def screen(self, pod_histories: Dict[str, List[Dict[str, Any]]]) -> Dict[str, ScreenResult]:
+        """
+        Decide which pods go on to the sequence model.
+
+        A pod is escalated if any new sample deviates from its baseline,
+        the baseline is still warming up, the heuristic rule table flags its
+        latest metrics (events, restarts, saturation, drops, terminations),
+        or it was flagged within the last `hold_screens` screens.
+
+        Args:
+            pod_histories: Dictionary mapping pod names to metric histories
+
+        Returns:
+            Dictionary mapping every pod name to a ScreenResult
+        """
+        pod_names = list(pod_histories.keys())
+        if not pod_names:
+            return {}
+        rules = POD_ANOMALY_RULES.evaluate([pod_histories[name][-1] for name in pod_names])
+
+        results = {}
+        for index, pod_name in enumerate(pod_names):
+            reasons = self.observe_history(pod_name, pod_histories[pod_name])
+            cursor = self.pods[pod_name]
+            if rules.matched[index]:
+                reasons.append(f"rule:{rules.anomaly_type[index]}")
+            if self.baselines[cursor.key].count <= self.warmup_samples:
+                reasons.append("warmup")
+
+            if reasons:
+                cursor.hold = self.hold_screens
+            elif cursor.hold > 0:
+                cursor.hold -= 1
+                reasons.append("hold")
+
+            results[pod_name] = ScreenResult(bool(reasons), reasons)
+
+        escalated = sum(1 for result in results.values() if result.escalate)
+        self.stats['screened'] += len(results)
+        self.stats['escalated'] += escalated
+        logger.debug(f"Prefilter escalated {escalated}/{len(results)} pods")
+        return results
+
+    def forget(self, pod_name):
+        """Drop the state of a pod that no longer exists, and its baseline once no pod uses it"""
+        cursor = self.pods.pop(pod_name, None)
+        if cursor is not None:
+            self._detach(pod_name, cursor.key)
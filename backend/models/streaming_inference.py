@@ -0,0 +1,583 @@
+"""
+Streaming Inference Engine
+
+This module scores pods with the trained LSTM sequence model as new samples
+arrive. It keeps a fixed-size window of the last `seq_length` scaled samples
+per pod, so each new sample costs one incremental window update instead of
+rebuilding the pod's history. Windows are scaled with the persisted scaler
+(scaler.pkl) and scored against the persisted threshold
+(anomaly_threshold.pkl) produced by utils/lstmmodel.py. When the model has
+been exported for the NumPy runtime (lstm_runtime.py), the scaler and
+threshold embedded in the archive are used and TensorFlow is not imported.
+When a version has been published to the versioned artifact store
+(model_versions.py), that version is loaded, and engines created from the
+model registry switch to newly published versions without a restart.
+
+In stateful mode the engine also keeps each pod's LSTM hidden and cell state
+and advances it by a single timestep per new sample, rescoring the full window
+every `resync_interval` samples to bound drift from the windowed semantics the
+model was trained with.
+"""
+
+import os
+import logging
+from typing import Any, NamedTuple, Optional
+import numpy as np
+
+try:
+    from .anomaly_prediction import classify_anomaly
+    from .lstm_runtime import NumpyLSTMModel
+    from .model_registry import registry
+    from .model_versions import ModelVersionStore
+except ImportError:
+    from anomaly_prediction import classify_anomaly
+    from lstm_runtime import NumpyLSTMModel
+    from model_registry import registry
+    from model_versions import ModelVersionStore
+
+logger = logging.getLogger("streaming-inference")
+
+# Features used to train the LSTM, in training order (must match utils/lstmmodel.py)
+TRAINING_FEATURES = [
+    'CPU Usage (%)', 'Memory Usage (%)', 'Pod Restarts',
+    'Memory Usage (MB)', 'Network Receive Bytes', 'Network Transmit Bytes',
+    'FS Reads Total (MB)', 'FS Writes Total (MB)',
+    'Network Receive Packets Dropped (p/s)', 'Network Transmit Packets Dropped (p/s)',
+    'Ready Containers'
+]
+
+# Sequence length used at training time
+DEFAULT_SEQUENCE_LENGTH = 10
+
+# Samples advanced by single recurrent steps before a pod is rescored from its full window
+DEFAULT_RESYNC_INTERVAL = 5 * DEFAULT_SEQUENCE_LENGTH
+
+# Locations of the artifacts written by the training script
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts")
+MODEL_FILE = "lstm_anomaly_model.h5"
+RUNTIME_MODEL_FILE = "lstm_anomaly_model.npz"
+SCALER_FILE = "scaler.pkl"
+THRESHOLD_FILE = "anomaly_threshold.pkl"
+
+
+def _to_float(value):
+    """Convert a metric value to float, mapping missing/invalid values to 0"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if np.isnan(value) else value
+
+
+class SequenceModelArtifacts(NamedTuple):
+    """Trained sequence model together with its preprocessing parameters"""
+    model: Any
+    scaler: Any
+    threshold: float
+    seq_length: int
+    version: Optional[str] = None
+
+    def warmup(self):
+        """Run one dummy forward pass through the model"""
+        dummy = np.zeros((1, self.seq_length, len(TRAINING_FEATURES)), dtype=np.float32)
+        if hasattr(self.model, 'predict_on_batch'):
+            self.model.predict_on_batch(dummy)
+        else:
+            self.model.predict(dummy, verbose=0)
+
+
+def load_sequence_artifacts(artifacts_dir=ARTIFACTS_DIR, seq_length=DEFAULT_SEQUENCE_LENGTH, version=None):
+    """
+    Load the sequence model, scaler and threshold written by the training script.
+
+    The published version of the versioned artifact store is used when there
+    is one; otherwise the unversioned files directly in `artifacts_dir`.
+
+    Args:
+        artifacts_dir: Directory containing the model, scaler and threshold
+        seq_length: Fallback number of timesteps if the model does not declare one
+        version: Specific stored version to load (defaults to the published one)
+
+    Returns:
+        SequenceModelArtifacts, or None if the artifacts are missing
+    """
+    store = ModelVersionStore(artifacts_dir)
+    version = version or store.current_version()
+    if version is not None:
+        return _load_artifacts_from_dir(store.version_dir(version), seq_length, version)
+    return _load_artifacts_from_dir(artifacts_dir, seq_length)
+
+
+def _load_artifacts_from_dir(artifacts_dir, seq_length, version=None):
+    """
+    Load a model bundle from one directory.
+
+    The exported NumPy runtime archive is preferred, in which case the scaler
+    and threshold embedded in it are used and TensorFlow is not imported.
+    """
+    runtime_path = os.path.join(artifacts_dir, RUNTIME_MODEL_FILE)
+    model_path = os.path.join(artifacts_dir, MODEL_FILE)
+    scaler_path = os.path.join(artifacts_dir, SCALER_FILE)
+    threshold_path = os.path.join(artifacts_dir, THRESHOLD_FILE)
+
+    model = scaler = threshold = None
+    if os.path.exists(runtime_path):
+        try:
+            model = NumpyLSTMModel.load(runtime_path)
+            scaler, threshold = model.scaler, model.threshold
+        except Exception as e:
+            logger.error(f"Failed to load NumPy runtime model from {runtime_path}: {e}")
+            model = None
+
+    if model is None:
+        if not os.path.exists(model_path):
+            logger.info(f"Streaming inference model not found in {artifacts_dir}")
+            return None
+        try:
+            from tensorflow.keras.models import load_model
+            model = load_model(model_path)
+        except Exception as e:
+            logger.error(f"Failed to load streaming inference model from {model_path}: {e}")
+            return None
+
+    # Fill in whatever the archive did not embed from the pickled artifacts
+    try:
+        if scaler is None or threshold is None:
+            import joblib
+            if scaler is None and os.path.exists(scaler_path):
+                scaler = joblib.load(scaler_path)
+            if threshold is None and os.path.exists(threshold_path):
+                threshold = joblib.load(threshold_path)
+    except Exception as e:
+        logger.error(f"Failed to load scaler/threshold from {artifacts_dir}: {e}")
+        return None
+
+    if scaler is None or threshold is None:
+        logger.info(f"Streaming inference scaler/threshold not found in {artifacts_dir}")
+        return None
+
+    # Prefer the sequence length the model was built with
+    try:
+        seq_length = int(model.input_shape[1]) or seq_length
+    except Exception:
+        pass
+
+    logger.info(f"Loaded streaming inference artifacts from {artifacts_dir} "
+                f"(version={version}, seq_length={seq_length}, threshold={float(threshold):.4f})")
+    return SequenceModelArtifacts(model, scaler, float(threshold), seq_length, version)
+
+
+# Registry name of the trained sequence model bundle; the registry reloads it
+# when a new version is published to the artifact store
+SEQUENCE_MODEL_NAME = "lstm"
+registry.register(SEQUENCE_MODEL_NAME, load_sequence_artifacts,
+                  revision_fn=ModelVersionStore(ARTIFACTS_DIR).current_version)
+
+
+class PodWindow:
+    """Fixed-size sliding window of scaled samples for a single pod"""
+
+    __slots__ = ('seq_length', 'count', 'last_timestamp', 'last_sample', 'history_length', '_buffer', '_pos')
+
+    def __init__(self, seq_length, n_features):
+        self.seq_length = seq_length
+        self.count = 0
+        self.last_timestamp = None
+        # Without timestamps, push_history finds its place in the next history
+        # by the last sample it consumed, or else by the history's length
+        self.last_sample = None
+        self.history_length = 0
+        # Every sample is written twice so the current window is always
+        # one contiguous slice of the buffer (no roll/concatenate on read)
+        self._buffer = np.zeros((2 * seq_length, n_features), dtype=np.float32)
+        self._pos = 0
+
+    def push(self, row):
+        """Append a scaled sample, evicting the oldest one when full"""
+        self._buffer[self._pos] = row
+        self._buffer[self._pos + self.seq_length] = row
+        self._pos = (self._pos + 1) % self.seq_length
+        self.count += 1
+
+    @property
+    def ready(self):
+        """Whether the window holds a full sequence"""
+        return self.count >= self.seq_length
+
+    def view(self):
+        """Return the window in chronological order, shape (seq_length, features)"""
+        return self._buffer[self._pos:self._pos + self.seq_length]
+
+
+class PodRecurrentState:
+    """LSTM state of a pod carried between samples in stateful mode"""
+
+    __slots__ = ('state', 'score', 'pending', 'since_sync')
+
+    def __init__(self, state, score):
+        # One (h, c) tuple of 1-D arrays per LSTM layer
+        self.state = state
+        self.score = score
+        # Samples pushed but not yet folded into the state
+        self.pending = 0
+        # Samples folded in by single steps since the last full-window pass
+        self.since_sync = 0
+
+
+class StreamingInferenceEngine:
+    """Scores pods incrementally using per-pod sliding windows"""
+
+    def __init__(self, model, scaler=None, threshold=0.5,
+                 seq_length=DEFAULT_SEQUENCE_LENGTH, features=None,
+                 stateful=False, resync_interval=DEFAULT_RESYNC_INTERVAL):
+        """
+        Initialize the streaming inference engine.
+
+        Args:
+            model: Sequence model exposing predict/predict_on_batch
+            scaler: Fitted scaler applied to each sample (e.g. MinMaxScaler)
+            threshold: Anomaly score threshold
+            seq_length: Number of timesteps per window
+            features: Ordered list of feature names fed to the model
+            stateful: Advance each pod's LSTM state one step per new sample
+                      instead of rescoring the whole window (requires a model
+                      exposing predict_with_state/step, e.g. NumpyLSTMModel)
+            resync_interval: In stateful mode, rescore a pod from its full
+                             window after this many single-step updates
+        """
+        self.model = model
+        self.threshold = float(threshold)
+        self.seq_length = int(seq_length)
+        self.features = list(features or TRAINING_FEATURES)
+        self.windows = {}
+
+        self.stateful = bool(stateful) and getattr(model, 'supports_step', False)
+        if stateful and not self.stateful:
+            logger.warning("Model does not support single-step updates, using windowed inference")
+        self.resync_interval = max(1, int(resync_interval))
+        self.recurrent_states = {}
+
+        # Set by from_registry so newly published model versions are picked up
+        self.bundle = None
+        self._registry_key = None
+
+        # MinMaxScaler.transform is x * scale_ + min_; applying it directly
+        # avoids sklearn's per-call validation overhead on single rows
+        self._scaler = scaler
+        self._scale = getattr(scaler, 'scale_', None)
+        self._min = getattr(scaler, 'min_', None)
+        if self._scale is not None and self._min is not None:
+            self._scale = np.asarray(self._scale, dtype=np.float32)
+            self._min = np.asarray(self._min, dtype=np.float32)
+
+    @classmethod
+    def from_artifacts(cls, artifacts_dir=ARTIFACTS_DIR, seq_length=DEFAULT_SEQUENCE_LENGTH, **kwargs):
+        """
+        Build an engine from the artifacts saved by the training script.
+
+        Args:
+            artifacts_dir: Directory containing the model, scaler and threshold
+            seq_length: Number of timesteps per window
+            **kwargs: Extra engine options (stateful, resync_interval)
+
+        Returns:
+            StreamingInferenceEngine instance, or None if artifacts are missing
+        """
+        return cls.from_bundle(load_sequence_artifacts(artifacts_dir, seq_length), **kwargs)
+
+    @classmethod
+    def from_registry(cls, name=None, version=None, **kwargs):
+        """
+        Build an engine around the sequence model held by the model registry.
+
+        The model is shared with every other engine in the process and is
+        loaded on first use; each engine keeps its own per-pod windows.
+
+        Returns:
+            StreamingInferenceEngine instance, or None if the model is unavailable
+        """
+        engine = cls.from_bundle(registry.get(name or SEQUENCE_MODEL_NAME, version), **kwargs)
+        if engine is not None:
+            engine._registry_key = (name or SEQUENCE_MODEL_NAME, version)
+        return engine
+
+    @classmethod
+    def from_bundle(cls, artifacts, **kwargs):
+        """Build an engine from a SequenceModelArtifacts bundle (None passes through)"""
+        if artifacts is None:
+            return None
+        engine = cls(artifacts.model, scaler=artifacts.scaler, threshold=artifacts.threshold,
+                     seq_length=artifacts.seq_length, **kwargs)
+        engine.bundle = artifacts
+        return engine
+
+    def swap_bundle(self, artifacts):
+        """
+        Switch to another model bundle without dropping the per-pod windows.
+
+        Windows hold scaled samples, so they are converted from the old
+        scaler to the new one when both are MinMax-style; otherwise (or if
+        the sequence length changed) the windows restart. Carried recurrent
+        state always belongs to the old weights and is dropped, so stateful
+        pods resynchronize from their windows on the next score.
+
+        Args:
+            artifacts: New SequenceModelArtifacts bundle
+        """
+        old_scale, old_min = self._scale, self._min
+        new_scale = getattr(artifacts.scaler, 'scale_', None)
+        new_min = getattr(artifacts.scaler, 'min_', None)
+
+        same_length = int(artifacts.seq_length) == self.seq_length
+        rescalable = same_length and old_scale is not None and new_scale is not None and new_min is not None
+        unscaled = same_length and self._scaler is None and artifacts.scaler is None
+        if unscaled:
+            pass
+        elif rescalable:
+            new_scale = np.asarray(new_scale, dtype=np.float32)
+            new_min = np.asarray(new_min, dtype=np.float32)
+            for window in self.windows.values():
+                raw = (window._buffer - old_min) / old_scale
+                window._buffer[:] = raw * new_scale + new_min
+        else:
+            self.windows = {}
+
+        self.model = artifacts.model
+        self.threshold = float(artifacts.threshold)
+        self.seq_length = int(artifacts.seq_length)
+        self._scaler = artifacts.scaler
+        self._scale, self._min = (new_scale, new_min) if new_scale is not None and new_min is not None else (None, None)
+        self.stateful = self.stateful and getattr(artifacts.model, 'supports_step', False)
+        self.recurrent_states = {}
+        self.bundle = artifacts
+        logger.info(f"Streaming engine switched to model version {artifacts.version} "
+                    f"({'reset' if not self.windows else 'kept'} pod windows)")
+
+    def _sync_with_registry(self):
+        """Pick up a model version the registry has swapped in since the last score"""
+        if self._registry_key is None:
+            return
+        current = registry.get(*self._registry_key)
+        if current is not None and current is not self.bundle:
+            self.swap_bundle(current)
+
+    def _scale_sample(self, metrics):
+        """Extract and scale the model features from a metrics record"""
+        row = np.array([_to_float(metrics.get(f, 0)) for f in self.features], dtype=np.float32)
+        if self._scale is not None:
+            return row * self._scale + self._min
+        if self._scaler is not None:
+            return np.asarray(self._scaler.transform(row.reshape(1, -1)), dtype=np.float32)[0]
+        return row
+
+    def push(self, pod_name, metrics):
+        """
+        Append a new sample to a pod's window.
+
+        Samples whose timestamp is not newer than the last accepted one are
+        ignored, so callers can pass overlapping histories safely.
+
+        Args:
+            pod_name: Name of the pod
+            metrics: Dictionary of pod metrics for one sample
+
+        Returns:
+            True if the sample was added to the window
+        """
+        window = self.windows.get(pod_name)
+        if window is None:
+            window = PodWindow(self.seq_length, len(self.features))
+            self.windows[pod_name] = window
+
+        timestamp = metrics.get('Timestamp')
+        if timestamp is not None and window.last_timestamp is not None and str(timestamp) <= window.last_timestamp:
+            return False
+
+        window.push(self._scale_sample(metrics))
+        if timestamp is not None:
+            window.last_timestamp = str(timestamp)
+        recurrent = self.recurrent_states.get(pod_name)
+        if recurrent is not None:
+            recurrent.pending += 1
+        return True
+
+    def push_history(self, pod_name, history):
+        """
+        Append the samples of a pod history that the window has not seen yet.
+
+        The history is scanned backwards from its newest sample, so only the
+        new tail is touched even when the caller passes the full history.
+        Samples without a 'Timestamp' are matched by identity with the last
+        sample consumed from the previous history; a rebuilt history only
+        contributes the samples beyond the previous history's length.
+
+        Args:
+            pod_name: Name of the pod
+            history: List of metric dictionaries in chronological order
+
+        Returns:
+            Number of samples added
+        """
+        window = self.windows.get(pod_name)
+        last_timestamp = window.last_timestamp if window is not None else None
+
+        start = len(history)
+        if last_timestamp is None and window is not None and window.last_sample is not None:
+            start = self._untimed_start(window, history)
+        elif last_timestamp is None:
+            start = max(0, len(history) - self.seq_length)
+        else:
+            while start > 0:
+                timestamp = history[start - 1].get('Timestamp')
+                if timestamp is None or str(timestamp) <= last_timestamp:
+                    break
+                start -= 1
+
+        added = sum(1 for sample in history[start:] if self.push(pod_name, sample))
+        if history:
+            window = self.windows[pod_name]
+            window.last_sample = history[-1]
+            window.history_length = len(history)
+        return added
+
+    def _untimed_start(self, window, history):
+        """Index of the first sample of a timestamp-less history not pushed yet"""
+        for index in range(len(history), 0, -1):
+            if history[index - 1] is window.last_sample:
+                return index
+        # The history was rebuilt: only samples beyond the consumed length are new
+        if len(history) <= window.history_length:
+            return len(history)
+        return max(window.history_length, len(history) - self.seq_length)
+
+    def is_ready(self, pod_name):
+        """Whether a pod has accumulated a full window"""
+        window = self.windows.get(pod_name)
+        return window is not None and window.ready
+
+    def _forward(self, X):
+        """Run a single forward pass over a stacked batch of windows"""
+        if hasattr(self.model, 'predict_on_batch'):
+            return np.asarray(self.model.predict_on_batch(X))
+        return np.asarray(self.model.predict(X, verbose=0))
+
+    def score(self, pod_names=None, latest_metrics=None):
+        """
+        Score the current window of each ready pod in one forward pass.
+
+        Args:
+            pod_names: Pods to score (defaults to all tracked pods)
+            latest_metrics: Optional mapping of pod name to latest raw metrics,
+                            used to label the anomaly type
+
+        Returns:
+            Dictionary mapping pod names to prediction results. Pods that
+            have not yet filled a window are omitted.
+        """
+        self._sync_with_registry()
+        if pod_names is None:
+            pod_names = list(self.windows.keys())
+        ready = [name for name in pod_names if self.is_ready(name)]
+        if not ready:
+            return {}
+
+        if self.stateful:
+            scores = self._score_stateful(ready)
+        else:
+            X = np.stack([self.windows[name].view() for name in ready])
+            scores = self._forward(X).reshape(len(ready), -1)[:, 0]
+
+        latest_metrics = latest_metrics or {}
+        results = {}
+        for pod_name, score in zip(ready, scores):
+            is_anomaly = score > self.threshold
+            metrics = latest_metrics.get(pod_name, {})
+            results[pod_name] = {
+                'predicted_anomaly': 1 if is_anomaly else 0,
+                'anomaly_probability': float(score),
+                'anomaly_type': classify_anomaly(metrics) if is_anomaly else 'unknown'
+            }
+        return results
+
+    def _score_stateful(self, ready):
+        """
+        Score ready pods by advancing their carried LSTM state.
+
+        Pods without a state, with a full window of unseen samples, or due for
+        resynchronization are scored from their full window in one batched
+        pass that also captures their state. The other pods advance their
+        state by one batched step per pending sample. Pods with no new
+        samples reuse their last score.
+        """
+        scores = np.empty(len(ready), dtype=np.float32)
+        resync, stepping = [], []
+        for index, pod_name in enumerate(ready):
+            recurrent = self.recurrent_states.get(pod_name)
+            if (recurrent is None or recurrent.pending >= self.seq_length or
+                    recurrent.since_sync + recurrent.pending >= self.resync_interval):
+                resync.append(index)
+            elif recurrent.pending:
+                stepping.append(index)
+            else:
+                scores[index] = recurrent.score
+
+        if resync:
+            X = np.stack([self.windows[ready[i]].view() for i in resync])
+            outputs, state = self.model.predict_with_state(X)
+            outputs = np.asarray(outputs).reshape(len(resync), -1)[:, 0]
+            for row, index in enumerate(resync):
+                state_row = [(h[row].copy(), c[row].copy()) for h, c in state]
+                self.recurrent_states[ready[index]] = PodRecurrentState(state_row, float(outputs[row]))
+                scores[index] = outputs[row]
+
+        if stepping:
+            pods = [self.recurrent_states[ready[i]] for i in stepping]
+            windows = [self.windows[ready[i]].view() for i in stepping]
+            for step in range(max(recurrent.pending for recurrent in pods)):
+                active = [k for k, recurrent in enumerate(pods) if recurrent.pending > step]
+                x = np.stack([windows[k][self.seq_length - pods[k].pending + step] for k in active])
+                state = [
+                    (np.stack([pods[k].state[layer][0] for k in active]),
+                     np.stack([pods[k].state[layer][1] for k in active]))
+                    for layer in range(len(pods[active[0]].state))
+                ]
+                outputs, state = self.model.step(x, state)
+                outputs = np.asarray(outputs).reshape(len(active), -1)[:, 0]
+                for row, k in enumerate(active):
+                    pods[k].state = [(h[row], c[row]) for h, c in state]
+                    pods[k].score = float(outputs[row])
+
+            for index, recurrent in zip(stepping, pods):
+                recurrent.since_sync += recurrent.pending
+                recurrent.pending = 0
+                scores[index] = recurrent.score
+
+        return scores
+
+    def update(self, pod_name, metrics):
+        """
+        Add one sample for a pod and score its window.
+
+        Returns:
+            Prediction dictionary, or None while the window is still filling
+        """
+        return self.update_many({pod_name: metrics}).get(pod_name)
+
+    def update_many(self, samples):
+        """
+        Add one new sample per pod and score all updated pods together.
+
+        Args:
+            samples: Dictionary mapping pod names to their newest metrics
+
+        Returns:
+            Dictionary mapping pod names to prediction results
+        """
+        for pod_name, metrics in samples.items():
+            self.push(pod_name, metrics)
+        return self.score(list(samples.keys()), latest_metrics=samples)
+
+    def forget(self, pod_name):
+        """Drop the window for a pod that no longer exists"""
+        self.windows.pop(pod_name, None)
+        self.recurrent_states.pop(pod_name, None)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Benchmark the anomaly inference paths on synthetic pod windows.
+
+Every path is timed at several batch sizes (number of pods scored per call):
+
+- rule_single:   rule_based_prediction called once per pod
+- rule_batch:    the vectorized rule table on all pods at once
+- pod_anomaly:   predict_pod_anomaly (cluster heuristics) called once per pod
+- cluster_rules: evaluate_cluster on all pods at once
+- model_single:  predict_anomalies called once per pod
+- model_batch:   predict_anomalies_local, one forward pass for all pods
+- streaming:     the streaming engine, one new sample per pod then score()
+
+For each path and batch size the p50/p99 latency per call, the throughput in
+pods per second and the peak traced memory (tracemalloc) are reported. The
+results are written as JSON. Passing --baseline compares p50 latency and
+peak memory against a previous run and exits with status 1 on a regression,
+so a CI job can gate on it.
+
+The model paths use the trained model artifacts when they exist and a model
+with random weights of the training architecture otherwise (--synthetic-model
+forces this), so the numbers do not depend on what was trained locally. The
+per-sample model and the streaming sequence model are resolved separately
+through the model registry, and the report records the source of each.
+
+Usage:
+    python benchmark_inference.py --output benchmark.json
+    python benchmark_inference.py --baseline benchmark.json --tolerance 0.25
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models')))
+
+from anomaly_prediction import (MODEL_FEATURES, MODEL_NAME, predict_anomalies, predict_anomalies_local,
+                                rule_based_prediction)
+from lstm_runtime import NumpyLSTMModel
+from model_registry import DEFAULT_VERSION, registry
+from rule_engine import evaluate_cluster, rule_predictions
+from streaming_inference import (DEFAULT_SEQUENCE_LENGTH, SEQUENCE_MODEL_NAME, TRAINING_FEATURES,
+                                 SequenceModelArtifacts, StreamingInferenceEngine)
+
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000]
+PATHS = ['rule_single', 'rule_batch', 'pod_anomaly', 'cluster_rules', 'model_single', 'model_batch', 'streaming']
+
+
+def synthetic_model(n_features, seq_length=DEFAULT_SEQUENCE_LENGTH, units=(64, 64), dense_units=32, seed=0):
+    """NumPy LSTM with random weights and the layer sizes of utils/lstmmodel.py"""
+    rng = np.random.default_rng(seed)
+    layers = []
+    inputs = n_features
+    for index, layer_units in enumerate(units):
+        layers.append({
+            'type': 'LSTM',
+            'config': {'units': layer_units, 'activation': 'tanh', 'recurrent_activation': 'sigmoid',
+                       'return_sequences': index < len(units) - 1},
+            'kernel': rng.normal(scale=0.1, size=(inputs, 4 * layer_units)).astype(np.float32),
+            'recurrent_kernel': rng.normal(scale=0.1, size=(layer_units, 4 * layer_units)).astype(np.float32),
+            'bias': np.zeros(4 * layer_units, dtype=np.float32),
+        })
+        inputs = layer_units
+    for size, activation in ((dense_units, 'relu'), (1, 'sigmoid')):
+        layers.append({'type': 'Dense', 'config': {'activation': activation},
+                       'kernel': rng.normal(scale=0.1, size=(inputs, size)).astype(np.float32),
+                       'bias': np.zeros(size, dtype=np.float32)})
+        inputs = size
+    return NumpyLSTMModel(layers, (None, seq_length, n_features))
+
+
+def synthetic_histories(n_pods, seq_length=DEFAULT_SEQUENCE_LENGTH, anomaly_rate=0.05, seed=0):
+    """
+    Generate metric histories for `n_pods` pods.
+
+    Returns:
+        Dictionary mapping pod names to lists of `seq_length` metric dicts
+    """
+    rng = np.random.default_rng(seed)
+    histories = {}
+    for p in range(n_pods):
+        anomalous = rng.random() < anomaly_rate
+        cpu_level, mem_level = rng.uniform(5, 60), rng.uniform(10, 70)
+        history = []
+        for t in range(seq_length):
+            history.append({
+                'Timestamp': f'2024-01-01 00:{t // 60:02d}:{t % 60:02d}',
+                'Pod Name': f'pod-{p}',
+                'CPU Usage (%)': float(min(100, cpu_level + rng.normal(0, 3) + (40 if anomalous else 0))),
+                'Memory Usage (%)': float(min(100, mem_level + rng.normal(0, 2))),
+                'Memory Usage (MB)': float(mem_level * 10),
+                'Pod Restarts': int(rng.integers(3, 8)) if anomalous else 0,
+                'Network Receive Bytes': float(rng.uniform(1e3, 1e6)),
+                'Network Transmit Bytes': float(rng.uniform(1e3, 1e6)),
+                'FS Reads Total (MB)': float(rng.uniform(0, 50)),
+                'FS Writes Total (MB)': float(rng.uniform(0, 50)),
+                'Network Receive Packets Dropped (p/s)': float(rng.uniform(1, 5)) if anomalous else 0.0,
+                'Network Transmit Packets Dropped (p/s)': 0.0,
+                'Ready Containers': 1,
+                'Total Containers': 1,
+                'Pod Status': 'CrashLoopBackOff' if anomalous and rng.random() < 0.5 else 'Running',
+                'Pod Event Reason': 'BackOff' if anomalous else '',
+                'Pod Event Age': '0:05:00',
+                'Event Reason': '',
+            })
+        histories[f'pod-{p}'] = history
+    return histories
+
+
+def _percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000.0)
+
+
+def _make_call(path, histories, engine):
+    """Return a zero-argument callable running `path` once over all pods"""
+    latest = {name: history[-1] for name, history in histories.items()}
+    latest_list = list(latest.values())
+
+    if path == 'rule_single':
+        return lambda: [rule_based_prediction(metrics) for metrics in latest_list]
+    if path == 'rule_batch':
+        return lambda: rule_predictions(latest_list)
+    if path == 'pod_anomaly':
+        # predict_pod_anomaly in k8s_multi_agent_system.py evaluates one pod this way
+        return lambda: [evaluate_cluster({'pod': metrics})['pod'] for metrics in latest_list]
+    if path == 'cluster_rules':
+        return lambda: evaluate_cluster(latest)
+    if path == 'model_single':
+        return lambda: [predict_anomalies(history) for history in histories.values()]
+    if path == 'model_batch':
+        return lambda: predict_anomalies_local(histories)
+    if path == 'streaming':
+        step = [len(next(iter(histories.values())))]
+
+        def call():
+            t = step[0]
+            step[0] += 1
+            timestamp = f'2024-01-02 {t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}'
+            return engine.update_many({name: dict(metrics, Timestamp=timestamp) for name, metrics in latest.items()})
+        return call
+    raise ValueError(f"Unknown inference path: {path}")
+
+
+def benchmark_path(path, batch_size, repeats=30, warmup=3, engine_options=None):
+    """
+    Time one inference path at one batch size.
+
+    Args:
+        path: One of PATHS
+        batch_size: Number of pods scored per call
+        repeats: Timed calls
+        warmup: Untimed calls run first (lazy loading, caches)
+        engine_options: Extra StreamingInferenceEngine options
+
+    Returns:
+        Dictionary with latency percentiles, throughput and peak memory
+    """
+    engine = None
+    seq_length = DEFAULT_SEQUENCE_LENGTH
+    if path == 'streaming':
+        # The sequence model run_benchmarks selected in the registry
+        engine = StreamingInferenceEngine.from_registry(**(engine_options or {}))
+        if engine is None:
+            raise RuntimeError("No sequence model is available for the streaming path")
+        seq_length = engine.seq_length
+    histories = synthetic_histories(batch_size, seq_length)
+    if engine is not None:
+        for name, history in histories.items():
+            engine.push_history(name, history)
+    call = _make_call(path, histories, engine)
+
+    # Raw byte counters saturate the random-weight sigmoids; that is expected here
+    with np.errstate(over='ignore'):
+        for _ in range(warmup):
+            call()
+
+        gc.collect()
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+
+        # Memory is measured on a separate call so tracing does not skew the timings
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    timings = np.asarray(timings)
+    return {
+        'path': path,
+        'batch_size': batch_size,
+        'repeats': repeats,
+        'p50_ms': _percentile_ms(timings, 50),
+        'p99_ms': _percentile_ms(timings, 99),
+        'mean_ms': float(timings.mean() * 1000.0),
+        'throughput_pods_per_s': float(batch_size / timings.mean()) if timings.mean() > 0 else None,
+        'peak_memory_mb': peak / (1024 * 1024),
+    }
+
+
+def run_benchmarks(paths=PATHS, batch_sizes=DEFAULT_BATCH_SIZES, repeats=30, warmup=3,
+                   synthetic=False, stateful=False):
+    """
+    Benchmark every path at every batch size.
+
+    Returns:
+        Report dictionary with environment details and one result per case
+    """
+    # Model paths must be measured locally, not against a running server
+    os.environ.pop('INFERENCE_SERVER_URL', None)
+    use_synthetic = synthetic or registry.get(MODEL_NAME) is None
+    if use_synthetic:
+        registry.register(MODEL_NAME, lambda: synthetic_model(len(MODEL_FEATURES)),
+                          version='benchmark', make_default=False)
+        registry.set_default_version(MODEL_NAME, 'benchmark')
+    sequence_synthetic = 'streaming' in paths and (synthetic or registry.get(SEQUENCE_MODEL_NAME) is None)
+    if sequence_synthetic:
+        registry.register(SEQUENCE_MODEL_NAME,
+                          lambda: SequenceModelArtifacts(synthetic_model(len(TRAINING_FEATURES)), None, 0.5,
+                                                         DEFAULT_SEQUENCE_LENGTH, 'benchmark'),
+                          version='benchmark', make_default=False)
+        registry.set_default_version(SEQUENCE_MODEL_NAME, 'benchmark')
+
+    results = []
+    try:
+        for path in paths:
+            for batch_size in batch_sizes:
+                # Per-pod paths get fewer repeats at large sizes to bound the run time
+                path_repeats = repeats if path not in ('rule_single', 'pod_anomaly', 'model_single') \
+                    else max(3, min(repeats, 3000 // batch_size))
+                result = benchmark_path(path, batch_size, path_repeats, warmup,
+                                        engine_options={'stateful': stateful})
+                results.append(result)
+                print(f"{path:>14} x{batch_size:<5} p50={result['p50_ms']:9.3f}ms p99={result['p99_ms']:9.3f}ms "
+                      f"{result['throughput_pods_per_s']:12.0f} pods/s peak={result['peak_memory_mb']:8.2f}MB")
+    finally:
+        if use_synthetic:
+            registry.set_default_version(MODEL_NAME, DEFAULT_VERSION)
+        if sequence_synthetic:
+            registry.set_default_version(SEQUENCE_MODEL_NAME, DEFAULT_VERSION)
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'model_source': 'synthetic' if use_synthetic else 'artifacts',
+        'sequence_model_source': ('synthetic' if sequence_synthetic else 'artifacts') if 'streaming' in paths else None,
+        'stateful_streaming': stateful,
+        'results': results,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2, min_delta_ms=0.05):
+    """
+    Find cases whose p50 latency or peak memory grew beyond `tolerance`.
+
+    Args:
+        report: Current report from run_benchmarks
+        baseline: Previous report
+        tolerance: Allowed relative growth (0.2 = 20%)
+        min_delta_ms: Latency growth below this absolute amount is ignored
+                      (sub-millisecond timings are noisy)
+
+    Returns:
+        List of regression descriptions (empty if none)
+    """
+    previous = {(r['path'], r['batch_size']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['path'], result['batch_size']))
+        if before is None:
+            continue
+        case = f"{result['path']} x{result['batch_size']}"
+        latency_delta = result['p50_ms'] - before['p50_ms']
+        if latency_delta > min_delta_ms and result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{case}: p50 {before['p50_ms']:.3f}ms -> {result['p50_ms']:.3f}ms")
+        if result['peak_memory_mb'] > before['peak_memory_mb'] * (1 + tolerance) + 0.1:
+            regressions.append(f"{case}: peak memory {before['peak_memory_mb']:.2f}MB -> "
+                               f"{result['peak_memory_mb']:.2f}MB")
+    return regressions
+
+
+def main():
+    """Run the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description='Benchmark the anomaly inference paths')
+    parser.add_argument('--paths', nargs='+', choices=PATHS, default=PATHS,
+                        help='Inference paths to benchmark (default: all)')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=DEFAULT_BATCH_SIZES,
+                        help=f'Pods per call (default: {DEFAULT_BATCH_SIZES})')
+    parser.add_argument('--repeats', type=int, default=30,
+                        help='Timed calls per case (default: 30)')
+    parser.add_argument('--warmup', type=int, default=3,
+                        help='Untimed calls per case (default: 3)')
+    parser.add_argument('--synthetic-model', action='store_true',
+                        help='Use a random-weight model even if trained artifacts exist')
+    parser.add_argument('--stateful', action='store_true',
+                        help='Benchmark the streaming engine in stateful mode')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the JSON report to this file')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Previous JSON report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown against the baseline (default: 0.2)')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.paths, args.batch_sizes, args.repeats, args.warmup,
+                            args.synthetic_model, args.stateful)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote benchmark report to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
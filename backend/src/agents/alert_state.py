@@ -0,0 +1,174 @@
+"""
+Alert lifecycle tracking for anomaly insights
+
+Without state, a pod that stays anomalous produces a new insight, an LLM
+call and a rewrite of the insights file on every detection cycle. This
+module keeps one alert per (pod, anomaly type) and reports only lifecycle
+transitions:
+
+    inactive -> pending    anomaly seen, waiting for `for_cycles` consecutive hits
+    pending  -> firing     anomaly confirmed (notify)
+    firing   -> firing     still anomalous after `renotify_interval` (re-notify)
+    firing   -> resolved   clear for `resolve_cycles` consecutive cycles (notify)
+    pending  -> inactive   cleared before it fired (silently dropped)
+
+The pending and resolve counts add hysteresis, so a single noisy sample
+neither fires nor resolves an alert.
+"""
+
+import time
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("alert-state")
+
+PENDING = 'pending'
+FIRING = 'firing'
+RESOLVED = 'resolved'
+
+
+class Alert:
+    """State of one (pod, anomaly type) alert"""
+
+    __slots__ = ('pod_name', 'anomaly_type', 'state', 'hits', 'clears',
+                 'started_at', 'fired_at', 'last_notified', 'resolved_at')
+
+    def __init__(self, pod_name, anomaly_type, now):
+        self.pod_name = pod_name
+        self.anomaly_type = anomaly_type
+        self.state = PENDING
+        self.hits = 0  # Consecutive anomalous cycles
+        self.clears = 0  # Consecutive clear cycles while firing
+        self.started_at = now
+        self.fired_at = None
+        self.last_notified = None
+        self.resolved_at = None
+
+    def to_dict(self):
+        """Alert fields for inclusion in an insight"""
+        return {
+            'alert_state': self.state,
+            'alert_started_at': self.started_at,
+            'alert_fired_at': self.fired_at,
+            'alert_resolved_at': self.resolved_at,
+        }
+
+
+class AlertTransition(NamedTuple):
+    """A lifecycle change that should be notified"""
+    pod_name: str
+    anomaly_type: str
+    state: str  # FIRING or RESOLVED
+    renotify: bool  # True when re-notifying an alert that kept firing
+    alert: Alert
+
+
+class AlertTracker:
+    """Tracks alerts per (pod, anomaly type) and reports notifiable transitions"""
+
+    def __init__(self, for_cycles: int = 2, resolve_cycles: int = 3,
+                 renotify_interval: Optional[float] = 3600.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            for_cycles: Consecutive anomalous cycles before an alert fires
+            resolve_cycles: Consecutive clear cycles before a firing alert resolves
+            renotify_interval: Seconds after which a still-firing alert is
+                               notified again (None never re-notifies)
+            clock: Time source, in seconds
+        """
+        self.for_cycles = max(1, int(for_cycles))
+        self.resolve_cycles = max(1, int(resolve_cycles))
+        self.renotify_interval = renotify_interval
+        self.clock = clock
+        self.alerts: Dict[Tuple[str, str], Alert] = {}
+        self.stats = {'observations': 0, 'fired': 0, 'renotified': 0, 'resolved': 0, 'suppressed': 0}
+
+    def observe(self, pod_name: str, anomaly_type: Optional[str], is_anomaly: bool,
+                now: Optional[float] = None) -> List[AlertTransition]:
+        """
+        Record one detection cycle of a pod.
+
+        Alerts of the pod for other anomaly types count as clear this cycle.
+
+        Args:
+            pod_name: Name of the pod
+            anomaly_type: Detected anomaly type (ignored when not anomalous)
+            is_anomaly: Whether the pod is anomalous this cycle
+            now: Observation time (defaults to the tracker clock)
+
+        Returns:
+            Transitions to notify (usually empty)
+        """
+        now = self.clock() if now is None else now
+        self.stats['observations'] += 1
+        transitions = []
+
+        if is_anomaly:
+            key = (pod_name, anomaly_type or 'unknown')
+            alert = self.alerts.get(key)
+            if alert is None or alert.state == RESOLVED:
+                alert = Alert(pod_name, key[1], now)
+                self.alerts[key] = alert
+            alert.hits += 1
+            alert.clears = 0
+
+            if alert.state == PENDING and alert.hits >= self.for_cycles:
+                alert.state = FIRING
+                alert.fired_at = alert.last_notified = now
+                self.stats['fired'] += 1
+                transitions.append(AlertTransition(pod_name, key[1], FIRING, False, alert))
+            elif alert.state == FIRING and self.renotify_interval is not None \
+                    and now - alert.last_notified >= self.renotify_interval:
+                alert.last_notified = now
+                self.stats['renotified'] += 1
+                transitions.append(AlertTransition(pod_name, key[1], FIRING, True, alert))
+            else:
+                self.stats['suppressed'] += 1
+            active_key = key
+        else:
+            active_key = None
+
+        for key, alert in list(self.alerts.items()):
+            if key[0] != pod_name or key == active_key or alert.state == RESOLVED:
+                continue
+            alert.hits = 0
+            if alert.state == PENDING:
+                del self.alerts[key]
+                continue
+            alert.clears += 1
+            if alert.clears >= self.resolve_cycles:
+                alert.state = RESOLVED
+                alert.resolved_at = now
+                self.stats['resolved'] += 1
+                transitions.append(AlertTransition(pod_name, key[1], RESOLVED, False, alert))
+
+        return transitions
+
+    def state(self, pod_name: str, anomaly_type: str) -> Optional[str]:
+        """Current state of an alert (None if there is none)"""
+        alert = self.alerts.get((pod_name, anomaly_type))
+        return alert.state if alert else None
+
+    def firing(self) -> List[Alert]:
+        """Alerts currently firing"""
+        return [alert for alert in self.alerts.values() if alert.state == FIRING]
+
+    def forget(self, pod_name: str) -> None:
+        """Drop every alert of a pod that no longer exists"""
+        for key in [key for key in self.alerts if key[0] == pod_name]:
+            del self.alerts[key]
+
+    def prune_resolved(self, older_than: float, now: Optional[float] = None) -> int:
+        """
+        Drop resolved alerts that resolved more than `older_than` seconds ago.
+
+        Returns:
+            Number of alerts dropped
+        """
+        now = self.clock() if now is None else now
+        stale = [key for key, alert in self.alerts.items()
+                 if alert.state == RESOLVED and now - alert.resolved_at > older_than]
+        for key in stale:
+            del self.alerts[key]
+        return len(stale)
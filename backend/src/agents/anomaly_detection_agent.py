@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 import json
 import tempfile
 import shutil
+import uuid
+import threading
 import portalocker
 import subprocess
 from typing import Dict, List, Any, Tuple, Optional
@@ -46,7 +48,7 @@ models_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__fil
 sys.path.insert(0, models_path)  # Insert at beginning of path for priority
 
 try:
-    from anomaly_prediction import predict_anomalies
+    from anomaly_prediction import predict_anomalies, predict_anomalies_batch
     logger.info(f"Successfully imported anomaly_prediction from {models_path}")
 except ImportError as e:
     logger.warning(f"Could not import anomaly_prediction module: {e}")
@@ -61,6 +63,7 @@ except ImportError as e:
             model_module = importlib.util.module_from_spec(spec)
             spec.loader.exec_module(model_module)
             predict_anomalies = model_module.predict_anomalies
+            predict_anomalies_batch = model_module.predict_anomalies_batch
             logger.info("Successfully loaded predict_anomalies function")
         except Exception as imp_err:
             logger.error(f"Failed to import the model module: {imp_err}")
@@ -72,6 +75,11 @@ except ImportError as e:
                     'anomaly_probability': [0.1],
                     'anomaly_type': ['unknown']
                 })
+            
+            def predict_anomalies_batch(pod_histories):
+                logger.warning("Using stub prediction function due to import failure")
+                return {pod_name: {'predicted_anomaly': 0, 'anomaly_probability': 0.1, 'anomaly_type': 'unknown'}
+                        for pod_name in pod_histories}
     else:
         # Define a stub function for testing
         logger.error(f"Model file not found at {model_file}, using stub function")
@@ -82,6 +90,79 @@ except ImportError as e:
                 'anomaly_probability': [0.1],
                 'anomaly_type': ['unknown']
             })
+        
+        def predict_anomalies_batch(pod_histories):
+            logger.warning("Using stub prediction function due to missing model file")
+            return {pod_name: {'predicted_anomaly': 0, 'anomaly_probability': 0.1, 'anomaly_type': 'unknown'}
+                    for pod_name in pod_histories}
+
+# Import the streaming sequence-model engine and model registry if available
+try:
+    from streaming_inference import StreamingInferenceEngine
+    from model_registry import registry as model_registry
+except Exception as e:
+    logger.warning(f"Could not import streaming_inference module: {e}")
+    StreamingInferenceEngine = None
+    model_registry = None
+
+# Import the client side of the shared inference server if available
+try:
+    from inference_server import register_remote_sequence_model
+except Exception as e:
+    logger.warning(f"Could not import inference_server module: {e}")
+    register_remote_sequence_model = None
+
+# Import the cheap statistical first stage of the detection cascade if available
+try:
+    from streaming_detectors import StatisticalPrefilter
+except Exception as e:
+    logger.warning(f"Could not import streaming_detectors module: {e}")
+    StatisticalPrefilter = None
+
+# Import the node-level aggregate detector if available
+try:
+    from node_detector import NodeAggregator, NodeAssessment
+except Exception as e:
+    logger.warning(f"Could not import node_detector module: {e}")
+    NodeAggregator = NodeAssessment = None
+
+# Import the streaming time-to-OOM forecaster if available
+try:
+    from memory_forecaster import MemoryLeakForecaster
+except Exception as e:
+    logger.warning(f"Could not import memory_forecaster module: {e}")
+    MemoryLeakForecaster = None
+
+# Import the concurrent LLM enrichment pool (lives next to this file)
+agents_path = os.path.dirname(os.path.abspath(__file__))
+if agents_path not in sys.path:
+    sys.path.append(agents_path)
+try:
+    from llm_enrichment import LLMEnricher
+except Exception as e:
+    logger.warning(f"Could not import llm_enrichment module: {e}")
+    LLMEnricher = None
+
+# Import the per-(pod, anomaly type) alert lifecycle tracker
+try:
+    from alert_state import AlertTracker, FIRING, RESOLVED
+except Exception as e:
+    logger.warning(f"Could not import alert_state module: {e}")
+    AlertTracker = None
+
+# Import the bounded per-pod state store
+from pod_state import PodStateStore, DEFAULT_POD_TTL_SECONDS, DEFAULT_MAX_PODS
+
+# Import the stable pod identities windowed state is keyed by
+from pod_identity import PodIdentityMap
+
+# Import the correlation of pod anomalies into incidents
+try:
+    from incident_correlation import IncidentCorrelator, workload_key
+except Exception as e:
+    logger.warning(f"Could not import incident_correlation module: {e}")
+    IncidentCorrelator = None
+    workload_key = None
 
 # Import NVIDIA LLM if available
 try:
@@ -181,15 +262,59 @@ class AnomalyDetectionAgent:
                  alert_threshold: float = 0.7,
                  history_window: int = 60,
                  data_dir: str = None,
-                 use_nvidia_llm: bool = False):
+                 use_nvidia_llm: bool = False,
+                 warmup_model: bool = False,
+                 stateful_inference: bool = False,
+                 use_cascade: bool = True,
+                 model_refresh_interval: Optional[float] = None,
+                 llm_max_workers: int = 4,
+                 llm_requests_per_minute: float = 60,
+                 llm_timeout: float = 30.0,
+                 use_alert_states: bool = True,
+                 alert_for_cycles: int = 2,
+                 alert_resolve_cycles: int = 3,
+                 alert_renotify_interval: Optional[float] = 3600.0,
+                 pod_ttl: Optional[float] = DEFAULT_POD_TTL_SECONDS,
+                 max_pods: Optional[int] = DEFAULT_MAX_PODS,
+                 correlate_incidents: bool = True,
+                 incident_window: float = 300.0):
         """
         Initialize the anomaly detection agent.
         
+        Models are loaded lazily on the first detection pass unless
+        warmup_model is set.
+        
         Args:
             alert_threshold: Probability threshold for anomaly alerts
             history_window: Number of minutes of history to maintain
             data_dir: Directory to store data files (defaults to project root)
             use_nvidia_llm: Whether to use NVIDIA LLM for enhanced analysis
+            warmup_model: Load the models and run a dummy prediction up front
+            stateful_inference: Carry each pod's LSTM state between samples and
+                                advance it one step per sample instead of
+                                rescoring the full window
+            use_cascade: Screen pods with cheap streaming statistics first and
+                         only run the model on pods that look suspicious
+            model_refresh_interval: Seconds between checks for newly published
+                                    model versions, which are swapped in
+                                    without restarting (None disables)
+            llm_max_workers: Maximum concurrent LLM enrichment calls
+            llm_requests_per_minute: LLM provider rate limit
+            llm_timeout: Seconds a single LLM call may take
+            use_alert_states: Emit insights only on alert transitions (firing,
+                              re-notify, resolved) instead of every cycle
+            alert_for_cycles: Consecutive anomalous cycles before an alert fires
+            alert_resolve_cycles: Consecutive clear cycles before an alert resolves
+            alert_renotify_interval: Seconds after which a still-firing alert is
+                                     reported again (None never re-notifies)
+            pod_ttl: Seconds without samples after which a pod's state is
+                     dropped (None keeps it forever)
+            max_pods: Maximum number of pods tracked; the least recently
+                      seen pods are dropped beyond it (None disables the cap)
+            correlate_incidents: Group anomalies of the same workload or node
+                                 into incidents and run LLM analysis once per
+                                 incident instead of once per pod
+            incident_window: Seconds an incident stays open after its last anomaly
         """
         self.alert_threshold = alert_threshold
         self.history_window = history_window
@@ -206,6 +331,33 @@ class AnomalyDetectionAgent:
                     logger.error(f"Failed to initialize NVIDIA LLM: {e}")
             else:
                 logger.error("NVIDIA LLM module not available")
+        
+        # LLM analysis runs in the background; insights are written without it
+        # and the analysis is attached to them when it arrives
+        self.llm_enricher = None
+        if self.nvidia_llm and LLMEnricher is not None:
+            self.llm_enricher = LLMEnricher(
+                lambda metrics_str, prediction_str, timeout: self.nvidia_llm.analyze_k8s_metrics(
+                    metrics_str, prediction_str, timeout=timeout, raise_errors=True),
+                max_workers=llm_max_workers,
+                requests_per_minute=llm_requests_per_minute,
+                call_timeout=llm_timeout)
+        self._enrichment_lock = threading.Lock()
+        self._pending_enrichments = {}  # insight id -> insight awaiting LLM analysis
+        self._written_insight_ids = set()  # ids of pending insights already in the output file
+        self._insights_file = None
+        
+        # Alert lifecycle per (pod, anomaly type), so long incidents are reported once
+        self.alert_tracker = None
+        if use_alert_states and AlertTracker is not None:
+            self.alert_tracker = AlertTracker(for_cycles=alert_for_cycles,
+                                              resolve_cycles=alert_resolve_cycles,
+                                              renotify_interval=alert_renotify_interval)
+        
+        # Anomalies of replicas of one workload (or pods of one node) form one incident
+        self.incident_correlator = None
+        if correlate_incidents and IncidentCorrelator is not None:
+            self.incident_correlator = IncidentCorrelator(window_seconds=incident_window)
                 
         # Setup data directory
         if data_dir:
@@ -217,43 +369,109 @@ class AnomalyDetectionAgent:
         os.makedirs(self.data_dir, exist_ok=True)
         
         # Initialize data structures
-        self.pod_metrics = {}  # Store latest metrics for each pod
-        self.anomaly_history = {}  # Store anomaly history for each pod
+        # Latest metrics per pod; pods that stop reporting (deleted pods) are
+        # evicted after pod_ttl, and with them every other piece of their state
+        self.pod_metrics = PodStateStore(ttl=pod_ttl, max_pods=max_pods, name="anomaly-agent-pods")
+        self.pod_metrics.on_evict(self._forget_pod)
+        # Histories and windows are keyed by stable identity (owner workload
+        # plus replica slot), so they carry over to a pod's replacement
+        self.pod_identities = PodIdentityMap()
+        self.anomaly_history = {}  # Store anomaly history for each pod identity
+        
+        # Windowed LSTM scoring, created on first use from the model registry
+        self._streaming_engine = None
+        self.stateful_inference = stateful_inference
+        
+        # First cascade stage: streaming z-score/MAD/EWMA baselines shared by
+        # the replicas of each workload, so they survive pod restarts
+        self.prefilter = None
+        if use_cascade and StatisticalPrefilter is not None:
+            self.prefilter = StatisticalPrefilter(baseline_key=workload_key)
+        
+        # Per-node aggregates of the latest pod samples, scored once per pass
+        self.node_aggregator = NodeAggregator() if NodeAggregator is not None else None
+        self.node_assessments = {}
+        
+        # Per-pod memory trends, flagging leaks long before the limit is hit
+        self.memory_forecaster = MemoryLeakForecaster() if MemoryLeakForecaster is not None else None
+        self.llm_calls = 0
         
         logger.info(f"Initialized AnomalyDetectionAgent with "
                    f"alert_threshold={alert_threshold}, "
                    f"data_dir={self.data_dir}")
         
-        # Check model availability
-        try:
-            # Create a simple test dataframe
-            test_df = pd.DataFrame({
-                'CPU Usage (%)': [0.5],
-                'Memory Usage (%)': [0.5],
-                'Pod Restarts': [0],
-                'Memory Usage (MB)': [100],
-                'Network Receive Bytes': [100],
-                'Network Transmit Bytes': [100],
-                'FS Reads Total (MB)': [0.1],
-                'FS Writes Total (MB)': [0.1],
-                'Network Receive Packets Dropped (p/s)': [0],
-                'Network Transmit Packets Dropped (p/s)': [0],
-                'Ready Containers': [1],
-                'Pod Name': ['test-pod']  # Add required column
-            })
-            
-            # Test the model
-            result = predict_anomalies(test_df)
-            logger.info(f"Model test successful: {result.iloc[0].to_dict()}")
-        except Exception as e:
-            logger.error(f"Model test failed: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+        # With a shared inference server the models live in the server process;
+        # the sequence model's windows stay here and only forward passes are sent
+        self.use_inference_server = bool(os.environ.get('INFERENCE_SERVER_URL'))
+        self.remote_sequence_model = None
+        if self.use_inference_server:
+            logger.info(f"Scoring pods on the inference server at {os.environ['INFERENCE_SERVER_URL']}")
+            if register_remote_sequence_model is not None:
+                self.remote_sequence_model = register_remote_sequence_model(os.environ['INFERENCE_SERVER_URL'])
+        
+        if warmup_model and model_registry is not None and not self.use_inference_server:
+            model_registry.warmup()
+            logger.info(f"Model registry stats after warmup: {model_registry.stats()}")
+        
+        # In server mode the watcher follows the version of the served sequence model
+        if model_refresh_interval and model_registry is not None:
+            model_registry.start_watcher(model_refresh_interval)
+    
+    @property
+    def streaming_engine(self):
+        """
+        Streaming LSTM engine, or None while the sequence model is unavailable.
+        
+        With an inference server that serves the sequence model, the engine's
+        forward passes run on the server; otherwise the model is loaded here.
+        Until a model is found, the lookup is repeated (at most as often as
+        the registry retries missing models).
+        """
+        if self._streaming_engine is None and StreamingInferenceEngine is not None:
+            if self.remote_sequence_model is not None:
+                self._streaming_engine = StreamingInferenceEngine.from_registry(self.remote_sequence_model)
+            if self._streaming_engine is None:
+                self._streaming_engine = StreamingInferenceEngine.from_registry(stateful=self.stateful_inference)
+        return self._streaming_engine
+    
+    def _forget_pod(self, pod_name: str, metrics: Dict[str, Any], reason: str) -> None:
+        """Drop all state of a pod evicted from pod_metrics, and of its identity once no pod holds it"""
+        identity = self.pod_identities.forget(pod_name)
+        if identity is not None:
+            self.anomaly_history.pop(identity, None)
+            if self._streaming_engine is not None:
+                self._streaming_engine.forget(identity)
+            if self.memory_forecaster is not None:
+                self.memory_forecaster.forget(identity)
+        if self.prefilter is not None:
+            self.prefilter.forget(pod_name)
+        if self.alert_tracker is not None:
+            self.alert_tracker.forget(pod_name)
+        if self.node_aggregator is not None:
+            self.node_aggregator.forget(pod_name)
+        logger.debug(f"Dropped state of pod {pod_name} ({reason})")
+    
+    def get_state_stats(self) -> Dict[str, Any]:
+        """Number of tracked pods and identities, and per-pod state evictions"""
+        stats = {**self.pod_metrics.stats(), 'pod_identities': len(self.pod_identities.members),
+                 'anomaly_history_identities': len(self.anomaly_history)}
+        if self.prefilter is not None:
+            stats['prefilter_baselines'] = len(self.prefilter.baselines)
+        return stats
     
     def detect_anomalies(self, pod_history: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
         """
         Run anomaly detection on pod history data.
         
+        Detection is a cascade. Every pod is first screened by cheap streaming
+        statistics and the heuristic rules; pods that pass the screen are
+        reported healthy without running the model. The remaining pods are
+        scored together in a single batched model call rather than one
+        prediction per pod. When the trained sequence model artifacts are
+        available, each pod's new samples are appended to its sliding window
+        and full windows are scored by the streaming engine; pods still
+        filling their window use the batched predictor.
+        
         Args:
             pod_history: Dictionary mapping pod names to lists of metric dictionaries
             
@@ -265,71 +483,189 @@ class AnomalyDetectionAgent:
         if not pod_history:
             logger.warning("Empty pod history provided, skipping anomaly detection")
             return results
-            
+        
+        # Collect the pods that have usable history
+        required_columns = ['Pod Name', 'CPU Usage (%)', 'Memory Usage (%)']
+        pod_windows = {}
         for pod_name, history in pod_history.items():
             # Skip if no history
             if not history:
                 continue
                 
             # Store the latest metrics for reference
-            self.pod_metrics[pod_name] = history[-1] if history else {}
+            self.pod_metrics[pod_name] = history[-1]
             
+            # Validate required columns
+            missing_columns = [col for col in required_columns if col not in history[-1]]
+            if missing_columns:
+                logger.warning(f"Pod {pod_name} missing required columns: {missing_columns}, skipping")
+                continue
+            
+            pod_windows[pod_name] = history
+        
+        # Drop pods that have stopped reporting
+        self.pod_metrics.expire()
+        
+        # Resolve stable identities oldest pod first, so a replacement pod
+        # takes over the identity (and windows) of the pod it replaced. The
+        # pass may hold only the changed pods: every tracked pod is still live
+        pod_windows = dict(sorted(pod_windows.items(), key=lambda item: str(item[1][0].get('Timestamp', ''))))
+        identities = self.pod_identities.resolve_all({pod_name: history[-1] for pod_name, history in pod_windows.items()
+                                                      if pod_name in self.pod_metrics},
+                                                     live_pods=self.pod_metrics.keys())
+        
+        # Node-wide problems: fold the new samples into the node aggregates
+        # and score all nodes at once
+        if self.node_aggregator is not None:
             try:
-                # Create a dataframe from pod history
-                pod_df = pd.DataFrame(history)
-                
-                # Validate required columns
-                required_columns = ['Pod Name', 'CPU Usage (%)', 'Memory Usage (%)']
-                missing_columns = [col for col in required_columns if col not in pod_df.columns]
-                if missing_columns:
-                    logger.warning(f"Pod {pod_name} missing required columns: {missing_columns}, skipping")
-                    continue
-                
-                # Run anomaly detection
+                for pod_name in pod_windows:
+                    if pod_name in self.pod_metrics:
+                        self.node_aggregator.update(pod_name, self.pod_metrics[pod_name])
+                self.node_assessments = self.node_aggregator.evaluate()
+            except Exception as e:
+                logger.error(f"Error in node-level detection: {e}")
+        
+        if not pod_windows:
+            return results
+        
+        # First stage: only suspicious pods go on to the model
+        screened = {}
+        if self.prefilter is not None:
+            try:
+                screened = self.prefilter.screen(pod_windows)
+            except Exception as e:
+                logger.error(f"Error in statistical prefilter, scoring all pods: {e}")
+        to_score = [pod_name for pod_name in pod_windows if pod_name not in screened or screened[pod_name].escalate]
+        
+        # Run anomaly detection for all escalated pods at once
+        try:
+            predictions = {}
+            engine = self.streaming_engine
+            if engine is not None:
+                # Keep every window current so escalated pods score on fresh data.
+                # Windows are per identity; a pod superseded by a newer holder
+                # of its identity falls back to the batched predictor
+                for pod_name, history in pod_windows.items():
+                    engine.push_history(identities.get(pod_name, pod_name), history)
+                holders = {identities[pod_name]: pod_name for pod_name in to_score
+                           if pod_name in identities and self.pod_identities.is_current(pod_name)}
                 try:
-                    prediction_df = predict_anomalies(pod_df)
-                    prediction = prediction_df.iloc[0].to_dict()
-                    
-                    # Add timestamp and pod name
-                    prediction['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    prediction['pod_name'] = pod_name
-                    
-                    # Add to results
-                    results[pod_name] = prediction
-                    
-                    # Update anomaly history
-                    if pod_name not in self.anomaly_history:
-                        self.anomaly_history[pod_name] = []
-                    self.anomaly_history[pod_name].append(prediction)
-                    
-                    # Trim anomaly history to keep only recent entries
-                    if len(self.anomaly_history[pod_name]) > 100:
-                        self.anomaly_history[pod_name] = self.anomaly_history[pod_name][-100:]
-                    
-                    # Log anomalies
-                    if prediction['predicted_anomaly']:
-                        logger.warning(
-                            f"Anomaly detected in pod {pod_name}: "
-                            f"type={prediction['anomaly_type']}, "
-                            f"probability={prediction['anomaly_probability']:.4f}"
-                        )
-                    
+                    scored = engine.score(list(holders), latest_metrics={
+                        identity: self.pod_metrics.get(pod_name, {}) for identity, pod_name in holders.items()})
                 except Exception as e:
-                    logger.error(f"Error in prediction for pod {pod_name}: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
+                    # e.g. the inference server is down or swapped models mid-pass
+                    logger.warning(f"Streaming engine failed ({e}), using the batched predictor")
+                    scored = {}
+                predictions = {holders[identity]: prediction for identity, prediction in scored.items()}
+            
+            remaining = {pod_name: pod_windows[pod_name] for pod_name in to_score if pod_name not in predictions}
+            if remaining:
+                predictions.update(predict_anomalies_batch(remaining))
+            
+            for pod_name in predictions:
+                predictions[pod_name]['detection_stage'] = 'model'
+                if pod_name in screened:
+                    predictions[pod_name]['prefilter_reasons'] = screened[pod_name].reasons
+            for pod_name, screen in screened.items():
+                if not screen.escalate:
+                    predictions[pod_name] = {
+                        'predicted_anomaly': 0,
+                        'anomaly_probability': 0.0,
+                        'anomaly_type': 'unknown',
+                        'detection_stage': 'prefilter'
+                    }
+            if screened:
+                logger.info(f"Cascade scored {len(to_score)}/{len(pod_windows)} pods with the model")
+            self._apply_memory_forecasts(pod_windows, identities, predictions)
+        except Exception as e:
+            logger.error(f"Error in batched prediction for {len(pod_windows)} pods: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return results
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for pod_name, prediction in predictions.items():
+            # Add timestamp, pod name and the pod's stable identity
+            prediction['timestamp'] = timestamp
+            prediction['pod_name'] = pod_name
+            identity = identities.get(pod_name)
+            if identity is not None:
+                prediction['pod_identity'] = identity
+            
+            # Add to results
+            results[pod_name] = prediction
+            
+            # Update anomaly history (only for pods still tracked, so pods
+            # evicted by the cap in this pass do not come back)
+            if pod_name in self.pod_metrics and identity is not None:
+                if identity not in self.anomaly_history:
+                    self.anomaly_history[identity] = []
+                self.anomaly_history[identity].append(prediction)
                 
-            except Exception as e:
-                logger.error(f"Error processing history for pod {pod_name}: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                # Trim anomaly history to keep only recent entries
+                if len(self.anomaly_history[identity]) > 100:
+                    self.anomaly_history[identity] = self.anomaly_history[identity][-100:]
+            
+            # Log anomalies
+            if prediction['predicted_anomaly']:
+                logger.warning(
+                    f"Anomaly detected in pod {pod_name}: "
+                    f"type={prediction['anomaly_type']}, "
+                    f"probability={prediction['anomaly_probability']:.4f}"
+                )
         
         return results
     
+    def _apply_memory_forecasts(self, pod_windows: Dict[str, List[Dict[str, Any]]], identities: Dict[str, str],
+                                predictions: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Update each pod's memory trend and attach its time-to-OOM projection.
+        
+        A pod whose memory is projected to reach its limit within the
+        forecast horizon is reported as a memory_leak, unless another detector
+        already flagged it (the projection is attached to its prediction).
+        
+        Args:
+            pod_windows: Dictionary mapping pod names to metric histories, oldest pod first
+            identities: Dictionary mapping pod names to the identity trends are kept for
+            predictions: Dictionary of pod names to predictions, updated in place
+        """
+        if self.memory_forecaster is None:
+            return
+        for pod_name, history in pod_windows.items():
+            identity = identities.get(pod_name)
+            if identity is None:
+                continue
+            try:
+                self.memory_forecaster.observe_history(identity, history, holder=pod_name)
+                forecast = self.memory_forecaster.forecast(identity)
+            except Exception as e:
+                logger.error(f"Error forecasting memory of pod {pod_name}: {e}")
+                continue
+            if forecast is None or not forecast.leaking or not self.pod_identities.is_current(pod_name):
+                continue
+            
+            leak = self.memory_forecaster.leak_prediction(forecast)
+            prediction = predictions.get(pod_name)
+            if prediction is None or not prediction.get('predicted_anomaly'):
+                predictions[pod_name] = {**leak, 'detection_stage': 'memory_trend'}
+                logger.warning(f"Memory leak suspected in pod {pod_name}: +{leak['memory_growth_per_hour']}%/h, "
+                               f"limit reached in ~{leak['time_to_oom_minutes']} minutes")
+            else:
+                prediction['time_to_oom_minutes'] = leak['time_to_oom_minutes']
+                prediction['memory_growth_per_hour'] = leak['memory_growth_per_hour']
+    
     def generate_insights(self, anomalies: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Generate insights based on detected anomalies.
         
+        With alert states enabled, an insight is produced only when an alert
+        fires, is re-notified or resolves; pods that stay anomalous between
+        those transitions produce no insight and no LLM call. With incident
+        correlation, confirmed anomalies of the same workload or node are
+        grouped and the LLM analyses only the most likely pod of each new
+        incident; the other insights reference it through incident_id.
+        
         Args:
             anomalies: Dictionary of pod names to anomaly results
             
@@ -337,6 +673,7 @@ class AnomalyDetectionAgent:
             List of insight dictionaries
         """
         insights = []
+        to_enrich = []  # (insight, metrics, prediction) of confirmed anomalies
         
         if not anomalies:
             return insights
@@ -344,8 +681,21 @@ class AnomalyDetectionAgent:
         # Process each anomaly
         for pod_name, prediction in anomalies.items():
             try:
-                # Skip non-anomalies below threshold
-                if not prediction['predicted_anomaly'] and prediction['anomaly_probability'] < self.alert_threshold:
+                alertable = bool(prediction['predicted_anomaly']) or \
+                    prediction['anomaly_probability'] >= self.alert_threshold
+                
+                transition = None
+                if self.alert_tracker is not None:
+                    transitions = self.alert_tracker.observe(pod_name, prediction.get('anomaly_type'), alertable)
+                    for resolved in (t for t in transitions if t.state == RESOLVED):
+                        insights.append(self._resolved_insight(resolved, prediction))
+                    firing = [t for t in transitions if t.state == FIRING]
+                    if not firing:
+                        # Pending, still firing or clear: nothing new to report
+                        continue
+                    transition = firing[0]
+                elif not alertable:
+                    # Skip non-anomalies below threshold
                     continue
                     
                 # Get pod metrics
@@ -353,6 +703,7 @@ class AnomalyDetectionAgent:
                 
                 # Generate insight based on anomaly type and metrics
                 insight = {
+                    'insight_id': uuid.uuid4().hex,
                     'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     'pod_name': pod_name,
                     'is_anomaly': bool(prediction['predicted_anomaly']),
@@ -373,29 +724,18 @@ class AnomalyDetectionAgent:
                     insight['event_reason'] = metrics['Pod Event Reason']
                 if 'Pod Event Age' in metrics:
                     insight['event_age'] = metrics['Pod Event Age']
+                if transition is not None:
+                    insight.update(transition.alert.to_dict())
+                    insight['renotify'] = transition.renotify
                 
-                # Use NVIDIA LLM for enhanced analysis if available
-                if self.nvidia_llm and self.use_nvidia_llm:
-                    try:
-                        logger.info(f"Generating enhanced analysis using NVIDIA LLM for pod {pod_name}")
-                        metrics_str = json.dumps(metrics, indent=2)
-                        prediction_str = json.dumps(prediction, indent=2)
-                        enhanced_analysis = self.nvidia_llm.analyze_k8s_metrics(metrics_str, prediction_str)
-                        
-                        # Add enhanced analysis to insight
-                        insight['enhanced_analysis'] = enhanced_analysis
-                        insight['ai_generated'] = True
-                        
-                        # Extract specific recommendations from enhanced analysis
-                        recommendation_section = self._extract_recommendations(enhanced_analysis)
-                        if recommendation_section:
-                            insight['enhanced_recommendation'] = recommendation_section
-                            
-                        logger.info(f"Enhanced analysis generated for pod {pod_name}")
-                    except Exception as e:
-                        logger.error(f"Error generating enhanced analysis for pod {pod_name}: {e}")
-                        import traceback
-                        logger.error(traceback.format_exc())
+                # Queue NVIDIA LLM analysis for confirmed anomalies only (not for
+                # re-notifications); the insight is returned right away and
+                # enriched when the call completes
+                confirmed = insight['is_anomaly'] and insight['anomaly_probability'] >= self.alert_threshold
+                if transition is not None and transition.renotify:
+                    confirmed = False
+                if confirmed:
+                    to_enrich.append((insight, metrics, prediction))
                 
                 insights.append(insight)
                 
@@ -416,8 +756,193 @@ class AnomalyDetectionAgent:
                 import traceback
                 logger.error(traceback.format_exc())
         
+        insights.extend(self._node_insights())
+        
+        for insight, metrics, prediction in self._correlate_insights(to_enrich):
+            if self.llm_enricher and self.use_nvidia_llm:
+                self._queue_enrichment(insight, metrics, prediction)
+        
+        if self.alert_tracker is not None:
+            self.alert_tracker.prune_resolved(older_than=self.history_window * 60)
+        
+        return insights
+    
+    def _node_insights(self) -> List[Dict[str, Any]]:
+        """
+        Build insights for node-level anomalies of the last detection pass.
+        
+        Nodes go through the alert tracker like pods (as 'node/<name>'), so a
+        failing node is reported when its alert fires and when it resolves.
+        A node that no longer has any pods is observed as clear, so its open
+        alert resolves instead of staying in the tracker.
+        """
+        insights = []
+        assessments = dict(self.node_assessments)
+        if self.alert_tracker is not None:
+            for alert in list(self.alert_tracker.alerts.values()):
+                node = alert.pod_name[len("node/"):]
+                if alert.pod_name.startswith("node/") and alert.state != RESOLVED and node not in assessments:
+                    assessments[node] = NodeAssessment(node, False, 'normal', 0.0, [], {}, [])
+        
+        for node, assessment in assessments.items():
+            if self.alert_tracker is not None:
+                transitions = self.alert_tracker.observe(f"node/{node}", assessment.anomaly_type, assessment.is_anomaly)
+                if not transitions:
+                    continue
+                transition = transitions[-1]
+            elif assessment.is_anomaly:
+                transition = None
+            else:
+                continue
+            
+            resolved = transition is not None and transition.state == RESOLVED
+            insight = {
+                'insight_id': uuid.uuid4().hex,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'pod_name': f"node/{node}",
+                'node_name': node,
+                'scope': 'node',
+                'is_anomaly': not resolved,
+                'anomaly_type': transition.anomaly_type if resolved else assessment.anomaly_type,
+                'anomaly_probability': float(assessment.probability),
+                'severity': 'Low' if resolved else ('Critical' if assessment.probability >= 0.9 else 'High'),
+                'recommendation': f"Node {node} recovered; no action needed" if resolved else
+                                  f"Investigate node {node} (cordon and drain if it stays unhealthy) "
+                                  f"before remediating its {len(assessment.pods)} pods individually",
+                'node_reasons': assessment.reasons,
+                'node_aggregates': assessment.aggregates,
+                'affected_pods': assessment.pods,
+            }
+            if transition is not None:
+                insight.update(transition.alert.to_dict())
+                insight['renotify'] = transition.renotify
+            logger.warning(f"Node insight for {node}: {insight['anomaly_type']} ({', '.join(assessment.reasons) or 'resolved'})")
+            insights.append(insight)
         return insights
     
+    def _correlate_insights(self, confirmed: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]):
+        """
+        Group confirmed insights into incidents and tag them with the incident.
+        
+        Args:
+            confirmed: (insight, metrics, prediction) of each confirmed anomaly
+            
+        Returns:
+            The entries that need LLM analysis: one per new incident, or all
+            of them without incident correlation
+        """
+        if self.incident_correlator is None or not confirmed:
+            return confirmed
+        
+        by_pod = {insight['pod_name']: (insight, metrics, prediction) for insight, metrics, prediction in confirmed}
+        failing_nodes = [node for node, assessment in self.node_assessments.items() if assessment.is_anomaly]
+        updates = self.incident_correlator.correlate({
+            pod_name: {'prediction': prediction, 'pod_metrics': metrics}
+            for pod_name, (_, metrics, prediction) in by_pod.items()}, failing_nodes=failing_nodes)
+        
+        to_analyze = []
+        for update in updates:
+            incident = update.incident
+            cycle_pods = [pod_name for pod_name in incident.pods if pod_name in by_pod]
+            representative = max(cycle_pods, key=lambda pod: by_pod[pod][0]['anomaly_probability'])
+            for pod_name in cycle_pods:
+                insight = by_pod[pod_name][0]
+                insight['incident_id'] = incident.incident_id
+                insight['incident_scope'] = incident.scope
+                insight['incident_pods'] = sorted(incident.pods)
+                if pod_name != representative:
+                    insight['incident_representative'] = representative
+            # Later anomalies of an open incident reuse the analysis of its first one
+            if update.new:
+                to_analyze.append(by_pod[representative])
+            if len(incident.pods) > 1:
+                logger.warning(f"Incident {incident.incident_id} ({incident.scope}) affects "
+                               f"{len(incident.pods)} pods: {', '.join(sorted(incident.pods))}")
+        return to_analyze
+    
+    def _queue_enrichment(self, insight: Dict[str, Any], metrics: Dict[str, Any], prediction: Dict[str, Any]) -> None:
+        """Queue the NVIDIA LLM analysis of an insight; it is attached when the call completes"""
+        self.llm_calls += 1
+        logger.info(f"Queueing enhanced analysis using NVIDIA LLM for pod {insight['pod_name']}")
+        insight['enrichment_status'] = 'pending'
+        with self._enrichment_lock:
+            self._pending_enrichments[insight['insight_id']] = insight
+        self.llm_enricher.submit(insight['insight_id'],
+                                 json.dumps(metrics, indent=2, default=str),
+                                 json.dumps(prediction, indent=2, default=str),
+                                 self._on_enrichment)
+    
+    def _resolved_insight(self, transition, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the insight reporting that a firing alert has resolved"""
+        metrics = self.pod_metrics.get(transition.pod_name, {})
+        insight = {
+            'insight_id': uuid.uuid4().hex,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'pod_name': transition.pod_name,
+            'is_anomaly': False,
+            'anomaly_type': transition.anomaly_type,
+            'anomaly_probability': float(prediction.get('anomaly_probability', 0.0)),
+            'severity': 'Low',
+            'recommendation': f"{transition.anomaly_type} alert resolved; no action needed",
+            **transition.alert.to_dict()
+        }
+        if 'Pod Status' in metrics:
+            insight['pod_status'] = metrics['Pod Status']
+        logger.info(f"Alert resolved for {transition.pod_name}: {transition.anomaly_type}")
+        return insight
+    
+    def _on_enrichment(self, insight_id: str, analysis: Optional[str], error: Optional[Exception]) -> None:
+        """
+        Attach a finished LLM analysis to its insight (called from an enrichment worker).
+        
+        Args:
+            insight_id: Id of the enriched insight
+            analysis: Analysis text, or None if the call failed
+            error: Exception of a failed call
+        """
+        if error is not None:
+            logger.error(f"Error generating enhanced analysis for insight {insight_id}: {error}")
+            fields = {'enrichment_status': 'failed'}
+        else:
+            fields = {
+                'enhanced_analysis': analysis,
+                'ai_generated': True,
+                'enrichment_status': 'completed'
+            }
+            # Extract specific recommendations from enhanced analysis
+            recommendation_section = self._extract_recommendations(analysis)
+            if recommendation_section:
+                fields['enhanced_recommendation'] = recommendation_section
+        
+        with self._enrichment_lock:
+            insight = self._pending_enrichments.pop(insight_id, None)
+            if insight is None:
+                return
+            insight.update(fields)
+            already_written = insight_id in self._written_insight_ids
+            self._written_insight_ids.discard(insight_id)
+            output_file = self._insights_file
+        
+        logger.info(f"Enhanced analysis {fields['enrichment_status']} for pod {insight['pod_name']}")
+        
+        # Insights not yet written pick the fields up when output_insights writes them
+        if already_written and output_file:
+            self._update_insights_file(output_file, {insight_id: fields})
+    
+    def wait_for_enrichment(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for queued LLM analyses to be attached to their insights.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            
+        Returns:
+            True if no analysis is still pending
+        """
+        if self.llm_enricher is None:
+            return True
+        return self.llm_enricher.wait(timeout)
+    
     def _calculate_severity(self, prediction: Dict[str, Any], metrics: Dict[str, Any]) -> str:
         """
         Calculate severity level based on anomaly prediction and metrics.
@@ -456,6 +981,10 @@ class AnomalyDetectionAgent:
             severity = 'High'
         elif anomaly_type == 'resource_exhaustion' and cpu_usage > 95:
             severity = 'High'
+        elif anomaly_type == 'memory_leak' and prediction.get('time_to_oom_minutes') is not None:
+            # Severity follows how soon the projected OOM kill is
+            minutes = float(prediction['time_to_oom_minutes'])
+            severity = 'Critical' if minutes <= 30 else 'High' if minutes <= 120 else 'Medium'
             
         # Adjust based on event age
         event_age_minutes = 0
@@ -509,6 +1038,14 @@ class AnomalyDetectionAgent:
             recommendations.append("Check for memory leaks in the application")
             recommendations.append("Optimize memory usage in the container")
             
+        elif anomaly_type == 'memory_leak':
+            minutes = prediction.get('time_to_oom_minutes')
+            if minutes is not None:
+                recommendations.append(f"Memory is projected to reach the limit in about {minutes:.0f} minutes; "
+                                       f"restart the pod before it is OOM-killed")
+            recommendations.append("Profile the application for memory leaks (growing caches, unreleased buffers)")
+            recommendations.append("Raising memory limits only delays the OOM kill of a leaking process")
+            
         elif anomaly_type == 'resource_exhaustion':
             recommendations.append("Scale the deployment horizontally with more replicas")
             recommendations.append("Increase CPU limits/requests for the pod")
@@ -598,23 +1135,25 @@ class AnomalyDetectionAgent:
             logger.error(f"Error extracting recommendations: {e}")
             return ""
     
-    def output_insights(self, insights: List[Dict[str, Any]], output_file: str = None) -> None:
+    def _resolve_output_file(self, output_file: str = None) -> str:
+        """Resolve the insights file path (absolute or relative to data_dir)"""
+        if not output_file:
+            return os.path.join(self.data_dir, 'pod_insights.json')
+        if not os.path.isabs(output_file):
+            return os.path.join(self.data_dir, output_file)
+        return output_file
+    
+    def _rewrite_insights_file(self, output_file: str, update_fn) -> bool:
         """
-        Output insights to a JSON file with proper file locking.
+        Read, update and atomically rewrite the insights file under its lock.
         
         Args:
-            insights: List of insight dictionaries
-            output_file: Path to the output file (absolute or relative to data_dir)
-        """
-        if not insights:
-            return
-        
-        # Resolve output file path
-        if not output_file:
-            output_file = os.path.join(self.data_dir, 'pod_insights.json')
-        elif not os.path.isabs(output_file):
-            output_file = os.path.join(self.data_dir, output_file)
+            output_file: Absolute path of the insights file
+            update_fn: Function mapping the existing insight list to the new one
             
+        Returns:
+            True if the file was written
+        """
         # Ensure directory exists
         os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
             
@@ -622,7 +1161,7 @@ class AnomalyDetectionAgent:
         lock_handle = FileLocker.acquire_lock(output_file)
         if not lock_handle:
             logger.error(f"Could not acquire lock on {output_file}, skipping write")
-            return
+            return False
             
         try:
             # Use a temporary file to avoid corruption
@@ -636,30 +1175,74 @@ class AnomalyDetectionAgent:
                     except json.JSONDecodeError:
                         logger.warning(f"Could not parse existing insights file {output_file}, creating new file")
                 
-                # Add new insights
-                all_insights = existing_insights + insights
-                
-                # Keep only the latest 100 insights
-                if len(all_insights) > 100:
-                    all_insights = all_insights[-100:]
-                
-                # Write to temporary file
-                json.dump(all_insights, temp_file, indent=2)
+                # Insights may be enriched concurrently, so serialize them under the enrichment lock
+                with self._enrichment_lock:
+                    json.dump(update_fn(existing_insights), temp_file, indent=2)
                 temp_file_path = temp_file.name
                 
             # Replace the original file with the temporary file
             shutil.move(temp_file_path, output_file)
-                
-            logger.info(f"Wrote {len(insights)} new insights to {output_file}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error writing insights to {output_file}: {e}")
             import traceback
             logger.error(traceback.format_exc())
+            return False
         finally:
             # Release lock
             FileLocker.release_lock(lock_handle)
     
+    def output_insights(self, insights: List[Dict[str, Any]], output_file: str = None) -> None:
+        """
+        Output insights to a JSON file with proper file locking.
+        
+        Insights still awaiting LLM analysis are written as they are and
+        updated in place once the analysis arrives.
+        
+        Args:
+            insights: List of insight dictionaries
+            output_file: Path to the output file (absolute or relative to data_dir)
+        """
+        if not insights:
+            return
+        
+        output_file = self._resolve_output_file(output_file)
+        
+        def append(existing_insights):
+            # Add new insights, keeping only the latest 100
+            all_insights = existing_insights + insights
+            if len(all_insights) > 100:
+                all_insights = all_insights[-100:]
+            
+            # Analyses arriving from now on must update the file
+            self._insights_file = output_file
+            for insight in insights:
+                if insight.get('insight_id') in self._pending_enrichments:
+                    self._written_insight_ids.add(insight['insight_id'])
+            return all_insights
+        
+        if self._rewrite_insights_file(output_file, append):
+            logger.info(f"Wrote {len(insights)} new insights to {output_file}")
+    
+    def _update_insights_file(self, output_file: str, updates: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Merge fields into insights already written to the insights file.
+        
+        Args:
+            output_file: Absolute path of the insights file
+            updates: Dictionary mapping insight ids to the fields to set
+        """
+        def merge(existing_insights):
+            for insight in existing_insights:
+                fields = updates.get(insight.get('insight_id'))
+                if fields:
+                    insight.update(fields)
+            return existing_insights
+        
+        if self._rewrite_insights_file(output_file, merge):
+            logger.debug(f"Attached {len(updates)} enhanced analyses in {output_file}")
+    
     def process_metrics_file(self, input_file: str, output_file: str = None) -> None:
         """
         Process a metrics file and generate insights.
@@ -820,6 +1403,36 @@ def main():
                         help='Interval in seconds between file checks when watching (default: 10)')
     parser.add_argument('--use-nvidia-llm', action='store_true',
                         help='Use NVIDIA LLM API for enhanced anomaly analysis')
+    parser.add_argument('--warmup-model', action='store_true',
+                        help='Load the prediction models at startup instead of on first use')
+    parser.add_argument('--no-cascade', action='store_true',
+                        help='Run the model on every pod instead of only pods flagged by the statistical prefilter')
+    parser.add_argument('--stateful-inference', action='store_true',
+                        help='Advance per-pod LSTM state one step per sample instead of rescoring full windows')
+    parser.add_argument('--model-refresh-interval', type=float, default=60.0,
+                        help='Seconds between checks for newly published model versions (0 disables, default: 60)')
+    parser.add_argument('--no-alert-states', action='store_true',
+                        help='Emit an insight for every anomalous pod on every cycle instead of on alert transitions')
+    parser.add_argument('--alert-for-cycles', type=int, default=2,
+                        help='Consecutive anomalous cycles before an alert fires (default: 2)')
+    parser.add_argument('--alert-resolve-cycles', type=int, default=3,
+                        help='Consecutive clear cycles before an alert resolves (default: 3)')
+    parser.add_argument('--alert-renotify-minutes', type=float, default=60,
+                        help='Minutes after which a still-firing alert is reported again (0 disables, default: 60)')
+    parser.add_argument('--llm-workers', type=int, default=4,
+                        help='Maximum concurrent NVIDIA LLM analysis calls (default: 4)')
+    parser.add_argument('--llm-requests-per-minute', type=float, default=60,
+                        help='NVIDIA LLM request rate limit (default: 60)')
+    parser.add_argument('--llm-timeout', type=float, default=30.0,
+                        help='Timeout in seconds for a single NVIDIA LLM call (default: 30)')
+    parser.add_argument('--pod-ttl-minutes', type=float, default=DEFAULT_POD_TTL_SECONDS / 60,
+                        help='Minutes without samples after which a pod\'s state is dropped (0 disables, default: 60)')
+    parser.add_argument('--max-pods', type=int, default=DEFAULT_MAX_PODS,
+                        help=f'Maximum number of pods tracked before the least recently seen are dropped (0 disables, default: {DEFAULT_MAX_PODS})')
+    parser.add_argument('--no-incident-correlation', action='store_true',
+                        help='Analyze every anomalous pod separately instead of once per workload/node incident')
+    parser.add_argument('--incident-window-minutes', type=float, default=5,
+                        help='Minutes an incident stays open after its last anomaly (default: 5)')
     
     args = parser.parse_args()
     
@@ -828,7 +1441,23 @@ def main():
         agent = AnomalyDetectionAgent(
             alert_threshold=args.alert_threshold,
             data_dir=args.data_dir,
-            use_nvidia_llm=args.use_nvidia_llm
+            use_nvidia_llm=args.use_nvidia_llm,
+            warmup_model=args.warmup_model or args.test,
+            stateful_inference=args.stateful_inference,
+            use_cascade=not args.no_cascade,
+            model_refresh_interval=args.model_refresh_interval or None,
+            llm_max_workers=args.llm_workers,
+            llm_requests_per_minute=args.llm_requests_per_minute,
+            llm_timeout=args.llm_timeout,
+            # A single pass has no previous cycles to debounce against
+            use_alert_states=args.watch and not args.no_alert_states,
+            alert_for_cycles=args.alert_for_cycles,
+            alert_resolve_cycles=args.alert_resolve_cycles,
+            alert_renotify_interval=args.alert_renotify_minutes * 60 or None,
+            pod_ttl=args.pod_ttl_minutes * 60 or None,
+            max_pods=args.max_pods or None,
+            correlate_incidents=not args.no_incident_correlation,
+            incident_window=args.incident_window_minutes * 60
         )
         
         # If test mode, just exit
@@ -909,6 +1538,7 @@ def main():
                                     
                                     # Output insights
                                     agent.output_insights(insights, args.output_file)
+                                    logger.debug(f"Per-pod state: {agent.get_state_stats()}")
                                 else:
                                     logger.debug("No new rows to process")
                             except Exception as e:
@@ -932,6 +1562,10 @@ def main():
             logger.info(f"Processing {input_file}")
             agent.process_metrics_file(args.input_file, args.output_file)
             
+            # Let queued LLM analyses reach the insights file before exiting
+            if not agent.wait_for_enrichment(timeout=args.llm_timeout * 10):
+                logger.warning("Exiting with LLM analyses still pending")
+            
             # Clean up the generator if it was started
             if generator_process and generator_process.poll() is None:
                 logger.info("Stopping dataset generator...")
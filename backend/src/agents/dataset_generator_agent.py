@@ -22,6 +22,9 @@ except ImportError as e:
     print(f"Warning: Could not import AnomalyDetectionAgent: {e}")
     # We'll handle this case later
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from pod_state import PodStateStore, DEFAULT_POD_TTL_SECONDS, DEFAULT_MAX_PODS
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,7 +43,9 @@ class DatasetGeneratorAgent:
                  input_file: str = 'pod_metrics.csv',
                  watch_interval: int = 10,
                  alert_threshold: float = 0.7,
-                 history_window: int = 60):
+                 history_window: int = 60,
+                 pod_ttl: Optional[float] = DEFAULT_POD_TTL_SECONDS,
+                 max_pods: Optional[int] = DEFAULT_MAX_PODS):
         """
         Initialize the dataset generator agent.
         
@@ -49,6 +54,10 @@ class DatasetGeneratorAgent:
             watch_interval: Interval in seconds between checks
             alert_threshold: Probability threshold for anomaly alerts
             history_window: Number of minutes of history to maintain
+            pod_ttl: Seconds without samples after which a pod's state is
+                     dropped (None keeps it forever)
+            max_pods: Maximum number of pods tracked; the least recently
+                      seen pods are dropped beyond it (None disables the cap)
         """
         # Resolve input file path
         if input_file == 'pod_metrics.csv' and not os.path.isabs(input_file):
@@ -83,14 +92,14 @@ class DatasetGeneratorAgent:
         self.history_window = history_window
         
         # Initialize data structures
-        self.pod_metrics = {}  # Store latest metrics for each pod
-        self.pod_history = {}  # Store historical metrics for each pod
+        self._init_pod_state(pod_ttl, max_pods)
         self.last_file_position = 0
         self.last_read_time = 0
         
         # Initialize the anomaly detection agent
         try:
-            self.anomaly_agent = AnomalyDetectionAgent(alert_threshold=alert_threshold)
+            self.anomaly_agent = AnomalyDetectionAgent(alert_threshold=alert_threshold,
+                                                       pod_ttl=pod_ttl, max_pods=max_pods)
             logger.info("Successfully initialized AnomalyDetectionAgent")
         except NameError:
             logger.error("AnomalyDetectionAgent could not be initialized, anomaly detection will not be available")
@@ -262,6 +271,31 @@ class DatasetGeneratorAgent:
             traceback.print_exc()
             return pd.DataFrame()
     
+    def _init_pod_state(self, pod_ttl: Optional[float], max_pods: Optional[int]) -> None:
+        """
+        Create the per-pod state.
+        
+        pod_history is the authoritative set of tracked pods: a pod that
+        stops sending samples (e.g. it was deleted) is evicted from it after
+        pod_ttl, and its entries in the other per-pod structures go with it.
+        """
+        self.pod_metrics = {}  # Store latest metrics for each pod
+        self.pod_history = PodStateStore(ttl=pod_ttl, max_pods=max_pods, name="dataset-generator-pods")
+        self.pod_history.on_evict(self._forget_pod)
+        
+        # Incremental detection: only pods with new samples are re-run, the
+        # last results of the other pods are reused
+        self.dirty_pods = set()  # Pods that received samples since the last detection pass
+        self.anomaly_results = {}  # Last detection result of each pod
+        self.last_detected = set()  # Pods whose results were recomputed by the last pass
+    
+    def _forget_pod(self, pod_name: str, history: List[Dict[str, Any]], reason: str) -> None:
+        """Drop the remaining state of a pod evicted from pod_history"""
+        self.pod_metrics.pop(pod_name, None)
+        self.anomaly_results.pop(pod_name, None)
+        self.dirty_pods.discard(pod_name)
+        self.last_detected.discard(pod_name)
+    
     def update_pod_metrics(self, df: pd.DataFrame) -> None:
         """
         Update pod metrics with new data.
@@ -297,6 +331,7 @@ class DatasetGeneratorAgent:
             if pod_name not in self.pod_history:
                 self.pod_history[pod_name] = []
             self.pod_history[pod_name].append(pod_data)
+            self.dirty_pods.add(pod_name)
             
             # Trim history to keep only recent data
             self._trim_pod_history(pod_name)
@@ -333,9 +368,17 @@ class DatasetGeneratorAgent:
         
         self.pod_history[pod_name] = filtered_history
     
-    def detect_anomalies(self) -> Dict[str, Dict[str, Any]]:
+    def detect_anomalies(self, force_all: bool = False) -> Dict[str, Dict[str, Any]]:
         """
-        Run anomaly detection on all pods using the separate anomaly detection agent.
+        Run anomaly detection using the separate anomaly detection agent.
+        
+        Only pods that received new samples since the last pass are sent to
+        the detector, so the work per tick scales with the number of changed
+        pods. The cached results of unchanged pods are included in the output;
+        last_detected names the pods whose results were recomputed.
+        
+        Args:
+            force_all: Re-run detection for every pod, not only changed ones
         
         Returns:
             Dictionary of pod names to anomaly results
@@ -344,15 +387,34 @@ class DatasetGeneratorAgent:
             logger.warning("Anomaly detection agent not available, skipping anomaly detection")
             return {}
         
-        try:
-            # Use the separate anomaly detection agent
-            anomalies = self.anomaly_agent.detect_anomalies(self.pod_history)
-            return anomalies
-        except Exception as e:
-            logger.error(f"Error detecting anomalies: {e}")
-            import traceback
-            traceback.print_exc()
-            return {}
+        # Evict pods that stopped reporting, then drop cached results of
+        # pods that are no longer tracked
+        self.pod_history.expire()
+        for pod_name in list(self.anomaly_results):
+            if pod_name not in self.pod_history:
+                del self.anomaly_results[pod_name]
+        
+        changed = self.pod_history.keys() if force_all else self.dirty_pods & self.pod_history.keys()
+        changed_history = {pod_name: self.pod_history[pod_name] for pod_name in changed
+                           if self.pod_history[pod_name]}
+        
+        self.last_detected = set()
+        if changed_history:
+            try:
+                # Use the separate anomaly detection agent
+                self.anomaly_results.update(self.anomaly_agent.detect_anomalies(changed_history))
+            except Exception as e:
+                logger.error(f"Error detecting anomalies: {e}")
+                import traceback
+                traceback.print_exc()
+                # Keep the pods dirty so the next pass retries them
+                return dict(self.anomaly_results)
+        
+        self.last_detected = set(changed_history)
+        self.dirty_pods.clear()
+        logger.debug(f"Ran detection on {len(changed_history)} changed pods, "
+                     f"reused {len(self.anomaly_results) - len(changed_history)} cached results")
+        return dict(self.anomaly_results)
     
     def generate_insights(self, anomalies: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -378,6 +440,31 @@ class DatasetGeneratorAgent:
             traceback.print_exc()
             return []
     
+    def process_new_data(self, new_data: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Run one detection pass over newly read rows.
+        
+        Only the results recomputed by this pass are sent to generate_insights:
+        the cached results of unchanged pods would be counted again by the
+        alert tracker as new observations.
+        
+        Args:
+            new_data: Rows read since the last pass
+            
+        Returns:
+            List of insight dictionaries
+        """
+        # Update metrics
+        self.update_pod_metrics(new_data)
+        
+        # Detect anomalies
+        anomalies = self.detect_anomalies()
+        detected = {pod_name: anomalies[pod_name] for pod_name in self.last_detected
+                    if pod_name in anomalies}
+        
+        # Generate insights
+        return self.generate_insights(detected)
+    
     def run(self) -> None:
         """Run the agent in a continuous loop"""
         logger.info(f"Starting dataset generator agent, monitoring {self.input_file}")
@@ -387,14 +474,7 @@ class DatasetGeneratorAgent:
                 # Read new data
                 new_data = self.read_new_data()
                 if not new_data.empty:
-                    # Update metrics
-                    self.update_pod_metrics(new_data)
-                    
-                    # Detect anomalies
-                    anomalies = self.detect_anomalies()
-                    
-                    # Generate insights
-                    insights = self.generate_insights(anomalies)
+                    insights = self.process_new_data(new_data)
                     
                     # Output insights
                     if insights and self.anomaly_agent:
@@ -466,6 +546,10 @@ def main():
                         help='Interval in seconds between checks (default: 10)')
     parser.add_argument('--alert-threshold', type=float, default=0.7,
                         help='Probability threshold for anomaly alerts (default: 0.7)')
+    parser.add_argument('--pod-ttl-minutes', type=float, default=DEFAULT_POD_TTL_SECONDS / 60,
+                        help='Minutes without samples after which a pod\'s state is dropped (0 disables, default: 60)')
+    parser.add_argument('--max-pods', type=int, default=DEFAULT_MAX_PODS,
+                        help=f'Maximum number of pods tracked before the least recently seen are dropped (0 disables, default: {DEFAULT_MAX_PODS})')
     parser.add_argument('--test', action='store_true',
                         help='Test agent setup without running the main loop')
     
@@ -476,7 +560,9 @@ def main():
         agent = DatasetGeneratorAgent(
             input_file=args.input_file,
             watch_interval=args.watch_interval,
-            alert_threshold=args.alert_threshold
+            alert_threshold=args.alert_threshold,
+            pod_ttl=args.pod_ttl_minutes * 60 or None,
+            max_pods=args.max_pods or None
         )
         
         # If test mode, just check if the input file exists
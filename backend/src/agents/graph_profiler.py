@@ -0,0 +1,251 @@
+"""
+Per-node profiling of state graph executions
+
+GraphProfiler is a GraphHook for the bundled state graph runtime. For every
+node run, fan-out and router decision it records:
+
+- wall time and CPU time of the process (CPU time includes the worker threads
+  of fan-outs and of sync nodes run by ainvoke),
+- allocations made during the step (tracemalloc: net bytes, and the peak on
+  Python 3.9+ where tracemalloc.reset_peak exists),
+- the size of the state after the step (top-level keys and approximate bytes).
+
+Steps are exported as Chrome-trace JSON (chrome://tracing, Perfetto) and
+aggregated into per-step counters. Profiling is opt-in: profiler_from_env()
+returns a profiler only when GRAPH_PROFILE is set.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+import logging
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from state_graph import GraphHook
+
+logger = logging.getLogger("graph-profiler")
+
+# Steps kept for the trace; counters cover every step
+DEFAULT_MAX_EVENTS = 10000
+
+# tracemalloc.reset_peak() was added in Python 3.9
+_CAN_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+
+class StepRecord(NamedTuple):
+    """One profiled step of a graph execution"""
+    kind: str  # 'node', 'fanout' or 'router'
+    name: str
+    run: int  # Index of the graph execution
+    start_us: float  # Start time relative to the profiler's creation
+    wall_ms: float
+    cpu_ms: float
+    alloc_bytes: int  # Net bytes allocated by the step (0 without tracemalloc)
+    peak_bytes: int  # Peak traced memory above the step's starting point
+    state_keys: int
+    state_bytes: int  # Approximate size of the state after the step (0 if not measured)
+    thread_id: int
+    detail: Dict[str, Any]
+
+
+def state_size(value: Any) -> int:
+    """Approximate size in bytes of a state, following dicts and collections"""
+    seen = set()
+    stack = [value]
+    size = 0
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset, deque)):
+            stack.extend(value)
+        elif hasattr(value, '__dict__'):
+            stack.append(vars(value))
+    return size
+
+
+class GraphProfiler(GraphHook):
+    """Records wall time, CPU time, allocations and state size per graph step"""
+
+    def __init__(self, graph_name: str = "graph", trace_path: Optional[str] = None,
+                 trace_allocations: bool = True, measure_state: bool = True,
+                 max_events: int = DEFAULT_MAX_EVENTS):
+        """
+        Args:
+            graph_name: Name of the profiled graph, used as the trace's process name
+            trace_path: Chrome-trace file rewritten after every execution (optional)
+            trace_allocations: Measure allocations with tracemalloc, starting it
+                               if it is not running
+            measure_state: Measure the state size after every step (walks the state)
+            max_events: Steps kept for the trace
+        """
+        self.graph_name = graph_name
+        self.trace_path = trace_path
+        self.measure_state = measure_state
+        self.events = deque(maxlen=max_events)
+        self.counters: Dict[str, Dict[str, Any]] = {}
+        self.runs = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+        self.trace_allocations = trace_allocations
+        self._started_tracemalloc = False
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def start_step(self, kind, name, state):
+        allocated = 0
+        if self.trace_allocations and tracemalloc.is_tracing():
+            allocated = tracemalloc.get_traced_memory()[0]
+            if _CAN_RESET_PEAK:
+                tracemalloc.reset_peak()
+        return time.perf_counter(), time.process_time(), allocated
+
+    def end_step(self, kind, name, token, state, result):
+        wall_end, cpu_end = time.perf_counter(), time.process_time()
+        wall_start, cpu_start, allocated = token
+        alloc_bytes = peak_bytes = 0
+        if self.trace_allocations and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            alloc_bytes = current - allocated
+            # Without reset_peak the peak may predate the step: report none
+            peak_bytes = max(0, peak - allocated) if _CAN_RESET_PEAK else 0
+
+        detail = {}
+        if kind == 'router':
+            detail['next'] = str(result)
+        elif kind == 'fanout' and isinstance(result, dict):
+            for key, value in result.items():
+                detail['errors' if key.endswith('_errors') else 'branches'] = len(value)
+
+        record = StepRecord(
+            kind, name, self.runs, (wall_start - self._origin) * 1e6,
+            (wall_end - wall_start) * 1000, (cpu_end - cpu_start) * 1000,
+            alloc_bytes, peak_bytes, len(state),
+            state_size(state) if self.measure_state else 0,
+            threading.get_ident(), detail)
+        self._record(record)
+
+    def end_run(self, state):
+        with self._lock:
+            self.runs += 1
+        if self.trace_path:
+            try:
+                self.write_chrome_trace(self.trace_path)
+            except OSError as e:
+                logger.error(f"Error writing graph trace to {self.trace_path}: {e}")
+
+    def _record(self, record: StepRecord):
+        with self._lock:
+            self.events.append(record)
+            counter = self.counters.get(f"{record.kind}:{record.name}")
+            if counter is None:
+                counter = {'calls': 0, 'wall_ms': 0.0, 'max_wall_ms': 0.0, 'cpu_ms': 0.0,
+                           'alloc_bytes': 0, 'max_peak_bytes': 0, 'max_state_bytes': 0}
+                self.counters[f"{record.kind}:{record.name}"] = counter
+            counter['calls'] += 1
+            counter['wall_ms'] += record.wall_ms
+            counter['max_wall_ms'] = max(counter['max_wall_ms'], record.wall_ms)
+            counter['cpu_ms'] += record.cpu_ms
+            counter['alloc_bytes'] += record.alloc_bytes
+            counter['max_peak_bytes'] = max(counter['max_peak_bytes'], record.peak_bytes)
+            counter['max_state_bytes'] = max(counter['max_state_bytes'], record.state_bytes)
+            if record.kind == 'router':
+                decisions = counter.setdefault('decisions', {})
+                decisions[record.detail['next']] = decisions.get(record.detail['next'], 0) + 1
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Recorded steps in the Chrome trace event format.
+
+        Returns:
+            Dictionary with 'traceEvents': a complete ('X') event per step and
+            a counter ('C') event tracking the state size
+        """
+        pid = os.getpid()
+        trace_events: List[Dict[str, Any]] = [
+            {'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.graph_name}}]
+        with self._lock:
+            events = list(self.events)
+        for record in events:
+            trace_events.append({
+                'name': record.name,
+                'cat': record.kind,
+                'ph': 'X',
+                'ts': round(record.start_us, 3),
+                'dur': round(record.wall_ms * 1000, 3),
+                'pid': pid,
+                'tid': record.thread_id,
+                'args': {'run': record.run, 'cpu_ms': round(record.cpu_ms, 3),
+                         'alloc_bytes': record.alloc_bytes, 'peak_bytes': record.peak_bytes,
+                         'state_keys': record.state_keys, 'state_bytes': record.state_bytes,
+                         **record.detail},
+            })
+            if record.kind != 'router' and self.measure_state:
+                trace_events.append({
+                    'name': 'state', 'ph': 'C', 'pid': pid,
+                    'ts': round(record.start_us + record.wall_ms * 1000, 3),
+                    'args': {'bytes': record.state_bytes},
+                })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the Chrome trace to a JSON file"""
+        trace = self.chrome_trace()
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+        logger.debug(f"Wrote {len(trace['traceEvents'])} trace events to {path}")
+
+    def summary(self, top: int = 10) -> str:
+        """The steps with the most wall time, one line each"""
+        with self._lock:
+            counters = sorted(self.counters.items(), key=lambda item: item[1]['wall_ms'], reverse=True)
+        lines = [f"{self.graph_name}: {self.runs} runs"]
+        for step, counter in counters[:top]:
+            lines.append(f"- {step}: {counter['calls']} calls, {counter['wall_ms']:.1f} ms wall "
+                         f"(max {counter['max_wall_ms']:.1f}), {counter['cpu_ms']:.1f} ms CPU, "
+                         f"{counter['alloc_bytes'] / 1024:.1f} KiB allocated, "
+                         f"state up to {counter['max_state_bytes'] / 1024:.1f} KiB")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Drop the recorded steps and counters"""
+        with self._lock:
+            self.events.clear()
+            self.counters.clear()
+            self.runs = 0
+
+    def close(self) -> None:
+        """Stop tracemalloc if the profiler started it"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+def profiler_from_env(graph_name: str) -> Optional[GraphProfiler]:
+    """
+    Profiler configured by the environment.
+
+    GRAPH_PROFILE=1 enables profiling, GRAPH_PROFILE_ALLOCATIONS=0 skips
+    tracemalloc and GRAPH_TRACE_DIR names a directory the Chrome trace of
+    each graph is written to as '<graph_name>.trace.json'.
+
+    Returns:
+        A GraphProfiler, or None when profiling is disabled
+    """
+    if os.environ.get('GRAPH_PROFILE', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    trace_dir = os.environ.get('GRAPH_TRACE_DIR')
+    trace_path = os.path.join(trace_dir, f"{graph_name}.trace.json") if trace_dir else None
+    allocations = os.environ.get('GRAPH_PROFILE_ALLOCATIONS', '1').lower() not in ('0', 'false', 'no')
+    return GraphProfiler(graph_name, trace_path=trace_path, trace_allocations=allocations)
@@ -0,0 +1,247 @@
+"""
+Correlation of pod anomalies into incidents
+
+A misbehaving Deployment with 30 replicas yields 30 pod anomalies, and
+without correlation each of them gets its own LLM analysis and remediation
+plan. This module groups the anomalies of one detection cycle into incidents
+so downstream analysis and remediation run once per incident:
+
+- workload: anomalous pods of the same owner workload (Deployment,
+  StatefulSet, ...) and anomaly type share an incident;
+- node: when anomalies of at least `node_min_workloads` different workloads
+  land on the same node, or a node-level detector flagged the node, the node
+  is the likely cause and those pods share one node incident;
+- time window: an incident stays open for `window_seconds` after its last
+  anomaly, so the same workload failing on the next cycle joins the open
+  incident instead of opening a new one.
+
+The owner workload is taken from the 'Owner Kind'/'Owner Name' metrics when
+the collector provides them, and otherwise derived from the pod name by
+stripping the generated ReplicaSet/pod suffixes.
+"""
+
+import re
+import time
+import uuid
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("incident-correlation")
+
+# Generated name suffixes use the Kubernetes "safe" alphabet (no vowels, 0, 1, 3)
+_SAFE = '[bcdfghjklmnpqrstvwxz2456789]'
+# <deployment>-<replicaset hash>-<pod suffix>, e.g. web-7d4b9c8f6d-x2k9p
+_DEPLOYMENT_POD = re.compile(rf'^(?P<name>.+)-{_SAFE}{{6,10}}-{_SAFE}{{5}}$')
+# <statefulset>-<ordinal>, e.g. db-0
+_STATEFULSET_POD = re.compile(r'^(?P<name>.+)-\d+$')
+# <daemonset or job>-<pod suffix>, e.g. node-exporter-4xk2f
+_GENERATED_POD = re.compile(rf'^(?P<name>.+)-{_SAFE}{{5}}$')
+
+
+def workload_of(pod_name: str, metrics: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+    """
+    Owner workload of a pod.
+
+    Args:
+        pod_name: Name of the pod
+        metrics: Pod metrics, used for the 'Owner Kind'/'Owner Name' fields if present
+
+    Returns:
+        Tuple of (kind, name); bare pods are their own workload of kind 'Pod'
+    """
+    metrics = metrics or {}
+    kind, name = metrics.get('Owner Kind'), metrics.get('Owner Name')
+    if kind and name:
+        template_hash = metrics.get('Pod Template Hash')
+        if kind == 'ReplicaSet' and template_hash and str(name).endswith(f"-{template_hash}"):
+            return 'Deployment', str(name)[:-len(template_hash) - 1]
+        return str(kind), str(name)
+
+    for kind, pattern in (('Deployment', _DEPLOYMENT_POD), ('StatefulSet', _STATEFULSET_POD),
+                          ('Workload', _GENERATED_POD)):
+        match = pattern.match(pod_name)
+        if match:
+            return kind, match.group('name')
+    return 'Pod', pod_name
+
+
+def workload_key(pod_name: str, metrics: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Stable key of a pod's owner workload, '<namespace>/<kind>/<name>'.
+    
+    Unlike the pod name it survives restarts and rollouts, so state shared by
+    the replicas of a workload (e.g. statistical baselines) is keyed by it.
+    """
+    metrics = metrics or {}
+    kind, name = workload_of(pod_name, metrics)
+    return f"{_namespace_of(metrics)}/{kind}/{name}"
+
+
+def _node_of(metrics):
+    node = metrics.get('Node Name') or metrics.get('node')
+    return str(node) if node and node != 'Unknown' else None
+
+
+def _namespace_of(metrics):
+    return str(metrics.get('Namespace') or metrics.get('namespace') or 'default')
+
+
+def _rank(entry):
+    prediction = entry.get('prediction', {})
+    return (entry.get('priority', 0), float(prediction.get('anomaly_probability', 0.0)))
+
+
+class Incident:
+    """Anomalous pods that share a cause"""
+
+    __slots__ = ('incident_id', 'scope', 'key', 'namespace', 'workload', 'node',
+                 'anomaly_types', 'pods', 'first_seen', 'last_seen')
+
+    def __init__(self, scope, key, namespace, workload, node, now):
+        self.incident_id = uuid.uuid4().hex
+        self.scope = scope  # 'workload' or 'node'
+        self.key = key
+        self.namespace = namespace
+        self.workload = workload  # (kind, name), None for node incidents
+        self.node = node
+        self.anomaly_types = set()
+        self.pods: Dict[str, Dict[str, Any]] = {}  # Latest anomaly entry of each affected pod
+        self.first_seen = now
+        self.last_seen = now
+
+    @property
+    def representative(self) -> str:
+        """Affected pod with the highest priority and anomaly probability"""
+        return max(self.pods, key=lambda pod_name: _rank(self.pods[pod_name]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable summary of the incident"""
+        return {
+            'incident_id': self.incident_id,
+            'scope': self.scope,
+            'namespace': self.namespace,
+            'workload_kind': self.workload[0] if self.workload else None,
+            'workload_name': self.workload[1] if self.workload else None,
+            'node': self.node,
+            'anomaly_types': sorted(self.anomaly_types),
+            'pods': sorted(self.pods),
+            'representative_pod': self.representative,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+        }
+
+
+class IncidentUpdate(NamedTuple):
+    """An incident touched by a detection cycle"""
+    incident: Incident
+    new: bool  # Opened by this cycle
+    new_pods: List[str]  # Pods that joined the incident this cycle
+
+
+class IncidentCorrelator:
+    """Groups pod anomalies into incidents by owner workload, node and time window"""
+
+    def __init__(self, window_seconds: float = 300.0, node_min_workloads: int = 3,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            window_seconds: Seconds an incident stays open after its last anomaly
+            node_min_workloads: Distinct anomalous workloads on one node that
+                                make the node the incident (0 disables)
+            clock: Time source, in seconds
+        """
+        self.window_seconds = window_seconds
+        self.node_min_workloads = node_min_workloads
+        self.clock = clock
+        self.open_incidents: Dict[Tuple, Incident] = {}
+        self.stats = {'anomalies': 0, 'incidents_opened': 0, 'incidents_closed': 0}
+
+    def correlate(self, anomalies: Dict[str, Dict[str, Any]], now: Optional[float] = None,
+                  failing_nodes: Optional[Iterable[str]] = None) -> List[IncidentUpdate]:
+        """
+        Group one cycle of pod anomalies into incidents.
+
+        Args:
+            anomalies: Dictionary mapping pod names to anomaly entries with
+                       'prediction', 'pod_metrics' and optionally 'priority'
+            now: Cycle time (defaults to the correlator clock)
+            failing_nodes: Nodes already known to be unhealthy (e.g. from
+                           node_detector); their anomalous pods form node incidents
+
+        Returns:
+            The incidents that received anomalies this cycle, most important first
+        """
+        now = self.clock() if now is None else now
+        self.expire(now)
+        self.stats['anomalies'] += len(anomalies)
+
+        placement = {}
+        for pod_name, entry in anomalies.items():
+            metrics = entry.get('pod_metrics', {}) or {}
+            anomaly_type = entry.get('prediction', {}).get('anomaly_type', 'unknown')
+            placement[pod_name] = (_namespace_of(metrics), workload_of(pod_name, metrics),
+                                   _node_of(metrics), anomaly_type)
+
+        # Nodes hosting anomalies of enough distinct workloads become the incident
+        node_workloads = defaultdict(set)
+        for namespace, workload, node, _ in placement.values():
+            if node is not None:
+                node_workloads[node].add((namespace, workload))
+        failing_nodes = set(failing_nodes or ())
+        failing_nodes.update(node for node, workloads in node_workloads.items()
+                             if self.node_min_workloads and len(workloads) >= self.node_min_workloads)
+
+        updates: Dict[Tuple, IncidentUpdate] = {}
+        for pod_name, (namespace, workload, node, anomaly_type) in placement.items():
+            if node in failing_nodes:
+                key = ('node', node)
+                args = ('node', key, None, None, node)
+            else:
+                key = ('workload', namespace, workload, anomaly_type)
+                args = ('workload', key, namespace, workload, node)
+
+            incident = self.open_incidents.get(key)
+            if key not in updates:
+                is_new = incident is None
+                if is_new:
+                    incident = Incident(*args, now)
+                    self.open_incidents[key] = incident
+                    self.stats['incidents_opened'] += 1
+                updates[key] = IncidentUpdate(incident, is_new, [])
+
+            if pod_name not in incident.pods:
+                updates[key].new_pods.append(pod_name)
+            incident.pods[pod_name] = anomalies[pod_name]
+            incident.anomaly_types.add(anomaly_type)
+            incident.last_seen = now
+            if incident.node is not None and incident.node != node:
+                incident.node = None  # Spread over several nodes
+
+        result = sorted(updates.values(), key=lambda update: _rank(
+            update.incident.pods[update.incident.representative]), reverse=True)
+        if len(result) < len(anomalies):
+            logger.info(f"Correlated {len(anomalies)} pod anomalies into {len(result)} incidents")
+        return result
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Close incidents without anomalies in the last window.
+
+        Returns:
+            Number of incidents closed
+        """
+        now = self.clock() if now is None else now
+        stale = [key for key, incident in self.open_incidents.items()
+                 if now - incident.last_seen > self.window_seconds]
+        for key in stale:
+            del self.open_incidents[key]
+        self.stats['incidents_closed'] += len(stale)
+        return len(stale)
+
+    def incident_of(self, pod_name: str) -> Optional[Incident]:
+        """Open incident affecting a pod, if any"""
+        for incident in self.open_incidents.values():
+            if pod_name in incident.pods:
+                return incident
+        return None
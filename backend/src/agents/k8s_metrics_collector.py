@@ -302,6 +302,10 @@ def extract_pod_metrics(pod_metrics: List[Dict[str, Any]], pod_info: List[Dict[s
         # Get pod status info
         pod_status = pod_info_lookup.get(pod_name, {}).get("status", {})
         
+        # Owner workload, so state can be shared across the workload's replicas
+        pod_metadata = pod_info_lookup.get(pod_name, {}).get("metadata", {})
+        owner = next((ref for ref in pod_metadata.get("ownerReferences", []) if ref.get("controller")), {})
+        
         # Extract containers info
         total_containers = len(pod.get("containers", []))
         ready_containers = sum(1 for container in pod_status.get("containerStatuses", []) 
@@ -399,7 +403,11 @@ def extract_pod_metrics(pod_metrics: List[Dict[str, Any]], pod_info: List[Dict[s
             'Event Message': event_message,
             'Event Age (minutes)': latest_event_age,
             'Event Count': event_count,
-            'Node Name': pod_status.get("hostIP", "")
+            'Node Name': pod_status.get("hostIP", ""),
+            'Namespace': pod_metadata.get("namespace", pod.get("metadata", {}).get("namespace", "default")),
+            'Owner Kind': owner.get("kind", ""),
+            'Owner Name': owner.get("name", ""),
+            'Pod Template Hash': pod_metadata.get("labels", {}).get("pod-template-hash", "")
         }
         
         metrics_rows.append(metrics_row)
@@ -31,7 +31,6 @@ from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
-from langgraph.graph import StateGraph, END
 
 # Kubernetes imports
 try:
@@ -39,6 +38,60 @@ try:
 except ImportError:
     print("Warning: Kubernetes client not installed. Some features may not work.")
 
+# Add the models directory to the path
+models_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..', 'backend', 'models'))
+if models_path not in sys.path:
+    sys.path.append(models_path)
+
+# Shared declarative detection rules
+from rule_engine import evaluate_cluster, pod_priorities
+# Node-wide problems are detected on per-node aggregates of the pod metrics
+from node_detector import NodeAggregator
+# Memory leaks are flagged from the per-pod memory trend before the OOM kill
+from memory_forecaster import MemoryLeakForecaster
+
+node_aggregator = NodeAggregator()
+memory_forecaster = MemoryLeakForecaster()
+
+# TTL/LRU eviction of per-pod history, so deleted pods do not accumulate
+agents_path = os.path.dirname(os.path.abspath(__file__))
+if agents_path not in sys.path:
+    sys.path.append(agents_path)
+from pod_state import prune_pod_state, DEFAULT_POD_TTL_SECONDS, DEFAULT_MAX_PODS
+
+# Graphs run on LangGraph, or on the bundled runtime (bounded messages,
+# structurally shared state) with STATE_GRAPH_RUNTIME=builtin
+from state_graph import load_graph_runtime, FanOut
+
+StateGraph, END = load_graph_runtime()
+
+# Per-step profiling of the orchestrator (GRAPH_PROFILE=1, Chrome traces
+# written to GRAPH_TRACE_DIR): the steps main() runs, and the nodes of the
+# compiled graph on the bundled runtime
+from graph_profiler import profiler_from_env
+
+orchestrator_profiler = profiler_from_env("orchestrator")
+
+# Pods remediated concurrently per cycle (0: executor default)
+REMEDIATION_WORKERS = int(os.environ.get('REMEDIATION_WORKERS', 8)) or None
+
+POD_STATE_TTL_SECONDS = float(os.environ.get('POD_STATE_TTL_SECONDS', DEFAULT_POD_TTL_SECONDS))
+POD_STATE_MAX_PODS = int(os.environ.get('POD_STATE_MAX_PODS', DEFAULT_MAX_PODS))
+
+# Histories are keyed by stable pod identity (owner workload plus replica
+# slot), so they carry over to a pod's replacement after a restart or rollout
+from pod_identity import PodIdentityMap
+
+pod_identities = PodIdentityMap()
+
+# Pod anomalies are grouped into incidents (by owner workload, node and time
+# window) so remediation is planned once per incident instead of once per pod
+from incident_correlation import IncidentCorrelator
+
+incident_correlator = IncidentCorrelator(
+    window_seconds=float(os.environ.get('INCIDENT_WINDOW_SECONDS', 300)),
+    node_min_workloads=int(os.environ.get('INCIDENT_NODE_MIN_WORKLOADS', 3)))
+
 # Try to import local modules
 try:
     from anomaly_prediction import predict_anomalies
@@ -147,7 +200,9 @@ class MonitoringState(TypedDict):
     messages: List[Any]
     metrics_data: Dict[str, Any]
     pod_metrics: Dict[str, Dict[str, Any]]
-    pod_history: Dict[str, List[Dict[str, Any]]]
+    pod_history: Dict[str, List[Dict[str, Any]]]  # Keyed by pod identity, samples carry 'Pod Name'
+    pod_last_seen: Dict[str, float]  # Time each pod identity last reported metrics
+    pod_evictions: Dict[str, int]  # Identities dropped from pod_history by TTL and by the cap
     status: str
     last_run_time: float
     action: str
@@ -177,6 +232,10 @@ class OrchestratorState(TypedDict):
     remediation_state: Optional[RemediationState]
     active_agent: str  # "monitoring", "anomaly", "remediation", "none"
     pods_with_anomalies: Dict[str, Dict[str, Any]]
+    incidents: Dict[str, Dict[str, Any]]  # Incident id -> correlated anomalies of this cycle
+    node_anomalies: Dict[str, Dict[str, Any]]  # Node name -> node-level anomaly of this cycle
+    pod_remediation_results: Dict[str, Dict[str, Any]]  # Pod name -> outcome of its remediation branch
+    pod_remediation_results_errors: Dict[str, str]  # Pod name -> error of a failed remediation branch
     current_pod: Optional[str]
     approved_remediations: List[str]
     approval_queue: List[Dict[str, Any]]
@@ -772,6 +831,15 @@ def collect_pod_metrics(namespace="default") -> Dict[str, Dict[str, Any]]:
                         'Pod Restarts': sum(container.restart_count for container in pod.status.container_statuses) if pod.status.container_statuses else 0,
                     }
                     
+                    # Owner workload, used to correlate anomalies of replicas into one incident
+                    owners = pod.metadata.owner_references or []
+                    controller = next((owner for owner in owners if owner.controller), owners[0] if owners else None)
+                    if controller is not None:
+                        pod_info['Owner Kind'] = controller.kind
+                        pod_info['Owner Name'] = controller.name
+                    if pod.metadata.labels and 'pod-template-hash' in pod.metadata.labels:
+                        pod_info['Pod Template Hash'] = pod.metadata.labels['pod-template-hash']
+                    
                     # Add container counts
                     total_containers = len(pod.spec.containers)
                     ready_containers = sum(1 for container in pod.status.container_statuses if container.ready) if pod.status.container_statuses else 0
@@ -987,6 +1055,8 @@ def collect_metrics_node(state: MonitoringState) -> MonitoringState:
             "metrics_data": pod_metrics,
             "pod_metrics": pod_metrics,
             "pod_history": state.get("pod_history", {}),
+            "pod_last_seen": state.get("pod_last_seen", {}),
+            "pod_evictions": state.get("pod_evictions", {}),
             "status": "metrics_collected",
             "last_run_time": time.time(),
             "action": "analyze"
@@ -1000,6 +1070,8 @@ def collect_metrics_node(state: MonitoringState) -> MonitoringState:
             "metrics_data": {},
             "pod_metrics": {},
             "pod_history": state.get("pod_history", {}),
+            "pod_last_seen": state.get("pod_last_seen", {}),
+            "pod_evictions": state.get("pod_evictions", {}),
             "status": "error",
             "last_run_time": time.time(),
             "action": "complete"
@@ -1010,24 +1082,41 @@ def analyze_metrics_node(state: MonitoringState) -> MonitoringState:
     messages = state["messages"]
     pod_metrics = state["pod_metrics"]
     pod_history = state.get("pod_history", {})
+    pod_last_seen = state.get("pod_last_seen", {})
+    pod_evictions = dict(state.get("pod_evictions") or {'ttl': 0, 'lru': 0})
+    now = time.time()
+    
+    # pod_metrics is a full snapshot: pods missing from it are gone and
+    # their replacements may take over their identities
+    pod_identities.retain(pod_metrics)
     
     # Update pod history with new metrics
     for pod_name, metrics in pod_metrics.items():
-        if pod_name not in pod_history:
-            pod_history[pod_name] = []
+        identity = pod_identities.resolve(pod_name, metrics)
+        pod_last_seen[identity] = now
+        if identity not in pod_history:
+            pod_history[identity] = []
         
         # Add timestamp if not present
         if "timestamp" not in metrics:
             metrics["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        metrics.setdefault("Pod Name", pod_name)
             
-        pod_history[pod_name].append(metrics)
+        pod_history[identity].append(metrics)
         
         # Keep history limited to avoid memory issues
-        if len(pod_history[pod_name]) > 100:
-            pod_history[pod_name] = pod_history[pod_name][-100:]
+        if len(pod_history[identity]) > 100:
+            pod_history[identity] = pod_history[identity][-100:]
+    
+    # Drop the history of identities no pod reported for (e.g. deleted workloads)
+    expired, overflow = prune_pod_state(pod_last_seen, [pod_history], ttl=POD_STATE_TTL_SECONDS or None,
+                                        max_pods=POD_STATE_MAX_PODS or None, now=now)
+    pod_evictions['ttl'] = pod_evictions.get('ttl', 0) + expired
+    pod_evictions['lru'] = pod_evictions.get('lru', 0) + overflow
     
     # Identify pods that need attention
     pods_of_interest = []
+    priorities = dict(zip(pod_metrics.keys(), pod_priorities(list(pod_metrics.values())))) if pod_metrics else {}
     
     for pod_name, metrics in pod_metrics.items():
         # Check for events
@@ -1037,7 +1126,7 @@ def analyze_metrics_node(state: MonitoringState) -> MonitoringState:
                 'reason': metrics['Event Reason'],
                 'age': metrics.get('Event Age (minutes)', 0),
                 'count': metrics.get('Event Count', 1),
-                'priority': calculate_pod_priority(metrics)
+                'priority': int(priorities[pod_name])
             })
             continue
             
@@ -1047,7 +1136,7 @@ def analyze_metrics_node(state: MonitoringState) -> MonitoringState:
                 'pod_name': pod_name,
                 'reason': 'High restart count',
                 'restarts': metrics['Pod Restarts'],
-                'priority': calculate_pod_priority(metrics)
+                'priority': int(priorities[pod_name])
             })
             continue
             
@@ -1058,7 +1147,7 @@ def analyze_metrics_node(state: MonitoringState) -> MonitoringState:
                 'reason': 'High resource usage',
                 'cpu': metrics.get('CPU Usage (%)', 0),
                 'memory': metrics.get('Memory Usage (%)', 0),
-                'priority': calculate_pod_priority(metrics)
+                'priority': int(priorities[pod_name])
             })
             continue
             
@@ -1069,7 +1158,7 @@ def analyze_metrics_node(state: MonitoringState) -> MonitoringState:
                 'reason': 'Network packet drops',
                 'rx_drops': metrics.get('Network Receive Packets Dropped (p/s)', 0),
                 'tx_drops': metrics.get('Network Transmit Packets Dropped (p/s)', 0),
-                'priority': calculate_pod_priority(metrics)
+                'priority': int(priorities[pod_name])
             })
             continue
     
@@ -1092,6 +1181,8 @@ def analyze_metrics_node(state: MonitoringState) -> MonitoringState:
         "metrics_data": state["metrics_data"],
         "pod_metrics": pod_metrics,
         "pod_history": pod_history,
+        "pod_last_seen": pod_last_seen,
+        "pod_evictions": pod_evictions,
         "status": "analysis_complete",
         "last_run_time": state["last_run_time"],
         "action": "complete"
@@ -1108,70 +1199,8 @@ def calculate_pod_priority(metrics: Dict[str, Any]) -> int:
     Returns:
         Priority score (0-100)
     """
-    priority = 0
-    
-    # Event-based priority
-    event_reason = metrics.get('Event Reason', '')
-    event_age = metrics.get('Event Age (minutes)', 0)
-    event_count = metrics.get('Event Count', 0)
-    
-    # Critical events
-    if event_reason in ['OOMKilled', 'BackOff', 'CrashLoopBackOff', 'Failed']:
-        priority += 40
-    # Important events
-    elif event_reason in ['Unhealthy', 'NodeNotReady', 'FailedMount']:
-        priority += 30
-    # Warning events
-    elif event_reason:
-        priority += 20
-    
-    # Recent events are more important
-    if 0 < event_age <= 5:
-        priority += 15
-    elif 5 < event_age <= 30:
-        priority += 10
-    elif 30 < event_age <= 120:
-        priority += 5
-    
-    # Frequent events are more important
-    if event_count >= 10:
-        priority += 15
-    elif event_count >= 5:
-        priority += 10
-    elif event_count >= 3:
-        priority += 5
-    
-    # Restart-based priority
-    restarts = metrics.get('Pod Restarts', 0)
-    if restarts >= 10:
-        priority += 20
-    elif restarts >= 5:
-        priority += 15
-    elif restarts >= 2:
-        priority += 10
-    
-    # Resource-based priority
-    cpu_usage = metrics.get('CPU Usage (%)', 0)
-    memory_usage = metrics.get('Memory Usage (%)', 0)
-    
-    if cpu_usage >= 95 or memory_usage >= 95:
-        priority += 15
-    elif cpu_usage >= 85 or memory_usage >= 85:
-        priority += 10
-    elif cpu_usage >= 75 or memory_usage >= 75:
-        priority += 5
-    
-    # Network-based priority
-    rx_drops = metrics.get('Network Receive Packets Dropped (p/s)', 0)
-    tx_drops = metrics.get('Network Transmit Packets Dropped (p/s)', 0)
-    
-    if rx_drops > 10 or tx_drops > 10:
-        priority += 10
-    elif rx_drops > 0 or tx_drops > 0:
-        priority += 5
-    
-    # Cap priority at 100
-    return min(priority, 100)
+    # Tier weights live in rule_engine.PRIORITY_RULES
+    return int(pod_priorities([metrics])[0])
 
 def create_anomaly_agent():
     """Create the anomaly detection agent graph."""
@@ -1583,6 +1612,14 @@ def generate_basic_remediation_plan(prediction: Dict[str, Any], pod_info: Dict[s
         plan["Warning level"] = "high"
         plan["action_type"] = "increase_memory"
         
+    elif anomaly_type == "memory_leak":
+        plan["Issue summary"] = f"Pod {namespace}/{pod_name} memory is projected to reach its limit in ~{prediction.get('time_to_oom_minutes', '?')} minutes."
+        plan["Root cause analysis"] = "Memory usage grows steadily, which points at a leak rather than a load spike."
+        plan["Recommended remediation steps"] = "1. Restart the pod before it is OOM-killed\n2. Profile the application for leaks"
+        plan["Potential impact"] = "Brief service interruption during pod restart."
+        plan["Warning level"] = "high"
+        plan["action_type"] = "restart_pod"
+        
     elif anomaly_type == "resource_exhaustion":
         plan["Issue summary"] = f"Pod {namespace}/{pod_name} is experiencing resource exhaustion."
         plan["Root cause analysis"] = "Pod's resources are near maximum, causing performance degradation."
@@ -1956,9 +1993,18 @@ def create_orchestrator_agent():
     workflow.add_node("collect_metrics", orchestrator_collect_metrics)
     workflow.add_node("detect_anomalies", orchestrator_detect_anomalies)
     workflow.add_node("plan_remediation", orchestrator_plan_remediation)
-    workflow.add_node("execute_remediation", orchestrator_execute_remediation)
     workflow.add_node("process_command", process_command)
     
+    # The pods of a cycle are remediated concurrently: on the bundled runtime
+    # as a graph fan-out joined by execute_remediation, elsewhere through
+    # orchestrator_execute_remediation's own fan-out
+    if hasattr(workflow, "add_fanout"):
+        workflow.add_node("execute_remediation", orchestrator_join_remediation)
+        workflow.add_fanout("execute_remediation", execute_pod_remediation, remediation_tasks,
+                            "pod_remediation_results", max_workers=REMEDIATION_WORKERS)
+    else:
+        workflow.add_node("execute_remediation", orchestrator_execute_remediation)
+    
     # Define the main conditional edges - command handling
     workflow.add_conditional_edges(
         "initialize",
@@ -2067,7 +2113,9 @@ def create_orchestrator_agent():
     # Set entry point
     workflow.set_entry_point("initialize")
     
-    # Compile
+    # Compile, with per-node profiling when enabled on the bundled runtime
+    if orchestrator_profiler is not None and hasattr(workflow, "fanouts"):
+        return workflow.compile(hooks=[orchestrator_profiler])
     return workflow.compile()
 
 def initialize_orchestrator(state: OrchestratorState) -> OrchestratorState:
@@ -2092,6 +2140,8 @@ Type 'help' for available commands or press Enter to start monitoring."""
             "metrics_data": {},
             "pod_metrics": {},
             "pod_history": {},
+            "pod_last_seen": {},
+            "pod_evictions": {'ttl': 0, 'lru': 0},
             "status": "idle",
             "last_run_time": 0,
             "action": "none"
@@ -2113,6 +2163,8 @@ Type 'help' for available commands or press Enter to start monitoring."""
         },
         "active_agent": "none",
         "pods_with_anomalies": {},
+        "incidents": {},
+        "node_anomalies": {},
         "current_pod": None,
         "approved_remediations": [],
         "approval_queue": [],
@@ -2133,6 +2185,8 @@ def orchestrator_collect_metrics(state: OrchestratorState) -> OrchestratorState:
             "metrics_data": {},
             "pod_metrics": {},
             "pod_history": {},
+            "pod_last_seen": {},
+            "pod_evictions": {'ttl': 0, 'lru': 0},
             "status": "idle",
             "last_run_time": 0,
             "action": "collect"
@@ -2167,6 +2221,8 @@ def orchestrator_collect_metrics(state: OrchestratorState) -> OrchestratorState:
                 "metrics_data": metrics_data,
                 "pod_metrics": pod_metrics,
                 "pod_history": monitoring_state.get("pod_history", {}),
+                "pod_last_seen": monitoring_state.get("pod_last_seen", {}),
+                "pod_evictions": monitoring_state.get("pod_evictions", {}),
                 "status": "metrics_collected",
                 "last_run_time": time.time(),
                 "action": "analyze"
@@ -2217,26 +2273,86 @@ def orchestrator_detect_anomalies(state: OrchestratorState) -> OrchestratorState
     # Process each pod and check for anomalies
     pods_with_anomalies = {}
     
-    for pod_name, metrics in pod_metrics.items():
-        try:
-            # Format metrics for prediction
-            is_anomaly, prediction = predict_pod_anomaly(metrics)
-            
-            if is_anomaly:
-                pods_with_anomalies[pod_name] = {
-                    'pod_metrics': metrics,
-                    'prediction': prediction,
-                    'priority': calculate_pod_priority(metrics)
+    try:
+        # Score every pod with one vectorized pass over the rule tables
+        cluster_results = evaluate_cluster(pod_metrics)
+    except Exception as e:
+        logger.error(f"Error analyzing pod metrics: {str(e)}")
+        cluster_results = {}
+    
+    for pod_name, result in cluster_results.items():
+        if result['is_anomaly']:
+            prediction = result['prediction']
+            pods_with_anomalies[pod_name] = {
+                'pod_metrics': pod_metrics[pod_name],
+                'prediction': prediction,
+                'priority': result['priority']
+            }
+            logger.info(f"Detected anomaly in pod {pod_name}: {prediction.get('anomaly_type', 'unknown')}")
+    
+    # Memory trends (per pod identity, so they survive restarts): a pod heading
+    # for its limit is a leak before it is an OOM kill
+    try:
+        now = time.time()
+        # pod_metrics is a full snapshot: forget the pods that are gone so the
+        # maps stay bounded and their replacements take over their slots
+        pod_identities.retain(pod_metrics)
+        identities = {pod_name: pod_identities.resolve(pod_name, metrics) for pod_name, metrics in pod_metrics.items()}
+        memory_forecaster.retain(identities.values())
+        for pod_name, metrics in pod_metrics.items():
+            memory_forecaster.observe(identities[pod_name], metrics, timestamp=now, holder=pod_name)
+            forecast = memory_forecaster.forecast(identities[pod_name])
+            if forecast is None or not forecast.leaking or pod_name in pods_with_anomalies:
+                continue
+            prediction = memory_forecaster.leak_prediction(forecast)
+            pods_with_anomalies[pod_name] = {
+                'pod_metrics': metrics,
+                'prediction': prediction,
+                'priority': calculate_pod_priority(metrics)
+            }
+            messages.append(AIMessage(content=f"Pod {pod_name} memory grows {prediction['memory_growth_per_hour']}%/h "
+                                              f"and will reach its limit in ~{prediction['time_to_oom_minutes']} minutes."))
+    except Exception as e:
+        logger.error(f"Error forecasting memory usage: {str(e)}")
+    
+    # Node-level detection over the aggregates of all pods, in one pass
+    node_anomalies = {}
+    try:
+        node_aggregator.retain(pod_metrics)
+        node_aggregator.update_many(pod_metrics)
+        for node, assessment in node_aggregator.evaluate().items():
+            if assessment.is_anomaly:
+                node_anomalies[node] = {
+                    'anomaly_type': assessment.anomaly_type,
+                    'anomaly_probability': assessment.probability,
+                    'reasons': assessment.reasons,
+                    'aggregates': assessment.aggregates,
+                    'pods': assessment.pods,
                 }
-                logger.info(f"Detected anomaly in pod {pod_name}: {prediction.get('anomaly_type', 'unknown')}")
-        except Exception as e:
-            logger.error(f"Error analyzing pod {pod_name}: {str(e)}")
+                messages.append(AIMessage(content=f"Node {node} shows a node-wide {assessment.anomaly_type} "
+                                                  f"({', '.join(assessment.reasons)}) affecting {len(assessment.pods)} pods."))
+    except Exception as e:
+        logger.error(f"Error in node-level detection: {str(e)}")
+    
+    # Group the pod anomalies into incidents
+    incidents = {}
+    for update in incident_correlator.correlate(pods_with_anomalies, failing_nodes=node_anomalies):
+        incident = update.incident.to_dict()
+        incident['new'] = update.new
+        incident['cycle_pods'] = sorted(pod for pod in update.incident.pods if pod in pods_with_anomalies)
+        incidents[incident['incident_id']] = incident
+        for pod_name in incident['cycle_pods']:
+            pods_with_anomalies[pod_name]['incident_id'] = incident['incident_id']
+    if incidents:
+        messages.append(AIMessage(content=f"Correlated {len(pods_with_anomalies)} pod anomalies into {len(incidents)} incidents."))
     
     # Update the state
     return {
         **state,
         "messages": messages,
         "pods_with_anomalies": pods_with_anomalies,
+        "incidents": incidents,
+        "node_anomalies": node_anomalies,
         "status": "anomalies_detected" if pods_with_anomalies else "no_anomalies",
         "active_agent": "anomaly" if pods_with_anomalies else "none"
     }
@@ -2266,7 +2382,24 @@ def orchestrator_plan_remediation(state: OrchestratorState) -> OrchestratorState
         messages.append(AIMessage(content="No pods with anomalies detected for remediation planning."))
         return {**state, "active_agent": "none", "status": "no_anomalies"}
     
-    messages.append(AIMessage(content=f"Planning remediation for {len(pods_with_anomalies)} pods with anomalies..."))
+    # Plan once per incident, on its most important pod; without incidents
+    # (e.g. state from an older run) every pod is its own incident
+    incidents = state.get("incidents") or {}
+    targets = {}
+    for incident in incidents.values():
+        cycle_pods = [pod for pod in incident['cycle_pods'] if pod in pods_with_anomalies]
+        if not cycle_pods:
+            continue
+        pod_name = incident['representative_pod']
+        if pod_name not in cycle_pods:
+            pod_name = max(cycle_pods, key=lambda pod: pods_with_anomalies[pod].get('priority', 0))
+        targets[pod_name] = incident
+    for pod_name in pods_with_anomalies:
+        if pod_name not in targets and pods_with_anomalies[pod_name].get('incident_id') not in incidents:
+            targets[pod_name] = None
+    
+    messages.append(AIMessage(content=f"Planning remediation for {len(targets)} incidents "
+                                      f"affecting {len(pods_with_anomalies)} pods with anomalies..."))
     
     # Track the number of intentional crashes
     intentional_crashes = 0
@@ -2274,7 +2407,8 @@ def orchestrator_plan_remediation(state: OrchestratorState) -> OrchestratorState
     # Create remediation plans
     remediation_plans = {}
     
-    for pod_name, anomaly_data in pods_with_anomalies.items():
+    for pod_name, incident in targets.items():
+        anomaly_data = pods_with_anomalies[pod_name]
         prediction = anomaly_data.get('prediction', {})
         pod_metrics = anomaly_data.get('pod_metrics', {})
         anomaly_type = prediction.get('anomaly_type', 'unknown')
@@ -2303,6 +2437,15 @@ def orchestrator_plan_remediation(state: OrchestratorState) -> OrchestratorState
                 "impact": "Momentary service disruption",
                 "warning_level": "high"
             }
+        elif anomaly_type == "memory_leak":
+            plan = {
+                "pod_name": pod_name,
+                "issue": f"Memory grows {prediction.get('memory_growth_per_hour', '?')}%/h and reaches the limit in ~{prediction.get('time_to_oom_minutes', '?')} minutes",
+                "action": "restart_pod",
+                "rationale": "Restarting releases the leaked memory before the container is OOM-killed",
+                "impact": "Momentary service disruption; the leak will recur until it is fixed",
+                "warning_level": "high" if prediction.get('time_to_oom_minutes', 0) <= 30 else "medium"
+            }
         elif anomaly_type == "resource_exhaustion":
             plan = {
                 "pod_name": pod_name,
@@ -2353,10 +2496,15 @@ def orchestrator_plan_remediation(state: OrchestratorState) -> OrchestratorState
                 "warning_level": "medium"
             }
         
+        if incident is not None:
+            plan["incident_id"] = incident['incident_id']
+            plan["affected_pods"] = incident['cycle_pods']
+        
         # Only add plans that have actual actions
         if plan["action"] != "no_action":
             remediation_plans[pod_name] = plan
-            messages.append(AIMessage(content=f"Remediation plan for {pod_name}: {plan['action']} ({plan['warning_level']} warning)"))
+            scope = f" (incident of {len(plan['affected_pods'])} pods)" if len(plan.get('affected_pods', [])) > 1 else ""
+            messages.append(AIMessage(content=f"Remediation plan for {pod_name}{scope}: {plan['action']} ({plan['warning_level']} warning)"))
     
     # If all anomalies are intentional crashes, inform the user
     if intentional_crashes > 0 and len(remediation_plans) == 0:
@@ -2379,8 +2527,150 @@ def orchestrator_plan_remediation(state: OrchestratorState) -> OrchestratorState
         "active_agent": "remediation"
     }
 
+def remediation_tasks(state: OrchestratorState) -> Dict[str, Dict[str, Any]]:
+    """Remediation plans of the cycle, one task per pod with its namespace resolved."""
+    remediation_plans = (state.get("remediation_state") or {}).get("remediation_plan", {})
+    pod_metrics = (state.get("monitoring_state") or {}).get("pod_metrics", {})
+    return {
+        pod_name: {
+            "pod_name": pod_name,
+            "plan": plan,
+            "namespace": pod_metrics.get(pod_name, {}).get("Namespace", "default"),
+        }
+        for pod_name, plan in remediation_plans.items()
+    }
+
+def execute_pod_remediation(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute the remediation plan of one pod.
+    
+    Runs as a fan-out branch, concurrently with the other pods of the cycle,
+    so it returns its messages instead of appending them to the shared state.
+    
+    Args:
+        task: Task built by remediation_tasks
+        
+    Returns:
+        Dictionary with the remediation 'result', whether the pod was
+        'remediated' and the 'messages' to report
+    """
+    pod_name, plan, namespace = task["pod_name"], task["plan"], task["namespace"]
+    action = plan.get("action", "unknown")
+    messages = []
+    remediated = False
+    result = {"success": False, "action": action}
+    
+    try:
+        # Improve logging to explain root cause
+        logger.info(f"Executing remediation for pod {pod_name}: {action}")
+        messages.append(AIMessage(content=f"Executing {action} for pod {namespace}/{pod_name}"))
+        
+        # Check pod status and reason for failure before remediation
+        if not API_CONFIG.get("test_mode", False):
+            try:
+                pod_info = core_api.read_namespaced_pod(name=pod_name, namespace=namespace)
+                status_phase = pod_info.status.phase
+                container_statuses = pod_info.status.container_statuses or []
+                
+                # Log detailed status information
+                if container_statuses:
+                    for container in container_statuses:
+                        if container.state.waiting:
+                            reason = container.state.waiting.reason
+                            message = container.state.waiting.message
+                            messages.append(AIMessage(content=f"Container {container.name} is waiting: {reason} - {message}"))
+                        elif container.state.terminated:
+                            exit_code = container.state.terminated.exit_code
+                            reason = container.state.terminated.reason
+                            messages.append(AIMessage(content=f"Container {container.name} terminated with exit code {exit_code}: {reason}"))
+                
+                messages.append(AIMessage(content=f"Pod status before remediation: {status_phase}"))
+            except Exception as e:
+                messages.append(AIMessage(content=f"Could not get pod status: {str(e)}"))
+        
+        # Execute the appropriate remediation action
+        if action == "restart_pod":
+            if not API_CONFIG.get("test_mode", False):
+                try:
+                    # Delete pod to trigger recreation by the controller
+                    core_api.delete_namespaced_pod(
+                        name=pod_name,
+                        namespace=namespace,
+                        body=client.V1DeleteOptions()
+                    )
+                    success_msg = f"Successfully restarted pod {namespace}/{pod_name}"
+                    messages.append(AIMessage(content=success_msg))
+                    logger.info(success_msg)
+                    remediated = True
+                    result = {"success": True, "action": action}
+                except Exception as e:
+                    if hasattr(e, 'status') and e.status == 404:
+                        # Pod not found - this is ok if the pod was already deleted
+                        warning_msg = f"Pod {namespace}/{pod_name} not found. It may have been already deleted."
+                        messages.append(AIMessage(content=warning_msg))
+                        logger.warning(warning_msg)
+                        result = {"success": False, "action": action, "reason": "Pod not found"}
+                    else:
+                        # Other API exceptions
+                        error_msg = f"Error restarting pod {namespace}/{pod_name}: {str(e)}"
+                        messages.append(AIMessage(content=error_msg))
+                        logger.error(error_msg)
+                        result = {"success": False, "action": action, "error": str(e)}
+            else:
+                # Test mode simulation
+                test_msg = f"[TEST MODE] Would restart pod {namespace}/{pod_name}"
+                messages.append(AIMessage(content=test_msg))
+                logger.info(test_msg)
+                remediated = True
+                result = {"success": True, "action": action, "test_mode": True}
+        
+        elif action == "restart_deployment":
+            # Find the deployment for this pod
+            if not API_CONFIG.get("test_mode", False):
+                try:
+                    # This would typically involve finding the deployment and restarting it
+                    # For now, just log what would be done
+                    messages.append(AIMessage(content=f"Would restart deployment for pod {namespace}/{pod_name}"))
+                    logger.info(f"Would restart deployment for pod {namespace}/{pod_name}")
+                    result = {"success": False, "action": action, "reason": "Not implemented"}
+                except Exception as e:
+                    error_msg = f"Error processing deployment for {namespace}/{pod_name}: {str(e)}"
+                    messages.append(AIMessage(content=error_msg))
+                    logger.error(error_msg)
+                    result = {"success": False, "action": action, "error": str(e)}
+            else:
+                messages.append(AIMessage(content=f"[TEST MODE] Would restart deployment for {namespace}/{pod_name}"))
+                result = {"success": True, "action": action, "test_mode": True}
+        
+        elif action == "increase_limits":
+            # Would implement resource limit increases
+            messages.append(AIMessage(content=f"Resource limit increase not implemented for {namespace}/{pod_name}"))
+            result = {"success": False, "action": action, "reason": "Not implemented"}
+        
+        else:
+            messages.append(AIMessage(content=f"Unknown action {action} for pod {namespace}/{pod_name}"))
+            result = {"success": False, "action": action, "reason": "Unknown action"}
+            
+    except Exception as e:
+        error_msg = f"Error executing remediation for pod {pod_name}: {str(e)}"
+        logger.error(error_msg)
+        messages.append(AIMessage(content=error_msg))
+        result = {"success": False, "action": "unknown", "error": str(e)}
+
+    
+    return {"result": result, "remediated": remediated, "messages": messages}
+
+# The pods of a cycle are remediated concurrently, one branch per pod, on
+# runtimes without fan-out support and in the interactive loop of main()
+remediation_fanout = FanOut(execute_pod_remediation, remediation_tasks, "pod_remediation_results",
+                            max_workers=REMEDIATION_WORKERS)
+
 def orchestrator_execute_remediation(state: OrchestratorState) -> OrchestratorState:
-    """Execute remediation plans."""
+    """Execute remediation plans, the pods of the cycle concurrently."""
+    return orchestrator_join_remediation({**state, **remediation_fanout.run(state)})
+
+def orchestrator_join_remediation(state: OrchestratorState) -> OrchestratorState:
+    """Report the per-pod remediation outcomes and update the state."""
     messages = state["messages"]
     remediation_state = state.get("remediation_state", {})
     remediation_plans = remediation_state.get("remediation_plan", {})
@@ -2391,115 +2681,21 @@ def orchestrator_execute_remediation(state: OrchestratorState) -> OrchestratorSt
     
     messages.append(AIMessage(content=f"Executing remediation plans for {len(remediation_plans)} pods..."))
     
-    # Track if any remediation was successful
+    # Collect the outcomes in plan order; a branch that raised has no outcome
+    outcomes = state.get("pod_remediation_results") or {}
+    errors = state.get("pod_remediation_results_errors") or {}
     any_successful_remediation = False
     remediation_results = {}
-    
-    for pod_name, plan in remediation_plans.items():
-        action = plan.get("action", "unknown")
-        namespace = "default"  # Default namespace
-        
-        # Get pod info from the monitoring state to find the namespace
-        pod_metrics = state.get("monitoring_state", {}).get("pod_metrics", {}).get(pod_name, {})
-        if pod_metrics:
-            namespace = pod_metrics.get("Namespace", "default")
-        
-        try:
-            # Improve logging to explain root cause
-            logger.info(f"Executing remediation for pod {pod_name}: {action}")
-            messages.append(AIMessage(content=f"Executing {action} for pod {namespace}/{pod_name}"))
-            
-            # Check pod status and reason for failure before remediation
-            if not API_CONFIG.get("test_mode", False):
-                try:
-                    pod_info = core_api.read_namespaced_pod(name=pod_name, namespace=namespace)
-                    status_phase = pod_info.status.phase
-                    container_statuses = pod_info.status.container_statuses or []
-                    
-                    # Log detailed status information
-                    if container_statuses:
-                        for container in container_statuses:
-                            if container.state.waiting:
-                                reason = container.state.waiting.reason
-                                message = container.state.waiting.message
-                                messages.append(AIMessage(content=f"Container {container.name} is waiting: {reason} - {message}"))
-                            elif container.state.terminated:
-                                exit_code = container.state.terminated.exit_code
-                                reason = container.state.terminated.reason
-                                messages.append(AIMessage(content=f"Container {container.name} terminated with exit code {exit_code}: {reason}"))
-                    
-                    messages.append(AIMessage(content=f"Pod status before remediation: {status_phase}"))
-                except Exception as e:
-                    messages.append(AIMessage(content=f"Could not get pod status: {str(e)}"))
-            
-            # Execute the appropriate remediation action
-            if action == "restart_pod":
-                if not API_CONFIG.get("test_mode", False):
-                    try:
-                        # Delete pod to trigger recreation by the controller
-                        core_api.delete_namespaced_pod(
-                            name=pod_name,
-                            namespace=namespace,
-                            body=client.V1DeleteOptions()
-                        )
-                        success_msg = f"Successfully restarted pod {namespace}/{pod_name}"
-                        messages.append(AIMessage(content=success_msg))
-                        logger.info(success_msg)
-                        any_successful_remediation = True
-                        remediation_results[pod_name] = {"success": True, "action": action}
-                    except Exception as e:
-                        if hasattr(e, 'status') and e.status == 404:
-                            # Pod not found - this is ok if the pod was already deleted
-                            warning_msg = f"Pod {namespace}/{pod_name} not found. It may have been already deleted."
-                            messages.append(AIMessage(content=warning_msg))
-                            logger.warning(warning_msg)
-                            remediation_results[pod_name] = {"success": False, "action": action, "reason": "Pod not found"}
-                        else:
-                            # Other API exceptions
-                            error_msg = f"Error restarting pod {namespace}/{pod_name}: {str(e)}"
-                            messages.append(AIMessage(content=error_msg))
-                            logger.error(error_msg)
-                            remediation_results[pod_name] = {"success": False, "action": action, "error": str(e)}
-                else:
-                    # Test mode simulation
-                    test_msg = f"[TEST MODE] Would restart pod {namespace}/{pod_name}"
-                    messages.append(AIMessage(content=test_msg))
-                    logger.info(test_msg)
-                    any_successful_remediation = True
-                    remediation_results[pod_name] = {"success": True, "action": action, "test_mode": True}
-            
-            elif action == "restart_deployment":
-                # Find the deployment for this pod
-                if not API_CONFIG.get("test_mode", False):
-                    try:
-                        # This would typically involve finding the deployment and restarting it
-                        # For now, just log what would be done
-                        messages.append(AIMessage(content=f"Would restart deployment for pod {namespace}/{pod_name}"))
-                        logger.info(f"Would restart deployment for pod {namespace}/{pod_name}")
-                        remediation_results[pod_name] = {"success": False, "action": action, "reason": "Not implemented"}
-                    except Exception as e:
-                        error_msg = f"Error processing deployment for {namespace}/{pod_name}: {str(e)}"
-                        messages.append(AIMessage(content=error_msg))
-                        logger.error(error_msg)
-                        remediation_results[pod_name] = {"success": False, "action": action, "error": str(e)}
-                else:
-                    messages.append(AIMessage(content=f"[TEST MODE] Would restart deployment for {namespace}/{pod_name}"))
-                    remediation_results[pod_name] = {"success": True, "action": action, "test_mode": True}
-            
-            elif action == "increase_limits":
-                # Would implement resource limit increases
-                messages.append(AIMessage(content=f"Resource limit increase not implemented for {namespace}/{pod_name}"))
-                remediation_results[pod_name] = {"success": False, "action": action, "reason": "Not implemented"}
-            
-            else:
-                messages.append(AIMessage(content=f"Unknown action {action} for pod {namespace}/{pod_name}"))
-                remediation_results[pod_name] = {"success": False, "action": action, "reason": "Unknown action"}
-                
-        except Exception as e:
-            error_msg = f"Error executing remediation for pod {pod_name}: {str(e)}"
-            logger.error(error_msg)
+    for pod_name in remediation_plans:
+        outcome = outcomes.get(pod_name)
+        if outcome is None:
+            error_msg = f"Error executing remediation for pod {pod_name}: {errors.get(pod_name, 'no result')}"
             messages.append(AIMessage(content=error_msg))
-            remediation_results[pod_name] = {"success": False, "action": "unknown", "error": str(e)}
+            remediation_results[pod_name] = {"success": False, "action": "unknown", "error": errors.get(pod_name)}
+            continue
+        messages.extend(outcome["messages"])
+        remediation_results[pod_name] = outcome["result"]
+        any_successful_remediation = any_successful_remediation or outcome["remediated"]
     
     # Log completion and add a summary message
     total_plans = len(remediation_plans)
@@ -2529,6 +2725,7 @@ def orchestrator_execute_remediation(state: OrchestratorState) -> OrchestratorSt
         "status": "remediation_executed",
         "active_agent": "none",
         "pods_with_anomalies": updated_pods_with_anomalies,  # Only clear if successful
+        "pod_remediation_results": {},
         "remediation_state": {
             **remediation_state,
             "remediation_plan": {},  # Clear remediation plans
@@ -2551,6 +2748,7 @@ def process_command(state: OrchestratorState) -> OrchestratorState:
 - metrics: Show the latest metrics for all pods
 - anomalies: Show detected anomalies
 - remediate: Execute remediation for detected anomalies
+- profile: Show where orchestrator iterations spend their time (GRAPH_PROFILE=1)
 - exit: Exit the system
 """
         messages.append(AIMessage(content=help_text))
@@ -2601,6 +2799,12 @@ def process_command(state: OrchestratorState) -> OrchestratorState:
         else:
             messages.append(AIMessage(content="No anomalies detected that require remediation."))
     
+    elif command.lower() == "profile":
+        if orchestrator_profiler is not None:
+            messages.append(AIMessage(content=orchestrator_profiler.summary()))
+        else:
+            messages.append(AIMessage(content="Profiling is disabled. Set GRAPH_PROFILE=1 to enable it."))
+    
     elif command.lower() == "exit":
         messages.append(AIMessage(content="Exiting Kubernetes multi-agent system."))
         return {**state, "command": "exit"}
@@ -2620,84 +2824,28 @@ def predict_pod_anomaly(metrics: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
     Returns:
         Tuple of (is_anomaly, prediction_dict)
     """
-    is_anomaly = False
-    anomaly_type = "none"
-    anomaly_probability = 0.0
-    anomaly_details = {}
-    
-    # Check for intentional crashes first
-    command = str(metrics.get("Command", ""))
-    if "exit 1" in command:
-        is_anomaly = True
-        anomaly_type = "intentional_crash"
-        anomaly_probability = 0.99
-        anomaly_details["command"] = command
-        anomaly_details["description"] = "Pod is configured to exit with code 1 intentionally"
-    
-    # Check restart count
-    restart_count = metrics.get("Pod Restarts", 0)
-    if restart_count > 5:
-        is_anomaly = True
-        if anomaly_type == "none":  # Don't override intentional crash
-            anomaly_type = "crash_loop"
-        anomaly_probability = max(anomaly_probability, min(0.5 + (restart_count / 20), 0.95))
-        anomaly_details["restart_count"] = restart_count
-    
-    # Check resource usage
-    cpu_usage = metrics.get("CPU Usage (%)", 0)
-    memory_usage = metrics.get("Memory Usage (%)", 0)
-    if cpu_usage > 90 or memory_usage > 90:
-        is_anomaly = True
-        if anomaly_type == "none":  # Don't override previous types
-            anomaly_type = "resource_exhaustion"
-        anomaly_probability = max(anomaly_probability, min(cpu_usage, memory_usage) / 100)
-        anomaly_details["cpu_usage"] = cpu_usage
-        anomaly_details["memory_usage"] = memory_usage
-    
-    # Check events
-    event_reason = metrics.get("Event Reason", "")
-    if event_reason in ["BackOff", "Failed", "FailedMount", "FailedScheduling", "OutOfmemory"]:
-        is_anomaly = True
-        if anomaly_type == "none" or (anomaly_type != "intentional_crash" and event_reason == "BackOff"):
-            anomaly_type = "pod_failure"
-        anomaly_probability = max(anomaly_probability, 0.85)
-        anomaly_details["event_reason"] = event_reason
-        anomaly_details["event_message"] = metrics.get("Event Message", "")
-    
-    # Check network issues
-    dropped_rx = metrics.get("Network Receive Packets Dropped (p/s)", 0)
-    dropped_tx = metrics.get("Network Transmit Packets Dropped (p/s)", 0)
-    if dropped_rx > 0 or dropped_tx > 0:
-        is_anomaly = True
-        if anomaly_type == "none":  # Don't override previous types
-            anomaly_type = "network_issue"
-        anomaly_probability = max(anomaly_probability, 0.70)
-        anomaly_details["dropped_rx"] = dropped_rx
-        anomaly_details["dropped_tx"] = dropped_tx
-    
-    # Check container status
-    container_state = metrics.get("Container State", "")
-    if container_state == "terminated":
-        exit_code = metrics.get("Exit Code", 0)
-        if exit_code != 0:
-            is_anomaly = True
-            if anomaly_type == "none":
-                if exit_code == 1 and "exit 1" in command:
-                    anomaly_type = "intentional_crash"
-                else:
-                    anomaly_type = "container_failure"
-            anomaly_probability = max(anomaly_probability, 0.90)
-            anomaly_details["exit_code"] = exit_code
-            anomaly_details["container_state"] = container_state
-    
-    prediction = {
-        "predicted_anomaly": 1 if is_anomaly else 0,
-        "anomaly_probability": anomaly_probability,
-        "anomaly_type": anomaly_type,
-        "details": anomaly_details
-    }
+    # Heuristics live in rule_engine.POD_ANOMALY_RULES
+    result = evaluate_cluster({"pod": metrics})["pod"]
+    return result["is_anomaly"], result["prediction"]
+
+def run_step(name: str, step, state: OrchestratorState) -> OrchestratorState:
+    """
+    Run one orchestrator step of the main loop, recorded by the profiler when enabled.
     
-    return is_anomaly, prediction
+    Args:
+        name: Step name reported by the profiler (the graph node it matches)
+        step: Orchestrator function taking and returning the state
+        state: The current state
+        
+    Returns:
+        The state returned by the step
+    """
+    if orchestrator_profiler is None:
+        return step(state)
+    token = orchestrator_profiler.start_step('node', name, state)
+    state = step(state)
+    orchestrator_profiler.end_step('node', name, token, state, state)
+    return state
 
 def main():
     """
@@ -2799,6 +2947,8 @@ def main():
                 "metrics_data": {},
                 "pod_metrics": {},
                 "pod_history": {},
+                "pod_last_seen": {},
+                "pod_evictions": {'ttl': 0, 'lru': 0},
                 "status": "idle",
                 "last_run_time": 0,
                 "action": "none"
@@ -2820,6 +2970,8 @@ def main():
             },
             "active_agent": "none",
             "pods_with_anomalies": {},
+            "incidents": {},
+            "node_anomalies": {},
             "current_pod": None,
             "approved_remediations": [],
             "approval_queue": [],
@@ -2849,29 +3001,29 @@ Type 'help' for available commands or press Enter to start monitoring."""
             
             # Step 1: Collect metrics
             print("\nCollecting metrics...")
-            state = orchestrator_collect_metrics(state)
+            state = run_step("collect_metrics", orchestrator_collect_metrics, state)
             if state["messages"]:
                 print(state["messages"][-1].content)
             
             # Step 2: Detect anomalies
             print("\nDetecting anomalies...")
-            state = orchestrator_detect_anomalies(state)
+            state = run_step("detect_anomalies", orchestrator_detect_anomalies, state)
             if state["messages"]:
                 print(state["messages"][-1].content)
             
             # Step 3: Plan remediation
             if state["pods_with_anomalies"]:
                 print("\nPlanning remediation...")
-                state = orchestrator_plan_remediation(state)
+                state = run_step("plan_remediation", orchestrator_plan_remediation, state)
                 if state["messages"]:
                     print(state["messages"][-1].content)
                 
                 # Add confirmation prompt for remediation execution
                 execute_confirm = input("\nDo you want to execute the remediation plan? (y/n): ")
                 if execute_confirm.lower() in ["y", "yes"]:
-                    # Step 4: Execute remediation
+                    # Step 4: Execute remediation, the pods concurrently
                     print("\nExecuting remediation...")
-                    state = orchestrator_execute_remediation(state)
+                    state = run_step("execute_remediation", orchestrator_execute_remediation, state)
                     if state["messages"]:
                         print(state["messages"][-1].content)
                 else:
@@ -2884,6 +3036,8 @@ Type 'help' for available commands or press Enter to start monitoring."""
             # Increment and check iteration count
             iteration_count += 1
             state["iteration_count"] = iteration_count
+            if orchestrator_profiler is not None:
+                orchestrator_profiler.end_run(state)
             
             # Check for user input
             if iteration_count < max_iterations or max_iterations == 0:
@@ -2923,6 +3077,9 @@ Type 'help' for available commands or press Enter to start monitoring."""
         import traceback
         traceback.print_exc()
     
+    remediation_fanout.close()
+    if orchestrator_profiler is not None:
+        orchestrator_profiler.close()
     logger.info("Shutting down Kubernetes multi-agent system.")
     return 0
 
@@ -0,0 +1,174 @@
+"""
+Concurrent, rate-limited LLM enrichment of anomaly insights
+
+LLM analysis takes seconds per pod, so calling it in line with insight
+generation delays every insight of a detection pass by all LLM round-trips
+before it. `LLMEnricher` runs the calls on a bounded worker pool instead:
+
+- a token bucket keeps the call rate within the provider's limit,
+- every call gets a timeout, and
+- results are delivered through a callback as they arrive, so callers can
+  publish rule-based insights immediately and attach the analysis later.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("llm-enrichment")
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the rate of provider calls"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate_per_second: Tokens added per second
+            burst: Bucket capacity (defaults to one second worth of tokens, at least 1)
+        """
+        self.rate = float(rate_per_second)
+        self.capacity = float(burst if burst is not None else max(1.0, self.rate))
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting for it if needed.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if a token was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_time = (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+
+class LLMEnricher:
+    """Runs LLM analysis calls on a bounded, rate-limited worker pool"""
+
+    def __init__(self, analyze_fn: Callable[..., str], max_workers: int = 4,
+                 requests_per_minute: float = 60, burst: Optional[int] = None,
+                 call_timeout: float = 30.0, queue_timeout: float = 300.0):
+        """
+        Args:
+            analyze_fn: Function (metrics_str, prediction_str, timeout=...) returning
+                        the analysis text
+            max_workers: Maximum concurrent calls
+            requests_per_minute: Provider rate limit
+            burst: Calls allowed back to back before the rate limit applies
+                   (defaults to max_workers)
+            call_timeout: Seconds a single call may take, passed to analyze_fn
+            queue_timeout: Seconds a request may wait for a rate-limit token
+                           before it is dropped
+        """
+        self.analyze_fn = analyze_fn
+        self.call_timeout = call_timeout
+        self.queue_timeout = queue_timeout
+        self.limiter = TokenBucket(requests_per_minute / 60.0, burst if burst is not None else max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-enrichment")
+        self._futures = set()
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rate_limited': 0}
+
+    def submit(self, key: str, metrics_str: str, prediction_str: str,
+               callback: Callable[[str, Optional[str], Optional[Exception]], None]):
+        """
+        Queue one analysis call.
+
+        Args:
+            key: Identifier passed back to the callback (e.g. the insight id)
+            metrics_str: Serialized pod metrics
+            prediction_str: Serialized prediction
+            callback: Called from a worker thread as callback(key, analysis, error);
+                      exactly one of analysis and error is None
+
+        Returns:
+            The Future of the call
+        """
+        with self._lock:
+            self.stats['submitted'] += 1
+        future = self._executor.submit(self._run, key, metrics_str, prediction_str, callback)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _run(self, key, metrics_str, prediction_str, callback):
+        analysis, error = None, None
+        if not self.limiter.acquire(timeout=self.queue_timeout):
+            error = TimeoutError(f"No rate-limit token within {self.queue_timeout}s")
+            outcome = 'rate_limited'
+        else:
+            start = time.perf_counter()
+            try:
+                analysis = self.analyze_fn(metrics_str, prediction_str, timeout=self.call_timeout)
+                outcome = 'completed'
+                logger.debug(f"LLM analysis for {key} took {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                error = e
+                outcome = 'failed'
+        with self._lock:
+            self.stats[outcome] += 1
+
+        try:
+            callback(key, analysis, error)
+        except Exception as e:
+            logger.error(f"Enrichment callback for {key} failed: {e}")
+
+    def pending(self) -> int:
+        """Number of calls queued or running"""
+        with self._lock:
+            return len(self._futures)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every queued call to finish.
+
+        Returns:
+            True if all calls finished within the timeout
+        """
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, wait_for_pending: bool = True):
+        """Stop accepting calls, optionally waiting for the queued ones"""
+        if not wait_for_pending:
+            with self._lock:
+                futures = list(self._futures)
+            for future in futures:
+                future.cancel()
+        self._executor.shutdown(wait=wait_for_pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return call counters and the number of pending calls"""
+        with self._lock:
+            return {**self.stats, 'pending': len(self._futures)}
@@ -39,7 +39,7 @@ class NvidiaLLM:
             raise
         
     def generate(self, prompt, model="meta/llama-3.3-70b-instruct", 
-                 temperature=0.2, max_tokens=1024, stream=False, top_p=0.7):
+                 temperature=0.2, max_tokens=1024, stream=False, top_p=0.7, timeout=None):
         """Generate a response from the NVIDIA LLM.
         
         Args:
@@ -49,6 +49,7 @@ class NvidiaLLM:
             max_tokens: Maximum tokens to generate (default: 1024)
             stream: Whether to stream the response (default: False)
             top_p: Top-p sampling parameter (default: 0.7)
+            timeout: Request timeout in seconds (default: client default)
             
         Returns:
             Generated text if stream=False, or a generator yielding text chunks if stream=True
@@ -57,13 +58,15 @@ class NvidiaLLM:
             logger.debug(f"Generating response with model: {model}, temperature: {temperature}, top_p: {top_p}")
             logger.debug(f"Prompt: {prompt[:100]}...")
             
+            request_options = {"timeout": timeout} if timeout is not None else {}
             completion = self.client.chat.completions.create(
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
                 top_p=top_p,
                 max_tokens=max_tokens,
-                stream=stream
+                stream=stream,
+                **request_options
             )
             
             if stream:
@@ -89,12 +92,14 @@ class NvidiaLLM:
             logger.error(f"Error details: {traceback.format_exc()}")
             raise
             
-    def analyze_k8s_metrics(self, metrics_data, prediction_result):
+    def analyze_k8s_metrics(self, metrics_data, prediction_result, timeout=None, raise_errors=False):
         """Analyze Kubernetes metrics and provide recommendations.
         
         Args:
             metrics_data: Dictionary containing pod metrics
             prediction_result: Dictionary containing prediction results
+            timeout: Request timeout in seconds (default: client default)
+            raise_errors: Raise on failure instead of returning an error message
             
         Returns:
             Analysis text from the LLM
@@ -117,9 +122,11 @@ If events are present, explain how the event age and count relate to the detecte
 """
         
         try:
-            return self.generate(prompt, max_tokens=1024, temperature=0.3)
+            return self.generate(prompt, max_tokens=1024, temperature=0.3, timeout=timeout)
         except Exception as e:
             logger.error(f"Failed to analyze metrics: {str(e)}")
+            if raise_errors:
+                raise
             return f"Error analyzing metrics: {str(e)}"
 
 # Example usage
@@ -0,0 +1,193 @@
+"""
+Stable pod identities
+
+Pod names change on every restart by a controller, reschedule and rollout,
+so state keyed by pod name starts cold each time: a Deployment replica that
+is recreated never accumulates a full LSTM window. This module maps pod names
+to identities that outlive the pods:
+
+- StatefulSet pods: '<namespace>/StatefulSet/<name>/<ordinal>'
+- DaemonSet pods: '<namespace>/DaemonSet/<name>/<node>'
+- bare pods: '<namespace>/Pod/<name>'
+- other replicas (Deployments, Jobs, ...): '<namespace>/<kind>/<name>/<slot>',
+  where a new replica takes over the slot of a replica of the same workload
+  that stopped reporting, and opens a new slot otherwise. A replica has
+  stopped reporting once it is silent for `stale_after` seconds, or as soon
+  as it is missing from the live pods given to resolve_all.
+
+Windowed state is keyed by identity and the pod name is kept as an attribute,
+so a replacement pod continues the window of the pod it replaced.
+"""
+
+import re
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from incident_correlation import workload_of, workload_key
+from memory_forecaster import parse_timestamp
+from node_detector import node_of
+
+logger = logging.getLogger("pod-identity")
+
+# A replica silent for this many seconds frees its slot for a new replica
+DEFAULT_STALE_AFTER_SECONDS = 180.0
+
+_ORDINAL = re.compile(r'-(\d+)$')
+
+
+class PodIdentityMap:
+    """Assigns stable identities to pods and tracks which pod currently holds each"""
+
+    def __init__(self, stale_after: float = DEFAULT_STALE_AFTER_SECONDS):
+        """
+        Args:
+            stale_after: Seconds without samples after which a replica's slot
+                         can be taken over by a new replica of the workload
+        """
+        self.stale_after = stale_after
+        self.identities: Dict[str, str] = {}  # pod -> identity
+        self.members: Dict[str, Set[str]] = {}  # identity -> pods mapped to it
+        self.current: Dict[str, str] = {}  # identity -> most recently seen pod
+        self._slots: Dict[str, List[str]] = {}  # workload -> slot identities
+        self._last_seen: Dict[str, float] = {}  # pod -> time of its latest sample
+        self._reporting: Optional[Set[str]] = None  # live pods of the pass being resolved
+        self.stats = {'assigned': 0, 'taken_over': 0}
+
+    def resolve(self, pod_name: str, metrics: Dict[str, Any]) -> str:
+        """
+        Identity of a pod, assigning one on first sight.
+
+        Args:
+            pod_name: Name of the pod
+            metrics: Latest metrics of the pod ('Timestamp', namespace and owner fields)
+
+        Returns:
+            The pod's identity
+        """
+        seen = parse_timestamp(metrics.get('Timestamp'))
+        seen = time.time() if seen is None else seen
+        identity = self.identities.get(pod_name)
+        if identity is None:
+            identity = self._assign(pod_name, metrics, seen)
+            self.identities[pod_name] = identity
+            self.members.setdefault(identity, set()).add(pod_name)
+            self.stats['assigned'] += 1
+        self._last_seen[pod_name] = max(seen, self._last_seen.get(pod_name, seen))
+
+        holder = self.current.get(identity)
+        if holder != pod_name and (holder is None or self._last_seen.get(holder, 0.0) < seen):
+            if holder is not None:
+                self.stats['taken_over'] += 1
+                logger.debug(f"Pod {pod_name} continues {identity} after {holder}")
+            self.current[identity] = pod_name
+        return identity
+
+    def resolve_all(self, pod_metrics: Dict[str, Dict[str, Any]],
+                    live_pods: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Identities of the pods of one detection pass.
+
+        Pods are resolved in the given order (oldest sample first). A slot
+        whose holder is not among the live pods and whose last sample is
+        older than the new replica's is taken over right away, so a
+        replacement that starts seconds after its predecessor keeps its slot.
+        Callers that resolve only part of the cluster (e.g. the pods with new
+        samples) must pass every pod they still track as live_pods, or a new
+        replica would take over the slot of a replica that is still running.
+
+        Args:
+            pod_metrics: Dictionary mapping the pods to resolve to their latest metrics
+            live_pods: Every pod still running (defaults to the pods of
+                       pod_metrics, i.e. a full snapshot)
+
+        Returns:
+            Dictionary mapping pod names to identities
+        """
+        self._reporting = set(pod_metrics) if live_pods is None else set(live_pods) | set(pod_metrics)
+        try:
+            return {pod_name: self.resolve(pod_name, metrics) for pod_name, metrics in pod_metrics.items()}
+        finally:
+            self._reporting = None
+
+    def _stopped_reporting(self, holder, seen):
+        last_seen = self._last_seen.get(holder, seen)
+        if last_seen <= seen - self.stale_after:
+            return True
+        return self._reporting is not None and holder not in self._reporting and last_seen < seen
+
+    def _assign(self, pod_name, metrics, seen):
+        kind, name = workload_of(pod_name, metrics)
+        workload = workload_key(pod_name, metrics)
+        if kind == 'Pod':
+            return workload
+        if kind == 'StatefulSet':
+            ordinal = _ORDINAL.search(pod_name)
+            if ordinal:
+                return f"{workload}/{ordinal.group(1)}"
+        node = node_of(metrics)
+        if kind == 'DaemonSet' and node:
+            return f"{workload}/{node}"
+
+        # Replicas without a stable ordinal share numbered slots
+        slots = self._slots.setdefault(workload, [])
+        for identity in slots:
+            holder = self.current.get(identity)
+            if holder is None or self._stopped_reporting(holder, seen):
+                return identity
+        identity = f"{workload}/{len(slots)}"
+        slots.append(identity)
+        return identity
+
+    def identity_of(self, pod_name: str) -> Optional[str]:
+        """Identity assigned to a pod (None for unknown pods)"""
+        return self.identities.get(pod_name)
+
+    def is_current(self, pod_name: str) -> bool:
+        """Whether a pod is the most recent holder of its identity"""
+        identity = self.identities.get(pod_name)
+        return identity is not None and self.current.get(identity) == pod_name
+
+    def forget(self, pod_name: str) -> Optional[str]:
+        """
+        Drop a pod that no longer exists.
+
+        Returns:
+            Its identity if no other pod holds it (state keyed by the identity
+            can be dropped too), otherwise None
+        """
+        identity = self.identities.pop(pod_name, None)
+        self._last_seen.pop(pod_name, None)
+        if identity is None:
+            return None
+        members = self.members.get(identity, set())
+        members.discard(pod_name)
+        if self.current.get(identity) == pod_name:
+            del self.current[identity]
+            if members:
+                self.current[identity] = max(members, key=lambda pod: self._last_seen.get(pod, 0.0))
+        if members:
+            return None
+
+        del self.members[identity]
+        # A workload whose slots are all free is gone; its slots start over
+        workload = identity.rsplit('/', 1)[0]
+        slots = self._slots.get(workload)
+        if slots and identity in slots and not any(slot in self.members for slot in slots):
+            del self._slots[workload]
+        return identity
+
+    def retain(self, pod_names) -> List[str]:
+        """
+        Forget every pod not in pod_names (e.g. pods missing from a full cluster snapshot).
+
+        Returns:
+            Identities no longer held by any pod
+        """
+        pod_names = set(pod_names)
+        orphaned = []
+        for pod_name in [pod_name for pod_name in self.identities if pod_name not in pod_names]:
+            identity = self.forget(pod_name)
+            if identity is not None:
+                orphaned.append(identity)
+        return orphaned
@@ -0,0 +1,182 @@
+"""
+Bounded per-pod state for long-running agents
+
+Agents keep state keyed by pod name (latest metrics, histories, anomaly
+history). Pods that are deleted never send another sample, so on clusters
+with heavy churn (CronJobs, CI pods) that state grows without bound. This
+module bounds it in two ways:
+
+- TTL: a pod not seen for `ttl` seconds is evicted.
+- LRU cap: beyond `max_pods` pods, the least recently seen pod is evicted.
+
+`PodStateStore` is a dict-like store that records when each pod was last
+written and evicts on its own. `prune_pod_state` applies the same policy to
+plain dictionaries plus a last-seen map, for state that has to stay a plain
+dict (e.g. LangGraph state). Eviction counts are kept so the cap can be sized
+from real churn.
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("pod-state")
+
+# Defaults: a pod silent for an hour is gone; keep at most 10k pods
+DEFAULT_POD_TTL_SECONDS = 3600.0
+DEFAULT_MAX_PODS = 10_000
+
+
+class PodStateStore(MutableMapping):
+    """Dictionary of per-pod state with last-seen tracking, TTL and LRU eviction"""
+
+    def __init__(self, ttl: Optional[float] = DEFAULT_POD_TTL_SECONDS,
+                 max_pods: Optional[int] = DEFAULT_MAX_PODS, name: str = "pod-state",
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            ttl: Seconds after the last write before a pod is evicted (None disables)
+            max_pods: Maximum number of pods kept (None disables the cap)
+            name: Name used in logs and stats
+            clock: Time source, in seconds
+        """
+        self.ttl = ttl
+        self.max_pods = max_pods
+        self.name = name
+        self.clock = clock
+        # Ordered from least to most recently seen
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._last_seen: Dict[str, float] = {}
+        self._listeners: List[Callable[[str, Any, str], None]] = []
+        self.evictions = {'ttl': 0, 'lru': 0}
+
+    def __getitem__(self, pod_name):
+        return self._data[pod_name]
+
+    def __setitem__(self, pod_name, value):
+        self._data[pod_name] = value
+        self.touch(pod_name)
+        if self.max_pods is not None and len(self._data) > self.max_pods:
+            self._evict_lru()
+
+    def __delitem__(self, pod_name):
+        del self._data[pod_name]
+        del self._last_seen[pod_name]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"PodStateStore({self.name}, {len(self._data)} pods)"
+
+    def touch(self, pod_name: str, now: Optional[float] = None) -> None:
+        """Mark a pod as seen, e.g. after mutating its value in place"""
+        if pod_name in self._data:
+            self._data.move_to_end(pod_name)
+            self._last_seen[pod_name] = self.clock() if now is None else now
+
+    def last_seen(self, pod_name: str) -> Optional[float]:
+        """Time a pod was last written or touched (None if not tracked)"""
+        return self._last_seen.get(pod_name)
+
+    def on_evict(self, listener: Callable[[str, Any, str], None]) -> None:
+        """
+        Register a callback run as listener(pod_name, value, reason) on eviction,
+        so state kept elsewhere for the pod can be dropped too.
+        """
+        self._listeners.append(listener)
+
+    def _evict(self, pod_name, reason):
+        value = self._data.pop(pod_name)
+        del self._last_seen[pod_name]
+        self.evictions[reason] += 1
+        for listener in self._listeners:
+            try:
+                listener(pod_name, value, reason)
+            except Exception as e:
+                logger.error(f"Eviction listener of {self.name} failed for {pod_name}: {e}")
+
+    def _evict_lru(self):
+        while len(self._data) > self.max_pods:
+            self._evict(next(iter(self._data)), 'lru')
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Evict pods not seen within the TTL.
+
+        Pods are ordered by last-seen time, so this stops at the first pod
+        still within the TTL and costs O(evicted pods).
+
+        Returns:
+            Number of pods evicted
+        """
+        if self.ttl is None:
+            return 0
+        now = self.clock() if now is None else now
+        evicted = 0
+        while self._data:
+            pod_name = next(iter(self._data))
+            if now - self._last_seen[pod_name] <= self.ttl:
+                break
+            self._evict(pod_name, 'ttl')
+            evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} pods from {self.name} not seen for {self.ttl}s")
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, limits and eviction counts, for sizing the cap"""
+        return {
+            'pods': len(self._data),
+            'max_pods': self.max_pods,
+            'ttl_seconds': self.ttl,
+            'evicted_ttl': self.evictions['ttl'],
+            'evicted_lru': self.evictions['lru'],
+        }
+
+
+def prune_pod_state(last_seen: Dict[str, float], states: Iterable[Dict[str, Any]],
+                    ttl: Optional[float] = DEFAULT_POD_TTL_SECONDS,
+                    max_pods: Optional[int] = DEFAULT_MAX_PODS,
+                    now: Optional[float] = None) -> Tuple[int, int]:
+    """
+    Apply TTL and LRU eviction to plain per-pod dictionaries.
+
+    Args:
+        last_seen: Dictionary mapping pod names to the time they were last seen;
+                   evicted pods are removed from it too
+        states: Dictionaries keyed by pod name to evict from
+        ttl: Seconds after which an unseen pod is evicted (None disables)
+        max_pods: Maximum number of pods kept (None disables the cap)
+        now: Current time (defaults to time.time())
+
+    Returns:
+        Tuple of (evicted by TTL, evicted by the LRU cap)
+    """
+    now = time.time() if now is None else now
+    states = list(states)
+
+    expired = [pod for pod, seen in last_seen.items() if ttl is not None and now - seen > ttl]
+    for pod in expired:
+        del last_seen[pod]
+    overflow = []
+    if max_pods is not None and len(last_seen) > max_pods:
+        overflow = sorted(last_seen, key=last_seen.get)[:len(last_seen) - max_pods]
+        for pod in overflow:
+            del last_seen[pod]
+
+    for state in states:
+        for pod in expired + overflow:
+            state.pop(pod, None)
+        # Pods present in the state but never recorded as seen are stale leftovers
+        for pod in [pod for pod in state if pod not in last_seen]:
+            state.pop(pod, None)
+
+    if expired or overflow:
+        logger.info(f"Evicted {len(expired)} expired and {len(overflow)} least recently seen pods")
+    return len(expired), len(overflow)
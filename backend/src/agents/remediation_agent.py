@@ -2,13 +2,13 @@ from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
-from langgraph.graph import StateGraph, END
 from kubernetes import client, config, watch
 import pandas as pd
 import logging
 import os
 import sys
 import time
+import asyncio
 from typing import Dict, Any, List, TypedDict, Optional, Tuple, Literal
 import json
 import traceback
@@ -16,6 +16,17 @@ import yaml
 import kubernetes as k8s
 from unittest.mock import MagicMock
 
+# Graphs run on LangGraph, or on the bundled runtime with STATE_GRAPH_RUNTIME=builtin
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from state_graph import load_graph_runtime
+from graph_profiler import profiler_from_env
+
+StateGraph, END = load_graph_runtime()
+
+# Per-node profiling on the bundled runtime (GRAPH_PROFILE=1)
+# Created with the graph, and only on the bundled runtime (LangGraph takes no hooks)
+remediation_profiler = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("remediation_agent")
@@ -585,7 +596,13 @@ def create_remediation_graph():
     # Set entry point
     workflow.set_entry_point("detect_issue")
     
-    # Compile the graph
+    # Compile the graph, with per-node profiling when enabled on the bundled runtime
+    global remediation_profiler
+    if hasattr(workflow, "fanouts"):
+        if remediation_profiler is None:
+            remediation_profiler = profiler_from_env("remediation")
+        if remediation_profiler is not None:
+            return workflow.compile(hooks=[remediation_profiler])
     return workflow.compile()
 
 # Instantiate the graph
@@ -618,6 +635,27 @@ def remediate_pod(prediction: dict, pod_info: dict, user_input: str = None) -> L
     
     return current_state["messages"]
 
+async def aremediate_pod(prediction: dict, pod_info: dict, user_input: str = None) -> List[Any]:
+    """Process a pod anomaly through the remediation agent on the running event loop."""
+    initial_state = {
+        "messages": [],
+        "prediction": prediction,
+        "pod_info": pod_info,
+        "remediation_plan": {},
+        "approval_status": "pending",
+        "action_status": "waiting"
+    }
+    
+    # Sync nodes run on the loop's executor, so other pods can be processed meanwhile
+    current_state = await remediation_agent.ainvoke(initial_state)
+    
+    if current_state["approval_status"] == "pending" and user_input is not None:
+        current_state = process_approval(current_state, user_input)
+        if current_state["approval_status"] == "approved":
+            current_state = await asyncio.get_running_loop().run_in_executor(None, execute_remediation, current_state)
+    
+    return current_state["messages"]
+
 def parse_llm_response(response_text: str) -> Dict[str, Any]:
     """Parse LLM response text into structured sections."""
     logger.debug("Parsing LLM response into structured sections")
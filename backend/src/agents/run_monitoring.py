@@ -80,6 +80,50 @@ def run_dataset_generator(stop_event, prometheus_url, namespace, output_file, in
         import traceback
         traceback.print_exc()
 
+def run_inference_server(stop_event, host, port, max_batch_size, max_wait_ms):
+    """Run the shared inference server process that owns the anomaly and sequence models"""
+    logger.info(f"Starting inference server on {host}:{port} with "
+               f"max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms}")
+    
+    try:
+        models_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..', 'backend', 'models'))
+        if models_path not in sys.path:
+            sys.path.append(models_path)
+        
+        # The server itself must predict locally, not forward to itself
+        os.environ.pop('INFERENCE_SERVER_URL', None)
+        from inference_server import InferenceServer
+        
+        # Newly published model versions are swapped in without a restart
+        server = InferenceServer(host, port, max_batch_size, max_wait_ms,
+                                 model_refresh_interval=60.0).start(warmup=True)
+        
+        while not stop_event.is_set():
+            time.sleep(1)
+        
+        server.shutdown()
+        logger.info("Inference server stopped")
+        
+    except KeyboardInterrupt:
+        logger.info("Inference server received interrupt")
+    except Exception as e:
+        logger.error(f"Error in inference server: {e}")
+        import traceback
+        traceback.print_exc()
+
+def start_inference_server(args):
+    """Start the inference server process and point the agents at it"""
+    inference_process = Process(
+        target=run_inference_server,
+        args=(stop_event, args.inference_host, args.inference_port, args.max_batch_size, args.max_batch_wait_ms),
+        name="InferenceServerProcess"
+    )
+    inference_process.start()
+    processes.append(inference_process)
+    
+    # Agent processes inherit the environment and send predictions to the server
+    os.environ['INFERENCE_SERVER_URL'] = f"http://{args.inference_host}:{args.inference_port}"
+
 def run_dataset_agent(stop_event, input_file, watch_interval, alert_threshold, openai_api_key=None, use_lang_models=True):
     """Run the dataset generator agent process"""
     logger.info(f"Starting dataset agent with input_file={input_file}, "
@@ -264,6 +308,18 @@ def main():
     parser.add_argument('--alert-threshold', type=float, default=0.7,
                         help='Probability threshold for anomaly alerts (default: 0.7)')
     
+    # Inference server options
+    parser.add_argument('--no-inference-server', action='store_true',
+                        help='Load the model in each agent instead of sharing one inference server')
+    parser.add_argument('--inference-host', type=str, default='127.0.0.1',
+                        help='Inference server bind address (default: 127.0.0.1)')
+    parser.add_argument('--inference-port', type=int, default=8765,
+                        help='Inference server port (default: 8765)')
+    parser.add_argument('--max-batch-size', type=int, default=256,
+                        help='Maximum pods per inference micro-batch (default: 256)')
+    parser.add_argument('--max-batch-wait-ms', type=float, default=5.0,
+                        help='Maximum micro-batching delay in milliseconds (default: 5)')
+    
     # Mode options
     parser.add_argument('--generator-only', action='store_true',
                         help='Run only the dataset generator')
@@ -322,6 +378,10 @@ def main():
             generator_process.start()
             processes.append(generator_process)
             
+            # Several agents score pods, so share one model between them
+            if not args.no_inference_server:
+                start_inference_server(args)
+            
             # Give the generator a head start to create the file
             time.sleep(2)
             
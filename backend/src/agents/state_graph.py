@@ -1,18 +1,487 @@
-from typing import Dict, List, Any, TypedDict, Optional, Tuple, Callable, Union
+"""
+Bundled state graph runtime
+
+A small LangGraph-compatible graph runtime for the multi-agent system. Graphs
+are built with the same calls (add_node, add_edge, add_conditional_edges,
+set_entry_point, compile) and the compiled graph is run with invoke().
+
+State is held in a StateStore instead of being rebuilt by every node:
+
+- structural sharing: a node's return value is merged into a new top-level
+  dictionary that shares every value the node did not replace, so unchanged
+  state (pod histories, metrics) is never copied,
+- partial updates: nodes may return only the keys they change; Patch merges
+  into a nested dictionary and Append adds messages,
+- bounded messages: message keys are MessageBuffers keeping only the most
+  recent messages, so 24/7 runs do not accumulate every AIMessage.
+
+Fan-out (add_fanout) maps a branch function over a collection taken from the
+state, e.g. one branch per pod, on a thread or process pool. The results are
+merged into the state and a join node combines them.
+
+Graphs run synchronously with invoke() or on an event loop with ainvoke().
+Nodes, routers and fan-out branches may be `async def` functions: ainvoke()
+awaits them, runs the branches of a fan-out concurrently and runs sync nodes
+on the loop's executor so they do not block it. invoke() runs graphs that
+contain async functions with ainvoke() on a new event loop. (CompiledGraph
+replaces the run_graph closure compile() used to return; invoke() is that
+entry point.) The monitoring, anomaly, remediation and orchestrator graphs
+have no async nodes, so under ainvoke() their nodes still run one at a time
+and work only overlaps inside fan-outs.
+
+compile(hooks=...) instruments executions: GraphHook objects are called
+around every node run, fan-out and router decision (see graph_profiler).
+
+load_graph_runtime() selects between LangGraph and this runtime.
+"""
+
+import os
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, List, Any, TypedDict, Optional, Tuple, Callable, Union, Iterable
 import logging
 
 # Configure logger
 logger = logging.getLogger("state-graph")
 
+# Messages kept per message key of the state
+DEFAULT_MAX_MESSAGES = 200
+
+
+def is_async(function: Optional[Callable]) -> bool:
+    """Whether calling a function returns a coroutine (async def functions and callables)"""
+    if function is None:
+        return False
+    return inspect.iscoroutinefunction(function) or \
+        inspect.iscoroutinefunction(getattr(function, '__call__', None))
+
+
+class Patch(dict):
+    """Partial update of a nested dictionary in the state, merged into a copy of it"""
+
+
+class Append(list):
+    """Messages to append to a message key of the state"""
+
+
+class MessageBuffer(list):
+    """List of messages that keeps only the `maxlen` most recent ones.
+
+    It is a list so nodes and prompt templates can keep slicing and
+    concatenating it; appends drop the oldest messages beyond `maxlen`.
+    """
+
+    def __init__(self, messages: Iterable[Any] = (), maxlen: int = DEFAULT_MAX_MESSAGES):
+        super().__init__()
+        self.maxlen = maxlen
+        self.dropped = 0
+        self.extend(messages)
+
+    def _trim(self):
+        excess = len(self) - self.maxlen
+        if excess > 0:
+            del self[:excess]
+            self.dropped += excess
+
+    def append(self, message):
+        super().append(message)
+        self._trim()
+
+    def extend(self, messages):
+        super().extend(messages)
+        self._trim()
+
+    def insert(self, index, message):
+        super().insert(index, message)
+        self._trim()
+
+    def __iadd__(self, messages):
+        self.extend(messages)
+        return self
+
+
+class StateStore:
+    """Copy-on-write graph state with bounded message buffers.
+
+    Every merge produces a new top-level dictionary; values that are not
+    replaced are shared with the previous snapshot rather than copied.
+    Message buffers are append-only and shared between snapshots.
+    """
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None,
+                 message_keys: Iterable[str] = ("messages",),
+                 max_messages: int = DEFAULT_MAX_MESSAGES):
+        """Initialize the store.
+
+        Args:
+            state: The initial state (optional)
+            message_keys: Keys holding message lists, kept as MessageBuffers
+            max_messages: Messages kept per message key
+        """
+        self.message_keys = frozenset(message_keys)
+        self.max_messages = max_messages
+        self.stats = {'merges': 0, 'keys_written': 0, 'keys_shared': 0}
+        self._state = {}
+        self.merge(dict(state or {}))
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """The current state snapshot"""
+        return self._state
+
+    def merge(self, update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge a node's return value into the state.
+
+        Args:
+            update: The full or partial state returned by a node (None leaves
+                    the state unchanged)
+
+        Returns:
+            The new state snapshot
+        """
+        if update is None or update is self._state:
+            return self._state
+
+        state = dict(self._state)
+        written = 0
+        for key, value in update.items():
+            current = state.get(key)
+            if value is current:
+                continue
+            if key in self.message_keys:
+                state[key] = self._merge_messages(current, value)
+            elif isinstance(value, Patch):
+                state[key] = {**(current or {}), **value}
+            else:
+                state[key] = value
+            written += 1
+
+        self.stats['merges'] += 1
+        self.stats['keys_written'] += written
+        self.stats['keys_shared'] += len(state) - written
+        self._state = state
+        return state
+
+    def _merge_messages(self, current, value):
+        if isinstance(value, Append):
+            if not isinstance(current, MessageBuffer):
+                current = MessageBuffer(current or (), self.max_messages)
+            current.extend(value)
+            return current
+
+        # Nodes written as `messages + [new]` return the buffer's contents
+        # followed by the new messages: append the new tail in place
+        if isinstance(current, MessageBuffer) and len(value) >= len(current) and \
+                all(old is new for old, new in zip(current, value)):
+            current.extend(value[len(current):])
+            return current
+        return MessageBuffer(value or (), self.max_messages)
+
+
+class FanOut:
+    """A branch function mapped over a collection before a join node runs"""
+
+    def __init__(self, branch: Callable[[Any], Any], items: Callable[[Dict[str, Any]], Any],
+                 results_key: str, executor: str = "thread", max_workers: Optional[int] = None):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown fan-out executor: {executor}")
+        self.branch = branch
+        self.items = items
+        self.results_key = results_key
+        self.executor = executor
+        self.max_workers = max_workers
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.executor == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers or os.cpu_count())
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fanout")
+        return self._pool
+
+    def run(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one branch per item and collect the results.
+
+        Args:
+            state: The current state, passed to the items function only
+
+        Returns:
+            Partial update with the results under results_key and the errors
+            of failed branches under '<results_key>_errors'
+        """
+        items = self._items(state)
+        results, errors = {}, {}
+        if len(items) == 1:
+            # Not worth a round trip through the pool
+            futures = None
+        else:
+            pool = self._get_pool()
+            futures = {key: pool.submit(self.branch, item) for key, item in items.items()}
+        for key, item in items.items():
+            try:
+                results[key] = futures[key].result() if futures is not None else self.branch(item)
+            except Exception as e:
+                self._failed(key, e, errors)
+        return {self.results_key: results, f"{self.results_key}_errors": errors}
+
+    async def arun(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one branch per item concurrently on the running event loop.
+
+        Async branches are awaited together, at most max_workers at a time;
+        sync branches run on the worker pool.
+
+        Args:
+            state: The current state, passed to the items function only
+
+        Returns:
+            Partial update in the format of run()
+        """
+        items = self._items(state)
+        if is_async(self.branch):
+            limit = asyncio.Semaphore(self.max_workers or len(items) or 1)
+
+            async def call(item):
+                async with limit:
+                    return await self.branch(item)
+            calls = [call(item) for item in items.values()]
+        else:
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            calls = [loop.run_in_executor(pool, self.branch, item) for item in items.values()]
+
+        results, errors = {}, {}
+        outcomes = await asyncio.gather(*calls, return_exceptions=True)
+        for key, outcome in zip(items, outcomes):
+            if isinstance(outcome, Exception):
+                self._failed(key, outcome, errors)
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results[key] = outcome
+        return {self.results_key: results, f"{self.results_key}_errors": errors}
+
+    def _items(self, state):
+        items = self.items(state) or {}
+        if not isinstance(items, dict):
+            items = dict(enumerate(items))
+        return items
+
+    def _failed(self, key, error, errors):
+        logger.error(f"Fan-out branch {key} into {self.results_key} failed: {error}")
+        errors[key] = str(error)
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+class GraphHook:
+    """Instrumentation called around the steps of a graph execution.
+
+    Steps are node runs ('node'), fan-outs before a join node ('fanout') and
+    router decisions ('router'). start_step returns a token that is passed
+    back to end_step with the state after the step and the step's result: the
+    node's or fan-out's update, or the next node chosen by a router.
+    """
+
+    def start_step(self, kind: str, name: str, state: Dict[str, Any]) -> Any:
+        return None
+
+    def end_step(self, kind: str, name: str, token: Any, state: Dict[str, Any], result: Any) -> None:
+        pass
+
+    def end_run(self, state: Dict[str, Any]) -> None:
+        pass
+
+
+class CompiledGraph:
+    """A runnable graph produced by StateGraph.compile()"""
+
+    def __init__(self, graph: "StateGraph", message_keys: Iterable[str], max_messages: int,
+                 hooks: Iterable[GraphHook] = ()):
+        self.graph = graph
+        self.message_keys = tuple(message_keys)
+        self.max_messages = max_messages
+        self.hooks = tuple(hooks)
+        self.last_store = None
+
+    def _start(self, kind, name, state):
+        return [hook.start_step(kind, name, state) for hook in self.hooks]
+
+    def _end(self, kind, name, tokens, state, result):
+        for hook, token in zip(self.hooks, tokens):
+            hook.end_step(kind, name, token, state, result)
+
+    def _end_run(self, state):
+        for hook in self.hooks:
+            hook.end_run(state)
+
+    def close(self):
+        """Shut down the worker pools of the graph's fan-outs"""
+        for fanout in self.graph.fanouts.values():
+            fanout.close()
+
+    @property
+    def is_async(self) -> bool:
+        """Whether any node, router or fan-out branch of the graph is async"""
+        graph = self.graph
+        return any(is_async(function) for function in graph.nodes.values()) or \
+            any(is_async(condition_function) for condition_function, _ in graph.conditional_edges.values()) or \
+            any(is_async(fanout.branch) for fanout in graph.fanouts.values())
+
+    def _follow(self, current_node, result, path_map):
+        next_node = path_map[result] if path_map is not None else result
+        logger.debug(f"Conditional edge from {current_node} -> {next_node}")
+        return next_node
+
+    def _next_node(self, current_node, state):
+        graph = self.graph
+        if current_node in graph.conditional_edges:
+            # Use conditional edge
+            condition_function, path_map = graph.conditional_edges[current_node]
+            next_node = self._follow(current_node, condition_function(state), path_map)
+        elif current_node in graph.edges:
+            # Use first edge
+            next_node = graph.edges[current_node][0]
+            logger.debug(f"Following edge {current_node} -> {next_node}")
+        else:
+            # No more edges
+            logger.debug(f"No edges from {current_node}, ending execution")
+            next_node = None
+        return next_node
+
+    def _route(self, current_node, state):
+        if not self.hooks or current_node not in self.graph.conditional_edges:
+            return self._next_node(current_node, state)
+        tokens = self._start('router', current_node, state)
+        next_node = self._next_node(current_node, state)
+        self._end('router', current_node, tokens, state, next_node)
+        return next_node
+
+    async def _aroute(self, current_node, state):
+        if not self.hooks or current_node not in self.graph.conditional_edges:
+            return await self._anext_node(current_node, state)
+        tokens = self._start('router', current_node, state)
+        next_node = await self._anext_node(current_node, state)
+        self._end('router', current_node, tokens, state, next_node)
+        return next_node
+
+    async def _anext_node(self, current_node, state):
+        conditional = self.graph.conditional_edges.get(current_node)
+        if conditional is not None and is_async(conditional[0]):
+            condition_function, path_map = conditional
+            return self._follow(current_node, await condition_function(state), path_map)
+        # Sync routers only inspect the state, so they run on the loop
+        return self._next_node(current_node, state)
+
+    def invoke(self, state: Optional[Dict[str, Any]] = None, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run the graph with the given state.
+
+        Args:
+            state: The initial state (optional)
+            config: Accepted for compatibility with LangGraph and ignored
+
+        Returns:
+            The final state after running the graph
+        """
+        if self.is_async:
+            return asyncio.run(self.ainvoke(state, config))
+
+        store = StateStore(state, self.message_keys, self.max_messages)
+        self.last_store = store
+
+        current_node = self.graph.entry_point
+        logger.info(f"Starting graph execution at node: {current_node}")
+
+        # Run until we reach END or run out of nodes
+        while current_node != END and current_node is not None:
+            # Execute the current node
+            node_function = self.graph.nodes.get(current_node)
+            if not node_function:
+                logger.error(f"Node {current_node} not found in graph")
+                break
+
+            fanout = self.graph.fanouts.get(current_node)
+            if fanout is not None:
+                logger.debug(f"Fanning out {fanout.results_key} before node: {current_node}")
+                tokens = self._start('fanout', current_node, store.state)
+                update = fanout.run(store.state)
+                self._end('fanout', current_node, tokens, store.merge(update), update)
+
+            logger.debug(f"Executing node: {current_node}")
+            tokens = self._start('node', current_node, store.state)
+            update = node_function(store.state)
+            self._end('node', current_node, tokens, store.merge(update), update)
+            current_node = self._route(current_node, store.state)
+
+        logger.info("Graph execution complete")
+        self._end_run(store.state)
+        return store.state
+
+    async def ainvoke(self, state: Optional[Dict[str, Any]] = None,
+                      config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run the graph on the running event loop.
+
+        Async nodes and routers are awaited, sync nodes run on the loop's
+        default executor, and fan-out branches run concurrently.
+
+        Args:
+            state: The initial state (optional)
+            config: Accepted for compatibility with LangGraph and ignored
+
+        Returns:
+            The final state after running the graph
+        """
+        store = StateStore(state, self.message_keys, self.max_messages)
+        self.last_store = store
+        loop = asyncio.get_running_loop()
+
+        current_node = self.graph.entry_point
+        logger.info(f"Starting async graph execution at node: {current_node}")
+
+        while current_node != END and current_node is not None:
+            node_function = self.graph.nodes.get(current_node)
+            if not node_function:
+                logger.error(f"Node {current_node} not found in graph")
+                break
+
+            fanout = self.graph.fanouts.get(current_node)
+            if fanout is not None:
+                logger.debug(f"Fanning out {fanout.results_key} before node: {current_node}")
+                tokens = self._start('fanout', current_node, store.state)
+                update = await fanout.arun(store.state)
+                self._end('fanout', current_node, tokens, store.merge(update), update)
+
+            logger.debug(f"Executing node: {current_node}")
+            tokens = self._start('node', current_node, store.state)
+            if is_async(node_function):
+                update = await node_function(store.state)
+            else:
+                update = await loop.run_in_executor(None, node_function, store.state)
+            self._end('node', current_node, tokens, store.merge(update), update)
+            current_node = await self._aroute(current_node, store.state)
+
+        logger.info("Async graph execution complete")
+        self._end_run(store.state)
+        return store.state
+
+    __call__ = invoke
+
+
 class StateGraph:
     """A simple state graph implementation for the multi-agent system.
-    
-    This is a simplified version of the LangGraph StateGraph class for testing purposes.
+
+    This is a simplified version of the LangGraph StateGraph class, usable
+    as a drop-in runtime for the graphs built in this package.
     """
-    
+
     def __init__(self, state_type):
         """Initialize the state graph.
-        
+
         Args:
             state_type: The type of state this graph will manage
         """
@@ -20,22 +489,24 @@ class StateGraph:
         self.nodes = {}
         self.edges = {}
         self.conditional_edges = {}
+        self.fanouts = {}
         self.entry_point = None
         logger.info(f"Initialized StateGraph with state type: {state_type.__name__}")
-    
+
     def add_node(self, name: str, function: Callable):
         """Add a node to the graph.
-        
+
         Args:
             name: The name of the node
-            function: The function to execute when this node is run
+            function: The function to execute when this node is run; it returns
+                      the full state or a partial update and may be async
         """
         self.nodes[name] = function
         logger.debug(f"Added node: {name}")
-    
+
     def add_edge(self, start_node: str, end_node: str):
         """Add an edge between two nodes.
-        
+
         Args:
             start_node: The starting node
             end_node: The ending node
@@ -44,20 +515,49 @@ class StateGraph:
             self.edges[start_node] = []
         self.edges[start_node].append(end_node)
         logger.debug(f"Added edge: {start_node} -> {end_node}")
-    
-    def add_conditional_edges(self, start_node: str, condition_function: Callable):
+
+    def add_conditional_edges(self, start_node: str, condition_function: Callable,
+                              path_map: Optional[Dict[Any, str]] = None):
         """Add conditional edges from a node.
-        
+
         Args:
             start_node: The starting node
-            condition_function: A function that takes the state and returns the next node
+            condition_function: A function that takes the state and returns the
+                                next node, or a key of path_map (may be async)
+            path_map: Optional mapping of condition results to node names
         """
-        self.conditional_edges[start_node] = condition_function
+        self.conditional_edges[start_node] = (condition_function, path_map)
         logger.debug(f"Added conditional edge from: {start_node}")
-    
+
+    def add_fanout(self, join_node: str, branch: Callable[[Any], Any], items: Callable[[Dict[str, Any]], Any],
+                   results_key: str, executor: str = "thread", max_workers: Optional[int] = None):
+        """Map a branch function over a collection each time a join node is reached.
+
+        Before join_node runs, items(state) is evaluated and branch(item) runs
+        for every item concurrently. The results are merged into the state
+        under results_key, keyed like the items, and join_node combines them.
+        Branches receive only their item, so they can run in other processes
+        and never race on the shared state.
+
+        Args:
+            join_node: The node that combines the branch results
+            branch: The function run once per item (may be async; async
+                    branches run on the event loop with either executor)
+            items: A function that takes the state and returns a dictionary of
+                   items (or an iterable, keyed by position)
+            results_key: State key the results are written to
+            executor: 'thread' for I/O-bound branches, 'process' for CPU-bound
+                      branches (branch and items must then be picklable)
+            max_workers: Size of the worker pool (defaults to the executor's default)
+        """
+        if join_node not in self.nodes:
+            raise ValueError(f"Node {join_node} not found in graph")
+        self.fanouts[join_node] = FanOut(branch, items, results_key, executor, max_workers)
+        logger.debug(f"Added fan-out into: {join_node}")
+
     def set_entry_point(self, node_name: str):
         """Set the entry point for the graph.
-        
+
         Args:
             node_name: The name of the node to use as the entry point
         """
@@ -65,65 +565,50 @@ class StateGraph:
             raise ValueError(f"Node {node_name} not found in graph")
         self.entry_point = node_name
         logger.debug(f"Set entry point to: {node_name}")
-    
-    def compile(self):
-        """Compile the graph into a runnable function.
-        
+
+    def compile(self, message_keys: Iterable[str] = ("messages",),
+                max_messages: int = DEFAULT_MAX_MESSAGES,
+                hooks: Iterable[GraphHook] = ()) -> CompiledGraph:
+        """Compile the graph into a runnable graph.
+
+        Args:
+            message_keys: State keys holding message lists, kept bounded
+            max_messages: Messages kept per message key
+            hooks: GraphHooks instrumenting every execution, e.g. a
+                   graph_profiler.GraphProfiler
+
         Returns:
-            A function that takes a state and runs the graph
+            A CompiledGraph; call it or its invoke() method with a state, or
+            await its ainvoke() method
         """
         if not self.entry_point:
             raise ValueError("Entry point not set")
-        
-        def run_graph(state=None):
-            """Run the graph with the given state.
-            
-            Args:
-                state: The initial state (optional)
-                
-            Returns:
-                The final state after running the graph
-            """
-            # Initialize state if not provided
-            if state is None:
-                state = {}
-            
-            current_node = self.entry_point
-            logger.info(f"Starting graph execution at node: {current_node}")
-            
-            # Run until we reach END or run out of nodes
-            while current_node != "END" and current_node is not None:
-                # Execute the current node
-                node_function = self.nodes.get(current_node)
-                if not node_function:
-                    logger.error(f"Node {current_node} not found in graph")
-                    break
-                
-                logger.debug(f"Executing node: {current_node}")
-                state = node_function(state)
-                
-                # Determine the next node
-                if current_node in self.conditional_edges:
-                    # Use conditional edge
-                    condition_function = self.conditional_edges[current_node]
-                    next_node = condition_function(state)
-                    logger.debug(f"Conditional edge from {current_node} -> {next_node}")
-                elif current_node in self.edges:
-                    # Use first edge
-                    next_node = self.edges[current_node][0]
-                    logger.debug(f"Following edge {current_node} -> {next_node}")
-                else:
-                    # No more edges
-                    logger.debug(f"No edges from {current_node}, ending execution")
-                    break
-                
-                current_node = next_node
-            
-            logger.info("Graph execution complete")
-            return state
-        
+
         logger.info("Graph compiled successfully")
-        return run_graph
+        return CompiledGraph(self, message_keys, max_messages, hooks)
 
 # Define a constant for the END node
-END = "END"
\ No newline at end of file
+END = "END"
+
+
+def load_graph_runtime(name: Optional[str] = None) -> Tuple[Any, str]:
+    """Return the StateGraph class and END marker of the graph runtime.
+
+    Args:
+        name: 'langgraph' or 'builtin' (defaults to the STATE_GRAPH_RUNTIME
+              environment variable, then 'langgraph'); LangGraph falls back to
+              the bundled runtime when it is not installed
+
+    Returns:
+        Tuple of (StateGraph class, END marker)
+    """
+    name = (name or os.environ.get('STATE_GRAPH_RUNTIME', 'langgraph')).lower()
+    if name == 'langgraph':
+        try:
+            from langgraph.graph import StateGraph as LangGraphStateGraph, END as LANGGRAPH_END
+            return LangGraphStateGraph, LANGGRAPH_END
+        except ImportError:
+            logger.warning("LangGraph is not installed, using the bundled state graph runtime")
+    elif name != 'builtin':
+        raise ValueError(f"Unknown state graph runtime: {name}")
+    return StateGraph, END
@@ -34,6 +34,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
     from agents.k8s_multi_agent_system import collect_pod_metrics, predict_pod_anomaly
     from agents.nvidia_llm import NvidiaLLM
+    # The multi-agent system puts backend/models on the path
+    from rule_engine import evaluate_cluster, suggest_remediation_actions
 except ImportError:
     st.error("Failed to import required modules. Make sure you're running from the project root.")
     st.stop()
@@ -95,19 +97,8 @@ def get_generic_pod_name(pod_name):
 # Update the suggest_remediation_action function to be more specific
 def suggest_remediation_action(anomaly_type, metrics):
     """Suggest appropriate remediation action based on anomaly type and metrics"""
-    # Make sure we're checking the actual anomaly type string
-    if anomaly_type == 'oom_risk' or metrics.get('Memory Usage (%)', 0) > 85:
-        return "increase_memory"
-    elif anomaly_type == 'resource_exhaustion' or metrics.get('CPU Usage (%)', 0) > 85:
-        return "increase_cpu"
-    elif anomaly_type == 'crash_loop' or metrics.get('Pod Restarts', 0) > 2:
-        return "restart_pod"
-    elif anomaly_type == 'deployment_issue':
-        return "restart_deployment"
-    elif anomaly_type == 'scaling_issue':
-        return "scale_deployment"
-    else:
-        return "restart_pod"  # Default action
+    # Rules live in rule_engine.REMEDIATION_RULES (restart_pod is the default action)
+    return suggest_remediation_actions([anomaly_type], [metrics])[0]
 
 # Metrics collection and processing
 def get_metrics(test_mode=False):
@@ -137,21 +128,24 @@ def detect_anomalies(pod_metrics):
     # Filter out remediated pods
     remediated_pod_names = [pod['name'] for pod in st.session_state.remediated_pods]
     
+    # Skip remediated pods
+    candidates = {pod_name: metrics for pod_name, metrics in pod_metrics.items()
+                  if pod_name not in remediated_pod_names}
+    
     anomalies = {}
-    for pod_name, metrics in pod_metrics.items():
-        # Skip remediated pods
-        if pod_name in remediated_pod_names:
-            continue
-            
-        try:
-            is_anomaly, prediction = predict_pod_anomaly(metrics)
-            if is_anomaly:
-                anomalies[pod_name] = {
-                    'metrics': metrics,
-                    'prediction': prediction
-                }
-        except Exception as e:
-            st.warning(f"Error detecting anomalies for pod {pod_name}: {str(e)}")
+    try:
+        # Score all pods with one vectorized pass over the rule tables
+        results = evaluate_cluster(candidates)
+    except Exception as e:
+        st.warning(f"Error detecting anomalies: {str(e)}")
+        return anomalies
+    
+    for pod_name, result in results.items():
+        if result['is_anomaly']:
+            anomalies[pod_name] = {
+                'metrics': candidates[pod_name],
+                'prediction': result['prediction']
+            }
     return anomalies
 
 def get_cluster_graph(pod_metrics):
@@ -674,23 +668,3 @@ def build_ui():
 
 if __name__ == "__main__":
     build_ui()
-
-# In the anomaly detection section where you display each anomaly
-def suggest_remediation_action(anomaly_type, metrics):
-    """Suggest the best remediation action based on anomaly type and metrics"""
-    cpu_usage = float(metrics.get('CPU Usage (%)', 0))
-    memory_usage = float(metrics.get('Memory Usage (%)', 0))
-    restarts = int(metrics.get('Pod Restarts', 0))
-    
-    if anomaly_type == 'crash_loop':
-        return "restart_deployment"
-    elif anomaly_type == 'oom_killed' or anomaly_type == 'oom_risk':
-        return "increase_memory"
-    elif anomaly_type == 'resource_exhaustion' and cpu_usage > 85:
-        return "increase_cpu"
-    elif anomaly_type == 'resource_exhaustion' and memory_usage > 85:
-        return "increase_memory"
-    elif restarts > 2:
-        return "restart_pod"
-    else:
-        return "restart_pod"  # Default action
\ No newline at end of file
@@ -1,67 +1,45 @@
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 import joblib
+import os
+import sys
 
-# Load the data
+# NumPy runtime exporter lives next to the inference code in backend/models
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'models')))
+from lstm_runtime import export_keras_model
+from training_pipeline import FEATURES, fit_scaler, make_tf_dataset
+
+# Metrics to train on (CSV or Parquet), streamed in chunks rather than loaded whole
 # Example: If dataSynthetic.csv is in the same folder as the script
-df = pd.read_csv('dataSynthetic.csv')
-df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-df = df.sort_values('Timestamp')
+data_path = sys.argv[1] if len(sys.argv) > 1 else 'dataSynthetic.csv'
+chunk_size = int(os.environ.get('TRAINING_CHUNK_SIZE', 200_000))
 
 # Define features present in the dataset
-features = [
-    'CPU Usage (%)', 'Memory Usage (%)', 'Pod Restarts',
-    'Memory Usage (MB)', 'Network Receive Bytes', 'Network Transmit Bytes',
-    'FS Reads Total (MB)', 'FS Writes Total (MB)',
-    'Network Receive Packets Dropped (p/s)', 'Network Transmit Packets Dropped (p/s)',
-    'Ready Containers'
-]
-
-# Handle missing or zero values
-df[features] = df[features].fillna(0)  # Replace NaN with 0
-df.loc[df['Pod Restarts'].isna(), 'Pod Restarts'] = 0  # Ensure restarts are numeric
-
-# Define anomaly target with refined conditions
-df['anomaly'] = 0
-df.loc[df['Pod Status'].isin(['CrashLoopBackOff', 'Error', 'Unknown']), 'anomaly'] = 1
-df.loc[df['Event Reason'] == 'OOMKilling', 'anomaly'] = 1
-df.loc[df['Node Name'].str.contains('NodeNotReady', na=False), 'anomaly'] = 1
-df.loc[df['Network Receive Packets Dropped (p/s)'] > 0, 'anomaly'] = 1
-df.loc[df['Ready Containers'] < df['Total Containers'], 'anomaly'] = 1
+features = FEATURES
 
-# Scale features
-scaler = MinMaxScaler()
-df_scaled = pd.DataFrame(scaler.fit_transform(df[features]), columns=features)
-df_scaled['anomaly'] = df['anomaly']
+# Fit the scaler incrementally, one chunk at a time
+scaler = fit_scaler(data_path, features, chunksize=chunk_size)
 
 # Save the scaler
 joblib.dump(scaler, 'scaler.pkl')
 print("Scaler saved as 'scaler.pkl'")
 
-# Create sequences for LSTM
-def create_sequences(data, seq_length):
-    X, y = [], []
-    for i in range(len(data) - seq_length):
-        X.append(data[i:i+seq_length, :-1])  # All features except anomaly
-        y.append(data[i+seq_length, -1])     # Anomaly label
-    return np.array(X), np.array(y)
-
-# Prepare data
+# Stream per-pod windows; whole pods are held out for validation and testing
+# (anomaly labels are derived per chunk by training_pipeline.label_anomalies)
 sequence_length = 10
-df_values = df_scaled.values
-X, y = create_sequences(df_values, sequence_length)
-
-# Split into train and test sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+split_options = dict(chunksize=chunk_size, validation_fraction=0.2, test_fraction=0.2)
+train_data = make_tf_dataset(data_path, scaler, features, sequence_length, batch_size=32,
+                             split='train', shuffle_buffer=10_000, seed=42, **split_options)
+val_data = make_tf_dataset(data_path, scaler, features, sequence_length, batch_size=256,
+                           split='validation', **split_options)
+test_data = make_tf_dataset(data_path, scaler, features, sequence_length, batch_size=256,
+                            split='test', **split_options)
 
 # Build the LSTM model
 model = Sequential()
-model.add(LSTM(64, return_sequences=True, input_shape=(X_train.shape[1], X_train.shape[2])))
+model.add(LSTM(64, return_sequences=True, input_shape=(sequence_length, len(features))))
 model.add(Dropout(0.2))
 model.add(LSTM(64))
 model.add(Dropout(0.2))
@@ -72,14 +50,14 @@ model.add(Dense(1, activation='sigmoid'))
 model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
 
 # Train model
-history = model.fit(X_train, y_train, epochs=50, batch_size=32, validation_split=0.2, verbose=1)
+history = model.fit(train_data, validation_data=val_data, epochs=50, verbose=1)
 
-# Evaluate model
-loss, accuracy = model.evaluate(X_test, y_test)
+# Evaluate model on the test pods, which were used neither for training nor validation
+loss, accuracy = model.evaluate(test_data)
 print(f"Test Loss: {loss:.4f}, Test Accuracy: {accuracy:.4f}")
 
-# Predict anomaly scores on test set for threshold calculation
-y_pred = model.predict(X_test)
+# Predict anomaly scores on the test pods for threshold calculation
+y_pred = model.predict(test_data.map(lambda X, y: X))
 threshold = np.percentile(y_pred, 95)  # Dynamic threshold at 95th percentile
 print(f"Dynamic Anomaly Threshold: {threshold:.4f}")
 
@@ -87,4 +65,8 @@ print(f"Dynamic Anomaly Threshold: {threshold:.4f}")
 model.save('lstm_anomaly_model.h5')
 joblib.dump(threshold, 'anomaly_threshold.pkl')
 print("Model saved as 'lstm_anomaly_model.h5'")
-print("Threshold saved as 'anomaly_threshold.pkl'")
\ No newline at end of file
+print("Threshold saved as 'anomaly_threshold.pkl'")
+
+# Export for the NumPy runtime so agents can score pods without TensorFlow
+export_keras_model(model, 'lstm_anomaly_model.npz', scaler=scaler, threshold=threshold)
+print("NumPy runtime model saved as 'lstm_anomaly_model.npz'")
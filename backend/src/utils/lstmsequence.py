@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
+from sequence_builder import build_pod_sequences
 
 # Load the data
 df = pd.read_csv('dataSynthetic.csv')
@@ -22,25 +23,12 @@ df.loc[df['Event Reason'] == 'OOMKilling', 'anomaly'] = 1
 df.loc[df['Pod Status'] == 'Unknown', 'anomaly'] = 1
 df.loc[df['Node Name'].str.contains('NodeNotReady', na=False), 'anomaly'] = 1
 
-# Scale features
+# Scale features in place so labels stay aligned with their rows
 scaler = MinMaxScaler()
-df_scaled = pd.DataFrame(scaler.fit_transform(df[features]), columns=features)
-df_scaled['anomaly'] = df['anomaly']
-df_scaled['Timestamp'] = df['Timestamp']
+df[features] = scaler.fit_transform(df[features])
 
-# Now you can create sequences for LSTM
-df_values = df_scaled.drop('Timestamp', axis=1).values
-
-# Function to create sequences
-def create_sequences(data, seq_length):
-    X, y = [], []
-    for i in range(len(data) - seq_length):
-        X.append(data[i:i+seq_length, :-1])  # All columns except the last (anomaly)
-        y.append(data[i+seq_length, -1])     # Only the anomaly column
-    return np.array(X), np.array(y)
-
-# Create sequences
+# Create per-pod sequences; windows are views until a batch is gathered
 sequence_length = 10
-X, y = create_sequences(df_values, sequence_length)
+sequences = build_pod_sequences(df, features, label_column='anomaly', seq_length=sequence_length)
 
-print(f"Sequences created: X shape = {X.shape}, y shape = {y.shape}")
+print(f"Sequences created: X shape = {sequences.shape}, y shape = ({len(sequences)},)")
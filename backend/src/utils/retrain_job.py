@@ -0,0 +1,195 @@
+"""
+Scheduled online retraining of the LSTM anomaly model
+
+Instead of training from scratch, each run warm-starts from the weights of
+the currently published model version and fine-tunes them on recent metrics
+only (samples newer than `--since` or the last `--lookback-hours`). The
+result is written to the versioned artifact store as a new immutable version
+(Keras model, NumPy runtime export, scaler, threshold and metadata) and then
+published. Running agents and the inference server poll the store through the
+model registry and swap to the new version without a restart.
+
+The scaler of the parent version is reused so the new model sees the same
+input scaling; a scaler is only fitted when no version exists yet.
+
+Usage:
+    python retrain_job.py pod_metrics.csv --lookback-hours 24 --epochs 3
+    python retrain_job.py pod_metrics.csv --interval-hours 6   # run every 6 hours
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from datetime import datetime, timedelta
+import numpy as np
+
+# Model runtime and artifact store live next to the inference code in backend/models
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'models')))
+from lstm_runtime import export_keras_model
+from model_versions import ModelVersionStore
+from streaming_inference import (ARTIFACTS_DIR, DEFAULT_SEQUENCE_LENGTH, MODEL_FILE,
+                                 RUNTIME_MODEL_FILE, SCALER_FILE, THRESHOLD_FILE)
+from training_pipeline import DEFAULT_CHUNK_SIZE, FEATURES, fit_scaler, make_tf_dataset
+
+logger = logging.getLogger("retrain-job")
+
+
+def _load_parent(store, artifacts_dir):
+    """
+    Return (version, keras_model, scaler) of the model to warm-start from.
+
+    Falls back to the unversioned artifacts written by lstmmodel.py; any
+    part that cannot be found is None.
+    """
+    import joblib
+    from tensorflow.keras.models import load_model
+
+    version = store.current_version()
+    source_dir = store.version_dir(version) if version else artifacts_dir
+    model_path = os.path.join(source_dir, MODEL_FILE)
+    scaler_path = os.path.join(source_dir, SCALER_FILE)
+
+    model = load_model(model_path) if os.path.exists(model_path) else None
+    scaler = joblib.load(scaler_path) if os.path.exists(scaler_path) else None
+    return version, model, scaler
+
+
+def _build_model(seq_length, n_features):
+    """Fresh model with the architecture of lstmmodel.py, used when nothing is published yet"""
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense, Dropout
+
+    model = Sequential()
+    model.add(LSTM(64, return_sequences=True, input_shape=(seq_length, n_features)))
+    model.add(Dropout(0.2))
+    model.add(LSTM(64))
+    model.add(Dropout(0.2))
+    model.add(Dense(32, activation='relu'))
+    model.add(Dense(1, activation='sigmoid'))
+    return model
+
+
+def retrain(data_path, artifacts_dir=ARTIFACTS_DIR, since=None, epochs=3, learning_rate=1e-4,
+            seq_length=DEFAULT_SEQUENCE_LENGTH, batch_size=32, chunksize=DEFAULT_CHUNK_SIZE,
+            keep_versions=5, publish=True):
+    """
+    Fine-tune the published model on recent metrics and store a new version.
+
+    Args:
+        data_path: CSV or Parquet metrics file
+        artifacts_dir: Model artifacts directory holding the version store
+        since: Only train on samples at or after this time (None uses all)
+        epochs: Fine-tuning epochs
+        learning_rate: Optimizer learning rate; kept low so warm-started
+                       weights are adjusted rather than overwritten
+        seq_length: Number of timesteps per window
+        batch_size: Training batch size
+        chunksize: Rows read per chunk
+        keep_versions: Number of stored versions kept after pruning
+        publish: Point running agents at the new version
+
+    Returns:
+        The new version id
+    """
+    import joblib
+    import tensorflow as tf
+
+    store = ModelVersionStore(artifacts_dir)
+    parent_version, model, scaler = _load_parent(store, artifacts_dir)
+    if scaler is None:
+        scaler = fit_scaler(data_path, FEATURES, chunksize=chunksize)
+    if model is None:
+        logger.info("No published model to warm-start from, training a new one")
+        model = _build_model(seq_length, len(FEATURES))
+    else:
+        seq_length = int(model.input_shape[1]) or seq_length
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss='binary_crossentropy', metrics=['accuracy'])
+
+    train_data = make_tf_dataset(data_path, scaler, FEATURES, seq_length, batch_size=batch_size,
+                                 chunksize=chunksize, split='train', shuffle_buffer=10_000, since=since)
+    val_data = make_tf_dataset(data_path, scaler, FEATURES, seq_length, batch_size=256,
+                               chunksize=chunksize, split='validation', since=since)
+
+    logger.info(f"Retraining from version {parent_version} on {data_path} (since={since}, epochs={epochs})")
+    history = model.fit(train_data, validation_data=val_data, epochs=epochs, verbose=2)
+    loss, accuracy = model.evaluate(val_data, verbose=0)
+    y_pred = model.predict(val_data.map(lambda X, y: X), verbose=0)
+    threshold = float(np.percentile(y_pred, 95))
+
+    def write_files(directory):
+        model.save(os.path.join(directory, MODEL_FILE))
+        joblib.dump(scaler, os.path.join(directory, SCALER_FILE))
+        joblib.dump(threshold, os.path.join(directory, THRESHOLD_FILE))
+        export_keras_model(model, os.path.join(directory, RUNTIME_MODEL_FILE), scaler=scaler, threshold=threshold)
+
+    version = store.write_version(write_files, metadata={
+        'parent_version': parent_version,
+        'data_path': os.path.abspath(data_path),
+        'since': str(since) if since is not None else None,
+        'epochs': epochs,
+        'learning_rate': learning_rate,
+        'seq_length': seq_length,
+        'features': FEATURES,
+        'threshold': threshold,
+        'validation_loss': float(loss),
+        'validation_accuracy': float(accuracy),
+        'train_loss': float(history.history['loss'][-1]),
+    })
+    logger.info(f"Version {version}: validation loss {loss:.4f}, accuracy {accuracy:.4f}, threshold {threshold:.4f}")
+
+    if publish:
+        store.publish(version)
+        store.prune(keep_versions)
+    return version
+
+
+def main():
+    """Run the retraining job once or on a schedule"""
+    parser = argparse.ArgumentParser(description='Warm-start retraining of the LSTM anomaly model')
+    parser.add_argument('data_path', type=str,
+                        help='Metrics CSV or Parquet file to train on')
+    parser.add_argument('--artifacts-dir', type=str, default=ARTIFACTS_DIR,
+                        help='Model artifacts directory holding the version store')
+    parser.add_argument('--since', type=str, default=None,
+                        help='Only train on samples at or after this timestamp')
+    parser.add_argument('--lookback-hours', type=float, default=None,
+                        help='Only train on samples from the last N hours (overrides --since)')
+    parser.add_argument('--epochs', type=int, default=3,
+                        help='Fine-tuning epochs (default: 3)')
+    parser.add_argument('--learning-rate', type=float, default=1e-4,
+                        help='Optimizer learning rate (default: 1e-4)')
+    parser.add_argument('--keep-versions', type=int, default=5,
+                        help='Number of stored model versions to keep (default: 5)')
+    parser.add_argument('--no-publish', action='store_true',
+                        help='Store the new version without publishing it to running agents')
+    parser.add_argument('--interval-hours', type=float, default=None,
+                        help='Repeat the job every N hours instead of running once')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    chunksize = int(os.environ.get('TRAINING_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+
+    while True:
+        since = args.since
+        if args.lookback_hours is not None:
+            # Collected timestamps are naive local time (datetime.now() in the collector)
+            since = datetime.now() - timedelta(hours=args.lookback_hours)
+        try:
+            retrain(args.data_path, args.artifacts_dir, since=since, epochs=args.epochs,
+                    learning_rate=args.learning_rate, chunksize=chunksize,
+                    keep_versions=args.keep_versions, publish=not args.no_publish)
+        except Exception as e:
+            logger.error(f"Retraining failed: {e}")
+            if args.interval_hours is None:
+                raise
+
+        if args.interval_hours is None:
+            break
+        time.sleep(args.interval_hours * 3600)
+
+
+if __name__ == "__main__":
+    main()
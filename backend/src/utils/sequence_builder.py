@@ -0,0 +1,187 @@
+"""
+Per-pod sequence builder for LSTM training
+
+Training windows are built per pod: rows are grouped by pod and ordered by
+time, so no window spans two pods. All windows are strided views
+(`numpy.lib.stride_tricks.sliding_window_view`) over one contiguous feature
+array. Beyond that array the only per-window memory is one start index, so
+memory stays bounded on tens of millions of rows. Windows are copied only when
+a batch is gathered.
+
+Each window covers `seq_length` consecutive samples of one pod and is labelled
+with the anomaly label of the sample that follows it.
+"""
+
+import logging
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger("sequence-builder")
+
+
+class PodSequenceSet:
+    """Lazily materialized set of per-pod training windows"""
+
+    def __init__(self, values, labels, seq_length, starts):
+        """
+        Args:
+            values: Array of shape (rows, features), grouped by pod and time-ordered
+            labels: Array of shape (rows,) with the label of every row
+            seq_length: Number of timesteps per window
+            starts: Row index at which each window starts
+        """
+        self.values = values
+        self.labels = labels
+        self.seq_length = seq_length
+        self.starts = starts
+        # View of shape (rows - seq_length + 1, seq_length, features); no copy.
+        # Fewer rows than seq_length hold no window at all
+        if len(values) >= seq_length:
+            self._windows = sliding_window_view(values, seq_length, axis=0).transpose(0, 2, 1)
+        else:
+            self._windows = np.empty((0, seq_length, values.shape[1]), dtype=values.dtype)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def shape(self):
+        """Shape the materialized X array would have"""
+        return (len(self.starts), self.seq_length, self.values.shape[1])
+
+    def batch(self, indices) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gather a batch of windows.
+
+        Args:
+            indices: Positions of the windows within this set
+
+        Returns:
+            Tuple of (X, y) with shapes (batch, seq_length, features) and (batch,)
+        """
+        starts = self.starts[indices]
+        return self._windows[starts], self.labels[starts + self.seq_length]
+
+    def iter_batches(self, batch_size=32, shuffle=False, seed=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield (X, y) batches, copying only one batch at a time.
+
+        Args:
+            batch_size: Number of windows per batch
+            shuffle: Visit windows in random order
+            seed: Random seed used when shuffling
+        """
+        order = np.arange(len(self.starts))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for offset in range(0, len(order), batch_size):
+            yield self.batch(order[offset:offset + batch_size])
+
+    def split(self, test_size=0.2, seed=None) -> Tuple['PodSequenceSet', 'PodSequenceSet']:
+        """
+        Randomly split the windows into two sets sharing the same feature array.
+
+        Args:
+            test_size: Fraction of windows in the second set
+            seed: Random seed
+
+        Returns:
+            Tuple of (train_set, test_set)
+        """
+        order = np.random.default_rng(seed).permutation(len(self.starts))
+        n_test = int(round(len(order) * test_size))
+        test_starts = np.sort(self.starts[order[:n_test]])
+        train_starts = np.sort(self.starts[order[n_test:]])
+        return (PodSequenceSet(self.values, self.labels, self.seq_length, train_starts),
+                PodSequenceSet(self.values, self.labels, self.seq_length, test_starts))
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Materialize every window (only for sets that fit in memory)"""
+        return self.batch(np.arange(len(self.starts)))
+
+    def keras_sequence(self, batch_size=32, shuffle=True, seed=None):
+        """
+        Wrap the set as a `tf.keras.utils.Sequence` for `model.fit`.
+
+        TensorFlow is imported only when this is called.
+        """
+        from tensorflow.keras.utils import Sequence
+
+        sequence_set = self
+
+        class _PodWindowSequence(Sequence):
+            def __init__(self):
+                super().__init__()
+                self.epoch = 0
+                self.order = np.arange(len(sequence_set))
+                self.on_epoch_end()
+
+            def __len__(self):
+                return (len(sequence_set) + batch_size - 1) // batch_size
+
+            def __getitem__(self, index):
+                return sequence_set.batch(self.order[index * batch_size:(index + 1) * batch_size])
+
+            def on_epoch_end(self):
+                if shuffle:
+                    rng = np.random.default_rng(None if seed is None else seed + self.epoch)
+                    rng.shuffle(self.order)
+                self.epoch += 1
+
+        return _PodWindowSequence()
+
+
+def window_starts(pod_codes, seq_length) -> np.ndarray:
+    """
+    Compute the start rows of every window that stays within one pod.
+
+    Args:
+        pod_codes: Integer pod code per row, rows grouped by pod
+        seq_length: Number of timesteps per window (the label row follows it)
+
+    Returns:
+        Array of window start rows
+    """
+    pod_codes = np.asarray(pod_codes)
+    if len(pod_codes) <= seq_length:
+        return np.empty(0, dtype=np.int64)
+    # Rows are grouped by pod, so a window and its label row lie within one
+    # pod exactly when the first and label rows belong to the same pod
+    valid = pod_codes[:-seq_length] == pod_codes[seq_length:]
+    dtype = np.int32 if len(pod_codes) < np.iinfo(np.int32).max else np.int64
+    return np.flatnonzero(valid).astype(dtype)
+
+
+def build_pod_sequences(df: pd.DataFrame, features: List[str], label_column: str = 'anomaly',
+                        seq_length: int = 10, pod_column: str = 'Pod Name',
+                        time_column: Optional[str] = 'Timestamp', dtype=np.float32) -> PodSequenceSet:
+    """
+    Build per-pod training windows from a metrics DataFrame.
+
+    Args:
+        df: Metrics with one row per pod sample (features already scaled)
+        features: Feature columns, in model input order
+        label_column: Column holding the 0/1 anomaly label
+        seq_length: Number of timesteps per window
+        pod_column: Column identifying the pod
+        time_column: Column used to order samples within a pod (None keeps row order)
+        dtype: dtype of the feature array
+
+    Returns:
+        PodSequenceSet over the windows
+    """
+    pod_codes, _ = pd.factorize(df[pod_column], sort=False)
+    if time_column is not None:
+        order = np.lexsort((df[time_column].to_numpy(), pod_codes))
+    else:
+        order = np.argsort(pod_codes, kind='stable')
+
+    values = np.ascontiguousarray(df[features].to_numpy(dtype=dtype)[order])
+    labels = df[label_column].to_numpy()[order]
+    starts = window_starts(pod_codes[order], seq_length)
+
+    logger.info(f"Built {len(starts)} windows of length {seq_length} from {len(df)} rows "
+                f"across {pod_codes.max() + 1 if len(pod_codes) else 0} pods")
+    return PodSequenceSet(values, labels, seq_length, starts)
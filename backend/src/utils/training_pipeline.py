@@ -0,0 +1,298 @@
+"""
+Out-of-core training data pipeline for the LSTM anomaly model
+
+Months of cluster history do not fit in memory as a DataFrame, let alone as
+materialized sequences. This module streams the stored metrics (CSV or
+Parquet) in fixed-size chunks instead:
+
+1. `fit_scaler` makes one pass over the file and fits the MinMaxScaler with
+   `partial_fit`, one chunk at a time.
+2. `iter_training_batches` makes another pass. It scales each chunk, builds
+   per-pod windows with the strided sequence builder and yields (X, y)
+   batches. The last `seq_length` samples of every pod carry over between
+   chunks, so windows spanning a chunk boundary are not lost.
+3. `make_tf_dataset` wraps the generator in a `tf.data.Dataset` for
+   `model.fit`.
+
+Memory is bounded by the chunk size, the shuffle buffer and `seq_length` rows
+per pod. Samples of a pod are expected in chronological order across chunks,
+as the metrics collector appends them.
+"""
+
+import os
+import zlib
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from .sequence_builder import window_starts
+except ImportError:
+    from sequence_builder import window_starts
+
+logger = logging.getLogger("training-pipeline")
+
+# Model input features, in training order
+FEATURES = [
+    'CPU Usage (%)', 'Memory Usage (%)', 'Pod Restarts',
+    'Memory Usage (MB)', 'Network Receive Bytes', 'Network Transmit Bytes',
+    'FS Reads Total (MB)', 'FS Writes Total (MB)',
+    'Network Receive Packets Dropped (p/s)', 'Network Transmit Packets Dropped (p/s)',
+    'Ready Containers'
+]
+
+# Columns needed by label_anomalies
+LABEL_COLUMNS = ['Pod Status', 'Event Reason', 'Node Name', 'Total Containers']
+
+DEFAULT_CHUNK_SIZE = 200_000
+
+
+def label_anomalies(df: pd.DataFrame) -> np.ndarray:
+    """
+    Derive the 0/1 anomaly training label of every row.
+
+    Args:
+        df: Metrics chunk
+
+    Returns:
+        Integer array with one label per row
+    """
+    anomaly = df['Pod Status'].isin(['CrashLoopBackOff', 'Error', 'Unknown'])
+    anomaly |= df['Event Reason'] == 'OOMKilling'
+    anomaly |= df['Node Name'].astype(str).str.contains('NodeNotReady', na=False)
+    anomaly |= df['Network Receive Packets Dropped (p/s)'].fillna(0) > 0
+    anomaly |= df['Ready Containers'].fillna(0) < df['Total Containers'].fillna(0)
+    return anomaly.to_numpy(dtype=np.int8)
+
+
+def iter_metric_chunks(path: str, columns: Optional[List[str]] = None,
+                       chunksize: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read a metrics file in chunks of at most `chunksize` rows.
+
+    Args:
+        path: CSV or Parquet file
+        columns: Columns to read (defaults to all)
+        chunksize: Rows per chunk
+
+    Yields:
+        DataFrame chunks
+    """
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet metrics requires pyarrow. Please install with: pip install pyarrow")
+        parquet_file = pq.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield record_batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def fit_scaler(path: str, features: List[str] = FEATURES, chunksize: int = DEFAULT_CHUNK_SIZE, scaler=None):
+    """
+    Fit a scaler incrementally over a metrics file.
+
+    Args:
+        path: CSV or Parquet file
+        features: Feature columns to scale
+        chunksize: Rows per chunk
+        scaler: Scaler exposing partial_fit (defaults to a new MinMaxScaler)
+
+    Returns:
+        The fitted scaler
+    """
+    if scaler is None:
+        from sklearn.preprocessing import MinMaxScaler
+        scaler = MinMaxScaler()
+
+    rows = 0
+    for chunk in iter_metric_chunks(path, columns=features, chunksize=chunksize):
+        scaler.partial_fit(chunk[features].fillna(0).to_numpy(dtype=np.float64))
+        rows += len(chunk)
+    logger.info(f"Fitted scaler on {rows} rows from {path}")
+    return scaler
+
+
+def _in_split(pod_names: np.ndarray, split: Optional[str], validation_fraction: float,
+              test_fraction: float = 0.0) -> np.ndarray:
+    """Assign whole pods to the train, validation or test split by hashing their names"""
+    if split is None:
+        return np.ones(len(pod_names), dtype=bool)
+    if split not in ('train', 'validation', 'test'):
+        raise ValueError(f"Unknown split: {split}")
+    buckets = np.array([zlib.crc32(str(name).encode('utf-8')) % 10_000 for name in pod_names])
+    is_validation = buckets < validation_fraction * 10_000
+    is_test = ~is_validation & (buckets < (validation_fraction + test_fraction) * 10_000)
+    if split == 'validation':
+        return is_validation
+    if split == 'test':
+        return is_test
+    return ~is_validation & ~is_test
+
+
+class _PodCarry:
+    """Last `seq_length` scaled rows and labels of every pod seen so far"""
+
+    def __init__(self, n_features, seq_length):
+        self.seq_length = seq_length
+        self.n_features = n_features
+        self.rows: Dict[int, np.ndarray] = {}
+        self.labels: Dict[int, np.ndarray] = {}
+
+    def prepend(self, codes, values, labels):
+        """Put the carried rows of the chunk's pods in front of the chunk rows"""
+        carried = [code for code in np.unique(codes) if code in self.rows]
+        if not carried:
+            return codes, values, labels
+        carry_codes = np.concatenate([np.full(len(self.rows[code]), code) for code in carried])
+        return (np.concatenate([carry_codes, codes]),
+                np.concatenate([self.rows[code] for code in carried] + [values]),
+                np.concatenate([self.labels[code] for code in carried] + [labels]))
+
+    def update(self, codes, values, labels):
+        """Remember the last rows of each pod, given rows grouped by pod"""
+        boundaries = np.flatnonzero(np.diff(codes)) + 1
+        ends = np.append(boundaries, len(codes))
+        begins = np.insert(boundaries, 0, 0)
+        for begin, end in zip(begins, ends):
+            start = max(begin, end - self.seq_length)
+            code = int(codes[begin])
+            self.rows[code] = values[start:end].copy()
+            self.labels[code] = labels[start:end].copy()
+
+
+def iter_training_batches(path: str, scaler, features: List[str] = FEATURES, seq_length: int = 10,
+                          batch_size: int = 32, chunksize: int = DEFAULT_CHUNK_SIZE,
+                          label_fn: Callable[[pd.DataFrame], np.ndarray] = label_anomalies,
+                          label_columns: List[str] = LABEL_COLUMNS,
+                          pod_column: str = 'Pod Name', time_column: Optional[str] = 'Timestamp',
+                          split: Optional[str] = None, validation_fraction: float = 0.2,
+                          test_fraction: float = 0.0, shuffle_buffer: int = 0, seed: Optional[int] = None,
+                          since=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Stream (X, y) training batches of per-pod windows from a metrics file.
+
+    Args:
+        path: CSV or Parquet file
+        scaler: Fitted scaler (see fit_scaler)
+        features: Feature columns, in model input order
+        seq_length: Number of timesteps per window
+        batch_size: Windows per yielded batch
+        chunksize: Rows read per chunk
+        label_fn: Function deriving the label array from a chunk
+        label_columns: Extra columns label_fn needs
+        pod_column: Column identifying the pod
+        time_column: Column ordering samples within a chunk (None keeps file order)
+        split: None for all pods, or 'train'/'validation'/'test' to hold out whole pods
+        validation_fraction: Fraction of pods in the validation split
+        test_fraction: Fraction of pods in the test split (pass the same value
+                       for every split so train never contains test pods)
+        shuffle_buffer: Number of windows shuffled together (0 disables shuffling)
+        seed: Random seed for shuffling
+        since: Only use samples at or after this time (anything pandas.Timestamp
+               accepts); requires time_column
+
+    Yields:
+        Tuples (X, y) with shapes (batch, seq_length, features) and (batch,)
+    """
+    columns = list(dict.fromkeys([pod_column] + ([time_column] if time_column else []) + features + label_columns))
+    rng = np.random.default_rng(seed)
+    carry = _PodCarry(len(features), seq_length)
+    pod_index: Dict[str, int] = {}
+    pending_X: List[np.ndarray] = []
+    pending_y: List[np.ndarray] = []
+    pending = 0
+    flush_size = max(batch_size, shuffle_buffer)
+    if since is not None:
+        if not time_column:
+            raise ValueError("Filtering by 'since' requires a time_column")
+        since = pd.Timestamp(since)
+
+    def drain(final=False):
+        nonlocal pending_X, pending_y, pending
+        X = np.concatenate(pending_X)
+        y = np.concatenate(pending_y)
+        if shuffle_buffer:
+            order = rng.permutation(len(X))
+            X, y = X[order], y[order]
+        usable = len(X) if final else (len(X) // batch_size) * batch_size
+        for offset in range(0, usable, batch_size):
+            yield X[offset:offset + batch_size], y[offset:offset + batch_size]
+        pending_X, pending_y = ([X[usable:]], [y[usable:]]) if usable < len(X) else ([], [])
+        pending = len(X) - usable
+
+    for chunk in iter_metric_chunks(path, columns=columns, chunksize=chunksize):
+        names = chunk[pod_column].to_numpy()
+        keep = _in_split(names, split, validation_fraction, test_fraction)
+        if since is not None:
+            keep &= (pd.to_datetime(chunk[time_column], errors='coerce') >= since).to_numpy()
+        if not keep.all():
+            chunk = chunk[keep]
+            names = names[keep]
+        if chunk.empty:
+            continue
+
+        codes = np.array([pod_index.setdefault(name, len(pod_index)) for name in names])
+        labels = np.asarray(label_fn(chunk))
+        chunk_features = chunk[features].fillna(0).to_numpy(dtype=np.float64)
+        values = np.asarray(scaler.transform(chunk_features), dtype=np.float32)
+
+        # Group rows by pod (time-ordered within the chunk), carried rows first
+        if time_column:
+            order = np.lexsort((chunk[time_column].to_numpy(), codes))
+        else:
+            order = np.argsort(codes, kind='stable')
+        codes, values, labels = carry.prepend(codes[order], values[order], labels[order])
+        order = np.argsort(codes, kind='stable')
+        codes, values, labels = codes[order], np.ascontiguousarray(values[order]), labels[order]
+
+        starts = window_starts(codes, seq_length)
+        if len(starts):
+            windows = sliding_window_view(values, seq_length, axis=0).transpose(0, 2, 1)
+            pending_X.append(windows[starts])
+            pending_y.append(labels[starts + seq_length])
+            pending += len(starts)
+        carry.update(codes, values, labels)
+
+        if pending >= flush_size:
+            yield from drain()
+
+    if pending:
+        yield from drain(final=True)
+
+
+def make_tf_dataset(path: str, scaler, features: List[str] = FEATURES, seq_length: int = 10,
+                    batch_size: int = 32, **kwargs):
+    """
+    Wrap `iter_training_batches` in a `tf.data.Dataset`.
+
+    The file is re-read on every epoch, so the dataset never holds more than
+    one chunk plus the shuffle buffer. TensorFlow is imported only here.
+
+    Args:
+        path: CSV or Parquet file
+        scaler: Fitted scaler (see fit_scaler)
+        features: Feature columns, in model input order
+        seq_length: Number of timesteps per window
+        batch_size: Windows per batch
+        **kwargs: Further iter_training_batches options (split, shuffle_buffer, ...)
+
+    Returns:
+        tf.data.Dataset of (X, y) batches
+    """
+    import tensorflow as tf
+
+    signature = (
+        tf.TensorSpec(shape=(None, seq_length, len(features)), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32),
+    )
+
+    def generator():
+        for X, y in iter_training_batches(path, scaler, features, seq_length, batch_size, **kwargs):
+            yield X, y.astype(np.float32)
+
+    return tf.data.Dataset.from_generator(generator, output_signature=signature).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Tests for the alert lifecycle state machine
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+from alert_state import AlertTracker, FIRING, PENDING, RESOLVED
+
+
+def _states(transitions):
+    return [(t.state, t.renotify) for t in transitions]
+
+
+def test_alert_fires_after_consecutive_hits_and_is_not_repeated():
+    tracker = AlertTracker(for_cycles=2, resolve_cycles=2, renotify_interval=None)
+
+    assert tracker.observe('pod-a', 'crash_loop', True, now=0) == []
+    assert tracker.state('pod-a', 'crash_loop') == PENDING
+    assert _states(tracker.observe('pod-a', 'crash_loop', True, now=10)) == [(FIRING, False)]
+    for now in range(20, 200, 10):
+        assert tracker.observe('pod-a', 'crash_loop', True, now=now) == []
+    assert tracker.stats['fired'] == 1
+
+
+def test_single_clear_sample_does_not_resolve_and_pending_is_dropped():
+    tracker = AlertTracker(for_cycles=2, resolve_cycles=2, renotify_interval=None)
+    tracker.observe('pod-a', 'crash_loop', True, now=0)
+    tracker.observe('pod-a', 'crash_loop', True, now=1)
+
+    assert tracker.observe('pod-a', None, False, now=2) == []
+    assert tracker.observe('pod-a', 'crash_loop', True, now=3) == []  # still firing, counter reset
+    assert tracker.observe('pod-a', None, False, now=4) == []
+    resolved = tracker.observe('pod-a', None, False, now=5)
+    assert _states(resolved) == [(RESOLVED, False)]
+    assert resolved[0].alert.resolved_at == 5
+
+    # A pending alert that clears never fires or resolves
+    tracker.observe('pod-b', 'oom_risk', True, now=6)
+    assert tracker.observe('pod-b', None, False, now=7) == []
+    assert tracker.state('pod-b', 'oom_risk') is None
+
+
+def test_renotify_after_interval_and_refire_after_resolution():
+    tracker = AlertTracker(for_cycles=1, resolve_cycles=1, renotify_interval=60)
+    assert _states(tracker.observe('pod-a', 'crash_loop', True, now=0)) == [(FIRING, False)]
+    assert tracker.observe('pod-a', 'crash_loop', True, now=30) == []
+    assert _states(tracker.observe('pod-a', 'crash_loop', True, now=61)) == [(FIRING, True)]
+
+    assert _states(tracker.observe('pod-a', None, False, now=70)) == [(RESOLVED, False)]
+    assert _states(tracker.observe('pod-a', 'crash_loop', True, now=80)) == [(FIRING, False)]
+
+
+def test_type_change_resolves_old_alert_and_starts_new_one():
+    tracker = AlertTracker(for_cycles=1, resolve_cycles=1, renotify_interval=None)
+    tracker.observe('pod-a', 'crash_loop', True, now=0)
+
+    transitions = tracker.observe('pod-a', 'oom_risk', True, now=1)
+    assert sorted((t.anomaly_type, t.state) for t in transitions) == [('crash_loop', RESOLVED), ('oom_risk', FIRING)]
+    assert [alert.anomaly_type for alert in tracker.firing()] == ['oom_risk']
+
+    assert tracker.prune_resolved(older_than=10, now=100) == 1
+    tracker.forget('pod-a')
+    assert tracker.alerts == {}
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Tests for the batched anomaly prediction path
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+import anomaly_prediction
+
+
+class RecordingModel:
+    """Fake sequence model that records every forward pass"""
+
+    input_shape = (None, 3, len(anomaly_prediction.MODEL_FEATURES))
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_on_batch(self, X):
+        self.calls.append(X.shape)
+        # Score each window by its latest CPU usage
+        return (X[:, -1, 0:1] / 100.0).astype(np.float32)
+
+
+def _history(cpu_values, restarts=0):
+    return [{'Pod Name': 'p', 'CPU Usage (%)': cpu, 'Memory Usage (%)': 10.0, 'Pod Restarts': restarts}
+            for cpu in cpu_values]
+
+
+def test_build_feature_windows_pads_short_histories():
+    names, X = anomaly_prediction.build_feature_windows({'a': _history([10, 20]), 'b': _history([1, 2, 3, 4])}, 3)
+    assert names == ['a', 'b']
+    assert X.shape == (2, 3, len(anomaly_prediction.MODEL_FEATURES))
+    assert list(X[0, :, 0]) == [10, 10, 20]
+    assert list(X[1, :, 0]) == [2, 3, 4]
+
+
+def test_batch_prediction_uses_single_forward_pass(monkeypatch):
+    fake = RecordingModel()
+    monkeypatch.setattr(anomaly_prediction, 'get_model', lambda: fake)
+
+    histories = {f'pod-{i}': _history([50, 60, 95 if i % 2 else 20]) for i in range(50)}
+    results = anomaly_prediction.predict_anomalies_batch(histories)
+
+    assert fake.calls == [(50, 3, len(anomaly_prediction.MODEL_FEATURES))]
+    assert results['pod-1']['predicted_anomaly'] == 1
+    assert results['pod-1']['anomaly_type'] == 'resource_exhaustion'
+    assert results['pod-0']['predicted_anomaly'] == 0
+
+
+def test_batch_prediction_falls_back_to_rules_without_model(monkeypatch):
+    monkeypatch.setattr(anomaly_prediction, 'get_model', lambda: None)
+    results = anomaly_prediction.predict_anomalies_batch({'crashing': _history([10], restarts=8)})
+    assert results['crashing']['anomaly_type'] == 'crash_loop'
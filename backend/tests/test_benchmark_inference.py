@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""
+Tests for the inference benchmark harness
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from benchmark_inference import PATHS, compare_to_baseline, run_benchmarks, synthetic_histories
+
+
+def test_synthetic_histories_shape():
+    histories = synthetic_histories(5, seq_length=4)
+    assert len(histories) == 5
+    assert all(len(history) == 4 for history in histories.values())
+
+
+def test_every_path_reports_latency_throughput_and_memory():
+    report = run_benchmarks(PATHS, batch_sizes=[1, 3], repeats=2, warmup=1, synthetic=True)
+    assert report['model_source'] == 'synthetic' and report['sequence_model_source'] == 'synthetic'
+    assert {(r['path'], r['batch_size']) for r in report['results']} == {(p, b) for p in PATHS for b in (1, 3)}
+    for result in report['results']:
+        assert result['p99_ms'] >= result['p50_ms'] >= 0
+        assert result['throughput_pods_per_s'] > 0
+        assert result['peak_memory_mb'] >= 0
+
+
+def test_compare_to_baseline_flags_only_real_slowdowns():
+    def report(p50, memory=1.0):
+        return {'results': [{'path': 'rule_batch', 'batch_size': 100, 'p50_ms': p50, 'peak_memory_mb': memory}]}
+
+    assert compare_to_baseline(report(10.0), report(10.0)) == []
+    assert compare_to_baseline(report(11.0), report(10.0), tolerance=0.2) == []
+    assert len(compare_to_baseline(report(13.0), report(10.0), tolerance=0.2)) == 1
+    # Tiny absolute differences on sub-millisecond cases are noise
+    assert compare_to_baseline(report(0.02), report(0.01)) == []
+    assert len(compare_to_baseline(report(10.0, memory=5.0), report(10.0, memory=1.0))) == 1
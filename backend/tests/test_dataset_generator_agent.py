@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Tests for incremental (dirty-set) detection in the dataset generator agent
+"""
+import os
+import sys
+import importlib
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+
+class RecordingAnomalyAgent:
+    """Returns a fixed result per pod and records which pods it was asked about"""
+
+    def __init__(self):
+        self.calls = []
+
+    def detect_anomalies(self, pod_history):
+        self.calls.append(sorted(pod_history))
+        return {pod_name: {'predicted_anomaly': 0, 'anomaly_probability': 0.1, 'samples': len(history)}
+                for pod_name, history in pod_history.items()}
+
+
+def _make_agent(tmp_path, monkeypatch):
+    # The module writes its log file to the working directory on import
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module('dataset_generator_agent')
+    agent = module.DatasetGeneratorAgent.__new__(module.DatasetGeneratorAgent)
+    agent.history_window = 60
+    agent._init_pod_state(pod_ttl=3600, max_pods=None)
+    agent.anomaly_agent = RecordingAnomalyAgent()
+    return agent
+
+
+def _rows(*pod_names):
+    return pd.DataFrame([{'Pod Name': name, 'CPU Usage (%)': 10.0} for name in pod_names])
+
+
+def test_only_changed_pods_are_redetected(tmp_path, monkeypatch):
+    agent = _make_agent(tmp_path, monkeypatch)
+
+    agent.update_pod_metrics(_rows('pod-a', 'pod-b', 'pod-c'))
+    first = agent.detect_anomalies()
+    assert agent.anomaly_agent.calls == [['pod-a', 'pod-b', 'pod-c']]
+    assert set(first) == {'pod-a', 'pod-b', 'pod-c'}
+
+    agent.update_pod_metrics(_rows('pod-b'))
+    second = agent.detect_anomalies()
+    assert agent.anomaly_agent.calls[-1] == ['pod-b']
+    # Unchanged pods keep their cached results
+    assert set(second) == {'pod-a', 'pod-b', 'pod-c'}
+    assert second['pod-b']['samples'] == 2 and second['pod-a']['samples'] == 1
+
+    # No new samples: nothing is re-run
+    agent.detect_anomalies()
+    assert len(agent.anomaly_agent.calls) == 2
+
+
+def test_failed_pass_keeps_pods_dirty_and_force_all_reruns(tmp_path, monkeypatch):
+    agent = _make_agent(tmp_path, monkeypatch)
+    agent.update_pod_metrics(_rows('pod-a'))
+
+    detector = agent.anomaly_agent
+    agent.anomaly_agent = type('Failing', (), {'detect_anomalies': lambda self, history: 1 / 0})()
+    assert agent.detect_anomalies() == {}
+    assert agent.dirty_pods == {'pod-a'}
+
+    agent.anomaly_agent = detector
+    agent.detect_anomalies()
+    agent.detect_anomalies(force_all=True)
+    assert detector.calls == [['pod-a'], ['pod-a']]
+
+
+def test_pods_that_stop_reporting_are_evicted(tmp_path, monkeypatch):
+    agent = _make_agent(tmp_path, monkeypatch)
+    clock = [1000.0]
+    agent.pod_history.clock = lambda: clock[0]
+
+    agent.update_pod_metrics(_rows('pod-a', 'pod-b'))
+    agent.detect_anomalies()
+    clock[0] += 3000
+    agent.update_pod_metrics(_rows('pod-b'))
+    clock[0] += 1000
+
+    results = agent.detect_anomalies()
+    assert set(results) == {'pod-b'}
+    assert set(agent.pod_history) == set(agent.pod_metrics) == {'pod-b'}
+    assert agent.pod_history.stats()['evicted_ttl'] == 1
+
+
+def test_only_recomputed_results_reach_the_alert_tracker(tmp_path, monkeypatch):
+    from alert_state import AlertTracker, FIRING
+
+    class AlertingAnomalyAgent(RecordingAnomalyAgent):
+        """pod-a is anomalous in its only sample; insights go through an AlertTracker"""
+
+        def __init__(self):
+            super().__init__()
+            self.tracker = AlertTracker(for_cycles=2)
+            self.observed = []
+
+        def detect_anomalies(self, pod_history):
+            results = super().detect_anomalies(pod_history)
+            for pod_name, result in results.items():
+                result['predicted_anomaly'] = int(pod_name == 'pod-a')
+            return results
+
+        def generate_insights(self, anomalies):
+            self.observed.append(sorted(anomalies))
+            return [transition for pod_name, result in anomalies.items()
+                    for transition in self.tracker.observe(pod_name, 'cpu', bool(result['predicted_anomaly']))
+                    if transition.state == FIRING]
+
+    agent = _make_agent(tmp_path, monkeypatch)
+    agent.anomaly_agent = AlertingAnomalyAgent()
+
+    assert agent.process_new_data(_rows('pod-a', 'pod-b')) == []
+    # pod-a stops reporting: its cached result is not replayed as a new cycle
+    for _ in range(3):
+        assert agent.process_new_data(_rows('pod-b')) == []
+    assert agent.anomaly_agent.observed == [['pod-a', 'pod-b'], ['pod-b'], ['pod-b'], ['pod-b']]
+    assert agent.anomaly_agent.tracker.state('pod-a', 'cpu') == 'pending'
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Tests for per-node profiling of state graph executions
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+from graph_profiler import GraphProfiler, profiler_from_env, state_size
+from state_graph import END, StateGraph
+
+
+def _graph(profiler):
+    graph = StateGraph(dict)
+    graph.add_node('collect', lambda state: {'samples': state.get('samples', []) + [list(range(1000))]})
+    graph.add_node('report', lambda state: {'done': True})
+    graph.add_conditional_edges('collect', lambda state: len(state['samples']) >= 2,
+                                {True: 'report', False: 'collect'})
+    graph.add_edge('report', END)
+    graph.set_entry_point('collect')
+    return graph.compile(hooks=[profiler])
+
+
+def test_profiler_counts_nodes_and_router_decisions(tmp_path):
+    profiler = GraphProfiler('test', trace_path=str(tmp_path / 'trace.json'))
+    try:
+        app = _graph(profiler)
+        app.invoke({})
+        app.invoke({})
+    finally:
+        profiler.close()
+
+    counters = profiler.counters
+    assert profiler.runs == 2
+    assert counters['node:collect']['calls'] == 4 and counters['node:report']['calls'] == 2
+    assert counters['router:collect']['decisions'] == {'report': 2, 'collect': 2}
+    assert counters['node:collect']['alloc_bytes'] > 0
+    assert counters['node:collect']['max_state_bytes'] >= state_size({'samples': [list(range(1000))] * 2})
+
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    steps = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    assert len(steps) == 10
+    assert {event['cat'] for event in steps} == {'node', 'router'}
+    assert all(event['dur'] >= 0 and 'cpu_ms' in event['args'] for event in steps)
+    assert 'node:collect' in profiler.summary()
+
+
+def test_profiling_is_opt_in(monkeypatch):
+    monkeypatch.delenv('GRAPH_PROFILE', raising=False)
+    assert profiler_from_env('orchestrator') is None
+
+    monkeypatch.setenv('GRAPH_PROFILE', '1')
+    monkeypatch.setenv('GRAPH_PROFILE_ALLOCATIONS', '0')
+    monkeypatch.setenv('GRAPH_TRACE_DIR', '/tmp')
+    profiler = profiler_from_env('orchestrator')
+    assert profiler.trace_path == os.path.join('/tmp', 'orchestrator.trace.json')
+    assert not profiler.trace_allocations
+
+
+def test_profiler_runs_without_reset_peak(monkeypatch):
+    # Python 3.8: tracemalloc has no reset_peak, so no peak is reported
+    import tracemalloc
+    import graph_profiler
+    monkeypatch.delattr(tracemalloc, 'reset_peak')
+    monkeypatch.setattr(graph_profiler, '_CAN_RESET_PEAK', False)
+
+    profiler = GraphProfiler('test')
+    try:
+        _graph(profiler).invoke({})
+    finally:
+        profiler.close()
+    assert profiler.counters['node:collect']['alloc_bytes'] > 0
+    assert profiler.counters['node:collect']['max_peak_bytes'] == 0
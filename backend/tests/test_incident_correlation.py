@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Tests for grouping pod anomalies into incidents
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+from incident_correlation import IncidentCorrelator, workload_key, workload_of
+
+
+def _anomaly(node='node-1', anomaly_type='crash_loop', probability=0.9, **metrics):
+    return {
+        'prediction': {'anomaly_type': anomaly_type, 'anomaly_probability': probability},
+        'pod_metrics': {'Node Name': node, 'Namespace': 'default', **metrics},
+    }
+
+
+def test_workload_from_pod_name_and_owner_metadata():
+    assert workload_of('web-7d4b9c8f6d-x2k9p') == ('Deployment', 'web')
+    assert workload_of('db-0') == ('StatefulSet', 'db')
+    assert workload_of('node-exporter-4xk2f') == ('Workload', 'node-exporter')
+    assert workload_of('standalone') == ('Pod', 'standalone')
+    assert workload_of('web-abc', {'Owner Kind': 'ReplicaSet', 'Owner Name': 'web-5f6c7d',
+                                   'Pod Template Hash': '5f6c7d'}) == ('Deployment', 'web')
+    assert workload_key('web-7d4b9c8f6d-x2k9p', {'Namespace': 'shop'}) == 'shop/Deployment/web'
+    assert workload_key('web-6c5b4d8f9d-q7z2m') == 'default/Deployment/web'
+
+
+def test_replicas_of_one_deployment_form_one_incident():
+    correlator = IncidentCorrelator(clock=lambda: 0.0)
+    suffixes = [f'x2k{a}{b}' for a in 'bcd' for b in 'fghjklmnpq']
+    anomalies = {f'web-7d4b9c8f6d-{suffix}': _anomaly(node=f'node-{i % 3}', probability=0.5 + i / 100)
+                 for i, suffix in enumerate(suffixes)}
+    anomalies['db-0'] = _anomaly(anomaly_type='resource_exhaustion')
+
+    updates = correlator.correlate(anomalies)
+
+    assert len(updates) == 2
+    web = next(u.incident for u in updates if u.incident.workload == ('Deployment', 'web'))
+    assert len(web.pods) == 30 and web.scope == 'workload'
+    assert web.representative == 'web-7d4b9c8f6d-x2kdq'
+    assert web.node is None  # Spread over several nodes
+
+
+def test_open_incident_is_reused_within_the_window():
+    correlator = IncidentCorrelator(window_seconds=300)
+    first = correlator.correlate({'web-7d4b9c8f6d-bbbbb': _anomaly()}, now=0)[0]
+    second = correlator.correlate({'web-7d4b9c8f6d-ccccc': _anomaly()}, now=200)[0]
+    assert first.new and not second.new
+    assert second.incident is first.incident and second.new_pods == ['web-7d4b9c8f6d-ccccc']
+
+    third = correlator.correlate({'web-7d4b9c8f6d-ddddd': _anomaly()}, now=600)[0]
+    assert third.new and third.incident is not first.incident
+    assert correlator.stats['incidents_closed'] == 1
+
+
+def test_many_workloads_on_one_node_form_a_node_incident():
+    correlator = IncidentCorrelator(node_min_workloads=3, clock=lambda: 0.0)
+    anomalies = {'api-7d4b9c8f6d-bbbbb': _anomaly(node='bad-node'),
+                 'db-0': _anomaly(node='bad-node', anomaly_type='resource_exhaustion'),
+                 'cache-1': _anomaly(node='bad-node', anomaly_type='network_issue'),
+                 'web-7d4b9c8f6d-ccccc': _anomaly(node='good-node')}
+
+    updates = correlator.correlate(anomalies)
+
+    scopes = sorted((u.incident.scope, len(u.incident.pods)) for u in updates)
+    assert scopes == [('node', 3), ('workload', 1)]
+    node_incident = next(u.incident for u in updates if u.incident.scope == 'node')
+    assert node_incident.node == 'bad-node'
+    assert node_incident.to_dict()['anomaly_types'] == ['crash_loop', 'network_issue', 'resource_exhaustion']
+
+
+def test_pods_on_a_flagged_node_form_a_node_incident():
+    correlator = IncidentCorrelator(node_min_workloads=3, clock=lambda: 0.0)
+    anomalies = {'api-7d4b9c8f6d-bbbbb': _anomaly(node='bad-node'),
+                 'db-0': _anomaly(node='bad-node', anomaly_type='resource_exhaustion')}
+
+    updates = correlator.correlate(anomalies, failing_nodes={'bad-node'})
+
+    assert len(updates) == 1 and updates[0].incident.scope == 'node'
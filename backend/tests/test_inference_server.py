@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Tests for the shared inference server and its micro-batcher
+"""
+import os
+import sys
+import threading
+import json
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from inference_server import (InferenceClient, InferenceServer, MicroBatcher, REMOTE_SEQUENCE_MODEL_NAME,
+                              SequenceModelChanged, register_remote_sequence_model)
+from lstm_runtime import ScalerParams
+from model_registry import registry
+from model_versions import ModelVersionStore
+from streaming_inference import (RUNTIME_MODEL_FILE, SequenceModelArtifacts, StreamingInferenceEngine,
+                                 TRAINING_FEATURES, load_sequence_artifacts)
+
+
+def _recording_predictor(batches):
+    def predict(pod_histories):
+        batches.append(len(pod_histories))
+        time.sleep(0.01)
+        return {key: {'predicted_anomaly': 0, 'anomaly_probability': float(history[-1]['CPU Usage (%)']) / 100,
+                      'anomaly_type': 'unknown'}
+                for key, history in pod_histories.items()}
+    return predict
+
+
+def test_concurrent_requests_are_micro_batched():
+    batches = []
+    batcher = MicroBatcher(_recording_predictor(batches), max_batch_size=100, max_wait_ms=50)
+    batcher.start()
+
+    results = {}
+
+    def client(index):
+        # Every client uses the same pod name; results must not leak across clients
+        results[index] = batcher.submit({'pod': [{'CPU Usage (%)': index}]}, timeout=5)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    assert sum(batches) == 10
+    assert len(batches) < 10
+    assert all(abs(results[i]['pod']['anomaly_probability'] - i / 100) < 1e-9 for i in range(10))
+    assert batcher.stats()['requests'] == 10
+
+
+def test_batch_size_bound():
+    batches = []
+    batcher = MicroBatcher(_recording_predictor(batches), max_batch_size=2, max_wait_ms=200)
+    batcher.start()
+    threads = [threading.Thread(target=batcher.submit, args=({f'p{i}': [{'CPU Usage (%)': 1}]},))
+               for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+    assert max(batches) <= 2
+    assert sum(batches) == 6
+
+
+def test_http_round_trip():
+    batches = []
+    server = InferenceServer(port=0, max_wait_ms=1, predict_fn=_recording_predictor(batches)).start()
+    try:
+        client = InferenceClient(server.url, timeout=5)
+        predictions = client.predict_batch({'web-1': [{'CPU Usage (%)': 42}], 'db-0': [{'CPU Usage (%)': 7}]})
+        assert abs(predictions['web-1']['anomaly_probability'] - 0.42) < 1e-9
+        assert abs(predictions['db-0']['anomaly_probability'] - 0.07) < 1e-9
+        assert client.health()['status'] == 'ok'
+        assert client.stats()['batching']['pods'] == 2
+    finally:
+        server.shutdown()
+
+
+class MeanCpuModel:
+    """Scores a window by the mean scaled CPU usage across its timesteps"""
+
+    def predict_on_batch(self, X):
+        return X[:, :, 0].mean(axis=1, keepdims=True)
+
+
+def test_remote_sequence_model_scores_windows_on_the_server():
+    scaler = ScalerParams(np.full(len(TRAINING_FEATURES), 0.01), np.zeros(len(TRAINING_FEATURES)))
+    registry.register('test-lstm', lambda: SequenceModelArtifacts(MeanCpuModel(), scaler, 0.5, 3, 'v1'))
+    server = InferenceServer(port=0, max_wait_ms=1, sequence_model_name='test-lstm').start()
+    try:
+        assert register_remote_sequence_model(server.url) == REMOTE_SEQUENCE_MODEL_NAME
+        engine = StreamingInferenceEngine.from_registry(REMOTE_SEQUENCE_MODEL_NAME)
+        assert engine.seq_length == 3 and engine.bundle.version == 'v1'
+
+        for second, cpu in enumerate([60, 90, 90, 90]):
+            engine.push('web-0', {'Timestamp': f'2024-01-01 00:00:{second:02d}', 'CPU Usage (%)': cpu})
+        result = engine.score()['web-0']
+        assert result['predicted_anomaly'] == 1
+        assert abs(result['anomaly_probability'] - 0.9) < 1e-6
+        assert InferenceClient(server.url).health()['sequence_model_version'] == 'v1'
+    finally:
+        server.shutdown()
+
+
+def test_model_swapped_while_windows_wait_in_the_batch_is_rejected():
+    scaler = ScalerParams(np.full(len(TRAINING_FEATURES), 0.01), np.zeros(len(TRAINING_FEATURES)))
+    versions = ['v1']
+    registry.register('racing-lstm', lambda: SequenceModelArtifacts(MeanCpuModel(), scaler, 0.5, 3, versions[-1]),
+                      revision_fn=lambda: versions[-1])
+    # Requests wait up to 300 ms for a batch: the swap lands in between
+    server = InferenceServer(port=0, max_wait_ms=300, sequence_model_name='racing-lstm').start()
+    try:
+        client = InferenceClient(server.url, timeout=5)
+        assert client.sequence_model()['version'] == 'v1'
+        window = np.zeros((1, 3, len(TRAINING_FEATURES)), dtype=np.float32)
+
+        outcome = []
+
+        def forward():
+            try:
+                outcome.append(client.forward_windows(window, 'v1'))
+            except SequenceModelChanged as e:
+                outcome.append(e)
+
+        thread = threading.Thread(target=forward)
+        thread.start()
+        time.sleep(0.1)
+        versions.append('v2')
+        registry.refresh('racing-lstm')
+        thread.join()
+
+        assert isinstance(outcome[0], SequenceModelChanged)
+        assert len(client.forward_windows(window, 'v2')) == 1
+    finally:
+        server.shutdown()
+
+
+def _write_runtime_model(threshold):
+    """Version writer for a one-layer NumPy runtime model embedding its scaler and threshold"""
+    n = len(TRAINING_FEATURES)
+
+    def write_files(directory):
+        config = {'input_shape': [None, 3, n],
+                  'layers': [{'type': 'Dense', 'activation': 'sigmoid', 'weights': ['kernel', 'bias']}]}
+        np.savez(os.path.join(directory, RUNTIME_MODEL_FILE), config=np.array(json.dumps(config)),
+                 layer0_kernel=np.zeros((n, 1), dtype=np.float32), layer0_bias=np.zeros(1, dtype=np.float32),
+                 scaler_scale=np.full(n, 0.01, dtype=np.float32), scaler_min=np.zeros(n, dtype=np.float32),
+                 threshold=np.array(threshold))
+    return write_files
+
+
+def test_server_swaps_to_a_newly_published_version(tmp_path):
+    store = ModelVersionStore(str(tmp_path))
+    store.publish(store.write_version(_write_runtime_model(0.6), version='v1'))
+    registry.register('versioned-lstm', lambda: load_sequence_artifacts(str(tmp_path)),
+                      revision_fn=store.current_version)
+
+    server = InferenceServer(port=0, max_wait_ms=1, sequence_model_name='versioned-lstm',
+                             model_refresh_interval=0.05).start()
+    try:
+        client = InferenceClient(server.url, timeout=5)
+        assert client.sequence_model()['version'] == 'v1'
+
+        store.publish(store.write_version(_write_runtime_model(0.8), version='v2'))
+        deadline = time.monotonic() + 5
+        while client.health()['sequence_model_version'] != 'v2' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        info = client.sequence_model()
+        assert info['version'] == 'v2' and abs(info['threshold'] - 0.8) < 1e-6
+    finally:
+        registry.stop_watcher()
+        server.shutdown()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Tests for the concurrent, rate-limited LLM enrichment pool
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+from llm_enrichment import LLMEnricher, TokenBucket
+
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    bucket = TokenBucket(rate_per_second=20, burst=3)
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0)
+
+    start = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert time.monotonic() - start >= 0.03
+
+
+def test_calls_run_concurrently_and_results_arrive_by_callback():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    timeouts = []
+
+    def analyze(metrics_str, prediction_str, timeout):
+        timeouts.append(timeout)
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return f"analysis of {metrics_str}"
+
+    results = {}
+    enricher = LLMEnricher(analyze, max_workers=4, requests_per_minute=6000, call_timeout=7.5)
+
+    start = time.monotonic()
+    for i in range(8):
+        enricher.submit(f"insight-{i}", f"pod-{i}", "{}", lambda key, text, error: results.__setitem__(key, text))
+    assert enricher.wait(timeout=5)
+    elapsed = time.monotonic() - start
+    enricher.shutdown()
+
+    assert results == {f"insight-{i}": f"analysis of pod-{i}" for i in range(8)}
+    assert peak[0] == 4
+    assert elapsed < 8 * 0.05  # faster than calling one pod at a time
+    assert set(timeouts) == {7.5}
+    assert enricher.get_stats()['completed'] == 8
+
+
+def test_failures_and_rate_limit_timeouts_reach_callback_as_errors():
+    def analyze(metrics_str, prediction_str, timeout):
+        raise ConnectionError("provider unavailable")
+
+    errors = {}
+    enricher = LLMEnricher(analyze, max_workers=2, requests_per_minute=1, burst=1, queue_timeout=0.05)
+    for key in ("a", "b"):
+        enricher.submit(key, "{}", "{}", lambda key, text, error: errors.__setitem__(key, error))
+    assert enricher.wait(timeout=5)
+    enricher.shutdown()
+
+    assert sorted(type(error).__name__ for error in errors.values()) == ['ConnectionError', 'TimeoutError']
+    stats = enricher.get_stats()
+    assert stats['failed'] == 1 and stats['rate_limited'] == 1 and stats['pending'] == 0
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Tests for the NumPy LSTM runtime and exporter
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from lstm_runtime import NumpyLSTMModel, export_keras_model
+
+
+class FakeLayer:
+    """Stand-in for a Keras layer exposing get_config/get_weights"""
+
+    def __init__(self, config, weights):
+        self.name = self.__class__.__name__.lower()
+        self._config = config
+        self._weights = weights
+
+    def get_config(self):
+        return self._config
+
+    def get_weights(self):
+        return self._weights
+
+
+# The exporter dispatches on the Keras layer class name
+class LSTM(FakeLayer):
+    pass
+
+
+class Dropout(FakeLayer):
+    pass
+
+
+class Dense(FakeLayer):
+    pass
+
+
+class FakeKerasModel:
+    def __init__(self, layers, input_shape):
+        self.layers = layers
+        self.input_shape = input_shape
+
+
+def _reference_lstm(X, kernel, recurrent_kernel, bias, units):
+    """Straightforward per-sample LSTM used as ground truth"""
+    sig = lambda v: 1 / (1 + np.exp(-v))
+    outputs = []
+    for sample in X:
+        h = np.zeros(units)
+        c = np.zeros(units)
+        for x in sample:
+            z = x @ kernel + h @ recurrent_kernel + bias
+            i, f, g, o = sig(z[:units]), sig(z[units:2 * units]), np.tanh(z[2 * units:3 * units]), sig(z[3 * units:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+        outputs.append(h)
+    return np.array(outputs)
+
+
+def test_exported_model_matches_reference(tmp_path):
+    rng = np.random.default_rng(0)
+    units, features, seq_length = 4, 3, 5
+    kernel = rng.normal(size=(features, 4 * units))
+    recurrent_kernel = rng.normal(size=(units, 4 * units))
+    bias = rng.normal(size=4 * units)
+    dense_kernel = rng.normal(size=(units, 1))
+    dense_bias = rng.normal(size=1)
+
+    keras_model = FakeKerasModel([
+        LSTM({'units': units, 'activation': 'tanh', 'recurrent_activation': 'sigmoid',
+              'return_sequences': False}, [kernel, recurrent_kernel, bias]),
+        Dropout({}, []),
+        Dense({'activation': 'sigmoid'}, [dense_kernel, dense_bias]),
+    ], (None, seq_length, features))
+
+    path = export_keras_model(keras_model, str(tmp_path / 'model.npz'), threshold=0.42)
+    runtime = NumpyLSTMModel.load(path)
+
+    X = rng.normal(size=(6, seq_length, features)).astype(np.float32)
+    expected = 1 / (1 + np.exp(-(_reference_lstm(X, kernel, recurrent_kernel, bias, units) @ dense_kernel + dense_bias)))
+
+    assert runtime.input_shape == (None, seq_length, features)
+    assert abs(runtime.threshold - 0.42) < 1e-9
+    np.testing.assert_allclose(runtime.predict(X), expected, rtol=1e-4, atol=1e-5)
+
+
+def _random_model(rng, features, seq_length, units=(5, 3)):
+    layers = []
+    inputs = features
+    for index, layer_units in enumerate(units):
+        layers.append({
+            'type': 'LSTM',
+            'config': {'units': layer_units, 'activation': 'tanh', 'recurrent_activation': 'sigmoid',
+                       'return_sequences': index < len(units) - 1},
+            'kernel': rng.normal(size=(inputs, 4 * layer_units)).astype(np.float32),
+            'recurrent_kernel': rng.normal(size=(layer_units, 4 * layer_units)).astype(np.float32),
+            'bias': rng.normal(size=4 * layer_units).astype(np.float32),
+        })
+        inputs = layer_units
+    layers.append({'type': 'Dense', 'config': {'activation': 'sigmoid'},
+                   'kernel': rng.normal(size=(inputs, 1)).astype(np.float32),
+                   'bias': rng.normal(size=1).astype(np.float32)})
+    return NumpyLSTMModel(layers, (None, seq_length, features))
+
+
+def test_single_steps_continue_the_full_sequence():
+    rng = np.random.default_rng(1)
+    model = _random_model(rng, features=3, seq_length=4)
+    X = rng.normal(size=(2, 7, 3)).astype(np.float32)
+
+    assert model.supports_step
+    outputs, state = model.predict_with_state(X[:, :4])
+    np.testing.assert_allclose(outputs, model.predict_on_batch(X[:, :4]), rtol=1e-5, atol=1e-6)
+
+    for t in range(4, 7):
+        outputs, state = model.step(X[:, t], state)
+    np.testing.assert_allclose(outputs, model.predict_on_batch(X), rtol=1e-5, atol=1e-6)
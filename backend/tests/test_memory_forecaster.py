@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Tests for the streaming time-to-OOM forecaster
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from memory_forecaster import MemoryLeakForecaster, SlidingLinearTrend
+
+
+def _samples(memory, start=datetime(2024, 1, 1), interval=60):
+    return [{'Timestamp': (start + timedelta(seconds=i * interval)).strftime("%Y-%m-%d %H:%M:%S"),
+             'Memory Usage (%)': value} for i, value in enumerate(memory)]
+
+
+def test_sliding_fit_matches_batch_least_squares():
+    rng = np.random.default_rng(0)
+    xs = np.arange(100) * 60.0 + 1e6
+    ys = 0.01 * xs + rng.normal(0, 1, 100)
+    trend = SlidingLinearTrend(window=20)
+    for x, y in zip(xs, ys):
+        trend.add(x, y)
+
+    slope, _, _ = trend.fit()
+    expected_slope, expected_intercept = np.polyfit(xs[-20:], ys[-20:], 1)
+    assert np.isclose(slope, expected_slope)
+    assert np.isclose(trend.predict(xs[-1]), expected_intercept + expected_slope * xs[-1])
+
+
+def test_rebasing_keeps_the_fit_exact():
+    trend = SlidingLinearTrend(window=10)
+    xs = np.arange(40) * 5000.0  # crosses the rebase threshold several times
+    for x in xs:
+        trend.add(x, 2.0 + 0.001 * x)
+    slope, _, r2 = trend.fit()
+    assert np.isclose(slope, 0.001) and np.isclose(r2, 1.0)
+    assert np.isclose(trend.predict(xs[-1]), 2.0 + 0.001 * xs[-1])
+
+
+def test_steady_leak_is_flagged_hours_before_the_limit():
+    forecaster = MemoryLeakForecaster(window=30, min_samples=10, horizon_seconds=6 * 3600)
+    # 40% growing 0.2 points per minute: 45.8% after 30 minutes, limit reached 4.5 hours later
+    forecaster.observe_history('leaky', _samples([40 + 0.2 * i for i in range(30)]))
+
+    forecast = forecaster.forecast('leaky')
+    assert forecast.leaking
+    assert np.isclose(forecast.slope_per_hour, 12.0)
+    assert np.isclose(forecast.time_to_oom_seconds, (100 - 45.8) / 12 * 3600)
+    prediction = forecaster.leak_prediction(forecast)
+    assert prediction['anomaly_type'] == 'memory_leak' and prediction['predicted_anomaly'] == 1
+
+
+def test_flat_or_noisy_memory_is_not_a_leak():
+    rng = np.random.default_rng(1)
+    forecaster = MemoryLeakForecaster()
+    forecaster.observe_history('flat', _samples([50.0] * 30))
+    forecaster.observe_history('noisy', _samples(list(50 + rng.normal(0, 5, 30))))
+    assert not forecaster.forecast('flat').leaking
+    assert not forecaster.forecast('noisy').leaking
+
+
+def test_overlapping_histories_are_deduplicated():
+    forecaster = MemoryLeakForecaster()
+    history = _samples([40 + i for i in range(20)])
+    forecaster.observe_history('pod', history[:15])
+    forecaster.observe_history('pod', history)
+    assert forecaster.forecast('pod').samples == 20
+    forecaster.forget('pod')
+    assert forecaster.forecast('pod') is None
+
+
+def test_restart_or_new_holder_starts_a_new_trend():
+    forecaster = MemoryLeakForecaster(window=30, min_samples=10)
+    history = _samples([40 + 0.2 * i for i in range(30)])
+    for sample in history:
+        sample['Pod Restarts'] = 0
+    forecaster.observe_history('web/0', history[:20], holder='web-abc')
+    assert forecaster.forecast('web/0').samples == 20
+
+    # The container restarts: the memory it leaked is freed
+    history[20]['Pod Restarts'] = 1
+    forecaster.observe_history('web/0', history[:21], holder='web-abc')
+    assert forecaster.forecast('web/0') is None  # a single sample has no trend yet
+
+    # A replacement pod takes over the identity with its own, overlapping samples
+    replacement = _samples([30.0] * 5, start=datetime(2024, 1, 1, 0, 18))
+    forecaster.observe_history('web/0', replacement, holder='web-def')
+    assert forecaster.forecast('web/0').samples == 5
+    assert forecaster.stats['resets'] == 2
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Tests for the lazy, thread-safe model registry
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from model_registry import ModelRegistry
+
+
+class WarmableModel:
+    def __init__(self):
+        self.warmed = False
+
+    def warmup(self):
+        self.warmed = True
+
+
+def test_loader_runs_once_on_first_use_across_threads():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'model'
+
+    registry = ModelRegistry()
+    registry.register('anomaly', loader)
+    assert not registry.is_loaded('anomaly')
+    assert calls == []
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('anomaly'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ['model'] * 8
+    assert registry.stats()['anomaly@default']['load_time_s'] >= 0.05
+
+
+def test_versions_side_by_side_and_warmup():
+    registry = ModelRegistry()
+    registry.register('lstm', lambda: WarmableModel(), version='v1')
+    registry.register('lstm', lambda: WarmableModel(), version='v2', make_default=False)
+
+    assert sorted(registry.versions('lstm')) == ['v1', 'v2']
+    registry.warmup('lstm')
+    assert registry.get('lstm').warmed
+    assert not registry.is_loaded('lstm', 'v2')
+
+    registry.set_default_version('lstm', 'v2')
+    assert registry.get('lstm') is registry.get('lstm', 'v2')
+
+
+def test_refresh_swaps_model_when_revision_changes():
+    revision = {'current': 'v1'}
+    registry = ModelRegistry()
+    registry.register('m', lambda: f"model-{revision['current']}", revision_fn=lambda: revision['current'])
+
+    assert registry.refresh() == []  # nothing loaded yet
+    assert registry.get('m') == 'model-v1'
+    assert registry.refresh() == []
+
+    revision['current'] = 'v2'
+    assert registry.refresh() == ['m@default']
+    assert registry.get('m') == 'model-v2'
+    assert registry.stats()['m@default']['revision'] == 'v2'
+    assert registry.stats()['m@default']['swaps'] == 1
+
+
+def test_refresh_keeps_old_model_when_new_revision_fails():
+    revision = {'current': 'v1'}
+
+    def loader():
+        if revision['current'] == 'broken':
+            raise IOError("truncated archive")
+        return 'model-v1'
+
+    registry = ModelRegistry()
+    registry.register('m', loader, revision_fn=lambda: revision['current'])
+    registry.get('m')
+
+    revision['current'] = 'broken'
+    assert registry.refresh() == []
+    assert registry.get('m') == 'model-v1'
+
+
+def test_missing_model_is_retried_after_backoff():
+    available = {'model': None}
+    registry = ModelRegistry(retry_after=0.05)
+    registry.register('m', lambda: available['model'])
+
+    assert registry.get('m') is None
+    assert not registry.is_loaded('m')
+    available['model'] = 'trained'
+    assert registry.get('m') is None  # still backing off
+
+    time.sleep(0.06)
+    assert registry.get('m') == 'trained' and registry.is_loaded('m')
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Tests for the versioned model artifact store
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from model_versions import ModelVersionStore
+
+
+def _write_model(content):
+    def write_files(directory):
+        with open(os.path.join(directory, 'model.bin'), 'w') as f:
+            f.write(content)
+    return write_files
+
+
+def test_write_publish_and_read_back(tmp_path):
+    store = ModelVersionStore(str(tmp_path))
+    assert store.current_version() is None
+
+    version = store.write_version(_write_model('weights'), metadata={'epochs': 3}, version='v1')
+    assert store.list_versions() == ['v1']
+    assert store.current_version() is None  # written but not yet published
+
+    store.publish(version)
+    assert store.current_version() == 'v1'
+    assert store.metadata('v1')['epochs'] == 3
+    with open(os.path.join(store.version_dir('v1'), 'model.bin')) as f:
+        assert f.read() == 'weights'
+
+
+def test_failed_write_leaves_no_version(tmp_path):
+    store = ModelVersionStore(str(tmp_path))
+
+    def failing(directory):
+        _write_model('partial')(directory)
+        raise RuntimeError("training crashed")
+
+    with pytest.raises(RuntimeError):
+        store.write_version(failing, version='v1')
+    assert store.list_versions() == []
+    assert os.listdir(store.root) == []
+
+
+def test_publish_requires_existing_version_and_prune_keeps_current(tmp_path):
+    store = ModelVersionStore(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        store.publish('missing')
+
+    for version in ['v1', 'v2', 'v3', 'v4']:
+        store.write_version(_write_model(version), version=version)
+    store.publish('v1')
+    store.prune(keep=2)
+    assert store.list_versions() == ['v1', 'v3', 'v4']
+    assert store.current_version() == 'v1'
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Tests for the remediation step of the Kubernetes multi-agent system
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+# The system loads its configuration from the backend package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import k8s_multi_agent_system as system
+
+
+def _cycle_state(*pod_names):
+    return {
+        "messages": [],
+        "monitoring_state": {"pod_metrics": {name: {"Namespace": "shop"} for name in pod_names}},
+        "remediation_state": {"remediation_plan": {name: {"action": "restart_pod"} for name in pod_names}},
+        "pods_with_anomalies": {name: {} for name in pod_names},
+    }
+
+
+def test_pods_of_a_cycle_are_remediated_concurrently(monkeypatch):
+    monkeypatch.setitem(system.API_CONFIG, "test_mode", True)
+    # Each branch waits for the other: a serial loop would break the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    execute = system.execute_pod_remediation
+
+    def branch(task):
+        barrier.wait()
+        return execute(task)
+
+    monkeypatch.setattr(system.remediation_fanout, "branch", branch)
+    state = system.orchestrator_execute_remediation(_cycle_state("web-a", "web-b"))
+
+    results = state["remediation_state"]["remediation_results"]
+    assert set(results) == {"web-a", "web-b"}
+    assert all(result["success"] and result["test_mode"] for result in results.values())
+    assert state["status"] == "remediation_executed" and state["pods_with_anomalies"] == {}
+
+
+def test_main_loop_steps_are_profiled(monkeypatch):
+    from graph_profiler import GraphProfiler
+
+    profiler = GraphProfiler("orchestrator", trace_allocations=False)
+    monkeypatch.setattr(system, "orchestrator_profiler", profiler)
+    state = system.run_step("plan_remediation", lambda state: {**state, "status": "remediation_planned"},
+                            _cycle_state("web-a"))
+    profiler.end_run(state)
+
+    assert state["status"] == "remediation_planned"
+    assert profiler.runs == 1 and profiler.counters["node:plan_remediation"]["calls"] == 1
+    state = system.process_command({**state, "command": "profile"})
+    assert state["messages"][-1].content.startswith("orchestrator: 1 runs")
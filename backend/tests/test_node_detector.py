@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Tests for incremental node-level aggregate detection
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from node_detector import NodeAggregator
+
+
+def _pod(node, ready=1, total=1, reason='', restarts=0, drops=0.0, memory=40.0):
+    return {'Node Name': node, 'Ready Containers': ready, 'Total Containers': total,
+            'Event Reason': reason, 'Pod Restarts': restarts, 'Memory Usage (%)': memory,
+            'Network Receive Packets Dropped (p/s)': drops}
+
+
+def test_updates_replace_previous_contribution():
+    aggregator = NodeAggregator()
+    aggregator.update('a', _pod('n1', ready=0))
+    aggregator.update('b', _pod('n1'))
+    assert aggregator.node_records()['n1']['Ready Ratio'] == 0.5
+
+    aggregator.update('a', _pod('n1', ready=1))
+    records = aggregator.node_records()
+    assert records['n1']['Pods'] == 2 and records['n1']['Ready Ratio'] == 1.0
+
+    # Moving a pod to another node moves its contribution
+    aggregator.update('b', _pod('n2'))
+    records = aggregator.node_records()
+    assert records['n1']['Pods'] == 1 and records['n2']['Pods'] == 1
+
+    aggregator.forget('a')
+    assert set(aggregator.node_records()) == {'n2'}
+
+
+def test_failing_node_is_flagged_once_and_healthy_node_is_not():
+    aggregator = NodeAggregator()
+    aggregator.update_many({
+        'web-1': _pod('bad', ready=0, reason='BackOff'),
+        'api-1': _pod('bad', ready=0, reason='Unhealthy'),
+        'db-0': _pod('bad', drops=5.0),
+        'web-2': _pod('good'),
+        'api-2': _pod('good', drops=1.0),
+    })
+
+    assessments = aggregator.evaluate()
+
+    assert assessments['bad'].is_anomaly and assessments['bad'].anomaly_type == 'node_failure'
+    assert 'widespread_errors' in assessments['bad'].reasons
+    assert assessments['bad'].pods == ['api-1', 'db-0', 'web-1']
+    assert not assessments['good'].is_anomaly
+
+
+def test_node_events_and_restart_rate():
+    aggregator = NodeAggregator(restart_alpha=1.0)
+    aggregator.update('a', _pod('n1', restarts=1))
+    aggregator.update('b', _pod('n2', reason='NodeNotReady'))
+    first = aggregator.evaluate()
+    assert first['n2'].is_anomaly and first['n2'].reasons == ['node_event']
+    assert not first['n1'].is_anomaly
+
+    aggregator.update('a', _pod('n1', restarts=6))
+    second = aggregator.evaluate()
+    assert second['n1'].aggregates['Restart Rate'] == 5
+    assert 'restart_storm' in second['n1'].reasons
+
+
+def test_restart_rate_is_smoothed_across_evaluations():
+    aggregator = NodeAggregator(restart_alpha=0.5)
+    aggregator.update('a', _pod('n1', restarts=0))
+    aggregator.evaluate()
+    aggregator.update('a', _pod('n1', restarts=4))
+    assert aggregator.evaluate()['n1'].aggregates['Restart Rate'] == 2
+    aggregator.update('a', _pod('n1', restarts=4))
+    assert aggregator.evaluate()['n1'].aggregates['Restart Rate'] == 1
+
+
+def test_retain_forgets_pods_missing_from_a_snapshot():
+    aggregator = NodeAggregator()
+    aggregator.update_many({'a': _pod('n1'), 'b': _pod('n2')})
+    aggregator.retain(['b'])
+    assert set(aggregator.node_records()) == {'n2'}
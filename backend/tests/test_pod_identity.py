@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Tests for stable pod identities
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+from pod_identity import PodIdentityMap
+
+
+def _metrics(minute, **extra):
+    return {'Timestamp': f'2024-01-01 00:{minute:02d}:00', 'Namespace': 'shop', **extra}
+
+
+def test_fixed_identities_of_statefulsets_daemonsets_and_bare_pods():
+    identities = PodIdentityMap()
+    assert identities.resolve('db-0', _metrics(0)) == 'shop/StatefulSet/db/0'
+    assert identities.resolve('agent-x2k9p', _metrics(0, **{'Owner Kind': 'DaemonSet', 'Owner Name': 'agent',
+                                                           'Node Name': 'node-a'})) == 'shop/DaemonSet/agent/node-a'
+    assert identities.resolve('debug', _metrics(0)) == 'shop/Pod/debug'
+
+
+def test_replacement_replica_takes_over_the_slot_of_a_silent_one():
+    identities = PodIdentityMap(stale_after=180)
+    first = identities.resolve('web-7d4b9c8f6d-x2k9p', _metrics(0))
+    second = identities.resolve('web-7d4b9c8f6d-q7z2m', _metrics(0))
+    assert first != second and first.startswith('shop/Deployment/web/')
+
+    # x2k9p stops reporting; its replacement continues its identity
+    identities.resolve('web-7d4b9c8f6d-q7z2m', _metrics(10))
+    assert identities.resolve('web-7d4b9c8f6d-b5v8n', _metrics(10)) == first
+    assert identities.current[first] == 'web-7d4b9c8f6d-b5v8n'
+    assert not identities.is_current('web-7d4b9c8f6d-x2k9p')
+
+    # During a rollout both replicas report, so the new one opens a new slot
+    assert identities.resolve('web-6c5b4d8f9d-w2r6t', _metrics(10)) not in (first, second)
+
+
+def test_forget_reports_identities_no_pod_holds():
+    identities = PodIdentityMap(stale_after=180)
+    identity = identities.resolve('web-7d4b9c8f6d-x2k9p', _metrics(0))
+    identities.resolve('web-7d4b9c8f6d-b5v8n', _metrics(10))
+    assert identities.forget('web-7d4b9c8f6d-x2k9p') is None
+    assert identities.current[identity] == 'web-7d4b9c8f6d-b5v8n'
+    assert identities.retain([]) == [identity]
+    assert identities.identities == {} and identities.members == {} and identities.current == {}
+
+
+def test_replacement_seconds_after_its_predecessor_keeps_the_slot():
+    identities = PodIdentityMap(stale_after=180)
+    at = lambda seconds: {'Timestamp': f'2024-01-01 00:{seconds // 60:02d}:{seconds % 60:02d}', 'Namespace': 'shop'}
+    for seconds in range(0, 660, 60):
+        slot = identities.resolve_all({'web-7d4b9c8f6d-x2k9p': at(seconds)})['web-7d4b9c8f6d-x2k9p']
+
+    # x2k9p's last sample was at t=600; its replacement reports at t=640
+    assert identities.resolve_all({'web-7d4b9c8f6d-b5v8n': at(640)}) == {'web-7d4b9c8f6d-b5v8n': slot}
+    assert identities.current[slot] == 'web-7d4b9c8f6d-b5v8n'
+
+    # A replica added while b5v8n keeps reporting opens a new slot
+    added = identities.resolve_all({'web-7d4b9c8f6d-b5v8n': at(700), 'web-7d4b9c8f6d-q7z2m': at(700)})
+    assert added['web-7d4b9c8f6d-q7z2m'] != slot
+
+    # A full snapshot without the old pods frees their slots as well
+    identities.retain(['web-7d4b9c8f6d-b5v8n'])
+    assert identities.resolve('web-7d4b9c8f6d-h4k2s', at(705)) == added['web-7d4b9c8f6d-q7z2m']
+
+
+def test_partial_pass_does_not_take_over_the_slot_of_a_live_replica():
+    identities = PodIdentityMap(stale_after=180)
+    first = identities.resolve_all({'web-7d4b9c8f6d-x2k9p': _metrics(0), 'web-7d4b9c8f6d-q7z2m': _metrics(0)})
+
+    # Scale-up seen by a pass holding only the changed pods
+    tracked = ['web-7d4b9c8f6d-x2k9p', 'web-7d4b9c8f6d-q7z2m', 'web-7d4b9c8f6d-b5v8n']
+    added = identities.resolve_all({'web-7d4b9c8f6d-b5v8n': _metrics(1)}, live_pods=tracked)
+    assert added['web-7d4b9c8f6d-b5v8n'] not in first.values()
+    assert identities.is_current('web-7d4b9c8f6d-x2k9p') and identities.is_current('web-7d4b9c8f6d-q7z2m')
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Tests for TTL and LRU eviction of per-pod state
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+from pod_state import PodStateStore, prune_pod_state
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_evicts_pods_not_seen_recently():
+    clock = FakeClock()
+    store = PodStateStore(ttl=60, max_pods=None, clock=clock)
+    store['pod-a'] = 1
+    clock.now = 30
+    store['pod-b'] = 2
+    clock.now = 70
+
+    assert store.expire() == 1
+    assert dict(store) == {'pod-b': 2}
+    assert store.stats()['evicted_ttl'] == 1
+
+
+def test_touch_and_rewrite_refresh_last_seen():
+    clock = FakeClock()
+    store = PodStateStore(ttl=60, max_pods=None, clock=clock)
+    store['pod-a'] = [1]
+    store['pod-b'] = [1]
+    clock.now = 50
+    store['pod-a'].append(2)
+    store.touch('pod-a')
+    clock.now = 100
+
+    store.expire()
+    assert list(store) == ['pod-a']
+    assert store.last_seen('pod-a') == 50
+
+
+def test_lru_cap_evicts_least_recently_seen_and_notifies():
+    evicted = []
+    store = PodStateStore(ttl=None, max_pods=2, clock=FakeClock())
+    store.on_evict(lambda pod, value, reason: evicted.append((pod, value, reason)))
+    store['pod-a'] = 1
+    store['pod-b'] = 2
+    store['pod-a'] = 3
+    store['pod-c'] = 4
+
+    assert set(store) == {'pod-a', 'pod-c'}
+    assert evicted == [('pod-b', 2, 'lru')]
+    assert store.stats()['evicted_lru'] == 1
+
+
+def test_failing_listener_does_not_block_eviction():
+    store = PodStateStore(ttl=1, max_pods=None, clock=FakeClock())
+    store.on_evict(lambda pod, value, reason: 1 / 0)
+    store['pod-a'] = 1
+    store.clock.now = 5
+    assert store.expire() == 1
+    assert len(store) == 0
+
+
+def test_prune_pod_state_on_plain_dicts():
+    last_seen = {'old': 0.0, 'a': 90.0, 'b': 95.0, 'c': 99.0}
+    metrics = {'old': {}, 'a': {}, 'b': {}, 'c': {}, 'orphan': {}}
+    history = {'old': [], 'a': [], 'c': []}
+
+    expired, overflow = prune_pod_state(last_seen, [metrics, history], ttl=60, max_pods=2, now=100.0)
+
+    assert (expired, overflow) == (1, 1)
+    assert set(last_seen) == {'b', 'c'}
+    assert set(metrics) == {'b', 'c'}
+    assert set(history) == {'c'}
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Tests for running the remediation agent on an event loop
+"""
+import os
+import sys
+import time
+import asyncio
+
+os.environ.setdefault("REMEDIATION_TEST_MODE", "true")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+# The agent imports its helpers from the backend package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import remediation_agent
+
+
+class SlowGraph:
+    """Stands in for the compiled remediation graph: plans after a non-blocking wait"""
+
+    async def ainvoke(self, state):
+        await asyncio.sleep(0.2)
+        return {**state, "messages": [f"plan for {state['pod_info']['name']}"],
+                "remediation_plan": {"action": "restart_pod"}}
+
+
+def _remediate(pod_name):
+    return remediation_agent.aremediate_pod({"anomaly_type": "crash_loop"}, {"name": pod_name}, user_input="yes")
+
+
+def test_concurrent_remediations_overlap(monkeypatch):
+    def execute_remediation(state):
+        time.sleep(0.2)  # blocking Kubernetes calls run on the executor
+        return {**state, "messages": state["messages"] + ["executed"], "approval_status": "complete"}
+
+    monkeypatch.setattr(remediation_agent, "remediation_agent", SlowGraph())
+    monkeypatch.setattr(remediation_agent, "execute_remediation", execute_remediation)
+
+    async def both():
+        return await asyncio.gather(_remediate("web-a"), _remediate("web-b"))
+
+    start = time.perf_counter()
+    first, second = asyncio.run(both())
+    elapsed = time.perf_counter() - start
+
+    assert first[0] == "plan for web-a" and second[0] == "plan for web-b"
+    assert first[-1] == second[-1] == "executed"
+    # Run one after the other, the two pods would take at least 0.8 s
+    assert elapsed < 0.7
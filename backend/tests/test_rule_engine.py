@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+Tests for the vectorized rule engine
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from rule_engine import evaluate_cluster, pod_priorities, rule_predictions, suggest_remediation_actions
+
+
+def _reference_priority(metrics):
+    """Original per-pod calculate_pod_priority"""
+    priority = 0
+    event_reason = metrics.get('Event Reason', '')
+    event_age = metrics.get('Event Age (minutes)', 0)
+    event_count = metrics.get('Event Count', 0)
+    if event_reason in ['OOMKilled', 'BackOff', 'CrashLoopBackOff', 'Failed']:
+        priority += 40
+    elif event_reason in ['Unhealthy', 'NodeNotReady', 'FailedMount']:
+        priority += 30
+    elif event_reason:
+        priority += 20
+    if 0 < event_age <= 5:
+        priority += 15
+    elif 5 < event_age <= 30:
+        priority += 10
+    elif 30 < event_age <= 120:
+        priority += 5
+    if event_count >= 10:
+        priority += 15
+    elif event_count >= 5:
+        priority += 10
+    elif event_count >= 3:
+        priority += 5
+    restarts = metrics.get('Pod Restarts', 0)
+    if restarts >= 10:
+        priority += 20
+    elif restarts >= 5:
+        priority += 15
+    elif restarts >= 2:
+        priority += 10
+    cpu = metrics.get('CPU Usage (%)', 0)
+    memory = metrics.get('Memory Usage (%)', 0)
+    if cpu >= 95 or memory >= 95:
+        priority += 15
+    elif cpu >= 85 or memory >= 85:
+        priority += 10
+    elif cpu >= 75 or memory >= 75:
+        priority += 5
+    rx = metrics.get('Network Receive Packets Dropped (p/s)', 0)
+    tx = metrics.get('Network Transmit Packets Dropped (p/s)', 0)
+    if rx > 10 or tx > 10:
+        priority += 10
+    elif rx > 0 or tx > 0:
+        priority += 5
+    return min(priority, 100)
+
+
+def _reference_pod_anomaly(metrics):
+    """Original per-pod predict_pod_anomaly (type and probability only)"""
+    is_anomaly, anomaly_type, probability = False, 'none', 0.0
+    command = str(metrics.get('Command', ''))
+    if 'exit 1' in command:
+        is_anomaly, anomaly_type, probability = True, 'intentional_crash', 0.99
+    restarts = metrics.get('Pod Restarts', 0)
+    if restarts > 5:
+        is_anomaly = True
+        if anomaly_type == 'none':
+            anomaly_type = 'crash_loop'
+        probability = max(probability, min(0.5 + restarts / 20, 0.95))
+    cpu = metrics.get('CPU Usage (%)', 0)
+    memory = metrics.get('Memory Usage (%)', 0)
+    if cpu > 90 or memory > 90:
+        is_anomaly = True
+        if anomaly_type == 'none':
+            anomaly_type = 'resource_exhaustion'
+        probability = max(probability, min(cpu, memory) / 100)
+    reason = metrics.get('Event Reason', '')
+    if reason in ['BackOff', 'Failed', 'FailedMount', 'FailedScheduling', 'OutOfmemory']:
+        is_anomaly = True
+        if anomaly_type == 'none' or (anomaly_type != 'intentional_crash' and reason == 'BackOff'):
+            anomaly_type = 'pod_failure'
+        probability = max(probability, 0.85)
+    if metrics.get('Network Receive Packets Dropped (p/s)', 0) > 0 or metrics.get('Network Transmit Packets Dropped (p/s)', 0) > 0:
+        is_anomaly = True
+        if anomaly_type == 'none':
+            anomaly_type = 'network_issue'
+        probability = max(probability, 0.70)
+    if metrics.get('Container State', '') == 'terminated' and metrics.get('Exit Code', 0) != 0:
+        is_anomaly = True
+        if anomaly_type == 'none':
+            anomaly_type = 'container_failure'
+        probability = max(probability, 0.90)
+    return is_anomaly, anomaly_type, probability
+
+
+def _random_pods(count, seed=0):
+    rng = np.random.default_rng(seed)
+    reasons = ['', 'BackOff', 'Failed', 'OOMKilled', 'Unhealthy', 'FailedMount', 'Pulled', 'FailedScheduling']
+    pods = []
+    for _ in range(count):
+        pods.append({
+            'CPU Usage (%)': float(rng.choice([10, 76, 86, 91, 96])),
+            'Memory Usage (%)': float(rng.choice([20, 80, 88, 92, 97])),
+            'Pod Restarts': int(rng.integers(0, 14)),
+            'Event Reason': str(rng.choice(reasons)),
+            'Event Age (minutes)': float(rng.choice([0, 3, 20, 60, 500])),
+            'Event Count': int(rng.integers(0, 12)),
+            'Network Receive Packets Dropped (p/s)': float(rng.choice([0, 0, 4, 20])),
+            'Network Transmit Packets Dropped (p/s)': float(rng.choice([0, 0, 12])),
+            'Command': str(rng.choice(['', 'sh -c exit 1', 'nginx'])),
+            'Container State': str(rng.choice(['running', 'terminated'])),
+            'Exit Code': int(rng.choice([0, 1, 137])),
+            'Ready Containers': int(rng.integers(0, 2)),
+            'Total Containers': 1,
+        })
+    return pods
+
+
+def test_cluster_rules_match_per_pod_heuristics():
+    pods = {f'pod-{i}': metrics for i, metrics in enumerate(_random_pods(300))}
+    results = evaluate_cluster(pods)
+
+    for pod_name, metrics in pods.items():
+        is_anomaly, anomaly_type, probability = _reference_pod_anomaly(metrics)
+        result = results[pod_name]
+        assert result['is_anomaly'] == is_anomaly
+        assert result['prediction']['anomaly_type'] == anomaly_type
+        assert abs(result['prediction']['anomaly_probability'] - probability) < 1e-9
+        assert result['priority'] == _reference_priority(metrics)
+
+
+def test_detection_rules_first_match_and_defaults():
+    predictions = rule_predictions([
+        {'Pod Restarts': 8, 'CPU Usage (%)': 99},
+        {'CPU Usage (%)': 99},
+        {'Memory Usage (%)': 93, 'Ready Containers': 1},
+        {'Ready Containers': 1, 'Total Containers': 2},
+        {'Ready Containers': 1},
+    ])
+    assert [p['anomaly_type'] for p in predictions] == [
+        'crash_loop', 'resource_exhaustion', 'oom_risk', 'pod_failure', 'unknown']
+    assert abs(predictions[0]['anomaly_probability'] - 0.9) < 1e-9
+    assert predictions[1]['anomaly_probability'] == 0.95
+    assert predictions[4] == {'predicted_anomaly': 0, 'anomaly_probability': 0.1, 'anomaly_type': 'unknown'}
+
+
+def test_priority_and_remediation_tables():
+    assert list(pod_priorities([{}, {'Event Reason': 'BackOff', 'Pod Restarts': 12, 'CPU Usage (%)': 99,
+                                     'Event Age (minutes)': 1, 'Event Count': 20}])) == [0, 100]
+    actions = suggest_remediation_actions(
+        ['oom_risk', 'crash_loop', 'unknown', 'scaling_issue'],
+        [{}, {'CPU Usage (%)': 90}, {}, {}])
+    assert actions == ['increase_memory', 'increase_cpu', 'restart_pod', 'scale_deployment']
+    assert suggest_remediation_actions(['memory_leak'], [{'Memory Usage (%)': 88}]) == ['restart_pod']
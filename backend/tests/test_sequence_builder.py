@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Tests for the per-pod LSTM sequence builder
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'utils'))
+
+from sequence_builder import build_pod_sequences
+
+
+def _metrics_frame():
+    # Two pods interleaved in time, as the collector writes them
+    rows = []
+    for t in range(6):
+        rows.append({'Pod Name': 'a', 'Timestamp': f'2024-01-01 00:00:{t:02d}', 'cpu': 100 + t, 'anomaly': t % 2})
+        rows.append({'Pod Name': 'b', 'Timestamp': f'2024-01-01 00:00:{t:02d}', 'cpu': 200 + t, 'anomaly': 0})
+    return pd.DataFrame(rows).sample(frac=1, random_state=0)
+
+
+def _reference(df, seq_length):
+    X, y = [], []
+    for _, pod_df in df.sort_values('Timestamp').groupby('Pod Name', sort=False):
+        values = pod_df[['cpu']].to_numpy(dtype=np.float32)
+        labels = pod_df['anomaly'].to_numpy()
+        for i in range(len(values) - seq_length):
+            X.append(values[i:i + seq_length])
+            y.append(labels[i + seq_length])
+    return np.array(X), np.array(y)
+
+
+def test_windows_never_cross_pods():
+    df = _metrics_frame()
+    sequences = build_pod_sequences(df, ['cpu'], seq_length=3)
+    X, y = sequences.to_arrays()
+
+    assert sequences.shape == (6, 3, 1)
+    # Every window is a run of consecutive samples from a single pod
+    assert np.all(np.diff(X[:, :, 0], axis=1) == 1)
+    assert np.all(X[:, 0, 0] // 100 == X[:, -1, 0] // 100)
+
+    X_ref, y_ref = _reference(df, 3)
+    order = np.lexsort((X[:, 0, 0],))
+    ref_order = np.lexsort((X_ref[:, 0, 0],))
+    np.testing.assert_array_equal(X[order], X_ref[ref_order])
+    np.testing.assert_array_equal(y[order], y_ref[ref_order])
+
+
+def test_split_and_batches_cover_every_window_once():
+    sequences = build_pod_sequences(_metrics_frame(), ['cpu'], seq_length=2)
+    train, test = sequences.split(test_size=0.25, seed=1)
+    assert len(train) + len(test) == len(sequences)
+    assert set(train.starts).isdisjoint(test.starts)
+
+    seen = np.concatenate([X[:, 0, 0] for X, _ in train.iter_batches(batch_size=3, shuffle=True, seed=0)])
+    assert sorted(seen) == sorted(train.to_arrays()[0][:, 0, 0])
+
+
+def test_frame_shorter_than_a_window_gives_an_empty_set():
+    sequences = build_pod_sequences(_metrics_frame().head(3), ['cpu'], seq_length=10)
+    assert len(sequences) == 0 and sequences.shape == (0, 10, 1)
+    X, y = sequences.to_arrays()
+    assert X.shape == (0, 10, 1) and y.shape == (0,)
+    train, test = sequences.split(test_size=0.5, seed=0)
+    assert len(train) == len(test) == 0
+    assert list(train.iter_batches()) == []
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Tests for the bundled state graph runtime
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'agents'))
+
+from state_graph import END, Append, MessageBuffer, Patch, StateGraph, StateStore, load_graph_runtime
+
+
+def test_message_buffer_keeps_the_most_recent_messages():
+    buffer = MessageBuffer(range(3), maxlen=4)
+    buffer.append(3)
+    buffer += [4, 5]
+    assert buffer == [2, 3, 4, 5] and buffer.dropped == 2
+    assert buffer + [6] == [2, 3, 4, 5, 6]
+
+
+def test_store_shares_unchanged_values_and_merges_partial_updates():
+    history = {'web-0': [{'CPU Usage (%)': 10}]}
+    store = StateStore({'messages': ['start'], 'pod_history': history,
+                        'monitoring_state': {'status': 'idle', 'pods': 3}}, max_messages=3)
+    before = store.state
+
+    after = store.merge({'status': 'ok', 'monitoring_state': Patch(status='done'), 'messages': Append(['a', 'b'])})
+    assert after is not before and before.get('status') is None
+    assert after['pod_history'] is history
+    assert after['monitoring_state'] == {'status': 'done', 'pods': 3}
+    assert before['monitoring_state'] == {'status': 'idle', 'pods': 3}
+    assert after['messages'] == ['start', 'a', 'b']
+
+    # `messages + [new]` appends to the buffer; a different list replaces it
+    buffer = after['messages']
+    assert store.merge({**after, 'messages': after['messages'] + ['c']})['messages'] is buffer
+    assert buffer == ['a', 'b', 'c']
+    assert store.merge({'messages': []})['messages'] == []
+
+
+def test_graph_runs_partial_update_nodes_with_a_path_map():
+    graph = StateGraph(dict)
+    graph.add_node('count', lambda state: {'count': state.get('count', 0) + 1,
+                                           'messages': Append([f"count {state.get('count', 0) + 1}"])})
+    graph.add_node('finish', lambda state: {**state, 'done': True})
+    graph.add_conditional_edges('count', lambda state: state['count'] >= 5, {True: 'finish', False: 'count'})
+    graph.add_edge('finish', END)
+    graph.set_entry_point('count')
+
+    app = graph.compile(max_messages=2)
+    state = app.invoke({'messages': []})
+    assert state['count'] == 5 and state['done']
+    assert state['messages'] == ['count 4', 'count 5']
+    assert app.last_store.stats['merges'] == 7
+
+
+def test_builtin_runtime_can_be_selected():
+    assert load_graph_runtime('builtin') == (StateGraph, END)
+
+
+def test_fanout_maps_a_branch_per_item_and_joins_the_results():
+    calls = []
+
+    def branch(item):
+        calls.append(item)
+        if item == 'bad':
+            raise RuntimeError('boom')
+        return item.upper()
+
+    graph = StateGraph(dict)
+    graph.add_node('join', lambda state: {'joined': sorted(state['branch_results'].values()),
+                                          'failed': list(state['branch_results_errors'])})
+    graph.add_fanout('join', branch, lambda state: {pod: pod for pod in state['pods']}, 'branch_results',
+                     max_workers=4)
+    graph.add_edge('join', END)
+    graph.set_entry_point('join')
+
+    app = graph.compile()
+    state = app.invoke({'pods': ['web-0', 'web-1', 'bad']})
+    app.close()
+    assert sorted(calls) == ['bad', 'web-0', 'web-1']
+    assert state['joined'] == ['WEB-0', 'WEB-1'] and state['failed'] == ['bad']
+
+
+def test_fanout_on_a_process_pool():
+    graph = StateGraph(dict)
+    graph.add_node('join', lambda state: {'total': sum(state['results'].values())})
+    graph.add_fanout('join', abs, lambda state: state['values'], 'results', executor='process', max_workers=2)
+    graph.set_entry_point('join')
+
+    app = graph.compile()
+    try:
+        assert app.invoke({'values': [-1, -2, 3]})['total'] == 6
+    finally:
+        app.close()
+
+
+def _mixed_graph():
+    async def fetch(state):
+        await asyncio.sleep(0)
+        return {'fetched': state.get('fetched', 0) + 1}
+
+    async def enough(state):
+        return state['fetched'] >= 3
+
+    graph = StateGraph(dict)
+    graph.add_node('fetch', fetch)
+    graph.add_node('report', lambda state: {'report': f"fetched {state['fetched']}"})
+    graph.add_conditional_edges('fetch', enough, {True: 'report', False: 'fetch'})
+    graph.add_edge('report', END)
+    graph.set_entry_point('fetch')
+    return graph.compile()
+
+
+def test_async_nodes_and_routers_run_in_either_mode():
+    app = _mixed_graph()
+    assert app.is_async
+    assert asyncio.run(app.ainvoke({}))['report'] == 'fetched 3'
+    assert app.invoke({})['report'] == 'fetched 3'
+
+
+def test_async_fanout_branches_run_concurrently():
+    running, peak = [0], [0]
+
+    async def branch(item):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return item * 2
+
+    graph = StateGraph(dict)
+    graph.add_node('join', lambda state: {'total': sum(state['doubled'].values())})
+    graph.add_fanout('join', branch, lambda state: range(6), 'doubled', max_workers=4)
+    graph.set_entry_point('join')
+
+    assert asyncio.run(graph.compile().ainvoke({}))['total'] == 30
+    assert peak[0] == 4
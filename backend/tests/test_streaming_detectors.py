@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Tests for the streaming statistical prefilter
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from streaming_detectors import EWMAResidual, RollingMAD, SeasonalProfile, StatisticalPrefilter, WelfordZScore
+
+
+def _sample(ts, cpu, memory=40.0, restarts=0):
+    return {'Timestamp': f'2024-01-01 00:{ts // 60:02d}:{ts % 60:02d}', 'CPU Usage (%)': cpu,
+            'Memory Usage (%)': memory, 'Memory Usage (MB)': memory * 10, 'Pod Restarts': restarts}
+
+
+def test_welford_matches_batch_statistics():
+    rng = np.random.default_rng(0)
+    values = rng.normal(50, 5, size=(200, 2))
+    detector = WelfordZScore(2)
+    for row in values:
+        detector.update(row)
+    np.testing.assert_allclose(detector.mean, values.mean(axis=0))
+    np.testing.assert_allclose(detector.score(values.mean(axis=0) + values.std(axis=0), 0.0, 1e-9), [1.0, 1.0])
+
+
+def test_detectors_flag_a_spike_but_not_noise():
+    rng = np.random.default_rng(1)
+    detectors = [WelfordZScore(1), RollingMAD(1, window=20), EWMAResidual(1, alpha=0.1)]
+    for value in rng.normal(50, 1, size=100):
+        for detector in detectors:
+            detector.update(np.array([value]))
+    for detector in detectors:
+        assert detector.score(np.array([50.5]), 0.0, 1e-3)[0] < 3
+        assert detector.score(np.array([80.0]), 0.0, 1e-3)[0] > 5
+
+
+def test_prefilter_escalates_only_deviating_pods():
+    rng = np.random.default_rng(2)
+    prefilter = StatisticalPrefilter(warmup_samples=10, hold_screens=1)
+    histories = {'steady': [], 'spiky': [], 'restarting': []}
+
+    for ts in range(40):
+        for pod_name, history in histories.items():
+            history.append(_sample(ts, float(rng.normal(30, 1))))
+        screen = prefilter.screen(histories)
+
+    assert not any(result.escalate for result in screen.values())
+
+    histories['spiky'].append(_sample(40, 75.0))
+    histories['restarting'].append(_sample(40, 30.0, restarts=1))
+    histories['steady'].append(_sample(40, float(rng.normal(30, 1))))
+    screen = prefilter.screen(histories)
+
+    assert not screen['steady'].escalate
+    assert screen['spiky'].escalate
+    assert screen['restarting'].escalate
+    assert any(reason.endswith('Pod Restarts') for reason in screen['restarting'].reasons)
+
+
+def test_prefilter_escalates_rule_matches_and_warmup():
+    prefilter = StatisticalPrefilter(warmup_samples=5)
+    screen = prefilter.screen({'new': [_sample(0, 20.0)],
+                               'backoff': [{**_sample(0, 20.0), 'Event Reason': 'BackOff'}]})
+    assert screen['new'].reasons == ['warmup']
+    assert 'rule:pod_failure' in screen['backoff'].reasons
+
+
+def test_seasonal_profile_keeps_one_baseline_per_hour():
+    profile = SeasonalProfile(1)
+    for day in range(20):
+        profile.update(np.array([20.0 + day % 2]), 3)
+        profile.update(np.array([80.0 + day % 2]), 15)
+    assert profile.count[3] == profile.count[15] == 20
+    assert profile.score(np.array([80.5]), 15, 0.0, 1e-3)[0] < 2
+    assert profile.score(np.array([80.5]), 3, 0.0, 1e-3)[0] > 50
+
+
+def test_replicas_share_a_workload_baseline_that_survives_restarts():
+    rng = np.random.default_rng(3)
+    prefilter = StatisticalPrefilter(warmup_samples=10, hold_screens=0,
+                                     baseline_key=lambda pod_name, metrics: pod_name.rsplit('-', 1)[0])
+    histories = {f'web-{replica}': [] for replica in 'abc'}
+    for ts in range(30):
+        for history in histories.values():
+            history.append(_sample(ts, float(rng.normal(30, 1))))
+        prefilter.screen(histories)
+    assert list(prefilter.baselines) == ['web']
+    assert prefilter.baselines['web'].pods == {'web-a', 'web-b', 'web-c'}
+
+    # A replacement pod is scored against the warm workload baseline right away
+    prefilter.forget('web-a')
+    histories = {'web-d': [_sample(30, 30.5)], 'web-e': [_sample(30, 90.0)]}
+    screen = prefilter.screen(histories)
+    assert not screen['web-d'].escalate
+    assert screen['web-e'].escalate and 'warmup' not in screen['web-e'].reasons
+
+    for pod_name in ['web-b', 'web-c', 'web-d', 'web-e']:
+        prefilter.forget(pod_name)
+    assert prefilter.baselines == {} and prefilter.pods == {}
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Tests for the windowed streaming inference engine
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from streaming_inference import PodWindow, StreamingInferenceEngine, TRAINING_FEATURES
+
+
+class FakeScaler:
+    """MinMax-style scaler mapping metric values onto [0, 1] by dividing by 100"""
+
+    scale_ = np.full(len(TRAINING_FEATURES), 0.01)
+    min_ = np.zeros(len(TRAINING_FEATURES))
+
+
+class MeanCpuModel:
+    """Scores a window by the mean scaled CPU usage across its timesteps"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_on_batch(self, X):
+        self.batches.append(X.copy())
+        return X[:, :, 0].mean(axis=1, keepdims=True)
+
+
+def _sample(ts, cpu):
+    return {'Timestamp': f'2024-01-01 00:00:{ts:02d}', 'CPU Usage (%)': cpu}
+
+
+def test_pod_window_keeps_last_samples_in_order():
+    window = PodWindow(3, 1)
+    for value in range(1, 6):
+        window.push(np.array([value]))
+    assert window.ready
+    assert list(window.view()[:, 0]) == [3, 4, 5]
+
+
+def test_engine_scales_and_scores_only_full_windows():
+    model = MeanCpuModel()
+    engine = StreamingInferenceEngine(model, scaler=FakeScaler(), threshold=0.5, seq_length=3)
+
+    assert engine.update('pod-a', _sample(1, 90)) is None
+    assert engine.update('pod-a', _sample(2, 90)) is None
+    result = engine.update('pod-a', _sample(3, 90))
+
+    assert result['predicted_anomaly'] == 1
+    assert abs(result['anomaly_probability'] - 0.9) < 1e-6
+    assert model.batches[-1].shape == (1, 3, len(TRAINING_FEATURES))
+
+
+def test_push_history_only_appends_new_samples():
+    engine = StreamingInferenceEngine(MeanCpuModel(), scaler=FakeScaler(), seq_length=3)
+    history = [_sample(i, 10 * i) for i in range(1, 5)]
+
+    assert engine.push_history('pod-a', history) == 3
+    assert engine.push_history('pod-a', history) == 0
+
+    history.append(_sample(5, 50))
+    assert engine.push_history('pod-a', history) == 1
+    assert list(np.round(engine.windows['pod-a'].view()[:, 0], 2)) == [0.3, 0.4, 0.5]
+
+
+def test_push_history_without_timestamps_only_appends_new_samples():
+    engine = StreamingInferenceEngine(MeanCpuModel(), scaler=FakeScaler(), seq_length=3)
+    history = [{'CPU Usage (%)': 10 * i} for i in range(1, 5)]
+
+    assert engine.push_history('pod-a', history) == 3
+    assert engine.push_history('pod-a', history) == 0
+
+    # Rolling history: the oldest sample drops out as a new one arrives
+    history = history[1:] + [{'CPU Usage (%)': 50}]
+    assert engine.push_history('pod-a', history) == 1
+    assert list(np.round(engine.windows['pod-a'].view()[:, 0], 2)) == [0.3, 0.4, 0.5]
+
+    # A history rebuilt from copies: only the samples beyond its last length are new
+    history = [dict(sample) for sample in history] + [{'CPU Usage (%)': 60}]
+    assert engine.push_history('pod-a', history) == 1
+    assert list(np.round(engine.windows['pod-a'].view()[:, 0], 2)) == [0.4, 0.5, 0.6]
+
+
+def test_stateful_mode_steps_and_resyncs():
+    from test_lstm_runtime import _random_model
+
+    rng = np.random.default_rng(2)
+    features = len(TRAINING_FEATURES)
+    model = _random_model(rng, features, seq_length=3)
+    engine = StreamingInferenceEngine(model, scaler=FakeScaler(), seq_length=3,
+                                      stateful=True, resync_interval=4)
+    samples = [_sample(i, float(rng.uniform(0, 100))) for i in range(1, 10)]
+    rows = np.array([[s['CPU Usage (%)'] * 0.01] + [0.0] * (features - 1) for s in samples], dtype=np.float32)
+
+    for i in range(3):
+        engine.push('pod-a', samples[i])
+    first = engine.score()['pod-a']['anomaly_probability']
+    np.testing.assert_allclose(first, model.predict_on_batch(rows[None, :3])[0, 0], rtol=1e-5)
+
+    # Single steps carry the state beyond the window until the resync interval
+    for i in range(3, 6):
+        engine.push('pod-a', samples[i])
+        stepped = engine.score()['pod-a']['anomaly_probability']
+        np.testing.assert_allclose(stepped, model.predict_on_batch(rows[None, :i + 1])[0, 0], rtol=1e-4)
+
+    # The fourth step is due for resync and is rescored from the window alone
+    engine.push('pod-a', samples[6])
+    resynced = engine.score()['pod-a']['anomaly_probability']
+    np.testing.assert_allclose(resynced, model.predict_on_batch(rows[None, 4:7])[0, 0], rtol=1e-5)
+    assert engine.recurrent_states['pod-a'].since_sync == 0
+
+
+def test_swap_bundle_rescales_windows_for_new_scaler():
+    from streaming_inference import SequenceModelArtifacts
+
+    engine = StreamingInferenceEngine(MeanCpuModel(), scaler=FakeScaler(), threshold=0.5, seq_length=3)
+    for i in range(1, 4):
+        engine.update('pod-a', _sample(i, 40))
+
+    class HalfScaler:
+        scale_ = np.full(len(TRAINING_FEATURES), 0.02)
+        min_ = np.zeros(len(TRAINING_FEATURES))
+
+    new_model = MeanCpuModel()
+    engine.swap_bundle(SequenceModelArtifacts(new_model, HalfScaler(), 0.9, 3, 'v2'))
+
+    # Raw CPU 40 is now scaled to 0.8, below the new threshold
+    results = engine.score()
+    assert abs(results['pod-a']['anomaly_probability'] - 0.8) < 1e-6
+    assert results['pod-a']['predicted_anomaly'] == 0
+    assert len(new_model.batches) == 1
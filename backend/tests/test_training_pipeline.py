@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Tests for the out-of-core training data pipeline
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'utils'))
+
+from sequence_builder import build_pod_sequences
+from training_pipeline import fit_scaler, iter_training_batches
+
+
+class IncrementalMinMax:
+    """partial_fit/transform subset of sklearn's MinMaxScaler"""
+
+    def __init__(self):
+        self.data_min_ = None
+        self.data_max_ = None
+
+    def partial_fit(self, X):
+        lo, hi = X.min(axis=0), X.max(axis=0)
+        self.data_min_ = lo if self.data_min_ is None else np.minimum(self.data_min_, lo)
+        self.data_max_ = hi if self.data_max_ is None else np.maximum(self.data_max_, hi)
+        return self
+
+    def transform(self, X):
+        return (X - self.data_min_) / np.where(self.data_max_ > self.data_min_, self.data_max_ - self.data_min_, 1)
+
+
+def _write_metrics(path, pods=4, steps=25):
+    rng = np.random.default_rng(0)
+    rows = []
+    for t in range(steps):
+        for p in range(pods):
+            rows.append({'Pod Name': f'pod-{p}', 'Timestamp': f'2024-01-01 00:{t // 60:02d}:{t % 60:02d}',
+                         'cpu': float(rng.uniform(0, 100)), 'mem': float(rng.uniform(0, 100)),
+                         'label': int(rng.integers(0, 2))})
+    df = pd.DataFrame(rows)
+    df.to_csv(path, index=False)
+    return df
+
+
+def _label(chunk):
+    return chunk['label'].to_numpy()
+
+
+def _window_keys(X, y):
+    return sorted(tuple(np.round(window.ravel(), 5)) + (int(label),) for window, label in zip(X, y))
+
+
+def test_streamed_windows_match_in_memory_builder(tmp_path):
+    path = str(tmp_path / 'metrics.csv')
+    df = _write_metrics(path)
+
+    scaler = fit_scaler(path, ['cpu', 'mem'], chunksize=7, scaler=IncrementalMinMax())
+    np.testing.assert_allclose(scaler.data_max_, df[['cpu', 'mem']].max().to_numpy())
+
+    batches = list(iter_training_batches(path, scaler, ['cpu', 'mem'], seq_length=4, batch_size=5,
+                                         chunksize=7, label_fn=_label, label_columns=['label']))
+    X = np.concatenate([b[0] for b in batches])
+    y = np.concatenate([b[1] for b in batches])
+    assert all(len(b[0]) == 5 for b in batches[:-1])
+
+    df[['cpu', 'mem']] = scaler.transform(df[['cpu', 'mem']].to_numpy())
+    X_ref, y_ref = build_pod_sequences(df, ['cpu', 'mem'], label_column='label', seq_length=4).to_arrays()
+    assert X.shape == X_ref.shape
+    assert _window_keys(X, y) == _window_keys(X_ref, y_ref)
+
+
+def test_validation_split_holds_out_whole_pods(tmp_path):
+    path = str(tmp_path / 'metrics.csv')
+    _write_metrics(path, pods=20, steps=6)
+    scaler = fit_scaler(path, ['cpu', 'mem'], scaler=IncrementalMinMax())
+    options = dict(seq_length=3, batch_size=8, label_fn=_label, label_columns=['label'],
+                   validation_fraction=0.3, shuffle_buffer=16, seed=0)
+
+    total = sum(len(X) for X, _ in iter_training_batches(path, scaler, ['cpu', 'mem'], **options))
+    train = sum(len(X) for X, _ in iter_training_batches(path, scaler, ['cpu', 'mem'], split='train', **options))
+    validation = sum(len(X) for X, _ in iter_training_batches(path, scaler, ['cpu', 'mem'], split='validation', **options))
+
+    assert total == 20 * 3
+    assert train + validation == total
+    assert train % 3 == 0 and validation % 3 == 0
+
+    # A test split comes out of the training pods only
+    held_out = dict(options, test_fraction=0.3)
+    splits = {split: sum(len(X) for X, _ in iter_training_batches(path, scaler, ['cpu', 'mem'], split=split, **held_out))
+              for split in ('train', 'validation', 'test')}
+    assert splits['validation'] == validation and splits['test'] > 0
+    assert sum(splits.values()) == total
+
+
+def test_since_keeps_only_recent_samples(tmp_path):
+    path = str(tmp_path / 'metrics.csv')
+    _write_metrics(path, pods=2, steps=20)
+    scaler = fit_scaler(path, ['cpu', 'mem'], scaler=IncrementalMinMax())
+
+    batches = list(iter_training_batches(path, scaler, ['cpu', 'mem'], seq_length=3, batch_size=100,
+                                         chunksize=9, label_fn=_label, label_columns=['label'],
+                                         since='2024-01-01 00:00:10'))
+    # 10 recent samples per pod leave 7 windows each
+    assert sum(len(y) for _, y in batches) == 14